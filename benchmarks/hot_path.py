@@ -0,0 +1,414 @@
+"""Benchmarks of the request hot path of the wrappers.
+
+Every benchmark runs against local stubs, so no request leaves the process:
+
+- `parse_call_kwargs`, `parse_response`, `api_call` and `async_api_call` measure the
+  pure-Python overhead per call in microseconds against a null transport that
+  answers every request with the same prebuilt response.
+- `api_call_with_transport` and `async_api_call_with_transport` measure the same calls
+  made through a client the wrapper was given an `httpx.MockTransport` for.
+- `api_call_instrumented` measures the same call with an `InMemorySink` recording it.
+- `throughput` measures calls per second at increasing levels of concurrency, with
+  threads for the synchronous wrapper and tasks for the asynchronous one.
+- `request_reference` measures the generation of the reference of a request.
+- `api_response_memory` measures the memory held by each `APIResponse`.
+- `pagination` walks the virtual accounts of a `KudaSimulator` page by page.
+
+Results are written as JSON so they can be compared between releases:
+
+    python -m benchmarks.hot_path --output results.json
+    python -m benchmarks.hot_path --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+from unittest.mock import patch
+
+import httpx
+
+from pykuda2.base import BaseAPIWrapper, BaseAsyncAPIWrapper, __version__
+from pykuda2.instrumentation import InMemorySink, Instrumentation
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import APIResponse, ServiceType
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+DEFAULT_CONCURRENCY_LEVELS = (1, 10, 100, 1000)
+
+# Metrics where a higher value is an improvement. For every other metric, lower is better.
+HIGHER_IS_BETTER = ("calls_per_second", "items_per_second", "pages_per_second")
+
+_RESPONSE_BODY = {
+    "status": True,
+    "message": "Request successful.",
+    "data": {"accountNumber": "2500000001", "trackingReference": "ref-1"},
+}
+_TOKEN = "benchmark-token"
+
+
+def _stub_response(**kwargs) -> httpx.Response:
+    return httpx.Response(200, json=_RESPONSE_BODY)
+
+
+async def _async_stub_response(self, **kwargs) -> httpx.Response:
+    return _stub_response()
+
+
+@contextmanager
+def null_transport():
+    """Answers every request made by the wrappers with the same prebuilt response."""
+    with patch("httpx.post", _stub_response), patch(
+        "httpx.AsyncClient.post", _async_stub_response
+    ):
+        yield
+
+
+def _null_handler(request: httpx.Request) -> httpx.Response:
+    return _stub_response()
+
+
+def _wrappers():
+    wrapper = BaseAPIWrapper(email="benchmark@example.com", api_key="key")
+    async_wrapper = BaseAsyncAPIWrapper(email="benchmark@example.com", api_key="key")
+    wrapper._saved_token = async_wrapper._saved_token = _TOKEN
+    return wrapper, async_wrapper
+
+
+def _per_call(func, iterations: int) -> dict:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started_at
+    return {"iterations": iterations, "us_per_call": elapsed / iterations * 1e6}
+
+
+async def _async_per_call(func, iterations: int) -> dict:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    elapsed = time.perf_counter() - started_at
+    return {"iterations": iterations, "us_per_call": elapsed / iterations * 1e6}
+
+
+def bench_parse_call_kwargs(iterations: int) -> dict:
+    wrapper, _ = _wrappers()
+    data = {"trackingReference": "ref-1"}
+    return _per_call(
+        lambda: wrapper._parse_call_kwargs(
+            service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE, data=data
+        ),
+        iterations,
+    )
+
+
+def bench_request_reference(iterations: int) -> dict:
+    wrapper, _ = _wrappers()
+    return _per_call(wrapper._generate_request_reference, iterations)
+
+
+def bench_parse_response(iterations: int) -> dict:
+    wrapper, _ = _wrappers()
+    response = _stub_response()
+    return _per_call(lambda: wrapper._parse_response(response), iterations)
+
+
+def bench_api_call(iterations: int) -> dict:
+    wrapper, _ = _wrappers()
+    data = {"trackingReference": "ref-1"}
+    with null_transport():
+        return _per_call(
+            lambda: wrapper._api_call(
+                service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE, data=data
+            ),
+            iterations,
+        )
+
+
+def bench_async_api_call(iterations: int) -> dict:
+    _, async_wrapper = _wrappers()
+    data = {"trackingReference": "ref-1"}
+
+    async def run():
+        return await _async_per_call(
+            lambda: async_wrapper._api_call(
+                service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE, data=data
+            ),
+            iterations,
+        )
+
+    with null_transport():
+        return asyncio.run(run())
+
+
+def bench_api_call_with_transport(
+    iterations: int, instrumentation: Optional[Instrumentation] = None
+) -> dict:
+    data = {"trackingReference": "ref-1"}
+    with BaseAPIWrapper(
+        email="benchmark@example.com",
+        api_key="key",
+        transport=httpx.MockTransport(_null_handler),
+        instrumentation=instrumentation,
+    ) as wrapper:
+        wrapper._saved_token = _TOKEN
+        return _per_call(
+            lambda: wrapper._api_call(
+                service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE, data=data
+            ),
+            iterations,
+        )
+
+
+def bench_async_api_call_with_transport(iterations: int) -> dict:
+    data = {"trackingReference": "ref-1"}
+
+    async def run():
+        async with BaseAsyncAPIWrapper(
+            email="benchmark@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(_null_handler),
+        ) as async_wrapper:
+            async_wrapper._saved_token = _TOKEN
+            return await _async_per_call(
+                lambda: async_wrapper._api_call(
+                    service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE,
+                    data=data,
+                ),
+                iterations,
+            )
+
+    return asyncio.run(run())
+
+
+def bench_throughput(
+    iterations: int, async_iterations: int, concurrency_levels: Sequence[int]
+) -> dict:
+    wrapper, async_wrapper = _wrappers()
+    data = {"trackingReference": "ref-1"}
+
+    def call(_):
+        return wrapper._api_call(
+            service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE, data=data
+        )
+
+    async def run_async(concurrency: int) -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def async_call():
+            async with semaphore:
+                await async_wrapper._api_call(
+                    service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE,
+                    data=data,
+                )
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(async_call() for _ in range(async_iterations)))
+        return time.perf_counter() - started_at
+
+    results = {"sync": {}, "async": {}}
+    with null_transport():
+        for concurrency in concurrency_levels:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                started_at = time.perf_counter()
+                list(executor.map(call, range(iterations)))
+                elapsed = time.perf_counter() - started_at
+            results["sync"][str(concurrency)] = {
+                "calls": iterations,
+                "calls_per_second": iterations / elapsed,
+            }
+            elapsed = asyncio.run(run_async(concurrency))
+            results["async"][str(concurrency)] = {
+                "calls": async_iterations,
+                "calls_per_second": async_iterations / elapsed,
+            }
+    return results
+
+
+def bench_api_response_memory(iterations: int) -> dict:
+    wrapper, _ = _wrappers()
+    response = _stub_response()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        responses = [wrapper._parse_response(response) for _ in range(iterations)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert all(isinstance(item, APIResponse) for item in responses)
+    return {"instances": iterations, "bytes_per_instance": allocated / iterations}
+
+
+def bench_pagination(accounts: int, page_size: int) -> dict:
+    simulator = KudaSimulator()
+    for index in range(accounts):
+        simulator.add_virtual_account(f"ref-{index}", email=f"{index}@example.com")
+    with Account(
+        email="benchmark@example.com",
+        api_key="key",
+        transport=httpx.MockTransport(simulator.handle),
+    ) as wrapper:
+        wrapper._saved_token = simulator.token
+        items, pages = 0, 0
+        started_at = time.perf_counter()
+        while True:
+            pages += 1
+            response = wrapper.get_virtual_accounts(
+                page_size=page_size, page_number=pages
+            )
+            items += len(response.data["accounts"])
+            if len(response.data["accounts"]) < page_size:
+                break
+        elapsed = time.perf_counter() - started_at
+    return {
+        "items": items,
+        "pages": pages,
+        "items_per_second": items / elapsed,
+        "pages_per_second": pages / elapsed,
+    }
+
+
+def run_benchmarks(
+    iterations: int = 10_000,
+    async_iterations: int = 500,
+    concurrency_levels: Sequence[int] = DEFAULT_CONCURRENCY_LEVELS,
+    pagination_accounts: int = 10_000,
+    pagination_page_size: int = 100,
+) -> dict:
+    """Runs every benchmark and returns the results as a JSON serializable dict.
+
+    Args:
+        iterations: The number of calls made by each benchmark.
+        async_iterations: The number of calls made by the benchmarks of the asynchronous
+            wrapper, which opens a new client for every call.
+        concurrency_levels: The levels of concurrency the throughput is measured at.
+        pagination_accounts: The number of virtual accounts walked by the pagination benchmark.
+        pagination_page_size: The page size used by the pagination benchmark.
+
+    Returns:
+        The benchmark results along with the environment they were measured in.
+    """
+    return {
+        "pykuda2": __version__,
+        "python": platform.python_version(),
+        "httpx": httpx.__version__,
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "results": {
+            "parse_call_kwargs": bench_parse_call_kwargs(iterations),
+            "parse_response": bench_parse_response(iterations),
+            "request_reference": bench_request_reference(iterations),
+            "api_call": bench_api_call(iterations),
+            "async_api_call": bench_async_api_call(async_iterations),
+            "api_call_with_transport": bench_api_call_with_transport(iterations),
+            "api_call_instrumented": bench_api_call_with_transport(
+                iterations, Instrumentation([InMemorySink()])
+            ),
+            "async_api_call_with_transport": bench_async_api_call_with_transport(
+                iterations
+            ),
+            "throughput": bench_throughput(
+                iterations, async_iterations, concurrency_levels
+            ),
+            "api_response_memory": bench_api_response_memory(iterations),
+            "pagination": bench_pagination(pagination_accounts, pagination_page_size),
+        },
+    }
+
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    flattened = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flattened.update(_flatten(value, name))
+        elif isinstance(value, float):
+            flattened[name] = value
+    return flattened
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """Compares two benchmark runs.
+
+    Args:
+        baseline: The results of a previous run of `run_benchmarks`.
+        current: The results of the current run of `run_benchmarks`.
+        threshold: The relative change beyond which a metric is considered to have regressed.
+
+    Returns:
+        A list of `(metric, baseline value, current value)` tuples of the metrics that regressed.
+    """
+    baseline_metrics = _flatten(baseline["results"])
+    regressions = []
+    for metric, value in _flatten(current["results"]).items():
+        previous = baseline_metrics.get(metric)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        if metric.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > threshold:
+            regressions.append((metric, previous, value))
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10_000)
+    parser.add_argument("--async-iterations", type=int, default=500)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_CONCURRENCY_LEVELS),
+        help="The levels of concurrency the throughput is measured at.",
+    )
+    parser.add_argument("--pagination-accounts", type=int, default=10_000)
+    parser.add_argument("--pagination-page-size", type=int, default=100)
+    parser.add_argument("--output", help="A file the JSON results are written to.")
+    parser.add_argument(
+        "--compare", help="The JSON results of a previous run to compare against."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="The relative change beyond which a metric is reported as a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        iterations=args.iterations,
+        async_iterations=args.async_iterations,
+        concurrency_levels=args.concurrency,
+        pagination_accounts=args.pagination_accounts,
+        pagination_page_size=args.pagination_page_size,
+    )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        for metric, previous, value in regressions:
+            print(
+                f"REGRESSION {metric}: {previous:.2f} -> {value:.2f}", file=sys.stderr
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+import time
+from array import array
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.pagination import (
+    DEFAULT_PAGE_SIZE,
+    iter_virtual_accounts,
+    iter_virtual_accounts_async,
+)
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+    from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+
+class BalanceSnapshot:
+    """The balances of many virtual accounts, stored column by column.
+
+    Balances are kept in `array`s of doubles rather than a dict or an object per
+    account, which takes a fraction of the memory for hundreds of thousands of accounts
+    and makes totals cheap to compute.
+
+    Attributes:
+        tracking_references: The tracking reference of every account.
+        available_balances: The available balance of every account.
+        ledger_balances: The ledger balance of every account.
+        refreshed_at: When the balances of every account were retrieved, in seconds since
+            the epoch.
+        errors: The messages of the lookups that failed during the last refresh, keyed by
+            tracking reference. The previous balances of those accounts are kept.
+    """
+
+    def __init__(self):
+        self.tracking_references: List[str] = []
+        self.available_balances = array("d")
+        self.ledger_balances = array("d")
+        self.refreshed_at = array("d")
+        self.errors: Dict[str, str] = {}
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.tracking_references)
+
+    def __contains__(self, tracking_reference: str) -> bool:
+        return tracking_reference in self._index
+
+    def get(self, tracking_reference: str) -> Optional[Tuple[float, float]]:
+        """Returns the available and ledger balances of an account, if it's known."""
+        index = self._index.get(tracking_reference)
+        if index is None:
+            return None
+        return self.available_balances[index], self.ledger_balances[index]
+
+    def rows(self) -> Iterator[Tuple[str, float, float]]:
+        """Iterates over the tracking reference, available and ledger balances of every account."""
+        return zip(
+            self.tracking_references, self.available_balances, self.ledger_balances
+        )
+
+    @property
+    def total_available_balance(self) -> float:
+        return sum(self.available_balances)
+
+    @property
+    def total_ledger_balance(self) -> float:
+        return sum(self.ledger_balances)
+
+    def stale(self, max_age: float, now: Optional[float] = None) -> List[str]:
+        """Returns the tracking references of the balances older than `max_age` seconds."""
+        threshold = (time.time() if now is None else now) - max_age
+        return [
+            tracking_reference
+            for tracking_reference, refreshed_at in zip(
+                self.tracking_references, self.refreshed_at
+            )
+            if refreshed_at <= threshold
+        ]
+
+    def _is_fresh(self, tracking_reference: str, threshold: Optional[float]) -> bool:
+        index = self._index.get(tracking_reference)
+        return (
+            index is not None
+            and threshold is not None
+            and self.refreshed_at[index] > threshold
+        )
+
+    def _update(
+        self,
+        tracking_reference: str,
+        available_balance: float,
+        ledger_balance: float,
+        refreshed_at: float,
+    ) -> None:
+        index = self._index.get(tracking_reference)
+        if index is None:
+            self._index[tracking_reference] = len(self.tracking_references)
+            self.tracking_references.append(tracking_reference)
+            self.available_balances.append(available_balance)
+            self.ledger_balances.append(ledger_balance)
+            self.refreshed_at.append(refreshed_at)
+            return
+        self.available_balances[index] = available_balance
+        self.ledger_balances[index] = ledger_balance
+        self.refreshed_at[index] = refreshed_at
+
+
+_Lookup = Tuple[str, Optional[APIResponse], Optional[str]]
+
+
+def _apply(snapshot: BalanceSnapshot, lookup: _Lookup) -> None:
+    tracking_reference, response, error = lookup
+    if response is not None and response.status and isinstance(response.data, dict):
+        snapshot.errors.pop(tracking_reference, None)
+        snapshot._update(
+            tracking_reference,
+            float(response.data.get("availableBalance") or 0),
+            float(response.data.get("ledgerBalance") or 0),
+            time.time(),
+        )
+    else:
+        snapshot.errors[tracking_reference] = (
+            error if error is not None else response.message
+        )
+
+
+def _references_to_refresh(
+    accounts: Iterable[dict], snapshot: BalanceSnapshot, threshold: Optional[float]
+) -> Iterator[str]:
+    for account in accounts:
+        tracking_reference = account.get("trackingReference")
+        if tracking_reference and not snapshot._is_fresh(tracking_reference, threshold):
+            yield tracking_reference
+
+
+def snapshot_balances(
+    accounts: "Account",
+    snapshot: Optional[BalanceSnapshot] = None,
+    max_age: Optional[float] = None,
+    discover: bool = True,
+    concurrency: int = 8,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> BalanceSnapshot:
+    """Retrieves the balances of all your virtual accounts.
+
+    The virtual accounts are paginated while the balances of the accounts of the pages
+    already fetched are looked up concurrently, so pagination and lookups overlap.
+
+    Args:
+        accounts: The `Account` wrapper the calls are made with.
+            It's given a client of its own with `pooled` if it has none.
+        snapshot: A previous snapshot to refresh in place. A new one is created when
+            it's not provided.
+        max_age: Only the balances of `snapshot` retrieved more than `max_age` seconds
+            ago are refreshed. Every balance is refreshed when it's not provided.
+        discover: Set to `False` to only refresh the accounts already in `snapshot`
+            instead of paginating the virtual accounts to discover new ones.
+        concurrency: The maximum number of balance lookups in flight.
+        page_size: The number of virtual accounts fetched per page.
+        rate_limiter: An optional `RateLimiter` every lookup waits for.
+
+    Returns:
+        The `BalanceSnapshot`, i.e. `snapshot` when it was provided.
+
+    Raises:
+        PaginationException: when a page of virtual accounts can't be retrieved.
+    """
+    accounts = pooled(accounts)
+    snapshot = snapshot if snapshot is not None else BalanceSnapshot()
+    threshold = time.time() - max_age if max_age is not None else None
+    if discover:
+        references = _references_to_refresh(
+            iter_virtual_accounts(accounts, page_size=page_size), snapshot, threshold
+        )
+    else:
+        references = (
+            snapshot.stale(max_age)
+            if max_age is not None
+            else snapshot.tracking_references[:]
+        )
+
+    def lookup(tracking_reference: str) -> _Lookup:
+        try:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            response = accounts.get_virtual_account_balance(
+                tracking_reference=tracking_reference
+            )
+        except Exception as error:
+            return tracking_reference, None, str(error)
+        return tracking_reference, response, None
+
+    for result in bounded_map(lookup, references, concurrency):
+        _apply(snapshot, result)
+    return snapshot
+
+
+async def snapshot_balances_async(
+    accounts: "AsyncAccount",
+    snapshot: Optional[BalanceSnapshot] = None,
+    max_age: Optional[float] = None,
+    discover: bool = True,
+    concurrency: int = 8,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> BalanceSnapshot:
+    """The asynchronous equivalent of `snapshot_balances`.
+
+    Args:
+        accounts: The `AsyncAccount` wrapper the calls are made with.
+        snapshot: A previous snapshot to refresh in place.
+        max_age: Only the balances of `snapshot` retrieved more than `max_age` seconds
+            ago are refreshed.
+        discover: Set to `False` to only refresh the accounts already in `snapshot`.
+        concurrency: The maximum number of balance lookups in flight.
+        page_size: The number of virtual accounts fetched per page.
+        rate_limiter: An optional `RateLimiter` every lookup waits for.
+
+    Returns:
+        The `BalanceSnapshot`, i.e. `snapshot` when it was provided.
+
+    Raises:
+        PaginationException: when a page of virtual accounts can't be retrieved.
+    """
+    accounts = pooled(accounts)
+    snapshot = snapshot if snapshot is not None else BalanceSnapshot()
+    threshold = time.time() - max_age if max_age is not None else None
+
+    async def discovered_references() -> AsyncIterator[str]:
+        async for account in iter_virtual_accounts_async(accounts, page_size=page_size):
+            tracking_reference = account.get("trackingReference")
+            if tracking_reference and not snapshot._is_fresh(
+                tracking_reference, threshold
+            ):
+                yield tracking_reference
+
+    if discover:
+        references = discovered_references()
+    else:
+        references = (
+            snapshot.stale(max_age)
+            if max_age is not None
+            else snapshot.tracking_references[:]
+        )
+
+    async def lookup(tracking_reference: str) -> _Lookup:
+        try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async()
+            response = await accounts.get_virtual_account_balance(
+                tracking_reference=tracking_reference
+            )
+        except Exception as error:
+            return tracking_reference, None, str(error)
+        return tracking_reference, response, None
+
+    async for result in bounded_map_async(lookup, references, concurrency):
+        _apply(snapshot, result)
+    return snapshot
@@ -1,6 +1,12 @@
+import asyncio
+import functools
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from json import JSONDecodeError
-from typing import Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Mapping, Optional, Tuple
 from httpx import codes as HTTP_STATUS_CODE
 
 __version__ = "0.1.0"
@@ -8,30 +14,70 @@ __version__ = "0.1.0"
 
 import httpx
 
+from pykuda2.instrumentation import Instrumentation
 from pykuda2.exceptions import (
     UnsupportedHTTPMethodException,
     ConnectionException,
     InvalidResponseException,
     TokenException,
 )
-from pykuda2.utils import APIResponse, HTTPMethod, Mode, ServiceType, generate_number
-
-REFERENCE_NUMBER_LENGTH = 10
+from pykuda2.transports import (
+    DEFAULT_MAX_CONCURRENT_STREAMS,
+    DEFAULT_MAX_CONNECTIONS,
+    build_async_transport,
+    build_transport,
+)
+from pykuda2.references import get_default_reference_generator
+from pykuda2.utils import APIResponse, HTTPMethod, Mode, ServiceType
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.outbox import Outbox
+
+# Read-only, since it's shared by every wrapper.
+_BASE_HEADERS: Mapping[str, str] = MappingProxyType(
+    {
+        "accept": "application/json; charset=utf-8",
+        "content-type": "application/json",
+        "user-agent": f"PyKuda {__version__}",
+    }
+)
+_BASE_URLS = {
+    Mode.DEVELOPMENT: "https://kuda-openapi-uat.kudabank.com/v2.1",
+    Mode.PRODUCTION: "https://kuda-openapi.kuda.com/v2.1",
+}
+# The names of the module level functions of `httpx` making requests with each method.
+# They're looked up on every call rather than bound here, so they can still be patched.
+_HTTPX_FUNCTION_NAMES = {method: method.value.lower() for method in HTTPMethod}
 
 
 class AbstractAPIWrapper(ABC):
-    def __init__(self, email: str, api_key: str, mode=Mode.DEVELOPMENT):
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        mode=Mode.DEVELOPMENT,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
         """Instantiates the APIWrapper.
 
         Args:
             email: The email address of your Kuda account with access to an apiKey.
             api_key: Your Kuda apiKey.
             mode: The mode you desire to use the wrapper in (development or production).
+            reference_generator: An optional callable generating the references of the
+                requests made without one, e.g. a `DedupingReferenceGenerator`.
         """
         self._mode = mode
         self._email = email
         self._api_key = api_key
         self._saved_token: Optional[str] = None
+        # Generates the references of requests made without one. The process-wide
+        # default generator is used when it's not set.
+        self.reference_generator = reference_generator
+        # The headers and urls requests are made with, built once rather than on every
+        # call. The headers are rebuilt whenever the access token changes.
+        self._authorized_headers: Optional[Tuple[str, dict]] = None
+        self._urls: Dict[Optional[str], str] = {}
 
     @property
     @abstractmethod
@@ -50,25 +96,19 @@ class AbstractAPIWrapper(ABC):
         ...
 
     @property
-    def _base_headers(self) -> dict:
+    def _base_headers(self) -> Mapping[str, str]:
         """Returns the headers without authorization header included.
 
-        It returns the headers used in making endpoint requests with the exclusion of the authorization header"""
-        return {
-            "accept": "application/json; charset=utf-8",
-            "content-type": "application/json",
-            "user-agent": f"PyKuda {__version__}",
-        }
+        It returns the headers used in making endpoint requests with the exclusion of the authorization header.
+        They're shared by every wrapper, so they're read-only."""
+        return _BASE_HEADERS
 
     @property
     def _base_url(self) -> str:
         """Returns the base url.
 
         The url returned depends on the mode in which the class was instantiated."""
-        return {
-            Mode.DEVELOPMENT: "https://kuda-openapi-uat.kudabank.com/v2.1",
-            Mode.PRODUCTION: "https://kuda-openapi.kuda.com/v2.1",
-        }[self._mode]
+        return _BASE_URLS[self._mode]
 
     @abstractmethod
     def _api_call(
@@ -106,6 +146,49 @@ class AbstractAPIWrapper(ABC):
         """
         ...
 
+    def _headers_with_token(self, token: str) -> dict:
+        """Returns the headers with the authorization header of `token` included.
+
+        The headers are shared by every call made with the same token, so they must not
+        be updated in place."""
+        authorized_headers = self._authorized_headers
+        if authorized_headers is None or authorized_headers[0] != token:
+            authorized_headers = self._authorized_headers = (
+                token,
+                {**self._base_headers, "authorization": f"Bearer {token}"},
+            )
+        return authorized_headers[1]
+
+    def _url(self, endpoint_path: Optional[str]) -> str:
+        """Returns the url of `endpoint_path`, or the base url when it's not provided."""
+        url = self._urls.get(endpoint_path)
+        if url is None:
+            url = self._urls[endpoint_path] = (
+                self._base_url + endpoint_path
+                if endpoint_path is not None
+                else self._base_url
+            )
+        return url
+
+    def _generate_request_reference(self) -> str:
+        """Returns a new unique identifier for a request."""
+        generator = self.reference_generator or get_default_reference_generator()
+        return generator()
+
+    def _request_reference(self, request_reference: Optional[str]) -> str:
+        """Returns the reference a request is made with, generated when not provided.
+
+        A reference provided by the caller is registered with generators that remember
+        the references they made, e.g. a `DedupingReferenceGenerator`, so they never
+        generate it later."""
+        if not request_reference:
+            return self._generate_request_reference()
+        generator = self.reference_generator or get_default_reference_generator()
+        add = getattr(generator, "add", None)
+        if add is not None:
+            add(request_reference)
+        return request_reference
+
     def _parse_call_kwargs(
         self,
         service_type: ServiceType,
@@ -113,26 +196,22 @@ class AbstractAPIWrapper(ABC):
         endpoint_path: Optional[str] = None,
         request_reference: Optional[str] = None,
         exclude_auth_header=False,
+        headers: Optional[dict] = None,
     ) -> dict:
-        payload = {
-            "servicetype": service_type,
-            "requestref": request_reference
-            or str(generate_number(REFERENCE_NUMBER_LENGTH)),
-            "data": data,
-        }
-        if not data:
-            payload.pop("data", None)
-        if service_type == ServiceType.NO_OP:
-            payload.pop("servicetype", None)
-        return {
-            "url": self._base_url + endpoint_path
-            if endpoint_path is not None
-            else self._base_url,
-            "json": payload,
-            "headers": self._headers if not exclude_auth_header else self._base_headers,
-        }
+        payload = (
+            {} if service_type == ServiceType.NO_OP else {"servicetype": service_type}
+        )
+        payload["requestref"] = request_reference or self._generate_request_reference()
+        if data:
+            payload["data"] = data
+        if headers is None:
+            headers = self._headers if not exclude_auth_header else self._base_headers
+        return {"url": self._url(endpoint_path), "json": payload, "headers": headers}
 
     def _parse_response(self, response: httpx.Response) -> APIResponse:
+        if response.status_code == HTTP_STATUS_CODE.UNAUTHORIZED:
+            # The access token expired or was revoked, so the next call fetches a new one.
+            self._saved_token = None
         try:
             response_body = response.json()
             return APIResponse(
@@ -157,39 +236,161 @@ class BaseAPIWrapper(AbstractAPIWrapper):
         email: The email address of your Kuda account with access to an apiKey
         api_key: Your Kuda apiKey
         mode: The mode you desire to use the wrapper in (development or production)
+        client: An optional `httpx.Client` used to make every request, e.g. to tune its
+            connection pool. It is left open when the wrapper is closed, so it can be shared.
+        transport: An optional `httpx.BaseTransport` (e.g. an `httpx.MockTransport`) the
+            wrapper creates its own client with. It can't be provided along with `client`.
+        http2: Set to `True` to multiplex concurrent requests over a few pooled HTTP/2
+            connections. It falls back to HTTP/1.1 when the server or the environment
+            doesn't support HTTP/2.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` notified about every call made,
+            e.g. to record the latency of each of its phases. It costs nothing when omitted.
+        outbox: An optional `Outbox` the money-moving calls are recorded in before they're
+            made, so their outcome can be reconciled after a crash.
+        reference_generator: An optional callable generating the references of the
+            requests made without one. The process-wide default generator is used when
+            it's not provided. References provided by the caller are registered with it
+            when it has an `add` method, like a `DedupingReferenceGenerator`.
+
+    When neither `client` nor `transport` is provided, every request is made with the
+    module level functions of `httpx`.
     """
 
-    def __init__(self, email: str, api_key: str, mode=Mode.DEVELOPMENT):
-        super().__init__(email=email, api_key=api_key, mode=mode)
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        mode=Mode.DEVELOPMENT,
+        client: Optional[httpx.Client] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional["Outbox"] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            reference_generator=reference_generator,
+        )
+        self.instrumentation = instrumentation
+        self.outbox = outbox
+        if client is not None and transport is not None:
+            raise ValueError("Only one of `client` and `transport` can be provided")
+        if http2:
+            if client is not None or transport is not None:
+                raise ValueError(
+                    "`http2` can't be used along with `client` or `transport`"
+                )
+            transport = build_transport(
+                max_connections=max_connections,
+                max_concurrent_streams=max_concurrent_streams,
+            )
+        self._owns_client = transport is not None
+        self._client: Optional[httpx.Client] = (
+            httpx.Client(transport=transport) if transport is not None else client
+        )
+
+    def pool_connections(self) -> None:
+        """Makes the wrapper reuse its connections across requests.
+
+        A wrapper given neither a `client` nor a `transport` makes every request with
+        the module level functions of `httpx`, which open a new connection each time.
+        This gives it a client of its own instead, closed along with the wrapper. It does
+        nothing when the wrapper already has a client.
+        """
+        if self._client is None:
+            self._client = httpx.Client()
+            self._owns_client = True
+
+    def warmup(self, connections: int = 1) -> None:
+        """Prepares the wrapper for its first requests.
+
+        It fetches and caches the access token, then opens `connections` keep-alive
+        connections to the base url of the current mode, so the first requests don't pay
+        for DNS resolution, TCP and TLS handshakes. Connections can only be kept alive by
+        a client, so the wrapper is given one with `pool_connections` if it has none.
+
+        Args:
+            connections: The number of connections to open concurrently. Connections
+                beyond the keep-alive limit of the client are closed once opened.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token can't be fetched.
+        """
+        if connections < 1:
+            raise ValueError("`connections` must be at least 1")
+        self.pool_connections()
+        self._saved_token = self._token
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: self._open_connection(), range(connections)))
+
+    def _open_connection(self) -> None:
+        try:
+            self._client.head(self._base_url)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            raise ConnectionException(
+                "Unable to connect to server. Please ensure you have an internet connection"
+            )
+
+    def close(self) -> None:
+        """Closes the client the wrapper created, e.g. from the `transport` it was instantiated with."""
+        if self._owns_client:
+            self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     @property
     def _token(self) -> str:
         if self._saved_token:
             return self._saved_token
-        else:
-            token_url = f"{self._base_url}/Account/GetToken"
-            auth_data = {"email": self._email, "apiKey": self._api_key}
-            try:
-                response = httpx.post(
-                    url=token_url, json=auth_data, headers=self._base_headers
-                )
-            except httpx.ConnectError:
-                raise ConnectionException(
-                    "Unable to connect to server. Please ensure you have an internet connection"
-                )
-            except httpx.ConnectTimeout:
-                raise ConnectionException("Server refused to respond")
-            if response.status_code == HTTP_STATUS_CODE.OK:
-                return response.text
-            raise TokenException(
-                "Unable to get access token, It's likely that you provided an invalid credential "
-                "or your apiKey has expired. You can always generate a new apiKey "
-                "from your developer account"
+        if self.instrumentation is None:
+            self._saved_token = self._fetch_token()
+            return self._saved_token
+        fetch = self.instrumentation.token_fetch_started()
+        try:
+            self._saved_token = self._fetch_token()
+            return self._saved_token
+        except Exception as error:
+            fetch.error = error
+            raise
+        finally:
+            self.instrumentation.token_fetch_finished(fetch)
+
+    def _fetch_token(self) -> str:
+        token_url = f"{self._base_url}/Account/GetToken"
+        auth_data = {"email": self._email, "apiKey": self._api_key}
+        post = self._client.post if self._client is not None else httpx.post
+        try:
+            response = post(url=token_url, json=auth_data, headers=self._base_headers)
+        except httpx.ConnectError:
+            raise ConnectionException(
+                "Unable to connect to server. Please ensure you have an internet connection"
             )
+        except httpx.ConnectTimeout:
+            raise ConnectionException("Server refused to respond")
+        if response.status_code == HTTP_STATUS_CODE.OK:
+            return response.text
+        raise TokenException(
+            "Unable to get access token, It's likely that you provided an invalid credential "
+            "or your apiKey has expired. You can always generate a new apiKey "
+            "from your developer account"
+        )
 
     @property
     def _headers(self) -> dict:
-        return {**self._base_headers, "authorization": f"Bearer {self._token}"}
+        return self._headers_with_token(self._token)
 
     def _api_call(
         self,
@@ -200,7 +401,48 @@ class BaseAPIWrapper(AbstractAPIWrapper):
         request_reference: Optional[str] = None,
         exclude_auth_header=False,
     ):
+        request_reference = self._request_reference(request_reference)
+        if self.outbox is None or service_type not in self.outbox.service_types:
+            return self._send_api_call(
+                service_type=service_type,
+                data=data,
+                method=method,
+                endpoint_path=endpoint_path,
+                request_reference=request_reference,
+                exclude_auth_header=exclude_auth_header,
+            )
+        # The call is only made once it's on disk, so that a crash can't leave a call
+        # that may have moved money unaccounted for.
+        self.outbox.record(request_reference, service_type, data)
+        response = self._send_api_call(
+            service_type=service_type,
+            data=data,
+            method=method,
+            endpoint_path=endpoint_path,
+            request_reference=request_reference,
+            exclude_auth_header=exclude_auth_header,
+        )
+        self.outbox.acknowledge(request_reference, response)
+        return response
 
+    def _send_api_call(
+        self,
+        service_type: ServiceType,
+        data: Optional[dict],
+        method: HTTPMethod,
+        endpoint_path: Optional[str],
+        request_reference: Optional[str],
+        exclude_auth_header: bool,
+    ) -> APIResponse:
+        if self.instrumentation is not None:
+            return self._instrumented_api_call(
+                service_type=service_type,
+                data=data,
+                method=method,
+                endpoint_path=endpoint_path,
+                request_reference=request_reference,
+                exclude_auth_header=exclude_auth_header,
+            )
         http_method_call_kwargs = self._parse_call_kwargs(
             service_type=service_type,
             data=data,
@@ -208,20 +450,15 @@ class BaseAPIWrapper(AbstractAPIWrapper):
             request_reference=request_reference,
             exclude_auth_header=exclude_auth_header,
         )
-        http_methods_mapping = {
-            HTTPMethod.GET: httpx.get,
-            HTTPMethod.POST: httpx.post,
-            HTTPMethod.PUT: httpx.put,
-            HTTPMethod.PATCH: httpx.patch,
-            HTTPMethod.DELETE: httpx.delete,
-            HTTPMethod.OPTIONS: httpx.options,
-            HTTPMethod.HEAD: httpx.head,
-        }
-        http_method_callable = http_methods_mapping.get(method)
-        if not http_method_callable:
+        http_function_name = _HTTPX_FUNCTION_NAMES.get(method)
+        if not http_function_name:
             raise UnsupportedHTTPMethodException(
                 f"{method} is not a supported HTTP method"
             )
+        if self._client is not None:
+            http_method_callable = functools.partial(self._client.request, method.value)
+        else:
+            http_method_callable = getattr(httpx, http_function_name)
         try:
             response = http_method_callable(**http_method_call_kwargs)
             return self._parse_response(response)
@@ -232,6 +469,77 @@ class BaseAPIWrapper(AbstractAPIWrapper):
         except (httpx.ConnectTimeout, httpx.ReadTimeout):
             raise ConnectionException("Server refused to respond")
 
+    def _instrumented_api_call(
+        self,
+        service_type: ServiceType,
+        data: Optional[dict],
+        method: HTTPMethod,
+        endpoint_path: Optional[str],
+        request_reference: Optional[str],
+        exclude_auth_header: bool,
+    ) -> APIResponse:
+        """Makes the same call as `_api_call` while timing each of its phases."""
+        if not isinstance(method, HTTPMethod):
+            raise UnsupportedHTTPMethodException(
+                f"{method} is not a supported HTTP method"
+            )
+        request_reference = request_reference or self._generate_request_reference()
+        call = self.instrumentation.call_started(
+            service_type,
+            method,
+            endpoint_path=endpoint_path,
+            request_reference=request_reference,
+        )
+        # Like the module level functions of `httpx`, a client is used for a single
+        # request when none was provided.
+        client = self._client if self._client is not None else httpx.Client()
+        try:
+            checkpoint = time.perf_counter()
+            # The hooks may update the headers in place, so they're given a copy.
+            headers = dict(self._base_headers if exclude_auth_header else self._headers)
+            call.token_seconds = time.perf_counter() - checkpoint
+
+            checkpoint = time.perf_counter()
+            self.instrumentation.request_prepared(call, headers)
+            request = client.build_request(
+                method.value,
+                **self._parse_call_kwargs(
+                    service_type=service_type,
+                    data=data,
+                    endpoint_path=endpoint_path,
+                    request_reference=request_reference,
+                    headers=headers,
+                ),
+            )
+            call.request_bytes = len(request.content)
+            call.serialization_seconds = time.perf_counter() - checkpoint
+
+            checkpoint = time.perf_counter()
+            try:
+                response = client.send(request)
+            except httpx.ConnectError:
+                raise ConnectionException(
+                    "Unable to connect to server. Please ensure you have an internet connection"
+                )
+            except (httpx.ConnectTimeout, httpx.ReadTimeout):
+                raise ConnectionException("Server refused to respond")
+            call.network_seconds = time.perf_counter() - checkpoint
+            call.status_code = response.status_code
+            call.response_bytes = len(response.content)
+
+            checkpoint = time.perf_counter()
+            api_response = self._parse_response(response)
+            call.parsing_seconds = time.perf_counter() - checkpoint
+            call.status = api_response.status
+            return api_response
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            if client is not self._client:
+                client.close()
+            self.instrumentation.call_finished(call)
+
 
 class BaseAsyncAPIWrapper(AbstractAPIWrapper):
     """A base class from which asynchronous API wrappers inherit from.
@@ -242,40 +550,171 @@ class BaseAsyncAPIWrapper(AbstractAPIWrapper):
         email: The email address of your Kuda account with access to an apiKey
         api_key: Your Kuda apiKey
         mode: The mode you desire to use the wrapper in (development or production)
+        client: An optional `httpx.AsyncClient` used to make every request, e.g. to tune its
+            connection pool. It is left open when the wrapper is closed, so it can be shared.
+        transport: An optional `httpx.AsyncBaseTransport` (e.g. an `httpx.MockTransport`) the
+            wrapper creates its own client with. It can't be provided along with `client`.
+        http2: Set to `True` to multiplex concurrent requests over a few pooled HTTP/2
+            connections. It falls back to HTTP/1.1 when the server or the environment
+            doesn't support HTTP/2.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` notified about every call made,
+            e.g. to record the latency of each of its phases. It costs nothing when omitted.
+        outbox: An optional `Outbox` the money-moving calls are recorded in before they're
+            made, so their outcome can be reconciled after a crash.
+        reference_generator: An optional callable generating the references of the
+            requests made without one. The process-wide default generator is used when
+            it's not provided. References provided by the caller are registered with it
+            when it has an `add` method, like a `DedupingReferenceGenerator`.
+
+    When neither `client` nor `transport` is provided, a new `httpx.AsyncClient` is
+    opened for every request.
     """
 
-    def __init__(self, email: str, api_key: str, mode=Mode.DEVELOPMENT):
-        super().__init__(email=email, api_key=api_key, mode=mode)
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        mode=Mode.DEVELOPMENT,
+        client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional["Outbox"] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            reference_generator=reference_generator,
+        )
+        self.instrumentation = instrumentation
+        self.outbox = outbox
+        if client is not None and transport is not None:
+            raise ValueError("Only one of `client` and `transport` can be provided")
+        if http2:
+            if client is not None or transport is not None:
+                raise ValueError(
+                    "`http2` can't be used along with `client` or `transport`"
+                )
+            transport = build_async_transport(
+                max_connections=max_connections,
+                max_concurrent_streams=max_concurrent_streams,
+            )
+        self._owns_client = transport is not None
+        self._client: Optional[httpx.AsyncClient] = (
+            httpx.AsyncClient(transport=transport) if transport is not None else client
+        )
+
+    def pool_connections(self) -> None:
+        """Makes the wrapper reuse its connections across requests.
+
+        A wrapper given neither a `client` nor a `transport` makes every request with
+        the module level functions of `httpx`, which open a new connection each time.
+        This gives it a client of its own instead, closed along with the wrapper. It does
+        nothing when the wrapper already has a client.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+            self._owns_client = True
+
+    async def warmup(self, connections: int = 1) -> None:
+        """Prepares the wrapper for its first requests.
+
+        It fetches and caches the access token, then opens `connections` keep-alive
+        connections to the base url of the current mode, so the first requests don't pay
+        for DNS resolution, TCP and TLS handshakes. Connections can only be kept alive by
+        a client, so the wrapper is given one with `pool_connections` if it has none.
+
+        Args:
+            connections: The number of connections to open concurrently. Connections
+                beyond the keep-alive limit of the client are closed once opened.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token can't be fetched.
+        """
+        if connections < 1:
+            raise ValueError("`connections` must be at least 1")
+        self.pool_connections()
+        self._saved_token = await self._token
+        await asyncio.gather(*(self._open_connection() for _ in range(connections)))
+
+    async def _open_connection(self) -> None:
+        try:
+            await self._client.head(self._base_url)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            raise ConnectionException(
+                "Unable to connect to server. Please ensure you have an internet connection"
+            )
+
+    async def aclose(self) -> None:
+        """Closes the client the wrapper created, e.g. from the `transport` it was instantiated with."""
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    @asynccontextmanager
+    async def _http_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Yields the client requests are made with, opening a new one if none was provided."""
+        if self._client is not None:
+            yield self._client
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
 
     @property
     async def _token(self) -> str:
         if self._saved_token:
             return self._saved_token
-        else:
-            token_url = f"{self._base_url}/Account/GetToken"
-            auth_data = {"email": self._email, "apiKey": self._api_key}
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        url=token_url, json=auth_data, headers=self._base_headers
-                    )
-            except httpx.ConnectError:
-                raise ConnectionException(
-                    "Unable to connect to server. Please ensure you have an internet connection"
+        if self.instrumentation is None:
+            self._saved_token = await self._fetch_token()
+            return self._saved_token
+        fetch = self.instrumentation.token_fetch_started()
+        try:
+            self._saved_token = await self._fetch_token()
+            return self._saved_token
+        except Exception as error:
+            fetch.error = error
+            raise
+        finally:
+            self.instrumentation.token_fetch_finished(fetch)
+
+    async def _fetch_token(self) -> str:
+        token_url = f"{self._base_url}/Account/GetToken"
+        auth_data = {"email": self._email, "apiKey": self._api_key}
+        try:
+            async with self._http_client() as client:
+                response = await client.post(
+                    url=token_url, json=auth_data, headers=self._base_headers
                 )
-            except (httpx.ConnectTimeout, httpx.ReadTimeout):
-                raise ConnectionException("Server refused to respond")
-            if response.status_code == HTTP_STATUS_CODE.OK:
-                return response.text
-            raise TokenException(
-                "Unable to get access token, It's likely that you provided an invalid credential "
-                "or your apiKey has expired. You can always generate a new apiKey "
-                "from your developer account"
+        except httpx.ConnectError:
+            raise ConnectionException(
+                "Unable to connect to server. Please ensure you have an internet connection"
             )
+        except (httpx.ConnectTimeout, httpx.ReadTimeout):
+            raise ConnectionException("Server refused to respond")
+        if response.status_code == HTTP_STATUS_CODE.OK:
+            return response.text
+        raise TokenException(
+            "Unable to get access token, It's likely that you provided an invalid credential "
+            "or your apiKey has expired. You can always generate a new apiKey "
+            "from your developer account"
+        )
 
     @property
     async def _headers(self) -> dict:
-        return {**self._base_headers, "authorization": f"Bearer {await self._token}"}
+        return self._headers_with_token(self._saved_token or await self._token)
 
     async def _api_call(
         self,
@@ -286,6 +725,46 @@ class BaseAsyncAPIWrapper(AbstractAPIWrapper):
         request_reference: Optional[str] = None,
         exclude_auth_header=False,
     ):
+        request_reference = self._request_reference(request_reference)
+        if self.outbox is None or service_type not in self.outbox.service_types:
+            return await self._send_api_call(
+                service_type=service_type,
+                data=data,
+                method=method,
+                endpoint_path=endpoint_path,
+                request_reference=request_reference,
+                exclude_auth_header=exclude_auth_header,
+            )
+        await self.outbox.record_async(request_reference, service_type, data)
+        response = await self._send_api_call(
+            service_type=service_type,
+            data=data,
+            method=method,
+            endpoint_path=endpoint_path,
+            request_reference=request_reference,
+            exclude_auth_header=exclude_auth_header,
+        )
+        self.outbox.acknowledge(request_reference, response)
+        return response
+
+    async def _send_api_call(
+        self,
+        service_type: ServiceType,
+        data: Optional[dict],
+        method: HTTPMethod,
+        endpoint_path: Optional[str],
+        request_reference: Optional[str],
+        exclude_auth_header: bool,
+    ) -> APIResponse:
+        if self.instrumentation is not None:
+            return await self._instrumented_api_call(
+                service_type=service_type,
+                data=data,
+                method=method,
+                endpoint_path=endpoint_path,
+                request_reference=request_reference,
+                exclude_auth_header=exclude_auth_header,
+            )
         http_method_call_kwargs = await self._parse_call_kwargs_async(
             service_type=service_type,
             data=data,
@@ -293,7 +772,7 @@ class BaseAsyncAPIWrapper(AbstractAPIWrapper):
             request_reference=request_reference,
             exclude_auth_header=exclude_auth_header,
         )
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             http_method_callable = getattr(client, method.value.lower(), None)
             if not http_method_callable:
                 raise UnsupportedHTTPMethodException(
@@ -309,6 +788,75 @@ class BaseAsyncAPIWrapper(AbstractAPIWrapper):
                 raise ConnectionException("Server refused to respond")
             return self._parse_response(response)
 
+    async def _instrumented_api_call(
+        self,
+        service_type: ServiceType,
+        data: Optional[dict],
+        method: HTTPMethod,
+        endpoint_path: Optional[str],
+        request_reference: Optional[str],
+        exclude_auth_header: bool,
+    ) -> APIResponse:
+        """Makes the same call as `_api_call` while timing each of its phases."""
+        if not isinstance(method, HTTPMethod):
+            raise UnsupportedHTTPMethodException(
+                f"{method} is not a supported HTTP method"
+            )
+        request_reference = request_reference or self._generate_request_reference()
+        call = self.instrumentation.call_started(
+            service_type,
+            method,
+            endpoint_path=endpoint_path,
+            request_reference=request_reference,
+        )
+        try:
+            async with self._http_client() as client:
+                checkpoint = time.perf_counter()
+                # The hooks may update the headers in place, so they're given a copy.
+                headers = dict(
+                    self._base_headers if exclude_auth_header else await self._headers
+                )
+                call.token_seconds = time.perf_counter() - checkpoint
+
+                checkpoint = time.perf_counter()
+                self.instrumentation.request_prepared(call, headers)
+                request = client.build_request(
+                    method.value,
+                    **await self._parse_call_kwargs_async(
+                        service_type=service_type,
+                        data=data,
+                        endpoint_path=endpoint_path,
+                        request_reference=request_reference,
+                        headers=headers,
+                    ),
+                )
+                call.request_bytes = len(request.content)
+                call.serialization_seconds = time.perf_counter() - checkpoint
+
+                checkpoint = time.perf_counter()
+                try:
+                    response = await client.send(request)
+                except httpx.ConnectError:
+                    raise ConnectionException(
+                        "Unable to connect to server. Please ensure you have an internet connection"
+                    )
+                except (httpx.ConnectTimeout, httpx.ReadTimeout):
+                    raise ConnectionException("Server refused to respond")
+                call.network_seconds = time.perf_counter() - checkpoint
+                call.status_code = response.status_code
+                call.response_bytes = len(response.content)
+
+            checkpoint = time.perf_counter()
+            api_response = self._parse_response(response)
+            call.parsing_seconds = time.perf_counter() - checkpoint
+            call.status = api_response.status
+            return api_response
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            self.instrumentation.call_finished(call)
+
     async def _parse_call_kwargs_async(
         self,
         service_type: ServiceType,
@@ -316,23 +864,15 @@ class BaseAsyncAPIWrapper(AbstractAPIWrapper):
         endpoint_path: Optional[str] = None,
         request_reference: Optional[str] = None,
         exclude_auth_header=False,
+        headers: Optional[dict] = None,
     ) -> dict:
-        payload = {
-            "ServiceType": service_type,
-            "RequestRef": request_reference
-            or str(generate_number(REFERENCE_NUMBER_LENGTH)),
-            "Data": data,
-        }
-        if not data:
-            payload.pop("data", None)
-        if service_type == ServiceType.NO_OP:
-            payload.pop("ServiceType", None)
-        return {
-            "url": self._base_url + endpoint_path
-            if endpoint_path is not None
-            else self._base_url,
-            "json": payload,
-            "headers": await self._headers
-            if not exclude_auth_header
-            else self._base_headers,
-        }
+        payload = (
+            {} if service_type == ServiceType.NO_OP else {"ServiceType": service_type}
+        )
+        payload["RequestRef"] = request_reference or self._generate_request_reference()
+        payload["Data"] = data
+        if headers is None:
+            headers = (
+                await self._headers if not exclude_auth_header else self._base_headers
+            )
+        return {"url": self._url(endpoint_path), "json": payload, "headers": headers}
@@ -0,0 +1,474 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import Enum
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import httpx
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.polling import TRANSIENT_EXCEPTIONS, Backoff
+from pykuda2.utils import APIResponse, TransactionType
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.savings import AsyncSavings
+    from pykuda2.wrappers.sync_wrappers.savings import Savings
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Status codes of responses worth retrying. A 429 or a 503 means Kuda didn't handle
+# the call, but a 502 or a 504 comes from a gateway and Kuda may have applied the
+# posting regardless, like a request that timed out.
+_TRANSIENT_STATUS_CODES = frozenset({429, 502, 503, 504})
+_AMBIGUOUS_STATUS_CODES = frozenset({502, 504})
+
+
+class SavingsPosting(NamedTuple):
+    """A credit or debit of a plain savings account.
+
+    Attributes:
+        tracking_reference: The tracking reference of the savings account.
+        amount: The amount to credit or debit.
+        transaction_type: `TransactionType.CREDIT` or `TransactionType.DEBIT`.
+        narration: The transaction description.
+    """
+
+    tracking_reference: str
+    amount: Union[int, float]
+    transaction_type: TransactionType
+    narration: str
+
+
+class PostingStatus(str, Enum):
+    """The outcome of a posting.
+
+    `SKIPPED` postings were already applied by a previous run writing to the same
+    results file, so they weren't sent again. `UNKNOWN` postings may or may not have
+    been applied: an attempt timed out, lost its connection or got a gateway error, and
+    Kuda didn't confirm a later one, e.g. because it rejected it as a duplicate. They
+    have to be checked against the account by their request reference, and aren't sent
+    again by a rerun.
+    """
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    UNKNOWN = "unknown"
+
+
+def posting_reference(run_id: str, index: int, posting: SavingsPosting) -> str:
+    """Returns the request reference of a posting of a run.
+
+    It's derived from the run and the posting rather than generated, so a posting
+    retried, or sent again by a rerun of the same run, keeps its reference and Kuda
+    can reject it as a duplicate instead of applying it twice.
+
+    Args:
+        run_id: The identifier of the run, e.g. "interest-2023-01-31".
+        index: The position of the posting in the run, from 0.
+        posting: The posting.
+    """
+    # The amount is normalized so 100, 100.0 and "100.00" give the same reference.
+    amount = format(Decimal(str(posting.amount)).normalize(), "f")
+    key = "|".join(
+        (
+            run_id,
+            str(index),
+            posting.tracking_reference,
+            amount,
+            TransactionType(posting.transaction_type).value,
+        )
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+@dataclass
+class PostingResult:
+    """The result of a posting.
+
+    Attributes:
+        index: The position of the posting in the run, from 0.
+        posting: The posting.
+        request_reference: The reference the posting was sent with.
+        status: The outcome of the posting.
+        attempts: The number of times the posting was sent.
+        response: The last response of Kuda, or `None` if no request succeeded.
+        error: The error the last request failed with, if any.
+    """
+
+    index: int
+    posting: SavingsPosting
+    request_reference: str
+    status: PostingStatus = PostingStatus.FAILED
+    attempts: int = 0
+    response: Optional[APIResponse] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Returns the result as a line of the results file."""
+        message = self.error
+        if message is None and self.response is not None:
+            message = self.response.message
+        return {
+            "index": self.index,
+            "request_reference": self.request_reference,
+            "tracking_reference": self.posting.tracking_reference,
+            "amount": self.posting.amount,
+            "transaction_type": TransactionType(self.posting.transaction_type).value,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "message": message,
+        }
+
+
+_Item = Tuple[int, SavingsPosting, str]
+
+
+def _is_transient(response: APIResponse) -> bool:
+    return response.status_code in _TRANSIENT_STATUS_CODES
+
+
+class _ResultsFile:
+    """A JSON lines file the result of every posting is appended to as it completes.
+
+    The postings that succeeded or whose outcome is unknown in previous runs are read
+    back when it's opened, so a run interrupted midway can be started again and only
+    sends what's left.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.settled: Dict[str, PostingStatus] = {}
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+        if path is None:
+            return
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        # A blank line, or a line cut short by a crash.
+                        continue
+                    status = PostingStatus(result["status"])
+                    if status != PostingStatus.FAILED:
+                        self.settled[result["request_reference"]] = status
+        self._file = open(path, "a")
+
+    def write(self, result: PostingResult) -> None:
+        if self._file is not None:
+            line = json.dumps(result.to_dict()) + "\n"
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def _items(
+    run_id: str, postings: Iterable[Iterable], settled: Dict[str, PostingStatus]
+) -> Iterator[Union[_Item, PostingResult]]:
+    for index, row in enumerate(postings):
+        posting = row if isinstance(row, SavingsPosting) else SavingsPosting(*row)
+        request_reference = posting_reference(run_id, index, posting)
+        status = settled.get(request_reference)
+        if status == PostingStatus.UNKNOWN:
+            yield PostingResult(index, posting, request_reference, status=status)
+        elif status is not None:
+            yield PostingResult(
+                index, posting, request_reference, status=PostingStatus.SKIPPED
+            )
+        else:
+            yield index, posting, request_reference
+
+
+def _settle(result: PostingResult, ambiguous: bool) -> None:
+    if result.response is not None and result.response.status:
+        result.status = PostingStatus.SUCCEEDED
+    elif ambiguous:
+        result.status = PostingStatus.UNKNOWN
+
+
+class BulkSavingsPoster:
+    """Credits or debits many plain savings accounts, e.g. to distribute interest.
+
+    Postings are sent `concurrency` at a time with
+    `Savings.credit_or_debit_plain_savings_account`. Every posting is sent with a
+    request reference derived from `run_id` and the posting, and connection errors or
+    unavailable responses are retried with the same reference, so Kuda never applies a
+    posting twice. A posting whose attempts timed out, lost their connection or got a
+    gateway error without Kuda confirming a later one is reported as
+    `PostingStatus.UNKNOWN`, and has to be checked against the account by its request
+    reference. The result of every posting
+    is appended to a results file as soon as it's known, and starting the same run
+    again with the same results file skips the postings that already succeeded or are
+    unknown. A posting sent by a run that died before its result was written is sent
+    again with the same reference, and if Kuda rejects it as a duplicate it's reported
+    as failed, so failures should be checked against the account before being sent by
+    another run.
+
+    Args:
+        savings: The `Savings` wrapper the postings are sent with.
+            It's given a client of its own with `pooled` if it has none.
+        run_id: The identifier of the run, which has to be the same when a run is
+            started again, e.g. "interest-2023-01-31".
+        concurrency: The maximum number of postings in flight.
+        rate_limiter: An optional `RateLimiter` every request waits for.
+        max_attempts: The maximum number of times a posting is sent.
+        backoff: The `Backoff` policy spacing out the attempts of a posting.
+
+    Example:
+        ```python
+        poster = BulkSavingsPoster(kuda.savings, "interest-2023-01-31", concurrency=32)
+        rows = (
+            (row["tracking_reference"], row["interest"], TransactionType.CREDIT, "Interest")
+            for row in csv.DictReader(file)
+        )
+        print(poster.post_all(rows, results_path="interest-2023-01-31.jsonl"))
+        ```
+    """
+
+    def __init__(
+        self,
+        savings: "Savings",
+        run_id: str,
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff: Optional[Backoff] = None,
+    ):
+        self.savings = pooled(savings)
+        self.run_id = run_id
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.max_attempts = max_attempts
+        self.backoff = backoff or Backoff(initial=0.5, maximum=10.0)
+
+    def _send(self, result: PostingResult) -> Tuple[bool, bool]:
+        """Sends a posting once, returning whether it's worth sending again and
+        whether Kuda may have applied it without saying so."""
+        posting = result.posting
+        result.attempts += 1
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            result.response = self.savings.credit_or_debit_plain_savings_account(
+                amount=posting.amount,
+                narration=posting.narration,
+                transaction_type=posting.transaction_type,
+                tracking_reference=posting.tracking_reference,
+                request_reference=result.request_reference,
+            )
+        except TRANSIENT_EXCEPTIONS as error:
+            result.error = str(error)
+            return True, True
+        except httpx.TransportError as error:
+            # Unless it couldn't connect, the request may have reached Kuda before the
+            # connection broke, e.g. on a read error, so it's as ambiguous as a timeout.
+            result.error = str(error)
+            return True, not isinstance(error, httpx.ConnectError)
+        except Exception as error:
+            result.error = str(error)
+            return False, False
+        result.error = None
+        return (
+            _is_transient(result.response),
+            result.response.status_code in _AMBIGUOUS_STATUS_CODES,
+        )
+
+    def _post(
+        self, item: Union[_Item, PostingResult], results: _ResultsFile
+    ) -> PostingResult:
+        if isinstance(item, PostingResult):
+            return item
+        result = PostingResult(*item)
+        ambiguous = False
+        while True:
+            retry, uncertain = self._send(result)
+            ambiguous = ambiguous or uncertain
+            if not retry or result.attempts >= self.max_attempts:
+                break
+            time.sleep(self.backoff.delay(result.attempts - 1))
+        _settle(result, ambiguous)
+        results.write(result)
+        return result
+
+    def post(
+        self, postings: Iterable[Iterable], results_path: Optional[str] = None
+    ) -> Iterator[PostingResult]:
+        """Sends the postings.
+
+        Args:
+            postings: `SavingsPosting`s or `(tracking_reference, amount,
+                transaction_type, narration)` tuples, in the same order every time the
+                run is started. They're streamed, so they can come straight from a file.
+            results_path: The path of the JSON lines file the results are appended to.
+
+        Returns:
+            An iterator of the `PostingResult` of every posting, in the order they
+            complete.
+        """
+        results = _ResultsFile(results_path)
+        try:
+            for result in bounded_map(
+                lambda item: self._post(item, results),
+                _items(self.run_id, postings, results.settled),
+                self.concurrency,
+            ):
+                yield result
+        finally:
+            results.close()
+
+    def post_all(
+        self, postings: Iterable[Iterable], results_path: Optional[str] = None
+    ) -> Counter:
+        """Sends the postings and counts their outcomes.
+
+        Args:
+            postings: The postings to send.
+            results_path: The path of the JSON lines file the results are appended to.
+
+        Returns:
+            A `Counter` of the `PostingStatus` of the postings.
+        """
+        return Counter(result.status for result in self.post(postings, results_path))
+
+
+class AsyncBulkSavingsPoster:
+    """The asynchronous equivalent of `BulkSavingsPoster`.
+
+    Args:
+        savings: The `AsyncSavings` wrapper the postings are sent with.
+        run_id: The identifier of the run, which has to be the same when a run is
+            started again.
+        concurrency: The maximum number of postings in flight.
+        rate_limiter: An optional `RateLimiter` every request waits for.
+        max_attempts: The maximum number of times a posting is sent.
+        backoff: The `Backoff` policy spacing out the attempts of a posting.
+    """
+
+    def __init__(
+        self,
+        savings: "AsyncSavings",
+        run_id: str,
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff: Optional[Backoff] = None,
+    ):
+        self.savings = pooled(savings)
+        self.run_id = run_id
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.max_attempts = max_attempts
+        self.backoff = backoff or Backoff(initial=0.5, maximum=10.0)
+
+    async def _send(self, result: PostingResult) -> Tuple[bool, bool]:
+        """Sends a posting once, returning whether it's worth sending again and
+        whether Kuda may have applied it without saying so."""
+        posting = result.posting
+        result.attempts += 1
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            result.response = await self.savings.credit_or_debit_plain_savings_account(
+                amount=posting.amount,
+                narration=posting.narration,
+                transaction_type=posting.transaction_type,
+                tracking_reference=posting.tracking_reference,
+                request_reference=result.request_reference,
+            )
+        except TRANSIENT_EXCEPTIONS as error:
+            result.error = str(error)
+            return True, True
+        except httpx.TransportError as error:
+            # Unless it couldn't connect, the request may have reached Kuda before the
+            # connection broke, e.g. on a read error, so it's as ambiguous as a timeout.
+            result.error = str(error)
+            return True, not isinstance(error, httpx.ConnectError)
+        except Exception as error:
+            result.error = str(error)
+            return False, False
+        result.error = None
+        return (
+            _is_transient(result.response),
+            result.response.status_code in _AMBIGUOUS_STATUS_CODES,
+        )
+
+    async def _post(
+        self, item: Union[_Item, PostingResult], results: _ResultsFile
+    ) -> PostingResult:
+        if isinstance(item, PostingResult):
+            return item
+        result = PostingResult(*item)
+        ambiguous = False
+        while True:
+            retry, uncertain = await self._send(result)
+            ambiguous = ambiguous or uncertain
+            if not retry or result.attempts >= self.max_attempts:
+                break
+            await asyncio.sleep(self.backoff.delay(result.attempts - 1))
+        _settle(result, ambiguous)
+        results.write(result)
+        return result
+
+    async def post(
+        self, postings: Iterable[Iterable], results_path: Optional[str] = None
+    ) -> AsyncIterator[PostingResult]:
+        """Sends the postings.
+
+        Args:
+            postings: `SavingsPosting`s or `(tracking_reference, amount,
+                transaction_type, narration)` tuples, in the same order every time the
+                run is started.
+            results_path: The path of the JSON lines file the results are appended to.
+
+        Returns:
+            An asynchronous iterator of the `PostingResult` of every posting, in the
+            order they complete.
+        """
+        results = _ResultsFile(results_path)
+        try:
+            async for result in bounded_map_async(
+                lambda item: self._post(item, results),
+                _items(self.run_id, postings, results.settled),
+                self.concurrency,
+            ):
+                yield result
+        finally:
+            results.close()
+
+    async def post_all(
+        self, postings: Iterable[Iterable], results_path: Optional[str] = None
+    ) -> Counter:
+        """Sends the postings and counts their outcomes.
+
+        Args:
+            postings: The postings to send.
+            results_path: The path of the JSON lines file the results are appended to.
+
+        Returns:
+            A `Counter` of the `PostingStatus` of the postings.
+        """
+        return Counter(
+            [result.status async for result in self.post(postings, results_path)]
+        )
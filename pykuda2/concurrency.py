@@ -0,0 +1,192 @@
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+W = TypeVar("W")
+
+
+class RateLimiter:
+    """A thread-safe token bucket used to keep calls to Kuda under a global rate limit.
+
+    Every call to `acquire` (or `acquire_async`) reserves a token. When the bucket is
+    empty the reservation is still made, and the caller simply waits until the token it
+    reserved has been refilled, so callers are served in the order they arrived.
+
+    Args:
+        rate: The number of calls allowed per second.
+        burst: The maximum number of calls that can be made back to back before the
+            limit kicks in. It defaults to `rate` rounded up to at least 1.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("`rate` must be greater than zero")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def _reserve(self) -> float:
+        """Reserves a token and returns how long the caller has to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available without waiting.
+
+        Returns:
+            `True` if a token was taken and `False` if the rate limit has been reached.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> None:
+        """Blocks the current thread until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Suspends the current task until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def pooled(wrapper: W) -> W:
+    """Returns `wrapper` once it reuses its connections across requests.
+
+    It calls the `pool_connections` method of the wrappers, so a wrapper given neither
+    a `client` nor a `transport` doesn't open a new connection for every one of the
+    concurrent calls it's about to make. Close the wrapper to close the client it gets.
+    Objects without that method, e.g. test doubles, are returned as they are.
+
+    Args:
+        wrapper: The API wrapper the concurrent calls are made with.
+    """
+    pool_connections = getattr(wrapper, "pool_connections", None)
+    if pool_connections is not None:
+        pool_connections()
+    return wrapper
+
+
+def bounded_map(
+    function: Callable[[T], R], items: Iterable[T], concurrency: int
+) -> Iterator[R]:
+    """Calls `function` on every item from `concurrency` threads and yields the results
+    in the order they complete.
+
+    Items are pulled from `items` as results are consumed, never more than `concurrency`
+    ahead, so it can stream through an iterable too large to hold in memory. The calls
+    not started yet are cancelled when the iterator is closed early.
+
+    Concurrent calls to Kuda only reuse connections when the wrapper they're made with
+    has a client, so the helpers built on `bounded_map` (and `bounded_map_async`) pass
+    their wrapper through `pooled`, which gives it one if it has none.
+
+    Args:
+        function: The function called on every item.
+        items: The items `function` is called on.
+        concurrency: The maximum number of calls in flight.
+
+    Raises:
+        Exception: any exception raised by `function`, once its result is reached.
+    """
+    if concurrency < 1:
+        raise ValueError("`concurrency` must be at least 1")
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {
+            executor.submit(function, item)
+            for item in itertools.islice(iterator, concurrency)
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for item in itertools.islice(iterator, len(done)):
+                    pending.add(executor.submit(function, item))
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def _aiter(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_map_async(
+    function: Callable[[T], Awaitable[R]],
+    items: Union[Iterable[T], AsyncIterable[T]],
+    concurrency: int,
+) -> AsyncIterator[R]:
+    """The asynchronous equivalent of `bounded_map`, which runs `concurrency` tasks.
+
+    Args:
+        function: The coroutine function called on every item.
+        items: The items `function` is called on, either an iterable or an asynchronous
+            iterable (e.g. one fetching the items page by page).
+        concurrency: The maximum number of calls in flight.
+    """
+    if concurrency < 1:
+        raise ValueError("`concurrency` must be at least 1")
+    iterator = _aiter(items)
+
+    async def start(count: int) -> None:
+        for _ in range(count):
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            pending.add(asyncio.ensure_future(function(item)))
+
+    pending: set = set()
+    try:
+        await start(concurrency)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            await start(len(done))
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,385 @@
+import json
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from pykuda2.pagination import (
+    DEFAULT_PAGE_SIZE,
+    iter_virtual_accounts,
+    iter_virtual_accounts_async,
+)
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+    from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS virtual_accounts (
+    tracking_reference TEXT PRIMARY KEY,
+    account TEXT NOT NULL
+)
+"""
+
+
+def _email_key(email: Optional[str]) -> Optional[str]:
+    return email.strip().lower() if email else None
+
+
+class VirtualAccountIndex:
+    """An in-memory store of virtual accounts indexed by tracking reference, account
+    number and email, optionally persisted to SQLite.
+
+    Accounts are stored as the dicts Kuda returns them as, e.g. by
+    `Account.get_virtual_accounts`. Emails are matched case insensitively and can be
+    shared by several accounts. It can be shared between threads: lookups take the
+    same lock as writes, which update the indexes one after the other.
+
+    Args:
+        path: The path of an optional SQLite database the accounts are persisted to and
+            loaded from.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._accounts: Dict[str, dict] = {}
+        self._by_account_number: Dict[str, str] = {}
+        self._by_email: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(_SCHEMA)
+            for (account,) in self._connection.execute(
+                "SELECT account FROM virtual_accounts"
+            ):
+                self._index(json.loads(account))
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __contains__(self, tracking_reference: str) -> bool:
+        return tracking_reference in self._accounts
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._accounts.values()))
+
+    def get(self, tracking_reference: str) -> Optional[dict]:
+        """Returns the account with a tracking reference, if it's known."""
+        with self._lock:
+            return self._accounts.get(tracking_reference)
+
+    def get_by_account_number(self, account_number: str) -> Optional[dict]:
+        """Returns the account with an account number, if it's known."""
+        with self._lock:
+            tracking_reference = self._by_account_number.get(account_number)
+            return (
+                self._accounts.get(tracking_reference) if tracking_reference else None
+            )
+
+    def get_by_email(self, email: str) -> List[dict]:
+        """Returns the accounts with an email address."""
+        with self._lock:
+            return [
+                self._accounts[tracking_reference]
+                for tracking_reference in self._by_email.get(_email_key(email), ())
+            ]
+
+    def _unindex(self, tracking_reference: str) -> None:
+        account = self._accounts.pop(tracking_reference, None)
+        if account is None:
+            return
+        self._by_account_number.pop(account.get("accountNumber"), None)
+        email = _email_key(account.get("email"))
+        references = self._by_email.get(email)
+        if references is not None:
+            references.discard(tracking_reference)
+            if not references:
+                del self._by_email[email]
+
+    def _index(self, account: dict) -> None:
+        tracking_reference = account["trackingReference"]
+        self._unindex(tracking_reference)
+        self._accounts[tracking_reference] = account
+        if account.get("accountNumber"):
+            self._by_account_number[account["accountNumber"]] = tracking_reference
+        email = _email_key(account.get("email"))
+        if email:
+            self._by_email.setdefault(email, set()).add(tracking_reference)
+
+    def put(self, account: dict) -> None:
+        """Adds an account, or replaces the account with the same tracking reference."""
+        with self._lock:
+            self._index(account)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO virtual_accounts VALUES (?, ?)",
+                        (account["trackingReference"], json.dumps(account)),
+                    )
+
+    def replace_all(self, accounts: Iterable[dict]) -> None:
+        """Replaces every account stored with `accounts`, in a single transaction."""
+        accounts = [account for account in accounts if account.get("trackingReference")]
+        with self._lock:
+            self._accounts.clear()
+            self._by_account_number.clear()
+            self._by_email.clear()
+            for account in accounts:
+                self._index(account)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM virtual_accounts")
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO virtual_accounts VALUES (?, ?)",
+                        (
+                            (account["trackingReference"], json.dumps(account))
+                            for account in accounts
+                        ),
+                    )
+
+    def update(self, tracking_reference: str, **fields) -> Optional[dict]:
+        """Updates some fields of an account, if it's known, and returns it."""
+        with self._lock:
+            account = self._accounts.get(tracking_reference)
+            if account is None:
+                return None
+            account = {**account, **fields}
+            self.put(account)
+            return account
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+
+
+def _account_from_response(response: APIResponse) -> Optional[dict]:
+    if not response.status or not isinstance(response.data, dict):
+        return None
+    account = response.data.get("account")
+    return account if isinstance(account, dict) else None
+
+
+def _created_account(response: APIResponse, kwargs: dict) -> dict:
+    return {
+        "accountNumber": response.data.get("accountNumber"),
+        "email": kwargs.get("email"),
+        "phoneNumber": kwargs.get("phone_number"),
+        "lastName": kwargs.get("last_name"),
+        "firstName": kwargs.get("first_name"),
+        "middleName": kwargs.get("middle_name"),
+        "businessName": kwargs.get("business_name"),
+        "trackingReference": kwargs["tracking_reference"],
+        "isDeleted": False,
+    }
+
+
+def _updated_fields(
+    first_name: Optional[str], last_name: Optional[str], email: Optional[str]
+) -> dict:
+    fields = {"firstName": first_name, "lastName": last_name, "email": email}
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+class VirtualAccountDirectory(VirtualAccountIndex):
+    """A local directory of your virtual accounts, for lookups that don't call Kuda.
+
+    The directory is populated by `refresh`, which paginates all your virtual accounts,
+    and kept fresh by making the calls that change virtual accounts through it, which
+    write the changes through to the directory once Kuda accepted them. Lookups by
+    tracking reference, account number or email are dictionary lookups.
+
+    Args:
+        accounts: The `Account` wrapper the calls are made with.
+        path: The path of an optional SQLite database the directory is persisted to, so
+            it doesn't have to be refreshed when the process restarts.
+
+    Example:
+        ```python
+        directory = VirtualAccountDirectory(kuda.accounts, path="accounts.db")
+        if not len(directory):
+            directory.refresh()
+        account = directory.get_by_account_number("2500000001")
+        ```
+    """
+
+    def __init__(self, accounts: "Account", path: Optional[str] = None):
+        super().__init__(path=path)
+        self.accounts = accounts
+
+    def refresh(self, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        """Replaces the content of the directory with all your virtual accounts.
+
+        Raises:
+            PaginationException: when a page of virtual accounts can't be retrieved.
+        """
+        self.replace_all(iter_virtual_accounts(self.accounts, page_size=page_size))
+
+    def fetch(self, tracking_reference: str) -> Optional[dict]:
+        """Returns the account with a tracking reference, retrieving it from Kuda when
+        it isn't in the directory yet."""
+        account = self.get(tracking_reference)
+        if account is None:
+            account = _account_from_response(
+                self.accounts.get_virtual_account(tracking_reference=tracking_reference)
+            )
+            if account is not None:
+                self.put(account)
+        return account
+
+    def create_virtual_account(self, **kwargs) -> APIResponse:
+        """Creates a virtual account with `Account.create_virtual_account` and adds it
+        to the directory."""
+        response = self.accounts.create_virtual_account(**kwargs)
+        if response.status and isinstance(response.data, dict):
+            self.put(_created_account(response, kwargs))
+        return response
+
+    def update_virtual_account(
+        self,
+        tracking_reference: str,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        request_reference: Optional[str] = None,
+    ) -> APIResponse:
+        """Updates a virtual account with `Account.update_virtual_account` and in the directory."""
+        response = self.accounts.update_virtual_account(
+            tracking_reference=tracking_reference,
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            request_reference=request_reference,
+        )
+        if response.status:
+            account = _account_from_response(response)
+            if account is not None:
+                self.put(account)
+            else:
+                self.update(
+                    tracking_reference, **_updated_fields(first_name, last_name, email)
+                )
+        return response
+
+    def disable_virtual_account(
+        self, tracking_reference: str, request_reference: Optional[str] = None
+    ) -> APIResponse:
+        """Disables a virtual account with `Account.disable_virtual_account` and in the directory."""
+        response = self.accounts.disable_virtual_account(
+            tracking_reference=tracking_reference, request_reference=request_reference
+        )
+        if response.status:
+            self.update(tracking_reference, isDeleted=True)
+        return response
+
+    def enable_virtual_account(
+        self, tracking_reference: str, request_reference: Optional[str] = None
+    ) -> APIResponse:
+        """Enables a virtual account with `Account.enable_virtual_account` and in the directory."""
+        response = self.accounts.enable_virtual_account(
+            tracking_reference=tracking_reference, request_reference=request_reference
+        )
+        if response.status:
+            self.update(tracking_reference, isDeleted=False)
+        return response
+
+
+class AsyncVirtualAccountDirectory(VirtualAccountIndex):
+    """The asynchronous equivalent of `VirtualAccountDirectory`.
+
+    Lookups are synchronous since they never call Kuda.
+
+    Args:
+        accounts: The `AsyncAccount` wrapper the calls are made with.
+        path: The path of an optional SQLite database the directory is persisted to.
+    """
+
+    def __init__(self, accounts: "AsyncAccount", path: Optional[str] = None):
+        super().__init__(path=path)
+        self.accounts = accounts
+
+    async def refresh(self, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        """Replaces the content of the directory with all your virtual accounts.
+
+        Raises:
+            PaginationException: when a page of virtual accounts can't be retrieved.
+        """
+        self.replace_all(
+            [
+                account
+                async for account in iter_virtual_accounts_async(
+                    self.accounts, page_size=page_size
+                )
+            ]
+        )
+
+    async def fetch(self, tracking_reference: str) -> Optional[dict]:
+        """Returns the account with a tracking reference, retrieving it from Kuda when
+        it isn't in the directory yet."""
+        account = self.get(tracking_reference)
+        if account is None:
+            account = _account_from_response(
+                await self.accounts.get_virtual_account(
+                    tracking_reference=tracking_reference
+                )
+            )
+            if account is not None:
+                self.put(account)
+        return account
+
+    async def create_virtual_account(self, **kwargs) -> APIResponse:
+        """Creates a virtual account with `AsyncAccount.create_virtual_account` and adds
+        it to the directory."""
+        response = await self.accounts.create_virtual_account(**kwargs)
+        if response.status and isinstance(response.data, dict):
+            self.put(_created_account(response, kwargs))
+        return response
+
+    async def update_virtual_account(
+        self,
+        tracking_reference: str,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        request_reference: Optional[str] = None,
+    ) -> APIResponse:
+        """Updates a virtual account with `AsyncAccount.update_virtual_account` and in the directory."""
+        response = await self.accounts.update_virtual_account(
+            tracking_reference=tracking_reference,
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            request_reference=request_reference,
+        )
+        if response.status:
+            account = _account_from_response(response)
+            if account is not None:
+                self.put(account)
+            else:
+                self.update(
+                    tracking_reference, **_updated_fields(first_name, last_name, email)
+                )
+        return response
+
+    async def disable_virtual_account(
+        self, tracking_reference: str, request_reference: Optional[str] = None
+    ) -> APIResponse:
+        """Disables a virtual account with `AsyncAccount.disable_virtual_account` and in the directory."""
+        response = await self.accounts.disable_virtual_account(
+            tracking_reference=tracking_reference, request_reference=request_reference
+        )
+        if response.status:
+            self.update(tracking_reference, isDeleted=True)
+        return response
+
+    async def enable_virtual_account(
+        self, tracking_reference: str, request_reference: Optional[str] = None
+    ) -> APIResponse:
+        """Enables a virtual account with `AsyncAccount.enable_virtual_account` and in the directory."""
+        response = await self.accounts.enable_virtual_account(
+            tracking_reference=tracking_reference, request_reference=request_reference
+        )
+        if response.status:
+            self.update(tracking_reference, isDeleted=False)
+        return response
@@ -0,0 +1,730 @@
+import functools
+import inspect
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Optional, Tuple
+
+from pykuda2.utils import HTTPMethod, ServiceType
+
+
+class Idempotency(str, Enum):
+    """How safe it is to repeat a call to an endpoint, e.g. when retrying it.
+
+    `READ` calls have no side effect, so they can be retried and cached freely.
+    `IDEMPOTENT` calls have a side effect Kuda applies at most once per request (e.g. per
+    tracking reference), so they can be retried with the same arguments. Retrying
+    `UNSAFE` calls may apply their side effect twice, e.g. move money twice.
+    """
+
+    READ = "read"
+    IDEMPOTENT = "idempotent"
+    UNSAFE = "unsafe"
+
+
+@dataclass(frozen=True)
+class Field:
+    """An argument of an endpoint and the key it's sent as in the payload.
+
+    Args:
+        name: The name of the argument of the wrapper method.
+        key: The key of the argument in the payload sent to Kuda.
+        optional: Optional arguments default to `None` and are left out of the payload
+            when they're empty.
+    """
+
+    name: str
+    key: str
+    optional: bool = False
+
+
+@dataclass(frozen=True)
+class Pagination:
+    """Where the page arguments of a paginated endpoint are and where its items are returned.
+
+    Args:
+        page_size: The name of the argument giving the size of a page.
+        page_number: The name of the argument giving the number of a page, from 1.
+        items_key: The key of the items of a page in the data of the response.
+    """
+
+    page_size: str
+    page_number: str
+    items_key: str
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """The declaration of a Kuda endpoint, from which wrapper methods are generated.
+
+    Args:
+        service_type: The service type the endpoint is called with.
+        fields: The arguments of the endpoint, in the order the wrapper method takes them.
+        method: The HTTP method the endpoint is called with.
+        endpoint_path: The path of the endpoint, relative to the base url.
+        pagination: Where the page arguments and items of a paginated endpoint are.
+        idempotency: How safe it is to repeat a call to the endpoint.
+        require_any: The optional arguments at least one of which must be provided.
+    """
+
+    service_type: ServiceType
+    fields: Tuple[Field, ...] = ()
+    method: HTTPMethod = HTTPMethod.POST
+    endpoint_path: Optional[str] = None
+    pagination: Optional[Pagination] = None
+    idempotency: Idempotency = Idempotency.READ
+    require_any: Tuple[str, ...] = ()
+    build_payload: Callable[..., Optional[dict]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(self, "build_payload", _compile_payload_builder(self))
+
+    @property
+    def argument_names(self) -> Tuple[str, ...]:
+        return tuple(item.name for item in self.fields)
+
+
+def _compile_payload_builder(endpoint: Endpoint) -> Callable[..., Optional[dict]]:
+    """Compiles a function that takes the arguments of an endpoint positionally and
+    returns its payload, so no mapping has to be walked on every call."""
+    arguments = ", ".join(endpoint.argument_names)
+    if not endpoint.fields:
+        return _compile("def build():\n    return None\n", "build", {})
+    lines = [f"def build({arguments}):"]
+    required = [item for item in endpoint.fields if not item.optional]
+    entries = ", ".join(f"{item.key!r}: {item.name}" for item in required)
+    lines.append(f"    data = {{{entries}}}")
+    for item in endpoint.fields:
+        if item.optional:
+            lines.append(f"    if {item.name}:")
+            lines.append(f"        data[{item.key!r}] = {item.name}")
+    lines.append("    return data")
+    return _compile("\n".join(lines) + "\n", "build", {})
+
+
+def _compile(source: str, name: str, namespace: dict) -> Callable:
+    exec(compile(source, f"<pykuda2.endpoints {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _compile_method(
+    endpoint: Endpoint, name: str, asynchronous: bool
+) -> Callable[..., object]:
+    """Compiles the body of a wrapper method calling `endpoint`.
+
+    The wrapper classes only declare their endpoint methods as stubs: a signature and a
+    docstring decorated with `endpoint_method`, and no body. The decorator swaps each
+    stub for a method compiled here with `exec`, whose source spells out the parameters
+    of the stub and passes them positionally to the compiled `build_payload` of the
+    endpoint. For example the stub of `Account.get_virtual_account` becomes:
+
+        def get_virtual_account(self, tracking_reference, request_reference):
+            return self._api_call(service_type=endpoint.service_type,
+                data=build(tracking_reference), method=endpoint.method,
+                endpoint_path=endpoint.endpoint_path,
+                request_reference=request_reference)
+
+    Compiling the methods, rather than sharing one generic method that walks the fields
+    of the endpoint, keeps a call as cheap as the hand written methods were. The
+    asynchronous twin of a wrapper declares the same stubs with `async def`, and gets
+    the same body awaiting `_api_call`. Methods that do more than send their arguments,
+    e.g. purchases returning a pending purchase, stay hand written but still take their
+    service type and payload from their endpoint.
+    """
+    parameters = ", ".join((*endpoint.argument_names, "request_reference"))
+    arguments = ", ".join(endpoint.argument_names)
+    lines = [f"{'async ' if asynchronous else ''}def {name}(self, {parameters}):"]
+    if endpoint.require_any:
+        names = [f"`{argument}`" for argument in endpoint.require_any]
+        names = " or ".join(filter(None, (", ".join(names[:-1]), names[-1])))
+        message = f"At least one of the parameters {names} must be provided"
+        lines.append(f"    if not ({' or '.join(endpoint.require_any)}):")
+        lines.append(f"        raise ValueError({message!r})")
+    lines.append(
+        f"    return {'await ' if asynchronous else ''}self._api_call("
+        f"service_type=endpoint.service_type, data=build({arguments}), "
+        "method=endpoint.method, endpoint_path=endpoint.endpoint_path, "
+        "request_reference=request_reference)"
+    )
+    return _compile(
+        "\n".join(lines) + "\n",
+        name,
+        {"endpoint": endpoint, "build": endpoint.build_payload},
+    )
+
+
+def endpoint_method(endpoint: Endpoint) -> Callable[[Callable], Callable]:
+    """Replaces the body of a wrapper method with one generated from `endpoint`.
+
+    The decorated method only declares the signature and docstring of the method, so
+    editors and the documentation keep seeing them, and may be either synchronous or
+    asynchronous. Its parameters must be the fields of the endpoint followed by
+    `request_reference`, which is checked when the method is defined. The body it's
+    given is described in `_compile_method`, and the defaults of the stub are kept.
+
+    Example:
+        ```python
+        class Account(BaseAPIWrapper):
+            @endpoint_method(ACCOUNT_ENDPOINTS["get_virtual_account"])
+            def get_virtual_account(
+                self, tracking_reference: str, request_reference: Optional[str] = None
+            ) -> APIResponse:
+                \"\"\"Retrieves an existing virtual account.\"\"\"
+        ```
+    """
+
+    def decorator(declaration: Callable) -> Callable:
+        parameters = tuple(inspect.signature(declaration).parameters)[1:]
+        expected = (*endpoint.argument_names, "request_reference")
+        if parameters != expected:
+            raise TypeError(
+                f"The parameters of {declaration.__qualname__} {parameters} don't match "
+                f"the fields of its endpoint {expected}"
+            )
+        method = _compile_method(
+            endpoint,
+            declaration.__name__,
+            asynchronous=inspect.iscoroutinefunction(declaration),
+        )
+        method.__defaults__ = declaration.__defaults__
+        method = functools.wraps(declaration)(method)
+        method.endpoint = endpoint
+        return method
+
+    return decorator
+
+
+ACCOUNT_ENDPOINTS: Dict[str, Endpoint] = {
+    "create_virtual_account": Endpoint(
+        service_type=ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT,
+        fields=(
+            Field("email", "email"),
+            Field("phone_number", "phoneNumber"),
+            Field("last_name", "lastName"),
+            Field("first_name", "firstName"),
+            Field("middle_name", "middleName"),
+            Field("business_name", "businessName"),
+            Field("tracking_reference", "trackingReference"),
+        ),
+        # Kuda rejects a second account with the same tracking reference.
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "update_virtual_account": Endpoint(
+        service_type=ServiceType.ADMIN_UPDATE_VIRTUAL_ACCOUNT,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("first_name", "firstName", optional=True),
+            Field("last_name", "lastName", optional=True),
+            Field("email", "email", optional=True),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+        require_any=("first_name", "last_name", "email"),
+    ),
+    "get_virtual_accounts": Endpoint(
+        service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNTS,
+        fields=(Field("page_size", "PageSize"), Field("page_number", "PageNumber")),
+        pagination=Pagination(
+            page_size="page_size", page_number="page_number", items_key="accounts"
+        ),
+    ),
+    "get_virtual_account": Endpoint(
+        service_type=ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT,
+        fields=(Field("tracking_reference", "trackingReference"),),
+    ),
+    "disable_virtual_account": Endpoint(
+        service_type=ServiceType.ADMIN_DISABLE_VIRTUAL_ACCOUNT,
+        fields=(Field("tracking_reference", "trackingReference"),),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "enable_virtual_account": Endpoint(
+        service_type=ServiceType.ADMIN_ENABLE_VIRTUAL_ACCOUNT,
+        fields=(Field("tracking_reference", "trackingReference"),),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "get_admin_account_balance": Endpoint(
+        service_type=ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE,
+    ),
+    "get_virtual_account_balance": Endpoint(
+        service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE,
+        fields=(Field("tracking_reference", "trackingReference"),),
+    ),
+}
+
+SAVINGS_ENDPOINTS: Dict[str, Endpoint] = {
+    "create_plain_savings_account": Endpoint(
+        service_type=ServiceType.CREATE_PLAIN_SAVE,
+        fields=(
+            Field("name", "Name"),
+            Field("tracking_reference", "TrackingReference"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "get_plain_savings_account": Endpoint(
+        service_type=ServiceType.GET_PLAIN_SAVE,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("primary_account_number", "PrimaryAccountNumber"),
+        ),
+    ),
+    "get_plain_savings_accounts": Endpoint(
+        service_type=ServiceType.GET_ALL_CUSTOMER_PLAIN_SAVE,
+        fields=(Field("tracking_reference", "TrackingReference"),),
+    ),
+    "credit_or_debit_plain_savings_account": Endpoint(
+        service_type=ServiceType.PLAIN_SAVE_DEBIT_CREDIT,
+        fields=(
+            Field("amount", "Amount"),
+            Field("narration", "Narration"),
+            Field("transaction_type", "TransactionType"),
+            Field("tracking_reference", "TrackingReference"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "get_plain_savings_account_transactions": Endpoint(
+        service_type=ServiceType.RETRIEVE_PLAIN_SAVE_TRANSACTIONS,
+        fields=(
+            Field("page_size", "PageSize"),
+            Field("page_number", "PageNumber"),
+            Field("tracking_reference", "TrackingReference"),
+        ),
+    ),
+    "create_open_flexible_savings_account": Endpoint(
+        service_type=ServiceType.CREATE_OPEN_FLEXIBLE_SAVE,
+        fields=(
+            Field("savings_tracking_reference", "SavingsTrackingReference"),
+            Field("name", "Name"),
+            Field(
+                "virtual_account_tracking_reference", "VirtualAccountTrackingReference"
+            ),
+            Field("amount", "Amount"),
+            Field("duration", "Duration"),
+            Field("frequency", "Frequency"),
+            Field("start_now", "StartNow"),
+            Field("start_date", "StartData"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "pre_create_open_flexible_savings_account": Endpoint(
+        service_type=ServiceType.PRE_CREATE_OPEN_FLEXIBLE_SAVE,
+        fields=(
+            Field("savings_tracking_reference", "SavingsTrackingReference"),
+            Field("name", "Name"),
+            Field(
+                "virtual_account_tracking_reference", "VirtualAccountTrackingReference"
+            ),
+            Field("amount", "Amount"),
+            Field("duration", "Duration"),
+            Field("frequency", "Frequency"),
+            Field("start_now", "StartNow"),
+            Field("start_date", "StartData"),
+            Field("is_interest_earning", "IsInterestEarning"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "get_open_flexible_savings_account": Endpoint(
+        service_type=ServiceType.GET_OPEN_FLEXIBLE_SAVE,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("primary_account_number", "PrimaryAccountNumber"),
+        ),
+    ),
+    "get_open_flexible_savings_accounts": Endpoint(
+        service_type=ServiceType.GET_ALL_CUSTOMER_OPEN_FLEXIBLE_SAVE,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("primary_account_number", "PrimaryAccountNumber"),
+        ),
+    ),
+    "withdrawal_from_flexible_savings_account": Endpoint(
+        service_type=ServiceType.COMPLETE_OPEN_FLEXIBLE_SAVE_WITHDRAWAL,
+        fields=(
+            Field("amount", "Amount"),
+            Field("tracking_reference", "TrackingReference"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "get_flexible_savings_account_transactions": Endpoint(
+        service_type=ServiceType.RETRIEVE_OPEN_FLEXIBLE_SAVE_TRANSACTIONS,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("page_size", "PageSize"),
+            Field("page_number", "PageNumber"),
+        ),
+    ),
+    "create_fixed_savings_account": Endpoint(
+        service_type=ServiceType.CREATE_FIXED_SAVE,
+        fields=(
+            Field("savings_tracking_reference", "SavingsTrackingReference"),
+            Field("name", "Name"),
+            Field(
+                "virtual_account_tracking_reference", "VirtualAccountTrackingReference"
+            ),
+            Field("amount", "Amount"),
+            Field("duration", "Duration"),
+            Field("frequency", "Frequency"),
+            Field("start_now", "StartNow"),
+            Field("start_date", "StartData"),
+            Field("is_interest_earning", "IsInterestEarning"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "get_fixed_savings_account": Endpoint(
+        service_type=ServiceType.GET_FIXED_SAVE,
+        fields=(Field("tracking_reference", "SavingsId"),),
+    ),
+    "get_fixed_savings_accounts": Endpoint(
+        service_type=ServiceType.GET_ALL_CUSTOMER_FIXED_SAVE,
+        fields=(Field("tracking_reference", "TrackingReference"),),
+    ),
+    "close_fixed_savings_account": Endpoint(
+        service_type=ServiceType.COMPLETE_FIXED_SAVE_WITHDRAWAL,
+        fields=(Field("amount", "Amount"), Field("tracking_reference", "SavingsId")),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "get_fixed_savings_account_transactions": Endpoint(
+        service_type=ServiceType.RETRIEVE_FIXED_SAVE_TRANSACTIONS,
+        fields=(
+            Field("tracking_reference", "SavingsId"),
+            Field("page_number", "PageNumber"),
+            Field("page_size", "PageSize"),
+        ),
+    ),
+}
+
+CARD_ENDPOINTS: Dict[str, Endpoint] = {
+    "request_card": Endpoint(
+        service_type=ServiceType.REQUEST_CARD,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("name_on_card", "NameOnCard"),
+            Field("country", "Country"),
+            Field("gender", "Gender"),
+            Field("additional_phone_number", "additionalPhoneNumber"),
+            Field("delivery_city", "DeliveryCity"),
+            Field("delivery_lga", "DeliveryLGA"),
+            Field("delivery_landmark", "DeliveryLandmark"),
+            Field("date_of_birth", "dateofBirth"),
+            Field("delivery_state", "DeliveryState"),
+            Field("delivery_street_no_and_name", "DeliveryStreetNoAndName"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "get_cards": Endpoint(
+        service_type=ServiceType.GET_CUSTOMER_CARDS,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("simulate_request", "SimulateRequest"),
+        ),
+    ),
+    "activate_card": Endpoint(
+        service_type=ServiceType.ACTIVATE_CARD,
+        fields=(
+            Field("pan", "Pan"),
+            Field("cvv", "CVV"),
+            Field("id", "Id"),
+            Field("tracking_reference", "TrackingReference"),
+            Field("simulate_request", "SimulateRequest"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "deactivate_card": Endpoint(
+        service_type=ServiceType.DEACTIVATE_CARD,
+        fields=(
+            Field("id", "Id"),
+            Field("tracking_reference", "TrackingReference"),
+            Field("simulate_request", "SimulateRequest"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "set_card_limit": Endpoint(
+        service_type=ServiceType.MANAGE_CARD_TRANSACTION_LIMIT,
+        fields=(
+            Field("id", "Id"),
+            Field("tracking_reference", "TrackingReference"),
+            Field("channel", "Channel"),
+            Field("limit", "Limit"),
+            Field("simulate_request", "SimulateRequest"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "manage_card_channel": Endpoint(
+        service_type=ServiceType.MANAGE_CARD_CHANNEL,
+        fields=(
+            Field("id", "Id"),
+            Field("tracking_reference", "TrackingReference"),
+            Field("channel", "Channel"),
+            Field("limit", "Limit"),
+            Field("simulate_request", "SimulateRequest"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "change_card_pin": Endpoint(
+        service_type=ServiceType.CHANGE_CARD_PIN,
+        fields=(
+            Field("id", "Id"),
+            Field("tracking_reference", "TrackingReference"),
+            Field("new_pin", "NewPIN"),
+        ),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "block_card": Endpoint(
+        service_type=ServiceType.BLOCK_CARD,
+        fields=(Field("tracking_reference", "TrackingReference"), Field("id", "Id")),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+    "unblock_card": Endpoint(
+        service_type=ServiceType.UNBLOCK_CARD,
+        fields=(Field("tracking_reference", "TrackingReference"), Field("id", "Id")),
+        idempotency=Idempotency.IDEMPOTENT,
+    ),
+}
+
+TRANSACTION_ENDPOINTS: Dict[str, Endpoint] = {
+    "get_banks": Endpoint(service_type=ServiceType.BANK_LIST),
+    "confirm_transfer_recipient": Endpoint(
+        service_type=ServiceType.NAME_ENQUIRY,
+        fields=(
+            Field("beneficiary_account_number", "beneficiaryAccountNumber"),
+            Field("beneficiary_bank_code", "beneficiaryBankCode"),
+            Field("sender_tracking_reference", "SenderTrackingReference"),
+            Field("is_request_from_virtual_account", "isRequestFromVirtualAccount"),
+        ),
+    ),
+    "fund_transfer": Endpoint(
+        service_type=ServiceType.SINGLE_FUND_TRANSFER,
+        fields=(
+            Field("beneficiary_account", "beneficiaryAccount"),
+            Field("beneficiary_bank_code", "beneficiaryBankCode"),
+            Field("beneficiary_name", "beneficiaryName"),
+            Field("amount", "amount"),
+            Field("narration", "narration"),
+            Field("name_enquiry_session_id", "nameEnquirySessionID"),
+            Field("sender_name", "senderName"),
+            Field("client_fee_charge", "clientFeeCharge"),
+            Field("client_account_number", "ClientAccountNumber"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "virtual_account_fund_transfer": Endpoint(
+        service_type=ServiceType.VIRTUAL_ACCOUNT_FUND_TRANSFER,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("beneficiary_account", "beneficiaryAccount"),
+            Field("amount", "amount"),
+            Field("beneficiary_name", "beneficiaryName"),
+            Field("narration", "narration"),
+            Field("beneficiary_bank_code", "beneficiaryBankCode"),
+            Field("sender_name", "senderName"),
+            Field("name_enquiry_id", "nameEnquiryId"),
+            Field("client_fee_charge", "clientFeeCharge"),
+            Field("client_account_number", "ClientAccountNumber"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "get_transfer_instructions": Endpoint(
+        service_type=ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION,
+        fields=(
+            Field("account_number", "AccountNumber"),
+            Field("reference", "Reference"),
+            Field("amount", "Amount"),
+            Field("original_request_ref", "OriginalRequestRef"),
+            Field("status", "Status"),
+            Field("page_number", "PageNumber"),
+            Field("page_size", "PageSize"),
+        ),
+    ),
+    "get_transaction_history": Endpoint(
+        service_type=ServiceType.ADMIN_MAIN_ACCOUNT_TRANSACTIONS,
+        fields=(Field("page_size", "pageSize"), Field("page_number", "pageNumber")),
+    ),
+    "get_filtered_transaction_history": Endpoint(
+        service_type=ServiceType.ADMIN_MAIN_ACCOUNT_FILTERED_TRANSACTIONS,
+        fields=(
+            Field("page_size", "pageSize"),
+            Field("page_number", "pageNumber"),
+            Field("start_date", "startDate"),
+            Field("end_date", "endDate"),
+        ),
+    ),
+    "get_virtual_account_transaction_history": Endpoint(
+        service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNT_TRANSACTIONS,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("page_size", "pageSize"),
+            Field("page_number", "pageNumber"),
+        ),
+    ),
+    "get_virtual_account_filtered_transaction_history": Endpoint(
+        service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNT_FILTERED_TRANSACTIONS,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("page_size", "pageSize"),
+            Field("page_number", "pageNumber"),
+            Field("start_date", "startDate"),
+            Field("end_date", "endDate"),
+        ),
+    ),
+    "get_status": Endpoint(
+        service_type=ServiceType.TRANSACTION_STATUS_QUERY,
+        fields=(
+            Field("is_third_party_bank_transfer", "isThirdPartyBankTransfer"),
+            Field("transaction_request_reference", "transactionRequestReference"),
+        ),
+    ),
+    "fund_virtual_account": Endpoint(
+        service_type=ServiceType.FUND_VIRTUAL_ACCOUNT,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("amount", "amount"),
+            Field("narration", "narration"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "withdraw_from_virtual_account": Endpoint(
+        service_type=ServiceType.WITHDRAW_VIRTUAL_ACCOUNT,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("amount", "amount"),
+            Field("narration", "narration"),
+            Field("client_fee_charge", "ClientFeeCharge"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    # Built by hand, since the instructions are serialised first.
+    "process_transfers": Endpoint(
+        service_type=ServiceType.FUND_TRANSFER_INSTRUCTION,
+        fields=(Field("fund_transfer_instructions", "FundTransferInstructions"),),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    # Built by hand, since its request reference is sent in the payload too.
+    "get_transaction_logs": Endpoint(
+        service_type=ServiceType.RETRIEVE_TRANSACTION_LOGS,
+        fields=(
+            Field("request_reference", "RequestReference"),
+            Field("response_reference", "ResponseReference"),
+            Field("fetch_successful_records", "FetchSuccessfulRecords"),
+            Field("transaction_date", "TransactionDate"),
+            Field("has_transaction_date_range_filter", "HasTransactionDateRangeFilter"),
+            Field("start_date", "StartDate"),
+            Field("end_date", "EndDate"),
+            Field("page_size", "PageSize"),
+            Field("page_number", "PageNumber"),
+        ),
+    ),
+}
+
+GIFT_CARD_ENDPOINTS: Dict[str, Endpoint] = {
+    "get_gift_cards": Endpoint(service_type=ServiceType.GET_GIFT_CARD),
+    "get_gift_card_status": Endpoint(
+        service_type=ServiceType.GIFT_CARD_TSQ,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("amount", "amount"),
+            Field("customer_name", "requestingCustomerName"),
+            Field("customer_mobile", "requestingCustomerMobile"),
+            Field("customer_email", "requestingCustomerEmail"),
+            Field("biller_identifier", "billerIdentifier"),
+            Field("note", "note"),
+        ),
+    ),
+    # The purchases are built by hand, since they return a pending purchase.
+    "purchase_gift_card": Endpoint(
+        service_type=ServiceType.ADMIN_BUY_GIFT_CARD,
+        fields=(
+            Field("amount", "amount"),
+            Field("customer_name", "requestingCustomerName"),
+            Field("customer_mobile", "requestingCustomerMobile"),
+            Field("customer_email", "requestingCustomerEmail"),
+            Field("biller_identifier", "billerIdentifier"),
+            Field("note", "note"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "purchase_gift_card_from_virtual_account": Endpoint(
+        service_type=ServiceType.BUY_GIFT_CARD,
+        fields=(
+            Field("tracking_reference", "trackingReference"),
+            Field("amount", "amount"),
+            Field("customer_name", "requestingCustomerName"),
+            Field("customer_mobile", "requestingCustomerMobile"),
+            Field("customer_email", "requestingCustomerEmail"),
+            Field("biller_identifier", "billerIdentifier"),
+            Field("note", "note"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+}
+
+BILLING_AND_BETTING_ENDPOINTS: Dict[str, Endpoint] = {
+    "get_bill_type_options": Endpoint(
+        service_type=ServiceType.GET_BILLERS_BY_TYPE,
+        fields=(Field("bill_type", "BillTypeName"),),
+    ),
+    "verify_customer_before_purchase": Endpoint(
+        service_type=ServiceType.VERIFY_BILL_CUSTOMER,
+        fields=(
+            Field("tracking_reference", "TrackingRef"),
+            Field("kuda_bill_item_identifier", "KudaBillItemIdentifier"),
+            Field("customer_identification", "CustomerIdentification"),
+        ),
+    ),
+    "get_purchased_bills": Endpoint(service_type=ServiceType.ADMIN_GET_PURCHASED_BILLS),
+    "get_purchased_bill_from_virtual_account": Endpoint(
+        service_type=ServiceType.GET_PURCHASED_BILLS,
+        fields=(Field("tracking_reference", "TrackingReference"),),
+    ),
+    # The purchases are built by hand, since they return a pending purchase.
+    "purchase_bill": Endpoint(
+        service_type=ServiceType.ADMIN_PURCHASE_BILL,
+        fields=(
+            Field("amount", "Amount"),
+            Field("bill_item_identifier", "BillItemIdentifier"),
+            Field("customer_identifier", "CustomerIdentifier"),
+            Field("phone_number", "PhoneNumber"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    "purchase_bill_from_virtual_account": Endpoint(
+        service_type=ServiceType.PURCHASE_BILL,
+        fields=(
+            Field("tracking_reference", "TrackingReference"),
+            Field("amount", "Amount"),
+            Field("bill_item_identifier", "BillItemIdentifier"),
+            Field("phone_number", "PhoneNumber"),
+            Field("customer_identifier", "CustomerIdentifier"),
+        ),
+        idempotency=Idempotency.UNSAFE,
+    ),
+    # Built by hand, since only one of its references may be given.
+    "get_bill_purchase_status": Endpoint(
+        service_type=ServiceType.BILL_TSQ,
+        fields=(
+            Field("bill_request_ref", "BillRequestRef"),
+            Field("bill_response_reference", "BillResponseReference"),
+        ),
+    ),
+}
+
+
+_ENDPOINTS_BY_SERVICE_TYPE: Dict[ServiceType, Endpoint] = {
+    endpoint.service_type: endpoint
+    for endpoints in (
+        ACCOUNT_ENDPOINTS,
+        SAVINGS_ENDPOINTS,
+        CARD_ENDPOINTS,
+        TRANSACTION_ENDPOINTS,
+        GIFT_CARD_ENDPOINTS,
+        BILLING_AND_BETTING_ENDPOINTS,
+    )
+    for endpoint in endpoints.values()
+}
+
+
+def get_endpoint(service_type: ServiceType) -> Optional[Endpoint]:
+    """Returns the declaration of the endpoint of a service type, if it was declared.
+
+    Cross-cutting features use it to treat calls uniformly, e.g. to only retry or cache
+    the calls that are safe to repeat.
+    """
+    return _ENDPOINTS_BY_SERVICE_TYPE.get(service_type)
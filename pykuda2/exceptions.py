@@ -16,3 +16,15 @@ class InvalidResponseException(Exception):
 
 class TokenException(Exception):
     ...
+
+
+class PollingTimeoutException(Exception):
+    ...
+
+
+class DuplicateReferenceException(Exception):
+    ...
+
+
+class PaginationException(Exception):
+    ...
@@ -0,0 +1,347 @@
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pykuda2.concurrency import RateLimiter, pooled
+from pykuda2.exceptions import PaginationException
+from pykuda2.pagination import DEFAULT_PAGE_SIZE
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+# The key of the transactions of a page in the data of a transaction history.
+_ITEMS_KEY = "postingsHistory"
+_REFERENCE_KEY = "referenceNumber"
+
+_Shard = Tuple[int, str, str]
+
+
+def date_shards(
+    start_date: Union[str, date], end_date: Union[str, date], shard_days: int = 1
+) -> List[Tuple[str, str]]:
+    """Splits a range of dates into consecutive shards of `shard_days` days.
+
+    Both ends of the range and of every shard are included, the way Kuda filters
+    transaction histories, so the shards don't overlap.
+
+    Args:
+        start_date: The first day of the range, as a `date` or in the YYYY-MM-DD format.
+        end_date: The last day of the range.
+        shard_days: The number of days per shard, e.g. 7 for weekly shards.
+
+    Returns:
+        The first and last day of every shard in the YYYY-MM-DD format, in order.
+    """
+    if shard_days < 1:
+        raise ValueError("`shard_days` must be at least 1")
+    start = date.fromisoformat(str(start_date)[:10])
+    end = date.fromisoformat(str(end_date)[:10])
+    shards = []
+    while start <= end:
+        last = min(start + timedelta(days=shard_days - 1), end)
+        shards.append((start.isoformat(), last.isoformat()))
+        start = last + timedelta(days=1)
+    return shards
+
+
+def _indexed(shards: Iterable[Tuple[str, str]]) -> List[_Shard]:
+    return [(index, start, end) for index, (start, end) in enumerate(shards)]
+
+
+def _page_items(response: APIResponse, shard: _Shard, page_number: int) -> list:
+    if not response.status or not isinstance(response.data, dict):
+        raise PaginationException(
+            f"Unable to retrieve page {page_number} of {shard[1]} to {shard[2]}: "
+            f"{response.message}"
+        )
+    return response.data.get(_ITEMS_KEY) or []
+
+
+def _map_in_order(
+    function: Callable[[_Shard], list], shards: List[_Shard], concurrency: int
+) -> Iterator[list]:
+    """Calls `function` on every shard from `concurrency` threads and yields the
+    results in the order of the shards.
+
+    Shards are started at most `concurrency` ahead of the running ones, so at most
+    `2 * concurrency` shards are held in memory while an earlier one is slow.
+    """
+    if concurrency < 1:
+        raise ValueError("`concurrency` must be at least 1")
+    iterator = iter(shards)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = deque(
+            executor.submit(function, shard)
+            for shard in itertools.islice(iterator, 2 * concurrency)
+        )
+        try:
+            while futures:
+                transactions = futures.popleft().result()
+                for shard in itertools.islice(iterator, 1):
+                    futures.append(executor.submit(function, shard))
+                yield transactions
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+async def _map_in_order_async(
+    function: Callable[[_Shard], Awaitable[list]],
+    shards: List[_Shard],
+    concurrency: int,
+) -> AsyncIterator[list]:
+    """The asynchronous equivalent of `_map_in_order`."""
+    if concurrency < 1:
+        raise ValueError("`concurrency` must be at least 1")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(shard: _Shard) -> list:
+        async with semaphore:
+            return await function(shard)
+
+    iterator = iter(shards)
+    tasks: Deque[asyncio.Future] = deque(
+        asyncio.ensure_future(call(shard))
+        for shard in itertools.islice(iterator, 2 * concurrency)
+    )
+    try:
+        while tasks:
+            transactions = await tasks.popleft()
+            for shard in itertools.islice(iterator, 1):
+                tasks.append(asyncio.ensure_future(call(shard)))
+            yield transactions
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class _Merger:
+    """Yields the transactions of shards in order, leaving out the transactions already
+    yielded."""
+
+    def __init__(self):
+        self.seen: Set[str] = set()
+
+    def add(self, transactions: list) -> Iterator[dict]:
+        for transaction in transactions:
+            reference = transaction.get(_REFERENCE_KEY)
+            if reference is not None:
+                if reference in self.seen:
+                    continue
+                self.seen.add(reference)
+            yield transaction
+
+
+class HistoryDownloader:
+    """Downloads long transaction histories by date, concurrently.
+
+    The range of dates is split into shards of `shard_days` days, and the pages of
+    `concurrency` shards are fetched at a time, so the download is only as long as the
+    longest shard rather than the sum of every page. Transactions are yielded in the
+    order of the shards as soon as every earlier shard is complete, and a transaction
+    returned by two shards is only yielded once. While a shard is slow, the shards after
+    it keep being fetched, but at most `2 * concurrency` shards are held in memory.
+
+    Args:
+        transactions: The `Transaction` wrapper the histories are fetched with.
+            It's given a client of its own with `pooled` if it has none.
+        shard_days: The number of days of each shard, e.g. 7 for weekly shards.
+        concurrency: The maximum number of shards fetched concurrently.
+        page_size: The number of transactions fetched per page.
+        rate_limiter: An optional `RateLimiter` every page waits for.
+
+    Example:
+        ```python
+        downloader = HistoryDownloader(kuda.transactions, concurrency=16)
+        for transaction in downloader.download("2023-01-01", "2023-03-31"):
+            print(transaction["referenceNumber"], transaction["amount"])
+        ```
+    """
+
+    def __init__(
+        self,
+        transactions: "Transaction",
+        shard_days: int = 1,
+        concurrency: int = 8,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.shard_days = shard_days
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter
+
+    def _fetch_page(
+        self, shard: _Shard, page_number: int, tracking_reference: Optional[str]
+    ) -> list:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        _, start_date, end_date = shard
+        if tracking_reference is None:
+            response = self.transactions.get_filtered_transaction_history(
+                page_size=self.page_size,
+                page_number=page_number,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        else:
+            response = (
+                self.transactions.get_virtual_account_filtered_transaction_history(
+                    tracking_reference=tracking_reference,
+                    page_size=self.page_size,
+                    page_number=page_number,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+            )
+        return _page_items(response, shard, page_number)
+
+    def _fetch_shard(self, shard: _Shard, tracking_reference: Optional[str]) -> list:
+        transactions = []
+        page_number = 1
+        while True:
+            items = self._fetch_page(shard, page_number, tracking_reference)
+            transactions.extend(items)
+            if len(items) < self.page_size:
+                return transactions
+            page_number += 1
+
+    def download(
+        self,
+        start_date: Union[str, date],
+        end_date: Union[str, date],
+        tracking_reference: Optional[str] = None,
+    ) -> Iterator[dict]:
+        """Downloads the transactions made between two dates.
+
+        Args:
+            start_date: The first day of the history, in the YYYY-MM-DD format.
+            end_date: The last day of the history, in the YYYY-MM-DD format.
+            tracking_reference: The tracking reference of a virtual account to download
+                the history of. The history of the main account is downloaded when it's
+                not provided.
+
+        Returns:
+            An iterator of the transactions, in the order of their dates.
+
+        Raises:
+            PaginationException: when a page can't be retrieved.
+        """
+        shards = _indexed(date_shards(start_date, end_date, self.shard_days))
+        merger = _Merger()
+        for transactions in _map_in_order(
+            lambda shard: self._fetch_shard(shard, tracking_reference),
+            shards,
+            self.concurrency,
+        ):
+            yield from merger.add(transactions)
+
+
+class AsyncHistoryDownloader:
+    """The asynchronous equivalent of `HistoryDownloader`.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper the histories are fetched with.
+        shard_days: The number of days of each shard, e.g. 7 for weekly shards.
+        concurrency: The maximum number of shards fetched concurrently.
+        page_size: The number of transactions fetched per page.
+        rate_limiter: An optional `RateLimiter` every page waits for.
+    """
+
+    def __init__(
+        self,
+        transactions: "AsyncTransaction",
+        shard_days: int = 1,
+        concurrency: int = 8,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.shard_days = shard_days
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter
+
+    async def _fetch_page(
+        self, shard: _Shard, page_number: int, tracking_reference: Optional[str]
+    ) -> list:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        _, start_date, end_date = shard
+        if tracking_reference is None:
+            response = await self.transactions.get_filtered_transaction_history(
+                page_size=self.page_size,
+                page_number=page_number,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        else:
+            response = await self.transactions.get_virtual_account_filtered_transaction_history(
+                tracking_reference=tracking_reference,
+                page_size=self.page_size,
+                page_number=page_number,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        return _page_items(response, shard, page_number)
+
+    async def _fetch_shard(
+        self, shard: _Shard, tracking_reference: Optional[str]
+    ) -> list:
+        transactions = []
+        page_number = 1
+        while True:
+            items = await self._fetch_page(shard, page_number, tracking_reference)
+            transactions.extend(items)
+            if len(items) < self.page_size:
+                return transactions
+            page_number += 1
+
+    async def download(
+        self,
+        start_date: Union[str, date],
+        end_date: Union[str, date],
+        tracking_reference: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """Downloads the transactions made between two dates.
+
+        Args:
+            start_date: The first day of the history, in the YYYY-MM-DD format.
+            end_date: The last day of the history, in the YYYY-MM-DD format.
+            tracking_reference: The tracking reference of a virtual account to download
+                the history of.
+
+        Returns:
+            An asynchronous iterator of the transactions, in the order of their dates.
+
+        Raises:
+            PaginationException: when a page can't be retrieved.
+        """
+        shards = _indexed(date_shards(start_date, end_date, self.shard_days))
+        merger = _Merger()
+        async for transactions in _map_in_order_async(
+            lambda shard: self._fetch_shard(shard, tracking_reference),
+            shards,
+            self.concurrency,
+        ):
+            for transaction in merger.add(transactions):
+                yield transaction
@@ -0,0 +1,394 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pykuda2.exceptions import PaginationException
+from pykuda2.pagination import DEFAULT_PAGE_SIZE
+from pykuda2.utils import APIResponse, TransactionStatus
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+# The key of the transfer instructions of a page in the data of a search.
+_ITEMS_KEY = "fundTransferInstructions"
+
+
+@dataclass(frozen=True)
+class TransferInstructionFilter:
+    """The filters of a search of transfer instructions.
+
+    Filters left empty match every instruction.
+
+    Attributes:
+        account_number: The beneficiary's account number.
+        reference: The reference on the transfer instruction.
+        amount: The transaction amount.
+        original_request_ref: The request reference the instruction was submitted with.
+        status: The status of the transaction.
+    """
+
+    account_number: str = ""
+    reference: str = ""
+    amount: Union[int, float] = 0
+    original_request_ref: str = ""
+    status: Optional[TransactionStatus] = None
+
+    def arguments(self) -> dict:
+        """Returns the filters as the arguments of `Transaction.get_transfer_instructions`."""
+        return {
+            "account_number": self.account_number,
+            "reference": self.reference,
+            "amount": self.amount,
+            "original_request_ref": self.original_request_ref,
+            "status": self.status,
+        }
+
+
+def _field(instruction: dict, key: str) -> Optional[str]:
+    # The keys of instructions aren't consistently cased, e.g. `Reference` or `reference`.
+    value = instruction.get(key)
+    if value is None:
+        value = instruction.get(key[0].lower() + key[1:])
+    return value
+
+
+class TransferInstructionIndex:
+    """An in-memory store of the transfer instructions found by searches, indexed by
+    reference, beneficiary's account number and status.
+
+    Instructions are stored as the dicts Kuda returns them as. An instruction found
+    again replaces the previous version of it, e.g. once its status changed.
+    """
+
+    def __init__(self):
+        self._instructions: Dict[str, dict] = {}
+        self._by_account_number: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._instructions)
+
+    def __contains__(self, reference: str) -> bool:
+        return reference in self._instructions
+
+    def __iter__(self):
+        return iter(list(self._instructions.values()))
+
+    def get(self, reference: str) -> Optional[dict]:
+        """Returns the instruction with a reference, if it's known."""
+        return self._instructions.get(reference)
+
+    def get_by_account_number(self, account_number: str) -> List[dict]:
+        """Returns the instructions paying an account."""
+        return self._lookup(self._by_account_number, account_number)
+
+    def get_by_status(self, status: Union[TransactionStatus, str]) -> List[dict]:
+        """Returns the instructions with a status."""
+        if isinstance(status, TransactionStatus):
+            status = status.value
+        return self._lookup(self._by_status, status)
+
+    def _lookup(self, index: Dict[str, Set[str]], key: str) -> List[dict]:
+        with self._lock:
+            return [self._instructions[reference] for reference in index.get(key, ())]
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: Optional[str], reference: str):
+        references = index.get(key)
+        if references is not None:
+            references.discard(reference)
+            if not references:
+                del index[key]
+
+    def put(self, instruction: dict) -> None:
+        """Adds an instruction, or replaces the instruction with the same reference."""
+        reference = _field(instruction, "Reference")
+        if not reference:
+            return
+        with self._lock:
+            previous = self._instructions.get(reference)
+            if previous is not None:
+                self._discard(
+                    self._by_account_number,
+                    _field(previous, "AccountNumber"),
+                    reference,
+                )
+                self._discard(self._by_status, _field(previous, "Status"), reference)
+            self._instructions[reference] = instruction
+            for index, key in (
+                (self._by_account_number, _field(instruction, "AccountNumber")),
+                (self._by_status, _field(instruction, "Status")),
+            ):
+                if key:
+                    index.setdefault(key, set()).add(reference)
+
+
+_PageKey = Tuple[TransferInstructionFilter, int, int]
+
+
+class _PageCache:
+    """The pages of searches retrieved less than `ttl` seconds ago, keyed by filter."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._pages: Dict[_PageKey, Tuple[float, List[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: _PageKey) -> Optional[List[dict]]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                return None
+            if time.monotonic() - page[0] >= self.ttl:
+                del self._pages[key]
+                return None
+            return page[1]
+
+    def put(self, key: _PageKey, items: List[dict]) -> None:
+        with self._lock:
+            self._pages[key] = (time.monotonic(), items)
+
+    def invalidate(self, search_filter: Optional[TransferInstructionFilter]) -> None:
+        with self._lock:
+            if search_filter is None:
+                self._pages.clear()
+                return
+            for key in [key for key in self._pages if key[0] == search_filter]:
+                del self._pages[key]
+
+
+def _page_items(response: APIResponse, page_number: int) -> List[dict]:
+    if not response.status:
+        raise PaginationException(
+            f"Unable to retrieve page {page_number}: {response.message}"
+        )
+    if isinstance(response.data, list):
+        return response.data
+    if isinstance(response.data, dict):
+        return response.data.get(_ITEMS_KEY) or []
+    return []
+
+
+class TransferInstructionCursor:
+    """A position in the results of a search of transfer instructions.
+
+    Pages are fetched on demand, so iterating over a cursor paginates transparently.
+    A cursor can be resumed later, or by another process, from its `page_number`.
+
+    Attributes:
+        filter: The filters of the search.
+        page_number: The number of the next page to fetch.
+        exhausted: `True` once the last page was fetched.
+    """
+
+    def __init__(
+        self,
+        search: "TransferInstructionSearch",
+        search_filter: TransferInstructionFilter,
+        page_number: int = 1,
+    ):
+        self._search = search
+        self.filter = search_filter
+        self.page_number = page_number
+        self.exhausted = False
+
+    def next_page(self) -> List[dict]:
+        """Returns the instructions of the next page, or an empty list once exhausted.
+
+        Raises:
+            PaginationException: when the page can't be retrieved.
+        """
+        if self.exhausted:
+            return []
+        items = self._search._page(self.filter, self.page_number)
+        self.page_number += 1
+        self.exhausted = len(items) < self._search.page_size
+        return items
+
+    def __iter__(self) -> Iterator[dict]:
+        while not self.exhausted:
+            yield from self.next_page()
+
+
+class TransferInstructionSearch:
+    """Searches transfer instructions with cursors, caching the pages it retrieves.
+
+    It wraps `Transaction.get_transfer_instructions`, which takes every filter and
+    page arguments on every call. Pages are cached by filter for `cache_ttl` seconds,
+    so re-running the same search doesn't call Kuda again, and every instruction found
+    is added to `index` to be looked up by reference, account number or status.
+
+    Args:
+        transactions: The `Transaction` wrapper the searches are made with.
+        page_size: The number of instructions fetched per page.
+        cache_ttl: The number of seconds a page is reused for.
+        index: The `TransferInstructionIndex` the instructions found are added to. A new
+            one is created when it's not provided.
+
+    Example:
+        ```python
+        search = TransferInstructionSearch(kuda.transactions)
+        for instruction in search.search(status=TransactionStatus.FAILED):
+            print(instruction["Reference"])
+        search.index.get_by_account_number("0123456789")
+        ```
+    """
+
+    def __init__(
+        self,
+        transactions: "Transaction",
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cache_ttl: float = 300,
+        index: Optional[TransferInstructionIndex] = None,
+    ):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.index = index if index is not None else TransferInstructionIndex()
+        self._cache = _PageCache(cache_ttl)
+
+    def search(self, page_number: int = 1, **filters) -> TransferInstructionCursor:
+        """Returns a cursor over the instructions matching the filters.
+
+        Args:
+            page_number: The number of the page the cursor starts from.
+            **filters: The attributes of a `TransferInstructionFilter`.
+
+        Returns:
+            A `TransferInstructionCursor`. No page is fetched until it's iterated over.
+        """
+        return TransferInstructionCursor(
+            self, TransferInstructionFilter(**filters), page_number
+        )
+
+    def invalidate(self, search_filter: Optional[TransferInstructionFilter] = None):
+        """Forgets the cached pages of a filter, or of every filter."""
+        self._cache.invalidate(search_filter)
+
+    def _page(
+        self, search_filter: TransferInstructionFilter, page_number: int
+    ) -> List[dict]:
+        key = (search_filter, self.page_size, page_number)
+        items = self._cache.get(key)
+        if items is not None:
+            return items
+        response = self.transactions.get_transfer_instructions(
+            page_number=page_number,
+            page_size=self.page_size,
+            **search_filter.arguments(),
+        )
+        items = _page_items(response, page_number)
+        for instruction in items:
+            self.index.put(instruction)
+        self._cache.put(key, items)
+        return items
+
+
+class AsyncTransferInstructionCursor:
+    """The asynchronous equivalent of `TransferInstructionCursor`.
+
+    Attributes:
+        filter: The filters of the search.
+        page_number: The number of the next page to fetch.
+        exhausted: `True` once the last page was fetched.
+    """
+
+    def __init__(
+        self,
+        search: "AsyncTransferInstructionSearch",
+        search_filter: TransferInstructionFilter,
+        page_number: int = 1,
+    ):
+        self._search = search
+        self.filter = search_filter
+        self.page_number = page_number
+        self.exhausted = False
+
+    async def next_page(self) -> List[dict]:
+        """Returns the instructions of the next page, or an empty list once exhausted.
+
+        Raises:
+            PaginationException: when the page can't be retrieved.
+        """
+        if self.exhausted:
+            return []
+        items = await self._search._page(self.filter, self.page_number)
+        self.page_number += 1
+        self.exhausted = len(items) < self._search.page_size
+        return items
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        while not self.exhausted:
+            for instruction in await self.next_page():
+                yield instruction
+
+
+class AsyncTransferInstructionSearch:
+    """The asynchronous equivalent of `TransferInstructionSearch`.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper the searches are made with.
+        page_size: The number of instructions fetched per page.
+        cache_ttl: The number of seconds a page is reused for.
+        index: The `TransferInstructionIndex` the instructions found are added to.
+    """
+
+    def __init__(
+        self,
+        transactions: "AsyncTransaction",
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cache_ttl: float = 300,
+        index: Optional[TransferInstructionIndex] = None,
+    ):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.index = index if index is not None else TransferInstructionIndex()
+        self._cache = _PageCache(cache_ttl)
+
+    def search(self, page_number: int = 1, **filters) -> AsyncTransferInstructionCursor:
+        """Returns a cursor over the instructions matching the filters.
+
+        Args:
+            page_number: The number of the page the cursor starts from.
+            **filters: The attributes of a `TransferInstructionFilter`.
+
+        Returns:
+            An `AsyncTransferInstructionCursor`.
+        """
+        return AsyncTransferInstructionCursor(
+            self, TransferInstructionFilter(**filters), page_number
+        )
+
+    def invalidate(self, search_filter: Optional[TransferInstructionFilter] = None):
+        """Forgets the cached pages of a filter, or of every filter."""
+        self._cache.invalidate(search_filter)
+
+    async def _page(
+        self, search_filter: TransferInstructionFilter, page_number: int
+    ) -> List[dict]:
+        key = (search_filter, self.page_size, page_number)
+        items = self._cache.get(key)
+        if items is not None:
+            return items
+        response = await self.transactions.get_transfer_instructions(
+            page_number=page_number,
+            page_size=self.page_size,
+            **search_filter.arguments(),
+        )
+        items = _page_items(response, page_number)
+        for instruction in items:
+            self.index.put(instruction)
+        self._cache.put(key, items)
+        return items
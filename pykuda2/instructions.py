@@ -0,0 +1,549 @@
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.utils import APIResponse, TransferInstruction
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+DEFAULT_MAX_INSTRUCTIONS = 500
+
+# The bytes of the rest of the request, i.e. its service type, request reference and
+# the key of the list of instructions, rounded up.
+_ENVELOPE_BYTES = 256
+
+
+class TransferInstructionBatch:
+    """Many transfer instructions, stored column by column.
+
+    A batch holds every field of its instructions in a list rather than in a
+    `TransferInstruction` per transfer, which takes less memory for large payouts.
+    Amounts are kept as they're given, never converted to floats, so a batch sends
+    exactly what its instructions would. It's validated and serialized to the format
+    Kuda expects a column at a time, and can be given to `Transaction.process_transfers`
+    or a `TransferInstructionSubmitter` wherever a list of instructions is accepted.
+
+    Attributes:
+        account_numbers: The beneficiary's account number of every instruction.
+        account_names: The beneficiary's account name of every instruction.
+        beneficiary_bank_codes: The beneficiary's bank code of every instruction.
+        amounts: The amount of every instruction, in naira and kobo.
+        bank_codes: The bank code of every instruction.
+        narrations: The description of every instruction.
+        bank_names: The beneficiary's bank name of every instruction.
+        long_codes: The beneficiary's long code of every instruction.
+        references: The unique identifier of every instruction.
+    """
+
+    def __init__(self, instructions: Iterable[TransferInstruction] = ()):
+        self.account_numbers: List[str] = []
+        self.account_names: List[str] = []
+        self.beneficiary_bank_codes: List[str] = []
+        self.amounts: List[Union[int, float]] = []
+        self.bank_codes: List[str] = []
+        self.narrations: List[str] = []
+        self.bank_names: List[str] = []
+        self.long_codes: List[str] = []
+        self.references: List[str] = []
+        for instruction in instructions:
+            self.append(
+                account_number=instruction.account_number,
+                account_name=instruction.account_name,
+                beneficiary_bank_code=instruction.beneficiary_bank_code,
+                amount=instruction.amount,
+                bank_code=instruction.bank_code,
+                narration=instruction.narration,
+                bank_name=instruction.bank_name,
+                long_code=instruction.long_code,
+                reference=instruction.reference,
+            )
+
+    def _columns(self) -> tuple:
+        return (
+            self.account_numbers,
+            self.account_names,
+            self.beneficiary_bank_codes,
+            self.amounts,
+            self.bank_codes,
+            self.narrations,
+            self.bank_names,
+            self.long_codes,
+            self.references,
+        )
+
+    def append(
+        self,
+        account_number: str,
+        account_name: str,
+        beneficiary_bank_code: str,
+        amount: Union[int, float],
+        bank_code: str,
+        narration: str,
+        bank_name: str,
+        long_code: str,
+        reference: str,
+    ) -> None:
+        """Adds an instruction to the batch, with the arguments of `TransferInstruction`."""
+        self.account_numbers.append(account_number)
+        self.account_names.append(account_name)
+        self.beneficiary_bank_codes.append(beneficiary_bank_code)
+        self.amounts.append(amount)
+        self.bank_codes.append(bank_code)
+        self.narrations.append(narration)
+        self.bank_names.append(bank_name)
+        self.long_codes.append(long_code)
+        self.references.append(reference)
+
+    def __len__(self) -> int:
+        return len(self.references)
+
+    def __iter__(self) -> Iterator[TransferInstruction]:
+        for row in zip(*self._columns()):
+            yield TransferInstruction(*row)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[TransferInstruction, "TransferInstructionBatch"]:
+        """Returns an instruction, or a new batch of the instructions of a slice."""
+        if not isinstance(index, slice):
+            return TransferInstruction(*(column[index] for column in self._columns()))
+        batch = TransferInstructionBatch()
+        for name, column in zip(_COLUMN_NAMES, self._columns()):
+            setattr(batch, name, column[index])
+        return batch
+
+    def validate(
+        self,
+        min_amount: float = 0,
+        max_amount: Optional[float] = None,
+        bank_codes: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[int, str]]:
+        """Checks every instruction of the batch before it's submitted.
+
+        Args:
+            min_amount: Amounts must be greater than `min_amount`.
+            max_amount: An optional maximum amount.
+            bank_codes: The bank codes the beneficiary's bank codes must be one of, e.g.
+                from `Transaction.get_banks`. They aren't checked when it's not provided.
+
+        Returns:
+            The position of every invalid instruction along with the reason it's
+            invalid, in order. The batch is valid when it's empty.
+        """
+        errors: List[Tuple[int, str]] = [
+            (index, f"Amount {amount} is not greater than {min_amount}")
+            for index, amount in enumerate(self.amounts)
+            if not amount > min_amount
+        ]
+        if max_amount is not None:
+            errors.extend(
+                (index, f"Amount {amount} is greater than {max_amount}")
+                for index, amount in enumerate(self.amounts)
+                if amount > max_amount
+            )
+        errors.extend(
+            (index, f"Account number {account_number!r} is not a 10 digit NUBAN")
+            for index, account_number in enumerate(self.account_numbers)
+            if len(account_number) != 10 or not account_number.isdigit()
+        )
+        if bank_codes is not None:
+            known = set(bank_codes)
+            errors.extend(
+                (index, f"Bank code {bank_code!r} is unknown")
+                for index, bank_code in enumerate(self.beneficiary_bank_codes)
+                if bank_code not in known
+            )
+        duplicates = {
+            reference
+            for reference, count in Counter(self.references).items()
+            if count > 1
+        }
+        if duplicates:
+            errors.extend(
+                (index, f"Reference {reference!r} is not unique")
+                for index, reference in enumerate(self.references)
+                if reference in duplicates
+            )
+        errors.sort(key=lambda error: error[0])
+        return errors
+
+    def to_dicts(self) -> List[dict]:
+        """Returns the instructions in the format Kuda expects, in a single pass."""
+        return [
+            {
+                "AccountNumber": account_number,
+                "AccountName": account_name,
+                "BeneficiaryBankCode": beneficiary_bank_code,
+                "Amount": amount,
+                "BankCode": bank_code,
+                "Narration": narration,
+                "BankName": bank_name,
+                "LongCode": long_code,
+                "Reference": reference,
+            }
+            for (
+                account_number,
+                account_name,
+                beneficiary_bank_code,
+                amount,
+                bank_code,
+                narration,
+                bank_name,
+                long_code,
+                reference,
+            ) in zip(*self._columns())
+        ]
+
+
+_COLUMN_NAMES = (
+    "account_numbers",
+    "account_names",
+    "beneficiary_bank_codes",
+    "amounts",
+    "bank_codes",
+    "narrations",
+    "bank_names",
+    "long_codes",
+    "references",
+)
+_Instructions = Union[List[TransferInstruction], TransferInstructionBatch]
+
+
+def _references(instructions: _Instructions) -> List[str]:
+    if isinstance(instructions, TransferInstructionBatch):
+        return list(instructions.references)
+    return [instruction.reference for instruction in instructions]
+
+
+def chunk_instructions(
+    instructions: Iterable[TransferInstruction],
+    max_count: int = DEFAULT_MAX_INSTRUCTIONS,
+    max_bytes: Optional[int] = None,
+) -> Iterator[_Instructions]:
+    """Splits transfer instructions into chunks small enough to be sent in one request.
+
+    Instructions are pulled from `instructions` one chunk at a time, so it can be a
+    generator of instructions too many to hold in memory. A `TransferInstructionBatch`
+    split by count only is split into smaller batches, without building an instruction
+    per transfer.
+
+    Args:
+        instructions: The instructions to split, in order.
+        max_count: The maximum number of instructions per chunk.
+        max_bytes: The maximum size of the JSON body of the request of a chunk. Chunks
+            are only split by count when it's not provided.
+
+    Returns:
+        An iterator of lists (or batches) of instructions, in the order of
+        `instructions`.
+
+    Raises:
+        ValueError: when a single instruction is larger than `max_bytes`.
+    """
+    if max_count < 1:
+        raise ValueError("`max_count` must be at least 1")
+    if isinstance(instructions, TransferInstructionBatch) and max_bytes is None:
+        for start in range(0, len(instructions), max_count):
+            yield instructions[start : start + max_count]
+        return
+    chunk: List[TransferInstruction] = []
+    chunk_bytes = _ENVELOPE_BYTES
+    for instruction in instructions:
+        if max_bytes is not None:
+            # Every instruction but the first is preceded by a ", " separator.
+            instruction_bytes = len(json.dumps(instruction.to_dict())) + 2
+            if _ENVELOPE_BYTES + instruction_bytes > max_bytes:
+                raise ValueError(
+                    f"Transfer instruction {instruction.reference} is larger than "
+                    f"{max_bytes} bytes"
+                )
+            if chunk and chunk_bytes + instruction_bytes > max_bytes:
+                yield chunk
+                chunk, chunk_bytes = [], _ENVELOPE_BYTES
+            chunk_bytes += instruction_bytes
+        chunk.append(instruction)
+        if len(chunk) == max_count:
+            yield chunk
+            chunk, chunk_bytes = [], _ENVELOPE_BYTES
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class TransferChunkResult:
+    """The outcome of the submission of a chunk of transfer instructions.
+
+    Attributes:
+        index: The position of the chunk in the submission, from 0.
+        request_reference: The reference the chunk was submitted with. It's known even
+            when the submission failed, so the chunk can be looked up before it's resent.
+        references: The references of the instructions of the chunk.
+        response: The response of Kuda, or `None` if the request failed.
+        error: The error the request failed with, e.g. a `ConnectionException`. Whether
+            the chunk reached Kuda is then unknown.
+    """
+
+    index: int
+    request_reference: str
+    references: List[str]
+    response: Optional[APIResponse] = None
+    error: Optional[str] = None
+
+    @property
+    def submitted(self) -> bool:
+        return self.response is not None and bool(self.response.status)
+
+    @property
+    def rejected(self) -> bool:
+        """`True` if Kuda answered that it didn't accept the chunk."""
+        return (
+            self.response is not None
+            and not self.response.status
+            and self.response.status_code < 500
+        )
+
+    @property
+    def unknown(self) -> bool:
+        """`True` if whether the chunk was accepted is unknown, after an error or a
+        server error. It may have reached Kuda."""
+        return not self.submitted and not self.rejected
+
+
+@dataclass
+class TransferSubmission:
+    """The merged outcome of the submission of all the chunks of a batch.
+
+    Attributes:
+        chunks: The result of every chunk, in the order of the chunks.
+    """
+
+    chunks: List[TransferChunkResult] = field(default_factory=list)
+
+    @property
+    def submitted(self) -> bool:
+        """`True` if every chunk was accepted by Kuda."""
+        return all(chunk.submitted for chunk in self.chunks)
+
+    @property
+    def request_references(self) -> List[str]:
+        return [chunk.request_reference for chunk in self.chunks]
+
+    @property
+    def rejected_chunks(self) -> List[TransferChunkResult]:
+        """The chunks Kuda didn't accept, which can be corrected and sent again."""
+        return [chunk for chunk in self.chunks if chunk.rejected]
+
+    @property
+    def rejected_references(self) -> List[str]:
+        """The references of the instructions of the rejected chunks."""
+        return [
+            reference
+            for chunk in self.rejected_chunks
+            for reference in chunk.references
+        ]
+
+    @property
+    def unknown_chunks(self) -> List[TransferChunkResult]:
+        """The chunks whose outcome is unknown. They may have been accepted, so they
+        have to be reconciled by their `request_reference` before they're sent again."""
+        return [chunk for chunk in self.chunks if chunk.unknown]
+
+    @property
+    def unknown_references(self) -> List[str]:
+        """The references of the instructions of the chunks whose outcome is unknown."""
+        return [
+            reference for chunk in self.unknown_chunks for reference in chunk.references
+        ]
+
+
+_Chunk = Tuple[int, str, _Instructions]
+
+
+class TransferInstructionSubmitter:
+    """Submits large lists of transfer instructions in chunks, concurrently.
+
+    `Transaction.process_transfers` sends every instruction it's given in a single
+    request, which times out or is rejected for very large batches. The submitter
+    splits the instructions by count and, optionally, by the size of the request, and
+    submits `concurrency` chunks at a time. Each chunk is given its own request
+    reference before it's sent, so its outcome can be traced whatever happens.
+
+    Args:
+        transactions: The `Transaction` wrapper the chunks are submitted with.
+            It's given a client of its own with `pooled` if it has none.
+        max_count: The maximum number of instructions per chunk.
+        max_bytes: The maximum size of the JSON body of the request of a chunk.
+        concurrency: The maximum number of chunks submitted concurrently.
+        rate_limiter: An optional `RateLimiter` every submission waits for.
+
+    Example:
+        ```python
+        submitter = TransferInstructionSubmitter(kuda.transactions, max_count=1000)
+        instructions = (to_instruction(row) for row in csv.DictReader(file))
+        submission = submitter.submit_all(instructions)
+        if not submission.submitted:
+            print("Rejected:", submission.rejected_references)
+            # These may have been paid: look them up before sending them again.
+            for chunk in submission.unknown_chunks:
+                print("Unknown:", chunk.request_reference)
+        ```
+    """
+
+    def __init__(
+        self,
+        transactions: "Transaction",
+        max_count: int = DEFAULT_MAX_INSTRUCTIONS,
+        max_bytes: Optional[int] = None,
+        concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+
+    def _chunks(self, instructions: Iterable[TransferInstruction]) -> Iterator[_Chunk]:
+        for index, chunk in enumerate(
+            chunk_instructions(instructions, self.max_count, self.max_bytes)
+        ):
+            yield index, self.transactions._generate_request_reference(), chunk
+
+    def _submit(self, chunk: _Chunk) -> TransferChunkResult:
+        index, request_reference, instructions = chunk
+        result = TransferChunkResult(
+            index=index,
+            request_reference=request_reference,
+            references=_references(instructions),
+        )
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            result.response = self.transactions.process_transfers(
+                instructions, request_reference=request_reference
+            )
+        except Exception as error:
+            result.error = str(error)
+        return result
+
+    def submit(
+        self, instructions: Iterable[TransferInstruction]
+    ) -> Iterator[TransferChunkResult]:
+        """Submits the instructions chunk by chunk.
+
+        Args:
+            instructions: The instructions to submit, e.g. a generator reading them from
+                a file. Only the chunks in flight are held in memory.
+
+        Returns:
+            An iterator of the `TransferChunkResult` of every chunk, in the order they
+            complete.
+        """
+        return bounded_map(self._submit, self._chunks(instructions), self.concurrency)
+
+    def submit_all(
+        self, instructions: Iterable[TransferInstruction]
+    ) -> TransferSubmission:
+        """Submits the instructions chunk by chunk and merges the results.
+
+        Args:
+            instructions: The instructions to submit.
+
+        Returns:
+            The `TransferSubmission` of the instructions.
+        """
+        chunks = sorted(self.submit(instructions), key=lambda chunk: chunk.index)
+        return TransferSubmission(chunks=chunks)
+
+
+class AsyncTransferInstructionSubmitter:
+    """The asynchronous equivalent of `TransferInstructionSubmitter`.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper the chunks are submitted with.
+        max_count: The maximum number of instructions per chunk.
+        max_bytes: The maximum size of the JSON body of the request of a chunk.
+        concurrency: The maximum number of chunks submitted concurrently.
+        rate_limiter: An optional `RateLimiter` every submission waits for.
+    """
+
+    def __init__(
+        self,
+        transactions: "AsyncTransaction",
+        max_count: int = DEFAULT_MAX_INSTRUCTIONS,
+        max_bytes: Optional[int] = None,
+        concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+
+    def _chunks(self, instructions: Iterable[TransferInstruction]) -> Iterator[_Chunk]:
+        for index, chunk in enumerate(
+            chunk_instructions(instructions, self.max_count, self.max_bytes)
+        ):
+            yield index, self.transactions._generate_request_reference(), chunk
+
+    async def _submit(self, chunk: _Chunk) -> TransferChunkResult:
+        index, request_reference, instructions = chunk
+        result = TransferChunkResult(
+            index=index,
+            request_reference=request_reference,
+            references=_references(instructions),
+        )
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            result.response = await self.transactions.process_transfers(
+                instructions, request_reference=request_reference
+            )
+        except Exception as error:
+            result.error = str(error)
+        return result
+
+    def submit(
+        self, instructions: Iterable[TransferInstruction]
+    ) -> AsyncIterator[TransferChunkResult]:
+        """Submits the instructions chunk by chunk.
+
+        Args:
+            instructions: The instructions to submit.
+
+        Returns:
+            An asynchronous iterator of the `TransferChunkResult` of every chunk, in the
+            order they complete.
+        """
+        return bounded_map_async(
+            self._submit, self._chunks(instructions), self.concurrency
+        )
+
+    async def submit_all(
+        self, instructions: Iterable[TransferInstruction]
+    ) -> TransferSubmission:
+        """Submits the instructions chunk by chunk and merges the results.
+
+        Args:
+            instructions: The instructions to submit.
+
+        Returns:
+            The `TransferSubmission` of the instructions.
+        """
+        chunks = [chunk async for chunk in self.submit(instructions)]
+        chunks.sort(key=lambda chunk: chunk.index)
+        return TransferSubmission(chunks=chunks)
@@ -0,0 +1,521 @@
+import contextlib
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterable, Optional, Tuple
+
+from pykuda2.utils import HTTPMethod, ServiceType
+
+logger = logging.getLogger(__name__)
+
+# The bucket of zero durations, which happen with coarse clocks.
+_ZERO_BUCKET = -(2**31)
+
+
+@dataclass
+class KudaCall:
+    """A record of a single call made to Kuda by an instrumented wrapper.
+
+    Every duration is in seconds. A phase the call didn't get to is left at `0.0`.
+
+    Attributes:
+        service_type: The Kuda service called.
+        method: The HTTP method the call was made with.
+        started_at: The `time.perf_counter` value when the call started.
+        endpoint_path: The path the call was made to, for calls that don't go to the base url.
+        request_reference: The reference the request was made with.
+        finished_at: The `time.perf_counter` value when the call finished.
+        token_seconds: The time spent getting the access token and building the headers.
+        serialization_seconds: The time spent building and encoding the request.
+        network_seconds: The time spent sending the request and reading the response.
+        parsing_seconds: The time spent decoding the response into an `APIResponse`.
+        status_code: The HTTP status code of the response, if one was received.
+        status: The status Kuda reported in the body of the response.
+        request_bytes: The size of the request body.
+        response_bytes: The size of the response body.
+        error: The exception the call raised, if any.
+        context: A place for hooks to keep their own state between events, e.g. a span.
+    """
+
+    service_type: ServiceType
+    method: HTTPMethod
+    started_at: float
+    endpoint_path: Optional[str] = None
+    request_reference: Optional[str] = None
+    finished_at: Optional[float] = None
+    token_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+    network_seconds: float = 0.0
+    parsing_seconds: float = 0.0
+    status_code: Optional[int] = None
+    status: Any = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    error: Optional[BaseException] = None
+    context: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def duration_seconds(self) -> float:
+        """The total time the call took."""
+        if self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        """The duration of every phase of the call keyed by phase name."""
+        return {
+            "token": self.token_seconds,
+            "serialization": self.serialization_seconds,
+            "network": self.network_seconds,
+            "parsing": self.parsing_seconds,
+        }
+
+
+@dataclass
+class TokenFetch:
+    """A record of a request made for an access token by an instrumented wrapper.
+
+    Attributes:
+        started_at: The `time.perf_counter` value when the fetch started.
+        finished_at: The `time.perf_counter` value when the fetch finished.
+        error: The exception the fetch raised, if any.
+        context: A place for hooks to keep their own state between events, e.g. a span.
+    """
+
+    started_at: float
+    finished_at: Optional[float] = None
+    error: Optional[BaseException] = None
+    context: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def duration_seconds(self) -> float:
+        """The total time the fetch took."""
+        if self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class InstrumentationHook:
+    """The base class of the objects notified about the calls made to Kuda.
+
+    Every method does nothing by default, so a hook only needs to override the events
+    it's interested in. Hooks are called synchronously from the thread or task making
+    the call, so they should be quick. Exceptions they raise are logged and ignored.
+    """
+
+    def call_started(self, call: KudaCall) -> None:
+        """Called before anything is done for a call."""
+
+    def request_prepared(self, call: KudaCall, headers: dict) -> None:
+        """Called with the headers of the request before it's encoded.
+
+        The headers can be updated in place, e.g. to propagate a trace context.
+        """
+
+    def call_finished(self, call: KudaCall) -> None:
+        """Called once a call has finished, whether it succeeded or not."""
+
+    def token_fetch_started(self, fetch: TokenFetch) -> None:
+        """Called before a request is made for an access token."""
+
+    def token_fetch_finished(self, fetch: TokenFetch) -> None:
+        """Called once a request for an access token has finished."""
+
+    def retry(self, service_type: ServiceType) -> None:
+        """Called when a call to `service_type` is about to be retried."""
+
+    def event(self, name: str, attributes: Dict[str, Any]) -> None:
+        """Called with any other notable event, e.g. calls coalesced into one."""
+
+    def capture_context(self) -> Any:
+        """Called from the thread or task of a caller whose work is carried on from
+        another one, e.g. by a poller. What it returns is given to `restore_context`
+        when events are reported on behalf of the caller."""
+        return None
+
+    def restore_context(self, context: Any) -> ContextManager:
+        """Returns a context manager the events reported on behalf of a caller are
+        notified within, given what `capture_context` returned for the caller."""
+        return contextlib.nullcontext()
+
+
+class Instrumentation:
+    """Dispatches the events of the calls made by a wrapper to hooks.
+
+    Wrappers instantiated without instrumentation skip every bit of this, so it costs
+    nothing when disabled.
+
+    Args:
+        hooks: The hooks notified about every call, e.g. `InMemorySink`,
+            `PrometheusSink` or `OpenTelemetrySink`.
+    """
+
+    def __init__(self, hooks: Iterable[InstrumentationHook]):
+        self.hooks: Tuple[InstrumentationHook, ...] = tuple(hooks)
+
+    def _notify(self, event: str, *args, context: Optional[tuple] = None) -> None:
+        for index, hook in enumerate(self.hooks):
+            try:
+                if context is None:
+                    getattr(hook, event)(*args)
+                else:
+                    with hook.restore_context(context[index]):
+                        getattr(hook, event)(*args)
+            except Exception:
+                logger.exception("Instrumentation hook %r raised an exception", hook)
+
+    def capture_context(self) -> tuple:
+        """Returns the context of the caller, to report events on its behalf from
+        another thread or task, e.g. the retries of a poll it started."""
+        context = []
+        for hook in self.hooks:
+            try:
+                context.append(hook.capture_context())
+            except Exception:
+                logger.exception("Instrumentation hook %r raised an exception", hook)
+                context.append(None)
+        return tuple(context)
+
+    def call_started(
+        self,
+        service_type: ServiceType,
+        method: HTTPMethod,
+        endpoint_path: Optional[str] = None,
+        request_reference: Optional[str] = None,
+    ) -> KudaCall:
+        """Returns the record of a new call after notifying the hooks about it."""
+        call = KudaCall(
+            service_type=service_type,
+            method=method,
+            started_at=time.perf_counter(),
+            endpoint_path=endpoint_path,
+            request_reference=request_reference,
+        )
+        self._notify("call_started", call)
+        return call
+
+    def request_prepared(self, call: KudaCall, headers: dict) -> None:
+        self._notify("request_prepared", call, headers)
+
+    def call_finished(self, call: KudaCall) -> None:
+        call.finished_at = time.perf_counter()
+        self._notify("call_finished", call)
+
+    def token_fetch_started(self) -> TokenFetch:
+        """Returns the record of a new token fetch after notifying the hooks about it."""
+        fetch = TokenFetch(started_at=time.perf_counter())
+        self._notify("token_fetch_started", fetch)
+        return fetch
+
+    def token_fetch_finished(self, fetch: TokenFetch) -> None:
+        fetch.finished_at = time.perf_counter()
+        self._notify("token_fetch_finished", fetch)
+
+    def retry(self, service_type: ServiceType, context: Optional[tuple] = None) -> None:
+        """Reports that a call to `service_type` is about to be retried.
+
+        Args:
+            service_type: The service type of the call.
+            context: The `capture_context` of the caller the call is retried for, if
+                it's retried from another thread or task.
+        """
+        self._notify("retry", service_type, context=context)
+
+    def event(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        context: Optional[tuple] = None,
+    ) -> None:
+        """Reports any other notable event to the hooks.
+
+        Args:
+            name: The name of the event.
+            attributes: The attributes of the event.
+            context: The `capture_context` of the caller the event happened for, if
+                it's reported from another thread or task.
+        """
+        self._notify("event", name, attributes or {}, context=context)
+
+
+class LatencyHistogram:
+    """A histogram of durations with a bounded relative error, in the spirit of HDR histograms.
+
+    Values are counted in logarithmic buckets, so percentiles are accurate to within
+    `precision` of the true value no matter how wide the range of recorded values is,
+    while the memory used only grows with the number of distinct buckets.
+
+    Args:
+        precision: The maximum relative error of the percentiles reported.
+    """
+
+    def __init__(self, precision: float = 0.01):
+        if not 0 < precision < 1:
+            raise ValueError("`precision` must be between 0 and 1")
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        index = (
+            math.ceil(math.log(value) / self._log_base) if value > 0 else _ZERO_BUCKET
+        )
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def _bucket_value(self, index: int) -> float:
+        return 0.0 if index == _ZERO_BUCKET else math.exp(index * self._log_base)
+
+    def percentile(self, percentile: float) -> float:
+        """Returns the value below which `percentile` percent of the recorded values are."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class InMemorySink(InstrumentationHook):
+    """Keeps latency histograms and counters of the calls made in memory.
+
+    Args:
+        precision: The maximum relative error of the percentiles reported.
+    """
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._lock = threading.Lock()
+        self.latencies: Dict[Tuple[ServiceType, str], LatencyHistogram] = {}
+        self.status_codes: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.retries: Counter = Counter()
+        self.request_bytes: Counter = Counter()
+        self.response_bytes: Counter = Counter()
+        self.token_fetches = LatencyHistogram(precision)
+
+    def _histogram(self, service_type: ServiceType, phase: str) -> LatencyHistogram:
+        histogram = self.latencies.get((service_type, phase))
+        if histogram is None:
+            histogram = self.latencies[(service_type, phase)] = LatencyHistogram(
+                self.precision
+            )
+        return histogram
+
+    def call_finished(self, call: KudaCall) -> None:
+        with self._lock:
+            for phase, seconds in call.phases.items():
+                self._histogram(call.service_type, phase).record(seconds)
+            self._histogram(call.service_type, "total").record(call.duration_seconds)
+            if call.status_code is not None:
+                self.status_codes[(call.service_type, call.status_code)] += 1
+            if call.error is not None:
+                self.errors[(call.service_type, type(call.error).__name__)] += 1
+            self.request_bytes[call.service_type] += call.request_bytes
+            self.response_bytes[call.service_type] += call.response_bytes
+
+    def token_fetch_finished(self, fetch: TokenFetch) -> None:
+        with self._lock:
+            self.token_fetches.record(fetch.duration_seconds)
+
+    def retry(self, service_type: ServiceType) -> None:
+        with self._lock:
+            self.retries[service_type] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Returns a summary of the latencies of every phase keyed by service type.
+
+        Returns:
+            A dict mapping every service type called to a dict of the summary of each
+                phase (and of the `total`) along with its status codes, errors, retries and bytes.
+        """
+        with self._lock:
+            snapshot: Dict[str, dict] = defaultdict(
+                lambda: {"latency": {}, "status_codes": {}, "errors": {}}
+            )
+            for (service_type, phase), histogram in self.latencies.items():
+                snapshot[service_type.value]["latency"][phase] = histogram.summary()
+            for (service_type, status_code), count in self.status_codes.items():
+                snapshot[service_type.value]["status_codes"][status_code] = count
+            for (service_type, error), count in self.errors.items():
+                snapshot[service_type.value]["errors"][error] = count
+            for service_type in list(snapshot):
+                service = ServiceType(service_type)
+                snapshot[service_type]["retries"] = self.retries[service]
+                snapshot[service_type]["request_bytes"] = self.request_bytes[service]
+                snapshot[service_type]["response_bytes"] = self.response_bytes[service]
+            return dict(snapshot)
+
+
+class PrometheusSink(InstrumentationHook):
+    """Exports the calls made as Prometheus metrics.
+
+    It requires the `prometheus-client` package.
+
+    Args:
+        registry: The registry the metrics are registered in. It defaults to the global registry.
+        namespace: The prefix of the name of every metric.
+        buckets: The upper bounds of the buckets of the latency histograms in seconds.
+    """
+
+    DEFAULT_BUCKETS = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+
+    def __init__(
+        self,
+        registry=None,
+        namespace: str = "pykuda2",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError(
+                "PrometheusSink requires the 'prometheus-client' package. "
+                "Install it with `pip install prometheus-client`."
+            )
+        registry = registry if registry is not None else prometheus_client.REGISTRY
+        self.latency = prometheus_client.Histogram(
+            "call_phase_seconds",
+            "Time spent in each phase of the calls made to Kuda.",
+            ["service_type", "phase"],
+            namespace=namespace,
+            buckets=buckets,
+            registry=registry,
+        )
+        self.calls = prometheus_client.Counter(
+            "calls",
+            "Calls made to Kuda by status code.",
+            ["service_type", "status_code"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.retries = prometheus_client.Counter(
+            "retries",
+            "Calls to Kuda that were retried.",
+            ["service_type"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.bytes = prometheus_client.Counter(
+            "bytes",
+            "Bytes sent to and received from Kuda.",
+            ["service_type", "direction"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+    def call_finished(self, call: KudaCall) -> None:
+        service_type = call.service_type.value
+        for phase, seconds in call.phases.items():
+            self.latency.labels(service_type, phase).observe(seconds)
+        self.latency.labels(service_type, "total").observe(call.duration_seconds)
+        status_code = str(call.status_code) if call.status_code is not None else "error"
+        self.calls.labels(service_type, status_code).inc()
+        self.bytes.labels(service_type, "sent").inc(call.request_bytes)
+        self.bytes.labels(service_type, "received").inc(call.response_bytes)
+
+    def retry(self, service_type: ServiceType) -> None:
+        self.retries.labels(service_type.value).inc()
+
+
+class OpenTelemetrySink(InstrumentationHook):
+    """Exports the calls made as OpenTelemetry metrics.
+
+    It requires the `opentelemetry-api` package, and an SDK to be configured for the
+    metrics to be exported anywhere.
+
+    Args:
+        meter: The meter the instruments are created with. It defaults to the `pykuda2`
+            meter of the global meter provider.
+    """
+
+    def __init__(self, meter=None):
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetrySink requires the 'opentelemetry-api' package. "
+                "Install it with `pip install opentelemetry-api`."
+            )
+        meter = meter if meter is not None else metrics.get_meter("pykuda2")
+        self.latency = meter.create_histogram(
+            "pykuda2.call.duration",
+            unit="s",
+            description="Time spent in each phase of the calls made to Kuda.",
+        )
+        self.calls = meter.create_counter(
+            "pykuda2.calls", description="Calls made to Kuda by status code."
+        )
+        self.retries = meter.create_counter(
+            "pykuda2.retries", description="Calls to Kuda that were retried."
+        )
+        self.bytes = meter.create_counter(
+            "pykuda2.bytes",
+            unit="By",
+            description="Bytes sent to and received from Kuda.",
+        )
+
+    def call_finished(self, call: KudaCall) -> None:
+        service_type = call.service_type.value
+        for phase, seconds in call.phases.items():
+            self.latency.record(seconds, {"service_type": service_type, "phase": phase})
+        self.latency.record(
+            call.duration_seconds, {"service_type": service_type, "phase": "total"}
+        )
+        attributes = {"service_type": service_type}
+        if call.status_code is not None:
+            attributes["status_code"] = call.status_code
+        if call.error is not None:
+            attributes["error"] = type(call.error).__name__
+        self.calls.add(1, attributes)
+        self.bytes.add(
+            call.request_bytes, {"service_type": service_type, "direction": "sent"}
+        )
+        self.bytes.add(
+            call.response_bytes,
+            {"service_type": service_type, "direction": "received"},
+        )
+
+    def retry(self, service_type: ServiceType) -> None:
+        self.retries.add(1, {"service_type": service_type.value})
@@ -1,5 +1,18 @@
+from typing import Callable, Optional
+
+import httpx
+
 from pykuda2.base import BaseAPIWrapper, BaseAsyncAPIWrapper
+from pykuda2.instrumentation import Instrumentation
+from pykuda2.outbox import Outbox
+from pykuda2.transports import DEFAULT_MAX_CONCURRENT_STREAMS, DEFAULT_MAX_CONNECTIONS
 from pykuda2.utils import Mode
+from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+from pykuda2.wrappers.async_wrappers.billing_and_betting import AsyncBillingAndBetting
+from pykuda2.wrappers.async_wrappers.card import AsyncCard
+from pykuda2.wrappers.async_wrappers.gift_card import AsyncGiftCard
+from pykuda2.wrappers.async_wrappers.savings import AsyncSavings
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
 from pykuda2.wrappers.sync_wrappers.accounts import Account
 from pykuda2.wrappers.sync_wrappers.billing_and_betting import BillingAndBetting
 from pykuda2.wrappers.sync_wrappers.card import Card
@@ -15,30 +28,139 @@ class Kuda(BaseAPIWrapper):
         email: The email address of your Kuda account with access to an apiKey
         api_key: Your Kuda apiKey
         mode: The mode you desire to use the wrapper in (development or production)
+        client: An optional `httpx.Client` shared by all the wrappers to make requests.
+        transport: An optional `httpx.BaseTransport` the wrapper creates the shared client with.
+        http2: Set to `True` to multiplex concurrent requests over a few HTTP/2 connections.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` shared by all the wrappers.
+        outbox: An optional `Outbox` the money-moving calls of all the wrappers are
+            recorded in.
+        reference_generator: An optional callable generating the references of the
+            requests of all the wrappers made without one.
     """
 
-    def __init__(self, email: str, api_key: str, mode: Mode = Mode.DEVELOPMENT):
-        super().__init__(email=email, api_key=api_key, mode=mode)
-        self.accounts = Account(email=email, api_key=api_key, mode=mode)
-        self.transactions = Transaction(email=email, api_key=api_key, mode=mode)
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        mode: Mode = Mode.DEVELOPMENT,
+        client: Optional[httpx.Client] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional[Outbox] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=client,
+            transport=transport,
+            http2=http2,
+            max_connections=max_connections,
+            max_concurrent_streams=max_concurrent_streams,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.accounts = Account(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.transactions = Transaction(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
         self.billing_and_betting = BillingAndBetting(
-            email=email, api_key=api_key, mode=mode
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.gift_cards = GiftCard(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.savings = Savings(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.cards = Card(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
         )
-        self.gift_cards = GiftCard(email=email, api_key=api_key, mode=mode)
-        self.savings = Savings(email=email, api_key=api_key, mode=mode)
-        self.cards = Card(email=email, api_key=api_key, mode=mode)
         # All the attributes above are API wrappers in themselves which means
         # they'll individually try to get the access token with the `emai` and
         # `api_key`. This is like to result in some performance issues. this is
         # a hacky solution to this issue. We use this `Kuda` wrapper to get the
         # `access_token` and feed it to all these attributes, so they don't have
         # to make a request to get the access token.
-        self.accounts._saved_token = self._token
-        self.transactions._saved_token = self._token
-        self.billing_and_betting._saved_token = self._token
-        self.gift_cards._saved_token = self._token
-        self.savings._saved_token = self._token
-        self.cards._saved_token = self._token
+        self._share_with_wrappers(token=self._token)
+
+    @property
+    def _wrappers(self) -> tuple:
+        return (
+            self.accounts,
+            self.transactions,
+            self.billing_and_betting,
+            self.gift_cards,
+            self.savings,
+            self.cards,
+        )
+
+    def _share_with_wrappers(self, token: str) -> None:
+        for wrapper in self._wrappers:
+            wrapper._saved_token = token
+            wrapper._client = self._client
+
+    def warmup(self, connections: int = 1) -> None:
+        """Prepares the wrapper and all its API wrappers for their first requests.
+
+        See `BaseAPIWrapper.warmup`. The token and the connections are shared with
+        `accounts`, `transactions` and the other API wrappers.
+
+        Args:
+            connections: The number of connections to open concurrently.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token can't be fetched.
+        """
+        super().warmup(connections=connections)
+        self._share_with_wrappers(token=self._saved_token)
 
 
 class AsyncKuda(BaseAsyncAPIWrapper):
@@ -48,15 +170,130 @@ class AsyncKuda(BaseAsyncAPIWrapper):
         email: The email address of your Kuda account with access to an apiKey
         api_key: Your Kuda apiKey
         mode: The mode you desire to use the wrapper in (development or production)
+        client: An optional `httpx.AsyncClient` shared by all the wrappers to make requests.
+        transport: An optional `httpx.AsyncBaseTransport` the wrapper creates the shared
+            client with.
+        http2: Set to `True` to multiplex concurrent requests over a few HTTP/2 connections.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` shared by all the wrappers.
+        outbox: An optional `Outbox` the money-moving calls of all the wrappers are
+            recorded in.
+        reference_generator: An optional callable generating the references of the
+            requests of all the wrappers made without one.
     """
 
-    def __init__(self, email: str, api_key: str, mode: Mode = Mode.DEVELOPMENT):
-        super().__init__(email=email, api_key=api_key, mode=mode)
-        self.accounts = Account(email=email, api_key=api_key, mode=mode)
-        self.transactions = Transaction(email=email, api_key=api_key, mode=mode)
-        self.billing_and_betting = BillingAndBetting(
-            email=email, api_key=api_key, mode=mode
+    def __init__(
+        self,
+        email: str,
+        api_key: str,
+        mode: Mode = Mode.DEVELOPMENT,
+        client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional[Outbox] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=client,
+            transport=transport,
+            http2=http2,
+            max_connections=max_connections,
+            max_concurrent_streams=max_concurrent_streams,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.accounts = AsyncAccount(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.transactions = AsyncTransaction(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.billing_and_betting = AsyncBillingAndBetting(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.gift_cards = AsyncGiftCard(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.savings = AsyncSavings(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
+        )
+        self.cards = AsyncCard(
+            email=email,
+            api_key=api_key,
+            mode=mode,
+            client=self._client,
+            instrumentation=instrumentation,
+            outbox=outbox,
+            reference_generator=reference_generator,
         )
-        self.gift_cards = GiftCard(email=email, api_key=api_key, mode=mode)
-        self.savings = Savings(email=email, api_key=api_key, mode=mode)
-        self.cards = Card(email=email, api_key=api_key, mode=mode)
+
+    @property
+    def _wrappers(self) -> tuple:
+        return (
+            self.accounts,
+            self.transactions,
+            self.billing_and_betting,
+            self.gift_cards,
+            self.savings,
+            self.cards,
+        )
+
+    def _share_with_wrappers(self, token: str) -> None:
+        for wrapper in self._wrappers:
+            wrapper._saved_token = token
+            wrapper._client = self._client
+
+    async def warmup(self, connections: int = 1) -> None:
+        """Prepares the wrapper and all its API wrappers for their first requests.
+
+        See `BaseAsyncAPIWrapper.warmup`. The token and the connections are shared with
+        `accounts`, `transactions` and the other API wrappers.
+
+        Args:
+            connections: The number of connections to open concurrently.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token can't be fetched.
+        """
+        await super().warmup(connections=connections)
+        self._share_with_wrappers(token=self._saved_token)
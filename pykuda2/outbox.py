@@ -0,0 +1,581 @@
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Deque, FrozenSet, List, Optional, Tuple
+
+from pykuda2.endpoints import (
+    BILLING_AND_BETTING_ENDPOINTS,
+    GIFT_CARD_ENDPOINTS,
+    TRANSACTION_ENDPOINTS,
+    Idempotency,
+)
+from pykuda2.polling import get_transaction_status
+from pykuda2.utils import APIResponse, ServiceType, TransactionStatus
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.billing_and_betting import (
+        AsyncBillingAndBetting,
+    )
+    from pykuda2.wrappers.async_wrappers.gift_card import AsyncGiftCard
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.billing_and_betting import BillingAndBetting
+    from pykuda2.wrappers.sync_wrappers.gift_card import GiftCard
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+KUDA_BANK_CODE = "999129"
+
+# How Kuda answers a status query about a transaction it has no record of.
+_NOT_FOUND_MESSAGE = re.compile(
+    r"not found|does not exist|doesn't exist|no record", re.IGNORECASE
+)
+
+# The money-moving calls `OutboxRecovery` can't reconcile, which are left out. A call
+# with transfer instructions only schedules them: each instruction moves money on its
+# own later on, and its outcome is found with `Transaction.get_transfer_instructions`
+# rather than with a status query about the request reference of the call.
+_UNRECONCILED_SERVICE_TYPES: FrozenSet[ServiceType] = frozenset(
+    {ServiceType.FUND_TRANSFER_INSTRUCTION}
+)
+
+_BILL_PURCHASE_SERVICE_TYPES = frozenset(
+    {ServiceType.ADMIN_PURCHASE_BILL, ServiceType.PURCHASE_BILL}
+)
+_GIFT_CARD_PURCHASE_SERVICE_TYPES = frozenset(
+    {ServiceType.ADMIN_BUY_GIFT_CARD, ServiceType.BUY_GIFT_CARD}
+)
+
+# The calls that move money, which are recorded in the outbox before they're made:
+# the transfers and purchases declared unsafe to repeat. Savings postings are left out,
+# since a transaction status query can't tell whether they were applied.
+MONEY_MOVING_SERVICE_TYPES: FrozenSet[ServiceType] = (
+    frozenset(
+        endpoint.service_type
+        for endpoints in (
+            TRANSACTION_ENDPOINTS,
+            BILLING_AND_BETTING_ENDPOINTS,
+            GIFT_CARD_ENDPOINTS,
+        )
+        for endpoint in endpoints.values()
+        if endpoint.idempotency is Idempotency.UNSAFE
+    )
+    - _UNRECONCILED_SERVICE_TYPES
+)
+
+
+class OutboxStatus(str, Enum):
+    """The states an outbox entry goes through.
+
+    An entry is `PENDING` from the moment it's recorded until Kuda's answer is known.
+    Entries left `PENDING` by a crash or a connection error are reconciled by
+    `OutboxRecovery`.
+    """
+
+    PENDING = "pending"
+    ACKNOWLEDGED = "acknowledged"
+    REJECTED = "rejected"
+    SUCCESSFUL = "successful"
+    FAILED = "failed"
+    NOT_FOUND = "not_found"
+
+
+@dataclass
+class OutboxEntry:
+    """A money-moving call recorded in the outbox."""
+
+    request_reference: str
+    service_type: ServiceType
+    payload: Optional[dict]
+    status: OutboxStatus
+    created_at: float
+    updated_at: float
+    response: Optional[dict] = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    request_reference TEXT PRIMARY KEY,
+    service_type TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    response TEXT
+)
+"""
+_PENDING_INDEX = (
+    "CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, created_at)"
+)
+_INSERT = "INSERT INTO outbox VALUES (?, ?, ?, ?, ?, ?, NULL)"
+_UPDATE = (
+    "UPDATE outbox SET status = ?, updated_at = ?, response = ? "
+    "WHERE request_reference = ?"
+)
+
+
+class Outbox:
+    """A durable, write-ahead record of the money-moving calls made to Kuda.
+
+    Wrappers given an outbox record the request reference and payload of every call in
+    `service_types` before making it, and the outcome once Kuda answers. A call is only
+    made once its entry is on disk, so after a crash every call that may have moved money
+    is found among the `PENDING` entries.
+
+    Writes are made by a single background thread with group commit: every write queued
+    while a transaction is being committed goes into the next transaction, so concurrent
+    calls share one fsync instead of paying for one each.
+
+    Args:
+        path: The path of the SQLite database.
+        service_types: The service types of the calls recorded.
+        max_batch_size: The maximum number of writes committed in one transaction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_types: FrozenSet[ServiceType] = MONEY_MOVING_SERVICE_TYPES,
+        max_batch_size: int = 1000,
+    ):
+        self.path = path
+        self.service_types = service_types
+        self.max_batch_size = max_batch_size
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(_SCHEMA)
+        self._connection.execute(_PENDING_INDEX)
+        self._connection_lock = threading.Lock()
+        self._queue: Deque[Tuple[str, tuple, Optional[Future]]] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="pykuda2-outbox", daemon=True
+        )
+        self._writer.start()
+
+    def _submit(self, statement: str, parameters: tuple, wait: bool) -> Future:
+        future: Optional[Future] = Future() if wait else None
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The outbox is closed")
+            self._queue.append((statement, parameters, future))
+            self._condition.notify()
+        return future
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(len(self._queue), self.max_batch_size))
+                ]
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[str, tuple, Optional[Future]]]) -> None:
+        try:
+            with self._connection_lock:
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    errors = []
+                    for statement, parameters, _ in batch:
+                        try:
+                            self._connection.execute(statement, parameters)
+                            errors.append(None)
+                        except sqlite3.IntegrityError as error:
+                            errors.append(error)
+                    self._connection.execute("COMMIT")
+                except BaseException:
+                    self._connection.execute("ROLLBACK")
+                    raise
+        except Exception as error:
+            logger.exception("Unable to write to the outbox")
+            errors = [error] * len(batch)
+        for (_, _, future), error in zip(batch, errors):
+            if future is None:
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def _record(self, request_reference: str, service_type: ServiceType, payload):
+        now = time.time()
+        return self._submit(
+            _INSERT,
+            (
+                request_reference,
+                service_type.value,
+                json.dumps(payload),
+                OutboxStatus.PENDING.value,
+                now,
+                now,
+            ),
+            wait=True,
+        )
+
+    def record(
+        self, request_reference: str, service_type: ServiceType, payload: Optional[dict]
+    ) -> None:
+        """Records a call before it's made, and returns once the record is on disk.
+
+        Args:
+            request_reference: The reference the call is made with.
+            service_type: The Kuda service called.
+            payload: The data sent with the call.
+
+        Raises:
+            sqlite3.IntegrityError: when a call was already recorded with the same reference.
+        """
+        self._record(request_reference, service_type, payload).result()
+
+    async def record_async(
+        self, request_reference: str, service_type: ServiceType, payload: Optional[dict]
+    ) -> None:
+        """The asynchronous equivalent of `record`, which doesn't block the event loop."""
+        await asyncio.wrap_future(
+            self._record(request_reference, service_type, payload)
+        )
+
+    def update(
+        self,
+        request_reference: str,
+        status: OutboxStatus,
+        response: Optional[APIResponse] = None,
+    ) -> None:
+        """Updates the status of an entry without waiting for the update to be on disk.
+
+        Args:
+            request_reference: The reference the call was made with.
+            status: The new status of the call.
+            response: The response that led to the new status.
+        """
+        self._submit(
+            _UPDATE,
+            (
+                status.value,
+                time.time(),
+                json.dumps(response.raw) if response is not None else None,
+                request_reference,
+            ),
+            wait=False,
+        )
+
+    def acknowledge(self, request_reference: str, response: APIResponse) -> None:
+        """Records the response Kuda made to a call.
+
+        Calls Kuda turned down are `REJECTED` and calls it accepted are `ACKNOWLEDGED`.
+        Server errors leave the entry `PENDING`, since the outcome of the call is unknown.
+        A response to a call still in flight when the outbox was closed isn't recorded:
+        it's logged, and the entry is left `PENDING` for `OutboxRecovery`.
+        """
+        if response.status_code >= 500:
+            return
+        status = OutboxStatus.ACKNOWLEDGED if response.status else OutboxStatus.REJECTED
+        with self._condition:
+            if self._closed:
+                logger.warning(
+                    "The outbox was closed before the response to %s was recorded",
+                    request_reference,
+                )
+                return
+            self.update(request_reference, status, response)
+
+    def flush(self) -> None:
+        """Waits until every write queued so far is on disk."""
+        self._submit("SELECT 1", (), wait=True).result()
+
+    def entries(
+        self, status: Optional[OutboxStatus] = None, older_than: float = 0.0
+    ) -> List[OutboxEntry]:
+        """Returns the entries recorded, oldest first.
+
+        Args:
+            status: Only return the entries with this status.
+            older_than: Only return the entries recorded more than this many seconds ago.
+        """
+        self.flush()
+        query = "SELECT * FROM outbox WHERE created_at <= ?"
+        parameters: list = [time.time() - older_than]
+        if status is not None:
+            query += " AND status = ?"
+            parameters.append(status.value)
+        with self._connection_lock:
+            rows = self._connection.execute(
+                query + " ORDER BY created_at", parameters
+            ).fetchall()
+        return [
+            OutboxEntry(
+                request_reference=row[0],
+                service_type=ServiceType(row[1]),
+                payload=json.loads(row[2]) if row[2] is not None else None,
+                status=OutboxStatus(row[3]),
+                created_at=row[4],
+                updated_at=row[5],
+                response=json.loads(row[6]) if row[6] is not None else None,
+            )
+            for row in rows
+        ]
+
+    def pending(self, older_than: float = 0.0) -> List[OutboxEntry]:
+        """Returns the entries whose outcome is unknown, oldest first."""
+        return self.entries(status=OutboxStatus.PENDING, older_than=older_than)
+
+    def close(self) -> None:
+        """Writes every queued write to disk and closes the database."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _status_query_kwargs(entry: OutboxEntry) -> dict:
+    payload = {key.lower(): value for key, value in (entry.payload or {}).items()}
+    is_third_party_bank_transfer = (
+        entry.service_type
+        in (
+            ServiceType.SINGLE_FUND_TRANSFER,
+            ServiceType.VIRTUAL_ACCOUNT_FUND_TRANSFER,
+        )
+        and str(payload.get("beneficiarybankcode")) != KUDA_BANK_CODE
+    )
+    return {
+        "is_third_party_bank_transfer": is_third_party_bank_transfer,
+        "transaction_request_reference": entry.request_reference,
+    }
+
+
+def _gift_card_status_kwargs(entry: OutboxEntry) -> dict:
+    # Gift card purchases are looked up by their details rather than by reference, and
+    # purchases made from the main account have no tracking reference.
+    payload = entry.payload or {}
+    return {
+        field.name: payload.get(field.key)
+        for field in GIFT_CARD_ENDPOINTS["get_gift_card_status"].fields
+    }
+
+
+def _reconciled_status(response: APIResponse) -> Optional[OutboxStatus]:
+    """Maps the answer to a status query to the new status of an entry, if it changed."""
+    if response.status_code >= 500:
+        return None
+    if not response.status:
+        # Only an explicit answer that Kuda has no record of the call means no money
+        # moved. Other failures, e.g. an expired token or a rate limited query, say
+        # nothing about the call, so the entry stays pending.
+        if response.status_code < 400 and _NOT_FOUND_MESSAGE.search(
+            response.message or ""
+        ):
+            return OutboxStatus.NOT_FOUND
+        return None
+    status = get_transaction_status(response)
+    if status == TransactionStatus.SUCCESSFUL:
+        return OutboxStatus.SUCCESSFUL
+    if status == TransactionStatus.FAILED:
+        return OutboxStatus.FAILED
+    return None
+
+
+class OutboxRecovery:
+    """Reconciles the entries an `Outbox` was left with after a crash.
+
+    Every `PENDING` entry is looked up with a status query. Entries Kuda explicitly
+    says it has no record of are marked `NOT_FOUND` and can safely be retried with a
+    new reference, while the others become `SUCCESSFUL` or `FAILED` once Kuda reports a
+    final status. Entries whose query fails for any other reason, e.g. an expired token
+    or rate limiting, are left `PENDING` until a later reconciliation.
+
+    Args:
+        outbox: The outbox reconciled.
+        transactions: The `Transaction` wrapper used to query the status of transfers.
+        billing_and_betting: The `BillingAndBetting` wrapper used to query the status of
+            bill purchases. Bill purchases are left `PENDING` without it.
+        gift_cards: The `GiftCard` wrapper used to query the status of gift card
+            purchases. Gift card purchases are left `PENDING` without it.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        transactions: "Transaction",
+        billing_and_betting: Optional["BillingAndBetting"] = None,
+        gift_cards: Optional["GiftCard"] = None,
+    ):
+        self.outbox = outbox
+        self.transactions = transactions
+        self.billing_and_betting = billing_and_betting
+        self.gift_cards = gift_cards
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _query(self, entry: OutboxEntry) -> Optional[APIResponse]:
+        if entry.service_type in _BILL_PURCHASE_SERVICE_TYPES:
+            if self.billing_and_betting is None:
+                return None
+            return self.billing_and_betting.get_bill_purchase_status(
+                bill_request_ref=entry.request_reference,
+                bill_response_reference=None,
+            )
+        if entry.service_type in _GIFT_CARD_PURCHASE_SERVICE_TYPES:
+            if self.gift_cards is None:
+                return None
+            return self.gift_cards.get_gift_card_status(
+                **_gift_card_status_kwargs(entry)
+            )
+        return self.transactions.get_status(**_status_query_kwargs(entry))
+
+    def reconcile(self, older_than: float = 60.0) -> Counter:
+        """Reconciles the entries pending for more than `older_than` seconds.
+
+        Args:
+            older_than: How old an entry has to be to be reconciled, which leaves the
+                calls in flight alone.
+
+        Returns:
+            A `Counter` of the new statuses of the entries reconciled.
+        """
+        reconciled: Counter = Counter()
+        for entry in self.outbox.pending(older_than=older_than):
+            try:
+                response = self._query(entry)
+            except Exception:
+                logger.exception(
+                    "Unable to reconcile outbox entry %s", entry.request_reference
+                )
+                continue
+            status = _reconciled_status(response) if response is not None else None
+            if status is not None:
+                self.outbox.update(entry.request_reference, status, response)
+                reconciled[status] += 1
+        self.outbox.flush()
+        return reconciled
+
+    def start(self, interval: float = 60.0, older_than: float = 60.0) -> None:
+        """Reconciles pending entries every `interval` seconds from a background thread."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+
+        def run():
+            while not self._stopped.is_set():
+                try:
+                    self.reconcile(older_than=older_than)
+                except Exception:
+                    logger.exception("Unable to reconcile the outbox")
+                self._stopped.wait(interval)
+
+        self._thread = threading.Thread(
+            target=run, name="pykuda2-outbox-recovery", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the background reconciliation started with `start`."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class AsyncOutboxRecovery:
+    """The asynchronous equivalent of `OutboxRecovery`.
+
+    Args:
+        outbox: The outbox reconciled.
+        transactions: The `AsyncTransaction` wrapper used to query the status of transfers.
+        billing_and_betting: The `AsyncBillingAndBetting` wrapper used to query the status
+            of bill purchases. Bill purchases are left `PENDING` without it.
+        concurrency: The maximum number of status queries made concurrently.
+        gift_cards: The `AsyncGiftCard` wrapper used to query the status of gift card
+            purchases. Gift card purchases are left `PENDING` without it.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        transactions: "AsyncTransaction",
+        billing_and_betting: Optional["AsyncBillingAndBetting"] = None,
+        concurrency: int = 10,
+        gift_cards: Optional["AsyncGiftCard"] = None,
+    ):
+        self.outbox = outbox
+        self.transactions = transactions
+        self.billing_and_betting = billing_and_betting
+        self.concurrency = concurrency
+        self.gift_cards = gift_cards
+
+    async def _query(self, entry: OutboxEntry) -> Optional[APIResponse]:
+        if entry.service_type in _BILL_PURCHASE_SERVICE_TYPES:
+            if self.billing_and_betting is None:
+                return None
+            return await self.billing_and_betting.get_bill_purchase_status(
+                bill_request_ref=entry.request_reference,
+                bill_response_reference=None,
+            )
+        if entry.service_type in _GIFT_CARD_PURCHASE_SERVICE_TYPES:
+            if self.gift_cards is None:
+                return None
+            return await self.gift_cards.get_gift_card_status(
+                **_gift_card_status_kwargs(entry)
+            )
+        return await self.transactions.get_status(**_status_query_kwargs(entry))
+
+    async def reconcile(self, older_than: float = 60.0) -> Counter:
+        """Reconciles the entries pending for more than `older_than` seconds.
+
+        Returns:
+            A `Counter` of the new statuses of the entries reconciled.
+        """
+        reconciled: Counter = Counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, self.outbox.pending, older_than)
+
+        async def reconcile_entry(entry: OutboxEntry) -> None:
+            async with semaphore:
+                try:
+                    response = await self._query(entry)
+                except Exception:
+                    logger.exception(
+                        "Unable to reconcile outbox entry %s", entry.request_reference
+                    )
+                    return
+            status = _reconciled_status(response) if response is not None else None
+            if status is not None:
+                self.outbox.update(entry.request_reference, status, response)
+                reconciled[status] += 1
+
+        await asyncio.gather(*(reconcile_entry(entry) for entry in entries))
+        await loop.run_in_executor(None, self.outbox.flush)
+        return reconciled
+
+    async def run(self, interval: float = 60.0, older_than: float = 60.0) -> None:
+        """Reconciles pending entries every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.reconcile(older_than=older_than)
+            except Exception:
+                logger.exception("Unable to reconcile the outbox")
+            await asyncio.sleep(interval)
@@ -0,0 +1,73 @@
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+
+from pykuda2.endpoints import ACCOUNT_ENDPOINTS
+from pykuda2.exceptions import PaginationException
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+    from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+DEFAULT_PAGE_SIZE = 100
+_VIRTUAL_ACCOUNTS_KEY = ACCOUNT_ENDPOINTS["get_virtual_accounts"].pagination.items_key
+
+
+def _page_items(response: APIResponse, page_number: int, key: str) -> list:
+    if not response.status or not isinstance(response.data, dict):
+        raise PaginationException(
+            f"Unable to retrieve page {page_number}: {response.message}"
+        )
+    return response.data.get(key) or []
+
+
+def iter_virtual_accounts(
+    accounts: "Account", page_size: int = DEFAULT_PAGE_SIZE
+) -> Iterator[dict]:
+    """Iterates over all your virtual accounts, fetching them page by page.
+
+    A page is only fetched once the accounts of the previous one were consumed.
+
+    Args:
+        accounts: The `Account` wrapper the pages are fetched with.
+        page_size: The number of virtual accounts fetched per request.
+
+    Raises:
+        PaginationException: when a page can't be retrieved.
+        ConnectionException: when the request times out or in the absence of an internet connection.
+    """
+    page_number = 1
+    while True:
+        response = accounts.get_virtual_accounts(
+            page_size=page_size, page_number=page_number
+        )
+        items = _page_items(response, page_number, _VIRTUAL_ACCOUNTS_KEY)
+        yield from items
+        if len(items) < page_size:
+            return
+        page_number += 1
+
+
+async def iter_virtual_accounts_async(
+    accounts: "AsyncAccount", page_size: int = DEFAULT_PAGE_SIZE
+) -> AsyncIterator[dict]:
+    """The asynchronous equivalent of `iter_virtual_accounts`.
+
+    Args:
+        accounts: The `AsyncAccount` wrapper the pages are fetched with.
+        page_size: The number of virtual accounts fetched per request.
+
+    Raises:
+        PaginationException: when a page can't be retrieved.
+        ConnectionException: when the request times out or in the absence of an internet connection.
+    """
+    page_number = 1
+    while True:
+        response = await accounts.get_virtual_accounts(
+            page_size=page_size, page_number=page_number
+        )
+        items = _page_items(response, page_number, _VIRTUAL_ACCOUNTS_KEY)
+        for item in items:
+            yield item
+        if len(items) < page_size:
+            return
+        page_number += 1
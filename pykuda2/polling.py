@@ -0,0 +1,795 @@
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from pykuda2.concurrency import RateLimiter
+from pykuda2.exceptions import (
+    ConnectionException,
+    InvalidResponseException,
+    PollingTimeoutException,
+)
+from pykuda2.utils import APIResponse, ServiceType, TransactionStatus
+
+if TYPE_CHECKING:
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Errors that are worth polling again for, since they say nothing about the
+# outcome of the operation being polled.
+TRANSIENT_EXCEPTIONS = (ConnectionException, InvalidResponseException)
+
+_TRANSACTION_STATUS_LOOKUP = {status.value.lower(): status for status in TransactionStatus}
+
+
+@dataclass
+class Backoff:
+    """An exponential backoff policy used to space out polls of a single item.
+
+    Attributes:
+        initial: The delay in seconds before the first poll.
+        factor: The multiplier applied to the delay after every unsuccessful poll.
+        maximum: The upper bound of the delay in seconds.
+        jitter: The fraction by which each delay is randomly stretched or shrunk, so
+            items submitted together don't keep getting polled together.
+    """
+
+    initial: float = 1.0
+    factor: float = 2.0
+    maximum: float = 60.0
+    jitter: float = 0.1
+
+    def delay(self, attempt: int) -> float:
+        """Returns the delay in seconds before poll number `attempt` (starting from 0)."""
+        delay = min(self.maximum, self.initial * self.factor ** min(attempt, 64))
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return delay
+
+
+def get_transaction_status(response: APIResponse) -> Optional[TransactionStatus]:
+    """Extracts the status of a transaction from a transaction status query response.
+
+    Args:
+        response: The `APIResponse` returned by `Transaction.get_status`.
+
+    Returns:
+        The `TransactionStatus` of the transaction or `None` if the response does not contain one.
+    """
+    if not isinstance(response.data, dict):
+        return None
+    for key in ("Status", "status", "TransactionStatus", "transactionStatus"):
+        value = response.data.get(key)
+        if isinstance(value, str) and value.lower() in _TRANSACTION_STATUS_LOOKUP:
+            return _TRANSACTION_STATUS_LOOKUP[value.lower()]
+    return None
+
+
+def is_final_transaction_status(response: APIResponse) -> bool:
+    """Returns `True` if the transaction in a status query response is either successful or failed."""
+    return get_transaction_status(response) in (
+        TransactionStatus.SUCCESSFUL,
+        TransactionStatus.FAILED,
+    )
+
+
+class _PollItem:
+    __slots__ = (
+        "check",
+        "is_final",
+        "future",
+        "callback",
+        "deadline",
+        "attempt",
+        "context",
+    )
+
+    def __init__(self, check, is_final, future, callback, timeout, context=None):
+        self.check = check
+        self.is_final = is_final
+        self.future = future
+        self.callback = callback
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.attempt = 0
+        # The instrumentation context of the caller that started polling the item.
+        self.context = context
+
+
+class _BasePoller:
+    def __init__(
+        self,
+        backoff: Optional[Backoff] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 50,
+    ):
+        self.backoff = backoff or Backoff()
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self._queue: list = []
+        self._counter = itertools.count()
+
+    @property
+    def pending(self) -> int:
+        """The number of items waiting to be polled."""
+        return len(self._queue)
+
+    def _push(self, item: _PollItem, delay: Optional[float]) -> None:
+        if delay is None:
+            delay = self.backoff.delay(item.attempt)
+        if item.deadline is not None:
+            # The last poll happens right at the deadline rather than after it.
+            delay = min(delay, max(0.0, item.deadline - time.monotonic()))
+        heapq.heappush(
+            self._queue, (time.monotonic() + delay, next(self._counter), item)
+        )
+
+    def _pop_due(self) -> list:
+        now = time.monotonic()
+        batch = []
+        while (
+            self._queue and self._queue[0][0] <= now and len(batch) < self.batch_size
+        ):
+            batch.append(heapq.heappop(self._queue)[2])
+        return batch
+
+    def _seconds_to_next_poll(self) -> Optional[float]:
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - time.monotonic())
+
+    @staticmethod
+    def _timed_out(item: _PollItem) -> bool:
+        return item.deadline is not None and time.monotonic() >= item.deadline
+
+    @staticmethod
+    def _timeout_exception(item: _PollItem) -> PollingTimeoutException:
+        return PollingTimeoutException(
+            f"Operation did not reach a final state after {item.attempt} polls"
+        )
+
+    def _cancel_pending(self) -> None:
+        while self._queue:
+            heapq.heappop(self._queue)[2].future.cancel()
+
+    def _transient_error(self, item: _PollItem) -> None:
+        """Called when an item is about to be polled again after a transient error."""
+
+
+class Poller(_BasePoller):
+    """Polls many pending operations from a single background thread.
+
+    Every watched item is polled with its own exponential backoff until its
+    `is_final` predicate returns `True`. Items that are due together are polled
+    in batches, and every poll goes through `rate_limiter` when one is provided,
+    so the total number of calls made to Kuda stays bounded no matter how many
+    items are being watched.
+
+    Args:
+        backoff: The backoff policy applied to every item. Defaults to `Backoff()`.
+        rate_limiter: An optional `RateLimiter` shared by all polls.
+        batch_size: The maximum number of due items picked up at once.
+    """
+
+    def __init__(
+        self,
+        backoff: Optional[Backoff] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 50,
+    ):
+        super().__init__(
+            backoff=backoff, rate_limiter=rate_limiter, batch_size=batch_size
+        )
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def watch(
+        self,
+        check: Callable[[], APIResponse],
+        is_final: Callable[[APIResponse], bool],
+        callback: Optional[Callable[[APIResponse], None]] = None,
+        delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> "Future[APIResponse]":
+        """Starts polling an operation until it reaches a final state.
+
+        Args:
+            check: A callable that queries the current state of the operation.
+            is_final: A predicate that tells if the response of `check` is final.
+            callback: An optional callable invoked with the final response.
+            delay: The delay in seconds before the first poll. It defaults to the
+                first delay of the backoff policy.
+            timeout: The number of seconds after which polling is abandoned. It is
+                unlimited by default.
+
+        Returns:
+            A `Future` resolved with the final `APIResponse`, with a `PollingTimeoutException`
+            if `timeout` elapses first, or with the exception raised by `check` or
+            `is_final` if it is not a transient error.
+        """
+        future: "Future[APIResponse]" = Future()
+        self._add(_PollItem(check, is_final, future, callback, timeout), delay)
+        return future
+
+    def _add(self, item: _PollItem, delay: Optional[float]) -> None:
+        self.start()
+        with self._condition:
+            self._push(item, delay)
+            self._condition.notify()
+
+    def start(self) -> None:
+        """Starts the polling thread. It is called automatically by `watch`."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name="pykuda2-poller", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops the polling thread and cancels the futures of items still being watched.
+
+        Args:
+            wait: Whether to wait for the polling thread to exit.
+        """
+        with self._condition:
+            self._running = False
+            self._cancel_pending()
+            self._condition.notify()
+        thread, self._thread = self._thread, None
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _next_batch(self) -> list:
+        with self._condition:
+            while self._running:
+                batch = self._pop_due()
+                if batch:
+                    return batch
+                self._condition.wait(self._seconds_to_next_poll())
+            return []
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            for item in batch:
+                if not self._running:
+                    # The poller was stopped while the batch was being polled.
+                    item.future.cancel()
+                    continue
+                if item.future.cancelled():
+                    continue
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                self._poll(item)
+
+    def _poll(self, item: _PollItem) -> None:
+        try:
+            response = item.check()
+            final = item.is_final(response)
+        except TRANSIENT_EXCEPTIONS:
+            self._retry(item, transient=True)
+            return
+        except Exception as exc:
+            self._resolve(item.future.set_exception, exc)
+            return
+        if not final:
+            self._retry(item)
+            return
+        if not self._resolve(item.future.set_result, response):
+            return
+        if item.callback:
+            try:
+                item.callback(response)
+            except Exception:
+                logger.exception("Poller callback raised an exception")
+
+    @staticmethod
+    def _resolve(setter: Callable, value) -> bool:
+        # The future may have been cancelled by its owner while it was being polled.
+        try:
+            setter(value)
+        except InvalidStateError:
+            return False
+        return True
+
+    def _retry(self, item: _PollItem, transient: bool = False) -> None:
+        item.attempt += 1
+        if self._timed_out(item):
+            self._resolve(item.future.set_exception, self._timeout_exception(item))
+            return
+        if transient:
+            self._transient_error(item)
+        with self._condition:
+            if self._running:
+                self._push(item, None)
+            else:
+                item.future.cancel()
+
+
+class AsyncPoller(_BasePoller):
+    """Polls many pending operations from a single task on the running event loop.
+
+    It is the asynchronous equivalent of `Poller`. Items that are due together
+    are polled concurrently, while `rate_limiter` (when provided) keeps the total
+    number of calls made to Kuda bounded.
+
+    Args:
+        backoff: The backoff policy applied to every item. Defaults to `Backoff()`.
+        rate_limiter: An optional `RateLimiter` shared by all polls.
+        batch_size: The maximum number of due items polled concurrently.
+    """
+
+    def __init__(
+        self,
+        backoff: Optional[Backoff] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 50,
+    ):
+        super().__init__(
+            backoff=backoff, rate_limiter=rate_limiter, batch_size=batch_size
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def watch(
+        self,
+        check: Callable[[], Awaitable[APIResponse]],
+        is_final: Callable[[APIResponse], bool],
+        callback: Optional[Callable[[APIResponse], None]] = None,
+        delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> "asyncio.Future[APIResponse]":
+        """Starts polling an operation until it reaches a final state.
+
+        It must be called from a running event loop.
+
+        Args:
+            check: A coroutine function that queries the current state of the operation.
+            is_final: A predicate that tells if the response of `check` is final.
+            callback: An optional callable invoked with the final response. If it
+                returns an awaitable, the awaitable is awaited.
+            delay: The delay in seconds before the first poll. It defaults to the
+                first delay of the backoff policy.
+            timeout: The number of seconds after which polling is abandoned. It is
+                unlimited by default.
+
+        Returns:
+            An `asyncio.Future` resolved with the final `APIResponse`, with a
+            `PollingTimeoutException` if `timeout` elapses first, or with the exception
+            raised by `check` or `is_final` if it is not a transient error.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._add(_PollItem(check, is_final, future, callback, timeout), delay)
+        return future
+
+    def _add(self, item: _PollItem, delay: Optional[float]) -> None:
+        self.start()
+        self._push(item, delay)
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Starts the polling task. It is called automatically by `watch`."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the polling task and cancels the futures of items still being watched."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._cancel_pending()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def _run(self) -> None:
+        while True:
+            batch = self._pop_due()
+            if batch:
+                await asyncio.gather(*(self._poll(item) for item in batch))
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self._seconds_to_next_poll()
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, item: _PollItem) -> None:
+        if item.future.done():
+            return
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            response = await item.check()
+            final = item.is_final(response)
+        except asyncio.CancelledError:
+            # The poller was stopped while the item was being polled.
+            item.future.cancel()
+            raise
+        except TRANSIENT_EXCEPTIONS:
+            self._retry(item, transient=True)
+            return
+        except Exception as exc:
+            if not item.future.done():
+                item.future.set_exception(exc)
+            return
+        if not final:
+            self._retry(item)
+            return
+        if item.future.done():
+            return
+        item.future.set_result(response)
+        if item.callback:
+            try:
+                result = item.callback(response)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Poller callback raised an exception")
+
+    def _retry(self, item: _PollItem, transient: bool = False) -> None:
+        item.attempt += 1
+        if self._timed_out(item):
+            if not item.future.done():
+                item.future.set_exception(self._timeout_exception(item))
+            return
+        if transient:
+            self._transient_error(item)
+        self._push(item, None)
+
+
+class TransactionStatusPoller(Poller):
+    """Polls the status of many pending transfers from a single background thread.
+
+    It replaces a sleep loop per transfer with a single thread that queries
+    `Transaction.get_status` for every watched transfer until it is either
+    `Successful` or `Failed`.
+
+    Args:
+        transactions: The `Transaction` wrapper used to query transaction statuses.
+        backoff: The backoff policy applied to every transfer. Defaults to `Backoff()`.
+        rate_limiter: An optional `RateLimiter` shared by all status queries.
+        batch_size: The maximum number of due transfers picked up at once.
+    """
+
+    def __init__(
+        self,
+        transactions: "Transaction",
+        backoff: Optional[Backoff] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 50,
+    ):
+        super().__init__(
+            backoff=backoff, rate_limiter=rate_limiter, batch_size=batch_size
+        )
+        self.transactions = transactions
+
+    def _transient_error(self, item: _PollItem) -> None:
+        # Polls of transfers still pending aren't retries, only polls failing are.
+        instrumentation = getattr(self.transactions, "instrumentation", None)
+        if instrumentation is not None:
+            instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY, item.context)
+
+    def watch_transfer(
+        self,
+        transaction_request_reference: str,
+        is_third_party_bank_transfer: bool = True,
+        callback: Optional[Callable[[APIResponse], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> "Future[APIResponse]":
+        """Starts polling the status of a transfer.
+
+        Args:
+            transaction_request_reference: The request reference used when making the transfer.
+            is_third_party_bank_transfer: Flag to determine if the transaction was interbank or
+                intra-bank.
+            callback: An optional callable invoked with the final status query response.
+            timeout: The number of seconds after which polling is abandoned, e.g. for a
+                transfer stuck in the pending state. It is unlimited by default.
+
+        Returns:
+            A `Future` resolved with the final status query response, or with a
+            `PollingTimeoutException` if `timeout` elapses first.
+        """
+        future: "Future[APIResponse]" = Future()
+        check = functools.partial(
+            self.transactions.get_status,
+            is_third_party_bank_transfer=is_third_party_bank_transfer,
+            transaction_request_reference=transaction_request_reference,
+        )
+        # Retries are reported on behalf of the caller, e.g. in the span it's in.
+        instrumentation = getattr(self.transactions, "instrumentation", None)
+        context = (
+            instrumentation.capture_context() if instrumentation is not None else None
+        )
+        self._add(
+            _PollItem(
+                check, is_final_transaction_status, future, callback, timeout, context
+            ),
+            None,
+        )
+        return future
+
+
+class AsyncTransactionStatusPoller(AsyncPoller):
+    """Polls the status of many pending transfers from a single task on the running event loop.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper used to query transaction statuses.
+        backoff: The backoff policy applied to every transfer. Defaults to `Backoff()`.
+        rate_limiter: An optional `RateLimiter` shared by all status queries.
+        batch_size: The maximum number of due transfers polled concurrently.
+    """
+
+    def __init__(
+        self,
+        transactions: "AsyncTransaction",
+        backoff: Optional[Backoff] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 50,
+    ):
+        super().__init__(
+            backoff=backoff, rate_limiter=rate_limiter, batch_size=batch_size
+        )
+        self.transactions = transactions
+
+    def _transient_error(self, item: _PollItem) -> None:
+        # Polls of transfers still pending aren't retries, only polls failing are.
+        instrumentation = getattr(self.transactions, "instrumentation", None)
+        if instrumentation is not None:
+            instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY, item.context)
+
+    def watch_transfer(
+        self,
+        transaction_request_reference: str,
+        is_third_party_bank_transfer: bool = True,
+        callback: Optional[Callable[[APIResponse], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> "asyncio.Future[APIResponse]":
+        """Starts polling the status of a transfer.
+
+        Args:
+            transaction_request_reference: The request reference used when making the transfer.
+            is_third_party_bank_transfer: Flag to determine if the transaction was interbank or
+                intra-bank.
+            callback: An optional callable invoked with the final status query response.
+            timeout: The number of seconds after which polling is abandoned, e.g. for a
+                transfer stuck in the pending state. It is unlimited by default.
+
+        Returns:
+            An `asyncio.Future` resolved with the final status query response, or with
+            a `PollingTimeoutException` if `timeout` elapses first.
+        """
+        future = asyncio.get_running_loop().create_future()
+        check = functools.partial(
+            self.transactions.get_status,
+            is_third_party_bank_transfer=is_third_party_bank_transfer,
+            transaction_request_reference=transaction_request_reference,
+        )
+        # Retries are reported on behalf of the caller, e.g. in the span it's in.
+        instrumentation = getattr(self.transactions, "instrumentation", None)
+        context = (
+            instrumentation.capture_context() if instrumentation is not None else None
+        )
+        self._add(
+            _PollItem(
+                check, is_final_transaction_status, future, callback, timeout, context
+            ),
+            None,
+        )
+        return future
+
+
+_default_poller: Optional[Poller] = None
+_default_poller_lock = threading.Lock()
+_default_async_pollers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPoller]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_default_poller() -> Poller:
+    """Returns the process wide `Poller` used by wrappers that don't have a poller of their own."""
+    global _default_poller
+    with _default_poller_lock:
+        if _default_poller is None:
+            _default_poller = Poller()
+        return _default_poller
+
+
+def get_default_async_poller() -> AsyncPoller:
+    """Returns the `AsyncPoller` used on the running event loop by asynchronous wrappers
+    that don't have a poller of their own."""
+    loop = asyncio.get_running_loop()
+    poller = _default_async_pollers.get(loop)
+    if poller is None:
+        poller = _default_async_pollers[loop] = AsyncPoller()
+    return poller
+
+
+@dataclass
+class PendingPurchase(APIResponse):
+    """An `APIResponse` of a purchase whose final outcome can be waited for.
+
+    It is returned by the purchase methods of the `BillingAndBetting` and `GiftCard`
+    wrappers. All pending purchases are polled by a single `Poller`, so waiting on
+    thousands of them does not cost a sleep loop each.
+
+    Attributes:
+        check: A callable that queries the status of the purchase.
+        poller: The `Poller` that drives `check`. The default poller is used if it is not provided.
+    """
+
+    check: Optional[Callable[[], APIResponse]] = field(
+        default=None, repr=False, compare=False
+    )
+    poller: Optional[Poller] = field(default=None, repr=False, compare=False)
+    _future: Optional[Future] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_response(
+        cls,
+        response: APIResponse,
+        check: Callable[[], APIResponse],
+        poller: Optional[Poller] = None,
+    ) -> "PendingPurchase":
+        return cls(
+            status_code=response.status_code,
+            status=response.status,
+            message=response.message,
+            data=response.data,
+            raw=response.raw,
+            check=check,
+            poller=poller,
+        )
+
+    def watch(self, timeout: Optional[float] = None) -> "Future[APIResponse]":
+        """Starts polling the status of the purchase.
+
+        Calling it more than once returns the same future. A purchase that was not
+        accepted in the first place resolves immediately with its own response.
+
+        Args:
+            timeout: The number of seconds after which polling is abandoned.
+
+        Returns:
+            A `Future` resolved with the final status response of the purchase.
+        """
+        if self._future is None:
+            if not self.status:
+                self._future = Future()
+                self._future.set_result(self)
+            else:
+                self._future = (self.poller or get_default_poller()).watch(
+                    check=self.check,
+                    is_final=is_final_transaction_status,
+                    timeout=timeout,
+                )
+        return self._future
+
+    def wait(self, timeout: Optional[float] = None) -> APIResponse:
+        """Blocks until the purchase is either successful or failed.
+
+        Args:
+            timeout: The number of seconds after which waiting is abandoned.
+
+        Returns:
+            The final status response of the purchase.
+
+        Raises:
+            PollingTimeoutException: when `timeout` elapses before the purchase is final.
+        """
+        return self.watch(timeout=timeout).result()
+
+
+@dataclass
+class AsyncPendingPurchase(APIResponse):
+    """An `APIResponse` of a purchase whose final outcome can be awaited.
+
+    It is returned by the purchase methods of the `AsyncBillingAndBetting` and
+    `AsyncGiftCard` wrappers. All pending purchases on an event loop are polled by a
+    single `AsyncPoller`.
+
+    Attributes:
+        check: A coroutine function that queries the status of the purchase.
+        poller: The `AsyncPoller` that drives `check`. The default poller of the running
+            event loop is used if it is not provided.
+    """
+
+    check: Optional[Callable[[], Awaitable[APIResponse]]] = field(
+        default=None, repr=False, compare=False
+    )
+    poller: Optional[AsyncPoller] = field(default=None, repr=False, compare=False)
+    _future: Optional[asyncio.Future] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_response(
+        cls,
+        response: APIResponse,
+        check: Callable[[], Awaitable[APIResponse]],
+        poller: Optional[AsyncPoller] = None,
+    ) -> "AsyncPendingPurchase":
+        return cls(
+            status_code=response.status_code,
+            status=response.status,
+            message=response.message,
+            data=response.data,
+            raw=response.raw,
+            check=check,
+            poller=poller,
+        )
+
+    def watch(self, timeout: Optional[float] = None) -> "asyncio.Future[APIResponse]":
+        """Starts polling the status of the purchase.
+
+        Calling it more than once returns the same future. A purchase that was not
+        accepted in the first place resolves immediately with its own response.
+
+        Args:
+            timeout: The number of seconds after which polling is abandoned.
+
+        Returns:
+            An `asyncio.Future` resolved with the final status response of the purchase.
+        """
+        if self._future is None:
+            if not self.status:
+                self._future = asyncio.get_running_loop().create_future()
+                self._future.set_result(self)
+            else:
+                self._future = (self.poller or get_default_async_poller()).watch(
+                    check=self.check,
+                    is_final=is_final_transaction_status,
+                    timeout=timeout,
+                )
+        return self._future
+
+    async def wait(self, timeout: Optional[float] = None) -> APIResponse:
+        """Waits until the purchase is either successful or failed.
+
+        Args:
+            timeout: The number of seconds after which waiting is abandoned.
+
+        Returns:
+            The final status response of the purchase.
+
+        Raises:
+            PollingTimeoutException: when `timeout` elapses before the purchase is final.
+        """
+        return await self.watch(timeout=timeout)
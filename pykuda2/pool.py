@@ -0,0 +1,271 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+import httpx
+
+from pykuda2.instrumentation import Instrumentation
+from pykuda2.kuda import AsyncKuda, Kuda
+from pykuda2.outbox import Outbox
+from pykuda2.transports import (
+    DEFAULT_MAX_CONCURRENT_STREAMS,
+    DEFAULT_MAX_CONNECTIONS,
+    build_async_transport,
+    build_transport,
+)
+from pykuda2.utils import Mode
+
+DEFAULT_MAX_TENANTS = 128
+
+
+class KudaPool:
+    """Caches a `Kuda` wrapper per set of credentials, for services acting on behalf of
+    many Kuda accounts.
+
+    Every wrapper shares the connection pool of a single `httpx.Client` and keeps its
+    own access token, so getting the wrapper of a tenant seen recently is a dictionary
+    lookup instead of a token request. The least recently used wrappers are evicted once
+    there are more than `max_size` of them.
+
+    Args:
+        mode: The mode the wrappers are used in (development or production).
+        max_size: The maximum number of wrappers cached.
+        client: An optional `httpx.Client` shared by all the wrappers. It is left open
+            when the pool is closed. A client is created when it's not provided.
+        transport: An optional `httpx.BaseTransport` the pool creates the shared client with.
+        http2: Set to `True` to multiplex the requests of all the tenants over a few
+            HTTP/2 connections.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` shared by all the wrappers.
+        outbox: An optional `Outbox` shared by all the wrappers.
+        reference_generator: An optional callable shared by all the wrappers to generate
+            the references of the requests made without one.
+
+    Example:
+        ```python
+        pool = KudaPool(mode=Mode.PRODUCTION)
+
+        def handle(merchant):
+            kuda = pool.get(merchant.kuda_email, merchant.kuda_api_key)
+            return kuda.accounts.get_admin_account_balance()
+        ```
+    """
+
+    def __init__(
+        self,
+        mode: Mode = Mode.DEVELOPMENT,
+        max_size: int = DEFAULT_MAX_TENANTS,
+        client: Optional[httpx.Client] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional[Outbox] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("`max_size` must be at least 1")
+        if client is not None and (transport is not None or http2):
+            raise ValueError(
+                "`transport` and `http2` can't be used along with `client`"
+            )
+        if http2:
+            if transport is not None:
+                raise ValueError("`http2` can't be used along with `transport`")
+            transport = build_transport(
+                max_connections=max_connections,
+                max_concurrent_streams=max_concurrent_streams,
+            )
+        self.mode = mode
+        self.max_size = max_size
+        self.instrumentation = instrumentation
+        self.outbox = outbox
+        self.reference_generator = reference_generator
+        self._owns_client = client is None
+        self._client = (
+            client if client is not None else httpx.Client(transport=transport)
+        )
+        self._wrappers: "OrderedDict[Tuple[str, str], Kuda]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[Kuda]:
+        with self._lock:
+            kuda = self._wrappers.get(key)
+            if kuda is not None:
+                self._wrappers.move_to_end(key)
+            return kuda
+
+    def get(self, email: str, api_key: str) -> Kuda:
+        """Returns the wrapper of a tenant, creating it on first use.
+
+        Args:
+            email: The email address of the tenant's Kuda account.
+            api_key: The tenant's Kuda apiKey.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token of a new tenant can't be fetched.
+        """
+        key = (email, api_key)
+        kuda = self._cached(key)
+        if kuda is not None:
+            return kuda
+        # The token is fetched outside the lock so a slow tenant doesn't hold up others.
+        kuda = Kuda(
+            email=email,
+            api_key=api_key,
+            mode=self.mode,
+            client=self._client,
+            instrumentation=self.instrumentation,
+            outbox=self.outbox,
+            reference_generator=self.reference_generator,
+        )
+        with self._lock:
+            kuda = self._wrappers.setdefault(key, kuda)
+            self._wrappers.move_to_end(key)
+            while len(self._wrappers) > self.max_size:
+                self._wrappers.popitem(last=False)
+        return kuda
+
+    def evict(self, email: str, api_key: str) -> None:
+        """Forgets the wrapper of a tenant, e.g. once its apiKey was revoked."""
+        with self._lock:
+            self._wrappers.pop((email, api_key), None)
+
+    def clear(self) -> None:
+        """Forgets every wrapper cached."""
+        with self._lock:
+            self._wrappers.clear()
+
+    def __len__(self) -> int:
+        return len(self._wrappers)
+
+    def close(self) -> None:
+        """Forgets every wrapper and closes the shared client the pool created."""
+        self.clear()
+        if self._owns_client:
+            self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncKudaPool:
+    """The asynchronous equivalent of `KudaPool`, which caches `AsyncKuda` wrappers.
+
+    Args:
+        mode: The mode the wrappers are used in (development or production).
+        max_size: The maximum number of wrappers cached.
+        client: An optional `httpx.AsyncClient` shared by all the wrappers. It is left
+            open when the pool is closed. A client is created when it's not provided.
+        transport: An optional `httpx.AsyncBaseTransport` the pool creates the shared
+            client with.
+        http2: Set to `True` to multiplex the requests of all the tenants over a few
+            HTTP/2 connections.
+        max_connections: The maximum number of connections opened in `http2` mode.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            connection in `http2` mode.
+        instrumentation: An optional `Instrumentation` shared by all the wrappers.
+        outbox: An optional `Outbox` shared by all the wrappers.
+        reference_generator: An optional callable shared by all the wrappers to generate
+            the references of the requests made without one.
+    """
+
+    def __init__(
+        self,
+        mode: Mode = Mode.DEVELOPMENT,
+        max_size: int = DEFAULT_MAX_TENANTS,
+        client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+        instrumentation: Optional[Instrumentation] = None,
+        outbox: Optional[Outbox] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("`max_size` must be at least 1")
+        if client is not None and (transport is not None or http2):
+            raise ValueError(
+                "`transport` and `http2` can't be used along with `client`"
+            )
+        if http2:
+            if transport is not None:
+                raise ValueError("`http2` can't be used along with `transport`")
+            transport = build_async_transport(
+                max_connections=max_connections,
+                max_concurrent_streams=max_concurrent_streams,
+            )
+        self.mode = mode
+        self.max_size = max_size
+        self.instrumentation = instrumentation
+        self.outbox = outbox
+        self.reference_generator = reference_generator
+        self._owns_client = client is None
+        self._client = (
+            client if client is not None else httpx.AsyncClient(transport=transport)
+        )
+        self._wrappers: "OrderedDict[Tuple[str, str], AsyncKuda]" = OrderedDict()
+
+    async def get(self, email: str, api_key: str) -> AsyncKuda:
+        """Returns the wrapper of a tenant, creating it on first use.
+
+        Args:
+            email: The email address of the tenant's Kuda account.
+            api_key: The tenant's Kuda apiKey.
+
+        Raises:
+            ConnectionException: when the request times out or in the absence of an internet connection.
+            TokenException: when the access token of a new tenant can't be fetched.
+        """
+        key = (email, api_key)
+        kuda = self._wrappers.get(key)
+        if kuda is not None:
+            self._wrappers.move_to_end(key)
+            return kuda
+        kuda = AsyncKuda(
+            email=email,
+            api_key=api_key,
+            mode=self.mode,
+            client=self._client,
+            instrumentation=self.instrumentation,
+            outbox=self.outbox,
+            reference_generator=self.reference_generator,
+        )
+        kuda._share_with_wrappers(token=await kuda._token)
+        # Another task may have added the tenant while the token was being fetched.
+        kuda = self._wrappers.setdefault(key, kuda)
+        self._wrappers.move_to_end(key)
+        while len(self._wrappers) > self.max_size:
+            self._wrappers.popitem(last=False)
+        return kuda
+
+    def evict(self, email: str, api_key: str) -> None:
+        """Forgets the wrapper of a tenant, e.g. once its apiKey was revoked."""
+        self._wrappers.pop((email, api_key), None)
+
+    def clear(self) -> None:
+        """Forgets every wrapper cached."""
+        self._wrappers.clear()
+
+    def __len__(self) -> int:
+        return len(self._wrappers)
+
+    async def aclose(self) -> None:
+        """Forgets every wrapper and closes the shared client the pool created."""
+        self.clear()
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,420 @@
+import csv
+import json
+import os
+from dataclasses import asdict, dataclass, replace
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+)
+
+import httpx
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.polling import TRANSIENT_EXCEPTIONS
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+    from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+# The arguments of `Account.create_virtual_account` every row provides.
+VIRTUAL_ACCOUNT_FIELDS = (
+    "email",
+    "phone_number",
+    "last_name",
+    "first_name",
+    "middle_name",
+    "business_name",
+    "tracking_reference",
+)
+_FIELD_LOOKUP = {field.replace("_", ""): field for field in VIRTUAL_ACCOUNT_FIELDS}
+
+
+def read_virtual_accounts_csv(path: str) -> Iterator[Dict[str, str]]:
+    """Streams the rows of a CSV file of virtual accounts to create.
+
+    The header names the columns after the arguments of
+    `Account.create_virtual_account`, either in snake case (`tracking_reference`) or in
+    camel case (`trackingReference`). Missing columns are left out of the rows.
+
+    Args:
+        path: The path of the CSV file.
+
+    Returns:
+        An iterator of rows that can be given to `VirtualAccountProvisioner.provision`.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        fields = {
+            column: _FIELD_LOOKUP.get(column.replace("_", "").lower())
+            for column in reader.fieldnames or ()
+        }
+        if "tracking_reference" not in fields.values():
+            raise ValueError(f"{path} has no tracking reference column")
+        for row in reader:
+            yield {
+                fields[column]: value
+                for column, value in row.items()
+                if fields.get(column)
+            }
+
+
+@dataclass
+class ProvisioningResult:
+    """The outcome of the creation of a virtual account.
+
+    Attributes:
+        tracking_reference: The tracking reference of the virtual account.
+        account_number: The number of the account created, or `None` if it wasn't.
+        message: The message Kuda answered with when the account wasn't created.
+        from_checkpoint: `True` if the account was created by a previous run.
+    """
+
+    tracking_reference: str
+    account_number: Optional[str]
+    message: Optional[str] = None
+    from_checkpoint: bool = False
+
+    @property
+    def created(self) -> bool:
+        return self.account_number is not None
+
+
+class ProvisioningCheckpoint:
+    """An append-only JSON lines file of the virtual accounts created so far.
+
+    Every result is written and flushed as soon as it's known, and synced to disk every
+    `sync_every` results and on `close`, so a run that is interrupted can be resumed
+    without creating any account twice. Every creation is also marked as started
+    before it's sent, so the next run knows which ones were in flight.
+
+    Args:
+        path: The path of the checkpoint file, created if it doesn't exist.
+        sync_every: The number of results written between two syncs to disk.
+
+    Attributes:
+        completed: The results of the accounts created so far, by tracking reference.
+        in_flight: The tracking references of the accounts whose creation was started
+            but never completed by a previous run.
+    """
+
+    def __init__(self, path: str, sync_every: int = 100):
+        self.path = path
+        self.sync_every = sync_every
+        self.completed: Dict[str, ProvisioningResult] = {}
+        self.in_flight: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                        if record.pop("in_flight", False):
+                            self.in_flight.add(record["tracking_reference"])
+                            continue
+                        result = ProvisioningResult(**record)
+                    except (ValueError, TypeError, KeyError, AttributeError):
+                        # The last line is truncated when a run was killed mid-write.
+                        continue
+                    self.in_flight.discard(result.tracking_reference)
+                    if result.created:
+                        self.completed[result.tracking_reference] = result
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+
+    def start(self, tracking_reference: str) -> None:
+        """Records that the creation of an account is about to be sent."""
+        record = {"tracking_reference": tracking_reference, "in_flight": True}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def write(self, result: ProvisioningResult) -> None:
+        """Records the result of a creation."""
+        record = asdict(result)
+        record.pop("from_checkpoint")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if result.created:
+            self.completed[result.tracking_reference] = result
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
+
+
+def _account_number(response: APIResponse) -> Optional[str]:
+    if not response.status or not isinstance(response.data, dict):
+        return None
+    account = response.data.get("account", response.data)
+    return account.get("accountNumber") if isinstance(account, dict) else None
+
+
+def _is_ambiguous(error: Exception) -> bool:
+    """Returns whether the account may have been created by a call that raised `error`.
+
+    A timeout or a connection broken after the request was sent leaves the outcome
+    unknown, but a connection that couldn't be made means Kuda never got the request.
+    """
+    if isinstance(error, httpx.TransportError):
+        return not isinstance(error, httpx.ConnectError)
+    return isinstance(error, TRANSIENT_EXCEPTIONS)
+
+
+def _creation_arguments(row: Dict[str, str]) -> Dict[str, Optional[str]]:
+    # Missing or empty columns are sent as `None` rather than as empty strings.
+    return {field: row.get(field) or None for field in VIRTUAL_ACCOUNT_FIELDS}
+
+
+def _provision_from_checkpoint(
+    row: Dict[str, str], checkpoint: Optional[ProvisioningCheckpoint]
+) -> Optional[ProvisioningResult]:
+    if checkpoint is None:
+        return None
+    result = checkpoint.completed.get(row.get("tracking_reference"))
+    if result is None:
+        return None
+    return replace(result, from_checkpoint=True)
+
+
+def _mark_in_flight(
+    rows: Iterable[Dict[str, str]], checkpoint: Optional[ProvisioningCheckpoint]
+) -> Iterator[Dict[str, str]]:
+    # Rows are pulled by `bounded_map` from the thread consuming the results, so the
+    # checkpoint is only ever written from one thread.
+    for row in rows:
+        tracking_reference = row.get("tracking_reference")
+        if (
+            checkpoint is not None
+            and tracking_reference
+            and tracking_reference not in checkpoint.completed
+        ):
+            checkpoint.start(tracking_reference)
+        yield row
+
+
+def _was_in_flight(
+    row: Dict[str, str], checkpoint: Optional[ProvisioningCheckpoint]
+) -> bool:
+    return checkpoint is not None and row.get("tracking_reference") in (
+        checkpoint.in_flight
+    )
+
+
+_MISSING_TRACKING_REFERENCE = "The row has no tracking reference"
+
+
+class VirtualAccountProvisioner:
+    """Creates virtual accounts in bulk with bounded concurrency.
+
+    Rows are streamed from any iterable of mappings with the arguments of
+    `Account.create_virtual_account` (e.g. `read_virtual_accounts_csv`), so millions of
+    accounts can be created without loading them all in memory. With a checkpoint, the
+    accounts created are recorded on disk and skipped by the next run, and an account
+    whose creation was in flight when a run was interrupted is looked up by its tracking
+    reference before being created again. An account whose creation timed out or got a
+    server error is looked up as well, since Kuda may have created it regardless, but a
+    rejected creation is reported as is. Rows without a tracking reference are reported
+    as failures.
+
+    Args:
+        accounts: The `Account` wrapper the accounts are created with.
+            It's given a client of its own with `pooled` if it has none.
+        concurrency: The maximum number of accounts created concurrently.
+        rate_limiter: An optional `RateLimiter` every creation waits for.
+        checkpoint: The path of an optional checkpoint file.
+
+    Example:
+        ```python
+        provisioner = VirtualAccountProvisioner(
+            kuda.accounts, concurrency=16, checkpoint="partner.jsonl"
+        )
+        for result in provisioner.provision(read_virtual_accounts_csv("partner.csv")):
+            print(result.tracking_reference, result.account_number)
+        ```
+    """
+
+    def __init__(
+        self,
+        accounts: "Account",
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        self.accounts = pooled(accounts)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.checkpoint = checkpoint
+
+    def _look_up(self, tracking_reference: str) -> Optional[str]:
+        try:
+            return _account_number(
+                self.accounts.get_virtual_account(tracking_reference=tracking_reference)
+            )
+        except Exception:
+            return None
+
+    def _create(self, row: Dict[str, str], in_flight: bool) -> ProvisioningResult:
+        tracking_reference = row.get("tracking_reference")
+        if not tracking_reference:
+            return ProvisioningResult("", None, _MISSING_TRACKING_REFERENCE)
+        if in_flight:
+            account_number = self._look_up(tracking_reference)
+            if account_number is not None:
+                return ProvisioningResult(tracking_reference, account_number)
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            response = self.accounts.create_virtual_account(**_creation_arguments(row))
+        except Exception as error:
+            if not _is_ambiguous(error):
+                return ProvisioningResult(tracking_reference, None, str(error))
+            message = str(error)
+        else:
+            account_number = _account_number(response)
+            if account_number is not None:
+                return ProvisioningResult(tracking_reference, account_number)
+            if response.status_code < 500:
+                return ProvisioningResult(tracking_reference, None, response.message)
+            message = response.message
+        # Kuda may have created the account before the call failed.
+        account_number = self._look_up(tracking_reference)
+        if account_number is not None:
+            return ProvisioningResult(tracking_reference, account_number)
+        return ProvisioningResult(tracking_reference, None, message)
+
+    def provision(self, rows: Iterable[Dict[str, str]]) -> Iterator[ProvisioningResult]:
+        """Creates a virtual account for every row.
+
+        Args:
+            rows: The arguments of `Account.create_virtual_account` for every account.
+
+        Returns:
+            An iterator of a `ProvisioningResult` per row, in the order the creations
+            complete. Accounts are only created as the iterator is consumed.
+        """
+        checkpoint = (
+            ProvisioningCheckpoint(self.checkpoint) if self.checkpoint else None
+        )
+
+        def provision_row(row: Dict[str, str]) -> ProvisioningResult:
+            return _provision_from_checkpoint(row, checkpoint) or self._create(
+                row, _was_in_flight(row, checkpoint)
+            )
+
+        try:
+            for result in bounded_map(
+                provision_row, _mark_in_flight(rows, checkpoint), self.concurrency
+            ):
+                if checkpoint is not None and not result.from_checkpoint:
+                    checkpoint.write(result)
+                yield result
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+
+class AsyncVirtualAccountProvisioner:
+    """The asynchronous equivalent of `VirtualAccountProvisioner`.
+
+    Args:
+        accounts: The `AsyncAccount` wrapper the accounts are created with.
+        concurrency: The maximum number of accounts created concurrently.
+        rate_limiter: An optional `RateLimiter` every creation waits for.
+        checkpoint: The path of an optional checkpoint file.
+    """
+
+    def __init__(
+        self,
+        accounts: "AsyncAccount",
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        self.accounts = pooled(accounts)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.checkpoint = checkpoint
+
+    async def _look_up(self, tracking_reference: str) -> Optional[str]:
+        try:
+            return _account_number(
+                await self.accounts.get_virtual_account(
+                    tracking_reference=tracking_reference
+                )
+            )
+        except Exception:
+            return None
+
+    async def _create(self, row: Dict[str, str], in_flight: bool) -> ProvisioningResult:
+        tracking_reference = row.get("tracking_reference")
+        if not tracking_reference:
+            return ProvisioningResult("", None, _MISSING_TRACKING_REFERENCE)
+        if in_flight:
+            account_number = await self._look_up(tracking_reference)
+            if account_number is not None:
+                return ProvisioningResult(tracking_reference, account_number)
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            response = await self.accounts.create_virtual_account(
+                **_creation_arguments(row)
+            )
+        except Exception as error:
+            if not _is_ambiguous(error):
+                return ProvisioningResult(tracking_reference, None, str(error))
+            message = str(error)
+        else:
+            account_number = _account_number(response)
+            if account_number is not None:
+                return ProvisioningResult(tracking_reference, account_number)
+            if response.status_code < 500:
+                return ProvisioningResult(tracking_reference, None, response.message)
+            message = response.message
+        # Kuda may have created the account before the call failed.
+        account_number = await self._look_up(tracking_reference)
+        if account_number is not None:
+            return ProvisioningResult(tracking_reference, account_number)
+        return ProvisioningResult(tracking_reference, None, message)
+
+    async def provision(
+        self, rows: Iterable[Dict[str, str]]
+    ) -> AsyncIterator[ProvisioningResult]:
+        """Creates a virtual account for every row.
+
+        Args:
+            rows: The arguments of `AsyncAccount.create_virtual_account` for every account.
+
+        Returns:
+            An asynchronous iterator of a `ProvisioningResult` per row, in the order the
+            creations complete.
+        """
+        checkpoint = (
+            ProvisioningCheckpoint(self.checkpoint) if self.checkpoint else None
+        )
+
+        async def provision_row(row: Dict[str, str]) -> ProvisioningResult:
+            return _provision_from_checkpoint(row, checkpoint) or await self._create(
+                row, _was_in_flight(row, checkpoint)
+            )
+
+        try:
+            async for result in bounded_map_async(
+                provision_row, _mark_in_flight(rows, checkpoint), self.concurrency
+            ):
+                if checkpoint is not None and not result.from_checkpoint:
+                    checkpoint.write(result)
+                yield result
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
@@ -0,0 +1,284 @@
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+DEFAULT_MATCH_THRESHOLD = 0.8
+
+_Recipient = Tuple[str, str]
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize_name(name: str) -> str:
+    # Banks don't agree on the order of the names of an account holder, e.g. "DOE JOHN"
+    # and "John Doe", so the words are compared in alphabetical order.
+    return " ".join(sorted(_NON_ALPHANUMERIC.sub(" ", name.lower()).split()))
+
+
+def name_match_score(expected_name: str, account_name: str) -> float:
+    """Returns how similar the name of an account is to the name it was expected to have.
+
+    Case, punctuation and the order of the words are ignored.
+
+    Args:
+        expected_name: The name of the beneficiary, e.g. from a payout file.
+        account_name: The name of the account returned by a name enquiry.
+
+    Returns:
+        A score between 0 (nothing in common) and 1 (the same name).
+    """
+    return SequenceMatcher(
+        None, _normalize_name(expected_name), _normalize_name(account_name)
+    ).ratio()
+
+
+@dataclass
+class RecipientVerification:
+    """The outcome of the verification of a transfer recipient.
+
+    Attributes:
+        row: The row that was verified.
+        account_name: The name of the account, or `None` if the name enquiry failed.
+        score: The `name_match_score` of the expected name of the row against
+            `account_name`, or `None` if either is missing.
+        matched: `True` if the account exists and, when the row has an expected name,
+            its name scored at least the threshold of the verifier.
+        message: The message Kuda answered with when the name enquiry failed.
+    """
+
+    row: Mapping[str, str]
+    account_name: Optional[str]
+    score: Optional[float] = None
+    matched: bool = False
+    message: Optional[str] = None
+
+
+class _RecipientBatch:
+    """Deduplicates the recipients of the rows of a batch and hands each row its result."""
+
+    def __init__(self, cache: Dict[_Recipient, str], threshold: float):
+        self.cache = cache
+        self.threshold = threshold
+        self.waiting: Dict[_Recipient, List[Mapping[str, str]]] = {}
+        self.ready: List[RecipientVerification] = []
+
+    def recipients(self, rows: Iterable[Mapping[str, str]]) -> Iterator[_Recipient]:
+        """Yields the recipients that have to be looked up, once each."""
+        for row in rows:
+            recipient = (row["account_number"], row["bank_code"])
+            account_name = self.cache.get(recipient)
+            if account_name is not None:
+                self.ready.append(self.verification(row, account_name, None))
+            elif recipient in self.waiting:
+                self.waiting[recipient].append(row)
+            else:
+                self.waiting[recipient] = [row]
+                yield recipient
+
+    def resolve(
+        self, recipient: _Recipient, account_name: Optional[str], message: Optional[str]
+    ) -> None:
+        if account_name is not None:
+            self.cache[recipient] = account_name
+        for row in self.waiting.pop(recipient):
+            self.ready.append(self.verification(row, account_name, message))
+
+    def drain(self) -> List[RecipientVerification]:
+        ready, self.ready = self.ready, []
+        return ready
+
+    def verification(
+        self,
+        row: Mapping[str, str],
+        account_name: Optional[str],
+        message: Optional[str],
+    ) -> RecipientVerification:
+        if account_name is None:
+            return RecipientVerification(row=row, account_name=None, message=message)
+        expected_name = row.get("name")
+        if not expected_name:
+            return RecipientVerification(
+                row=row, account_name=account_name, matched=True
+            )
+        score = name_match_score(expected_name, account_name)
+        return RecipientVerification(
+            row=row,
+            account_name=account_name,
+            score=score,
+            matched=score >= self.threshold,
+        )
+
+
+def _account_name(response: APIResponse) -> Tuple[Optional[str], Optional[str]]:
+    if response.status and isinstance(response.data, dict):
+        account_name = response.data.get("beneficiaryName")
+        if account_name:
+            return account_name, None
+    return None, response.message
+
+
+class RecipientVerifier:
+    """Verifies the recipients of a batch of transfers before they're submitted.
+
+    Every `(account_number, bank_code)` pair is looked up once with
+    `Transaction.confirm_transfer_recipient`, however many rows share it, and the
+    lookups run concurrently. The name of every account found is compared to the name
+    the row expects, so rows paying the wrong person can be rejected before any money
+    moves. Account names are cached by the verifier, so they aren't looked up again by
+    the next batches.
+
+    Args:
+        transactions: The `Transaction` wrapper the names are looked up with.
+            It's given a client of its own with `pooled` if it has none.
+        concurrency: The maximum number of name enquiries in flight.
+        rate_limiter: An optional `RateLimiter` every name enquiry waits for.
+        threshold: The minimum `name_match_score` of a name that matches.
+        sender_tracking_reference: The tracking reference of the virtual account the
+            transfers will be made from. Leave it empty if they'll be made from the main
+            account.
+
+    Example:
+        ```python
+        verifier = RecipientVerifier(kuda.transactions, concurrency=16)
+        rows = [{"account_number": "0123456789", "bank_code": "000013", "name": "John Doe"}]
+        rejected = [result for result in verifier.verify(rows) if not result.matched]
+        ```
+    """
+
+    def __init__(
+        self,
+        transactions: "Transaction",
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        threshold: float = DEFAULT_MATCH_THRESHOLD,
+        sender_tracking_reference: Optional[str] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.threshold = threshold
+        self.sender_tracking_reference = sender_tracking_reference
+        self.cache: Dict[_Recipient, str] = {}
+
+    def _lookup(
+        self, recipient: _Recipient
+    ) -> Tuple[_Recipient, Optional[str], Optional[str]]:
+        account_number, bank_code = recipient
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            response = self.transactions.confirm_transfer_recipient(
+                beneficiary_account_number=account_number,
+                beneficiary_bank_code=bank_code,
+                sender_tracking_reference=self.sender_tracking_reference,
+                is_request_from_virtual_account=bool(self.sender_tracking_reference),
+            )
+        except Exception as error:
+            return recipient, None, str(error)
+        return (recipient, *_account_name(response))
+
+    def verify(
+        self, rows: Iterable[Mapping[str, str]]
+    ) -> Iterator[RecipientVerification]:
+        """Verifies the recipient of every row, yielding the results as they're known.
+
+        Args:
+            rows: Mappings with the `account_number` and `bank_code` of a recipient and,
+                optionally, the `name` it's expected to have. Rows are streamed, so they
+                can come straight from a large file.
+
+        Returns:
+            An iterator of the `RecipientVerification` of every row, in the order they
+            complete rather than the order of `rows`.
+        """
+        batch = _RecipientBatch(self.cache, self.threshold)
+        for result in bounded_map(
+            self._lookup, batch.recipients(rows), self.concurrency
+        ):
+            batch.resolve(*result)
+            yield from batch.drain()
+        yield from batch.drain()
+
+
+class AsyncRecipientVerifier:
+    """The asynchronous equivalent of `RecipientVerifier`.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper the names are looked up with.
+        concurrency: The maximum number of name enquiries in flight.
+        rate_limiter: An optional `RateLimiter` every name enquiry waits for.
+        threshold: The minimum `name_match_score` of a name that matches.
+        sender_tracking_reference: The tracking reference of the virtual account the
+            transfers will be made from.
+    """
+
+    def __init__(
+        self,
+        transactions: "AsyncTransaction",
+        concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        threshold: float = DEFAULT_MATCH_THRESHOLD,
+        sender_tracking_reference: Optional[str] = None,
+    ):
+        self.transactions = pooled(transactions)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.threshold = threshold
+        self.sender_tracking_reference = sender_tracking_reference
+        self.cache: Dict[_Recipient, str] = {}
+
+    async def _lookup(
+        self, recipient: _Recipient
+    ) -> Tuple[_Recipient, Optional[str], Optional[str]]:
+        account_number, bank_code = recipient
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            response = await self.transactions.confirm_transfer_recipient(
+                beneficiary_account_number=account_number,
+                beneficiary_bank_code=bank_code,
+                sender_tracking_reference=self.sender_tracking_reference,
+                is_request_from_virtual_account=bool(self.sender_tracking_reference),
+            )
+        except Exception as error:
+            return recipient, None, str(error)
+        return (recipient, *_account_name(response))
+
+    async def verify(
+        self, rows: Iterable[Mapping[str, str]]
+    ) -> AsyncIterator[RecipientVerification]:
+        """Verifies the recipient of every row, yielding the results as they're known.
+
+        Args:
+            rows: Mappings with the `account_number` and `bank_code` of a recipient and,
+                optionally, the `name` it's expected to have.
+
+        Returns:
+            An asynchronous iterator of the `RecipientVerification` of every row.
+        """
+        batch = _RecipientBatch(self.cache, self.threshold)
+        async for result in bounded_map_async(
+            self._lookup, batch.recipients(rows), self.concurrency
+        ):
+            batch.resolve(*result)
+            for verification in batch.drain():
+                yield verification
+        for verification in batch.drain():
+            yield verification
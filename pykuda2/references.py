@@ -0,0 +1,204 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from pykuda2.exceptions import DuplicateReferenceException
+
+# Crockford's base32 alphabet, which leaves out I, L, O and U to avoid ambiguity.
+_CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOMNESS_BITS = 80
+_MAX_RANDOMNESS = (1 << _RANDOMNESS_BITS) - 1
+
+
+def _encode_base32(value: int, length: int) -> str:
+    characters = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        characters.append(_CROCKFORD_ALPHABET[index])
+    return "".join(reversed(characters))
+
+
+class ReferenceGenerator(ABC):
+    """The base class of the generators of the references requests are made with.
+
+    A generator is called with no arguments and returns a new reference every time.
+    Any callable with that signature can be used in place of a `ReferenceGenerator`.
+    """
+
+    @abstractmethod
+    def __call__(self) -> str:
+        """Returns a new reference."""
+        ...
+
+
+class NumericReferenceGenerator(ReferenceGenerator):
+    """Generates random references made of `length` digits.
+
+    This is the format of the references the wrappers used to generate. The chance of
+    a collision grows with the number of references generated, so prefer the default
+    `UlidReferenceGenerator` when generating millions of them.
+
+    Args:
+        length: The number of digits of every reference.
+    """
+
+    def __init__(self, length: int = 10):
+        if length < 1:
+            raise ValueError("`length` must be at least 1")
+        self.length = length
+        self._upper_bound = 10**length
+
+    def __call__(self) -> str:
+        return str(secrets.randbelow(self._upper_bound)).zfill(self.length)
+
+
+class UlidReferenceGenerator(ReferenceGenerator):
+    """Generates ULIDs, i.e. 26 character references that sort in the order they were made.
+
+    A ULID is a 48 bit timestamp in milliseconds followed by 80 random bits, both encoded
+    with Crockford's base32. References generated within the same millisecond increment
+    the random bits of the previous one instead of drawing new ones, so the references
+    made by a generator are strictly increasing even when the clock goes backwards.
+
+    Args:
+        node_id: An optional prefix identifying the host (or process) generating the
+            references. Two nodes with different ids can never generate the same
+            reference, no matter how many they generate.
+        clock: The function returning the current time in seconds. Defaults to `time.time`.
+    """
+
+    def __init__(
+        self,
+        node_id: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if node_id is not None and not node_id.isalnum():
+            raise ValueError("`node_id` must only contain letters and digits")
+        self.node_id = node_id or ""
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_timestamp = -1
+        self._last_randomness = 0
+
+    def __call__(self) -> str:
+        timestamp = int(self._clock() * 1000)
+        with self._lock:
+            if timestamp <= self._last_timestamp:
+                timestamp = self._last_timestamp
+                randomness = self._last_randomness + 1
+                if randomness > _MAX_RANDOMNESS:
+                    timestamp += 1
+                    randomness = secrets.randbits(_RANDOMNESS_BITS - 1)
+            else:
+                # The top bit is left clear so there's plenty of room to increment.
+                randomness = secrets.randbits(_RANDOMNESS_BITS - 1)
+            self._last_timestamp = timestamp
+            self._last_randomness = randomness
+        return (
+            self.node_id
+            + _encode_base32(timestamp, 10)
+            + _encode_base32(randomness, 16)
+        )
+
+
+class DedupingReferenceGenerator(ReferenceGenerator):
+    """Remembers every reference generated in SQLite and never returns one twice.
+
+    Generated references are inserted in a table keyed by the reference, so a reference
+    that was already generated, possibly by another process sharing the database, is
+    discarded and a new one is generated in its place.
+
+    Args:
+        generator: The generator references are drawn from. Defaults to a
+            `UlidReferenceGenerator`.
+        path: The path of the SQLite database. Defaults to an in-memory database, which
+            only dedupes the references generated by this process.
+        max_attempts: The number of references drawn before giving up.
+    """
+
+    def __init__(
+        self,
+        generator: Optional[Callable[[], str]] = None,
+        path: str = ":memory:",
+        max_attempts: int = 10,
+    ):
+        self.generator = generator or UlidReferenceGenerator()
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS request_references "
+            "(reference TEXT PRIMARY KEY, created_at REAL NOT NULL)"
+        )
+
+    def __call__(self) -> str:
+        for _ in range(self.max_attempts):
+            reference = self.generator()
+            if self.add(reference):
+                return reference
+        raise DuplicateReferenceException(
+            f"Unable to generate a unique reference in {self.max_attempts} attempts"
+        )
+
+    def add(self, reference: str) -> bool:
+        """Records a reference made elsewhere, e.g. one provided by the caller.
+
+        Args:
+            reference: The reference to record.
+
+        Returns:
+            `True` if the reference was recorded and `False` if it had already been.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO request_references VALUES (?, ?)",
+                (reference, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def prune(self, older_than: float) -> int:
+        """Forgets the references generated more than `older_than` seconds ago.
+
+        Returns:
+            The number of references forgotten.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM request_references WHERE created_at < ?",
+                (time.time() - older_than,),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+_default_generator: Callable[[], str] = UlidReferenceGenerator(
+    node_id=os.environ.get("PYKUDA2_NODE_ID") or None
+)
+
+
+def get_default_reference_generator() -> Callable[[], str]:
+    """Returns the generator used by wrappers that weren't given one.
+
+    It's a `UlidReferenceGenerator` prefixed with the `PYKUDA2_NODE_ID` environment
+    variable when it's set.
+    """
+    return _default_generator
+
+
+def set_default_reference_generator(generator: Callable[[], str]) -> None:
+    """Replaces the generator used by wrappers that weren't given one.
+
+    Args:
+        generator: A callable returning a new reference every time it's called.
+    """
+    global _default_generator
+    _default_generator = generator
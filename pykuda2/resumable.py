@@ -0,0 +1,381 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    Tuple,
+)
+
+from pykuda2.exceptions import PaginationException
+from pykuda2.pagination import DEFAULT_PAGE_SIZE
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.instant_settlement_service import (
+        AsyncInstantSettlementService,
+    )
+    from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+    from pykuda2.wrappers.sync_wrappers.instant_settlement_service import (
+        InstantSettlementService,
+    )
+    from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pagination_checkpoints (
+    key TEXT PRIMARY KEY,
+    page_number INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# A position in a walk: the page to fetch next, the number of its records already
+# emitted, and whether the last page was reached.
+_Position = Tuple[int, int, bool]
+
+
+def checkpoint_key(source: str, **filters) -> str:
+    """Returns the key of the checkpoint of a walk over `source` with some filters.
+
+    Walks with the same source and filters share their checkpoint, whatever the order
+    the filters are given in.
+    """
+    return json.dumps({"source": source, "filters": filters}, sort_keys=True)
+
+
+class PaginationCheckpoint:
+    """The positions of paginated walks, persisted to SQLite after every record.
+
+    A position is the page to fetch next and the number of its records already
+    emitted. It's stored before a record is handed over, so a walk resumed after a
+    crash starts right after the last record emitted and no record is emitted twice.
+    The record being processed when the process died is not emitted again either,
+    so it should be processed idempotently or logged by the caller.
+
+    Args:
+        path: The path of the SQLite database, created if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> _Position:
+        """Returns the position of a walk, which is the first page for a new one."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT page_number, position, completed FROM pagination_checkpoints "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return 1, 0, False
+        page_number, position, completed = row
+        return page_number, position, bool(completed)
+
+    def save(self, key: str, page_number: int, position: int, completed: bool) -> None:
+        """Stores the position of a walk."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pagination_checkpoints VALUES (?, ?, ?, ?, ?)",
+                (key, page_number, position, int(completed), time.time()),
+            )
+
+    def reset(self, key: str) -> None:
+        """Forgets the position of a walk, so it starts over from the first page."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM pagination_checkpoints WHERE key = ?", (key,)
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def page_records(response: APIResponse) -> List[dict]:
+    """Returns the records of a page: its data when it's a list, or the first list in
+    its data otherwise, e.g. `data["transactions"]`."""
+    if isinstance(response.data, list):
+        return response.data
+    if isinstance(response.data, dict):
+        for value in response.data.values():
+            if isinstance(value, list):
+                return value
+    return []
+
+
+def _records(
+    response: APIResponse,
+    page_number: int,
+    records: Callable[[APIResponse], List[dict]],
+) -> List[dict]:
+    if not response.status:
+        raise PaginationException(
+            f"Unable to retrieve page {page_number}: {response.message}"
+        )
+    return records(response)
+
+
+def _walk_page(
+    checkpoint: PaginationCheckpoint,
+    key: str,
+    page_number: int,
+    position: int,
+    items: List[dict],
+    page_size: int,
+) -> Iterator[dict]:
+    last_page = len(items) < page_size
+    for index in range(position, len(items)):
+        if index + 1 < len(items):
+            checkpoint.save(key, page_number, index + 1, False)
+        else:
+            checkpoint.save(key, page_number + 1, 0, last_page)
+        yield items[index]
+    if position >= len(items):
+        checkpoint.save(key, page_number + 1, 0, last_page)
+
+
+def iter_resumable(
+    fetch_page: Callable[[int], APIResponse],
+    checkpoint: PaginationCheckpoint,
+    key: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    records: Callable[[APIResponse], List[dict]] = page_records,
+) -> Iterator[dict]:
+    """Iterates over the records of a paginated endpoint, resuming from a checkpoint.
+
+    Pages are assumed to be stable, i.e. the records of a page don't change between
+    two runs, which holds for the history of past transactions.
+
+    Args:
+        fetch_page: A function returning the response of a page given its number.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        key: The key of the walk in `checkpoint`, e.g. from `checkpoint_key`.
+        page_size: The number of records `fetch_page` requests per page.
+        records: A function returning the records of a page.
+
+    Raises:
+        PaginationException: when a page can't be retrieved. The walk can be resumed.
+    """
+    page_number, position, completed = checkpoint.load(key)
+    while not completed:
+        items = _records(fetch_page(page_number), page_number, records)
+        yield from _walk_page(checkpoint, key, page_number, position, items, page_size)
+        page_number, position, completed = page_number + 1, 0, len(items) < page_size
+
+
+async def iter_resumable_async(
+    fetch_page: Callable[[int], Awaitable[APIResponse]],
+    checkpoint: PaginationCheckpoint,
+    key: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    records: Callable[[APIResponse], List[dict]] = page_records,
+) -> AsyncIterator[dict]:
+    """The asynchronous equivalent of `iter_resumable`.
+
+    Args:
+        fetch_page: A coroutine function returning the response of a page.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        key: The key of the walk in `checkpoint`.
+        page_size: The number of records `fetch_page` requests per page.
+        records: A function returning the records of a page.
+
+    Raises:
+        PaginationException: when a page can't be retrieved. The walk can be resumed.
+    """
+    page_number, position, completed = checkpoint.load(key)
+    while not completed:
+        items = _records(await fetch_page(page_number), page_number, records)
+        for item in _walk_page(
+            checkpoint, key, page_number, position, items, page_size
+        ):
+            yield item
+        page_number, position, completed = page_number + 1, 0, len(items) < page_size
+
+
+def _transaction_logs_filters(
+    start_date: str,
+    end_date: str,
+    response_reference: str,
+    fetch_successful_records: bool,
+) -> dict:
+    return {
+        "request_reference": "",
+        "response_reference": response_reference,
+        "transaction_date": "",
+        "has_transaction_date_range_filter": True,
+        "start_date": start_date,
+        "end_date": end_date,
+        "fetch_successful_records": fetch_successful_records,
+    }
+
+
+def iter_transaction_logs(
+    transactions: "Transaction",
+    checkpoint: PaginationCheckpoint,
+    start_date: str,
+    end_date: str,
+    response_reference: str = "",
+    fetch_successful_records: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[dict]:
+    """Iterates over the transaction logs of a range of dates, resuming from where the
+    last walk with the same filters stopped.
+
+    Args:
+        transactions: The `Transaction` wrapper the logs are fetched with.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        start_date: Transaction start date. Format (YYYY-MM-DD)
+        end_date: Transaction end date. Format (YYYY-MM-DD)
+        response_reference: An optional transaction response reference.
+        fetch_successful_records: If set to `True`, only successful transactions are
+            retrieved.
+        page_size: The number of transactions fetched per page.
+
+    Raises:
+        PaginationException: when a page can't be retrieved. The walk can be resumed.
+    """
+    filters = _transaction_logs_filters(
+        start_date, end_date, response_reference, fetch_successful_records
+    )
+    return iter_resumable(
+        lambda page_number: transactions.get_transaction_logs(
+            page_size=page_size, page_number=page_number, **filters
+        ),
+        checkpoint,
+        checkpoint_key("transaction_logs", page_size=page_size, **filters),
+        page_size=page_size,
+    )
+
+
+def iter_transaction_logs_async(
+    transactions: "AsyncTransaction",
+    checkpoint: PaginationCheckpoint,
+    start_date: str,
+    end_date: str,
+    response_reference: str = "",
+    fetch_successful_records: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[dict]:
+    """The asynchronous equivalent of `iter_transaction_logs`.
+
+    Args:
+        transactions: The `AsyncTransaction` wrapper the logs are fetched with.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        start_date: Transaction start date. Format (YYYY-MM-DD)
+        end_date: Transaction end date. Format (YYYY-MM-DD)
+        response_reference: An optional transaction response reference.
+        fetch_successful_records: If set to `True`, only successful transactions are
+            retrieved.
+        page_size: The number of transactions fetched per page.
+    """
+    filters = _transaction_logs_filters(
+        start_date, end_date, response_reference, fetch_successful_records
+    )
+    return iter_resumable_async(
+        lambda page_number: transactions.get_transaction_logs(
+            page_size=page_size, page_number=page_number, **filters
+        ),
+        checkpoint,
+        checkpoint_key("transaction_logs", page_size=page_size, **filters),
+        page_size=page_size,
+    )
+
+
+def iter_settlement_transactions(
+    service: "InstantSettlementService",
+    checkpoint: PaginationCheckpoint,
+    terminal_id: str,
+    from_: str,
+    to: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[dict]:
+    """Iterates over the transactions of a terminal, resuming from where the last walk
+    with the same filters stopped.
+
+    Args:
+        service: The `InstantSettlementService` wrapper the transactions are fetched with.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        terminal_id: The terminal unique identifier
+        from_: The start date
+        to: The end date
+        page_size: The number of transactions fetched per page.
+
+    Raises:
+        PaginationException: when a page can't be retrieved. The walk can be resumed.
+    """
+    return iter_resumable(
+        lambda page_number: service.transactions(
+            terminal_id=terminal_id,
+            from_=from_,
+            to=to,
+            page_size=page_size,
+            page_number=page_number,
+        ),
+        checkpoint,
+        checkpoint_key(
+            "settlement_transactions",
+            terminal_id=terminal_id,
+            from_=from_,
+            to=to,
+            page_size=page_size,
+        ),
+        page_size=page_size,
+    )
+
+
+def iter_settlement_transactions_async(
+    service: "AsyncInstantSettlementService",
+    checkpoint: PaginationCheckpoint,
+    terminal_id: str,
+    from_: str,
+    to: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[dict]:
+    """The asynchronous equivalent of `iter_settlement_transactions`.
+
+    Args:
+        service: The `AsyncInstantSettlementService` wrapper the transactions are
+            fetched with.
+        checkpoint: The `PaginationCheckpoint` the position of the walk is stored in.
+        terminal_id: The terminal unique identifier
+        from_: The start date
+        to: The end date
+        page_size: The number of transactions fetched per page.
+    """
+    return iter_resumable_async(
+        lambda page_number: service.transactions(
+            terminal_id=terminal_id,
+            from_=from_,
+            to=to,
+            page_size=page_size,
+            page_number=page_number,
+        ),
+        checkpoint,
+        checkpoint_key(
+            "settlement_transactions",
+            terminal_id=terminal_id,
+            from_=from_,
+            to=to,
+            page_size=page_size,
+        ),
+        page_size=page_size,
+    )
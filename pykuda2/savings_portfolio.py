@@ -0,0 +1,590 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async, pooled
+from pykuda2.pagination import DEFAULT_PAGE_SIZE
+from pykuda2.resumable import page_records
+from pykuda2.utils import APIResponse
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pykuda2.wrappers.async_wrappers.savings import AsyncSavings
+    from pykuda2.wrappers.sync_wrappers.savings import Savings
+
+
+class SavingsProduct(str, Enum):
+    """An enum of the savings products offered by Kuda."""
+
+    PLAIN = "plain"
+    FLEXIBLE = "flexible"
+    FIXED = "fixed"
+
+
+# The keys each field of a plan may be returned under, as the three products don't
+# name them the same way.
+_PLAN_KEYS = {
+    "tracking_reference": (
+        "trackingReference",
+        "savingsTrackingReference",
+        "savingsId",
+    ),
+    "name": ("name", "savingsName"),
+    "balance": ("amount", "balance", "currentBalance", "savingsBalance"),
+    "interest_rate": ("interestRate", "rate"),
+    "maturity_date": ("maturityDate", "endDate", "dueDate"),
+    "status": ("status",),
+}
+
+
+def _value(data: dict, keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        for candidate in (key, key[0].upper() + key[1:]):
+            value = data.get(candidate)
+            if value is not None:
+                return value
+    return None
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    # Floats are converted through their shortest repr, so 7000.1 is Decimal("7000.1").
+    try:
+        amount = Decimal(str(value)) if value is not None else None
+    except InvalidOperation:
+        return None
+    return amount if amount is not None and amount.is_finite() else None
+
+
+class SavingsPlan(NamedTuple):
+    """A savings plan of any product, normalized.
+
+    Attributes:
+        product: The product of the plan.
+        tracking_reference: The unique identifier of the plan.
+        name: The name the customer gave the plan.
+        balance: The amount saved.
+        interest_rate: The interest rate of the plan, if it has one.
+        maturity_date: The date the plan matures on, if it has one.
+        status: The status of the plan.
+        raw: The plan as Kuda returned it.
+    """
+
+    product: SavingsProduct
+    tracking_reference: Optional[str]
+    name: Optional[str]
+    balance: Decimal
+    interest_rate: Optional[Decimal]
+    maturity_date: Optional[str]
+    status: Optional[str]
+    raw: dict
+
+    @classmethod
+    def from_data(cls, product: SavingsProduct, data: dict) -> "SavingsPlan":
+        """Normalizes a plan returned by one of the `Savings.get_*_savings_accounts`."""
+        return cls(
+            product=product,
+            tracking_reference=_value(data, _PLAN_KEYS["tracking_reference"]),
+            name=_value(data, _PLAN_KEYS["name"]),
+            balance=_decimal(_value(data, _PLAN_KEYS["balance"])) or Decimal(0),
+            interest_rate=_decimal(_value(data, _PLAN_KEYS["interest_rate"])),
+            maturity_date=_value(data, _PLAN_KEYS["maturity_date"]),
+            status=_value(data, _PLAN_KEYS["status"]),
+            raw=data,
+        )
+
+
+@dataclass
+class SavingsPortfolio:
+    """Every savings plan of a customer.
+
+    Attributes:
+        tracking_reference: The tracking reference of the customer.
+        plans: The plans of every product.
+        transactions: The latest transactions of every plan, keyed by the tracking
+            reference of the plan, when they were requested.
+        errors: The messages of the calls that failed, keyed by product or by the
+            tracking reference of a plan. The portfolio is incomplete if there are any.
+        fetched_at: When the portfolio was retrieved, in seconds since the epoch.
+    """
+
+    tracking_reference: str
+    plans: List[SavingsPlan] = field(default_factory=list)
+    transactions: Dict[str, List[dict]] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+    @property
+    def total_balance(self) -> Decimal:
+        return sum((plan.balance for plan in self.plans), Decimal(0))
+
+    def by_product(self, product: SavingsProduct) -> List[SavingsPlan]:
+        """Returns the plans of a product."""
+        return [plan for plan in self.plans if plan.product == product]
+
+
+class _PortfolioCache:
+    """The portfolios retrieved less than `ttl` seconds ago, keyed by customer, along
+    with the customer of every plan so a change to a plan invalidates its portfolio.
+
+    A portfolio being retrieved while it's invalidated may already be stale, so it's
+    only stored if no invalidation affecting it happened since `begin` was called.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._portfolios: Dict[str, SavingsPortfolio] = {}
+        self._customers: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Every invalidation gets the next generation. The generation of the last
+        # invalidation of every customer is only kept while portfolios are retrieved.
+        self._generation = 0
+        self._cleared_at = 0
+        self._invalidated_at: Dict[str, int] = {}
+        self._in_flight = 0
+
+    def get(self, tracking_reference: str) -> Optional[SavingsPortfolio]:
+        with self._lock:
+            portfolio = self._portfolios.get(tracking_reference)
+            if portfolio is None or time.time() - portfolio.fetched_at < self.ttl:
+                return portfolio
+            self._drop(tracking_reference)
+            return None
+
+    def begin(self) -> int:
+        """Records that a portfolio is being retrieved, returning the generation to
+        give `end` along with it."""
+        with self._lock:
+            self._in_flight += 1
+            return self._generation
+
+    def end(self, portfolio: Optional[SavingsPortfolio], started: int) -> None:
+        """Stores a portfolio retrieved since the generation `started`, unless it was
+        invalidated meanwhile. `portfolio` is `None` if it isn't to be stored."""
+        with self._lock:
+            self._in_flight -= 1
+            if portfolio is not None and not self._invalidated_since(
+                portfolio.tracking_reference, started
+            ):
+                self._drop(portfolio.tracking_reference)
+                self._portfolios[portfolio.tracking_reference] = portfolio
+                for plan in portfolio.plans:
+                    if plan.tracking_reference:
+                        self._customers.setdefault(plan.tracking_reference, set()).add(
+                            portfolio.tracking_reference
+                        )
+            if not self._in_flight:
+                self._invalidated_at.clear()
+
+    def _invalidated_since(self, tracking_reference: str, generation: int) -> bool:
+        return (
+            self._cleared_at > generation
+            or self._invalidated_at.get(tracking_reference, 0) > generation
+        )
+
+    def _drop(self, tracking_reference: str) -> None:
+        portfolio = self._portfolios.pop(tracking_reference, None)
+        if portfolio is None:
+            return
+        for plan in portfolio.plans:
+            customers = self._customers.get(plan.tracking_reference)
+            if customers is not None:
+                customers.discard(tracking_reference)
+                if not customers:
+                    del self._customers[plan.tracking_reference]
+
+    def _invalidate_customer(self, tracking_reference: str) -> None:
+        self._drop(tracking_reference)
+        if self._in_flight:
+            self._invalidated_at[tracking_reference] = self._generation
+
+    def _clear(self) -> None:
+        self._portfolios.clear()
+        self._customers.clear()
+        self._cleared_at = self._generation
+
+    def invalidate(self, tracking_reference: Optional[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            if tracking_reference is None:
+                self._clear()
+            else:
+                self._invalidate_customer(tracking_reference)
+
+    def invalidate_plan(self, plan_tracking_reference: str) -> None:
+        with self._lock:
+            self._generation += 1
+            customers = self._customers.get(plan_tracking_reference)
+            if customers is None:
+                # The plan isn't in any cached portfolio, e.g. it was just created or
+                # its portfolio is being retrieved, so it's unknown whose portfolio is
+                # stale.
+                self._clear()
+                return
+            for customer in list(customers):
+                self._invalidate_customer(customer)
+
+
+_Key = Tuple[str, Any]
+_Call = Tuple[_Key, Callable[[], Any]]
+_Result = Tuple[_Key, Optional[APIResponse], Optional[str]]
+
+
+def _plan_calls(
+    savings: Any, tracking_reference: str, primary_account_number: str
+) -> List[_Call]:
+    return [
+        (
+            ("plans", SavingsProduct.PLAIN),
+            lambda: savings.get_plain_savings_accounts(
+                tracking_reference=tracking_reference
+            ),
+        ),
+        (
+            ("plans", SavingsProduct.FLEXIBLE),
+            lambda: savings.get_open_flexible_savings_accounts(
+                tracking_reference=tracking_reference,
+                primary_account_number=primary_account_number,
+            ),
+        ),
+        (
+            ("plans", SavingsProduct.FIXED),
+            lambda: savings.get_fixed_savings_accounts(
+                tracking_reference=tracking_reference
+            ),
+        ),
+    ]
+
+
+def _transaction_calls(
+    savings: Any, plans: List[SavingsPlan], page_size: int
+) -> List[_Call]:
+    methods = {
+        SavingsProduct.PLAIN: savings.get_plain_savings_account_transactions,
+        SavingsProduct.FLEXIBLE: savings.get_flexible_savings_account_transactions,
+        SavingsProduct.FIXED: savings.get_fixed_savings_account_transactions,
+    }
+    return [
+        (
+            ("transactions", plan.tracking_reference),
+            lambda method=methods[plan.product], plan=plan: method(
+                tracking_reference=plan.tracking_reference,
+                page_size=page_size,
+                page_number=1,
+            ),
+        )
+        for plan in plans
+        if plan.tracking_reference
+    ]
+
+
+def _add(portfolio: SavingsPortfolio, result: _Result) -> None:
+    (kind, key), response, error = result
+    if response is None or not response.status:
+        portfolio.errors[key] = error if response is None else response.message
+    elif kind == "plans":
+        portfolio.plans.extend(
+            SavingsPlan.from_data(key, data)
+            for data in page_records(response)
+            if isinstance(data, dict)
+        )
+    else:
+        portfolio.transactions[key] = page_records(response)
+
+
+def _ordered(portfolio: SavingsPortfolio) -> None:
+    # The calls complete in any order, so the plans are sorted for stable portfolios.
+    products = list(SavingsProduct)
+    portfolio.plans.sort(key=lambda plan: products.index(plan.product))
+
+
+class SavingsAggregator:
+    """Builds the savings portfolio of customers, calling Kuda concurrently.
+
+    The plain, flexible and fixed savings of a customer are retrieved at the same time
+    rather than one after the other, then, when `include_transactions` is set, the
+    latest transactions of every plan are too. Plans are normalized into
+    `SavingsPlan`s, so every product can be handled the same way.
+
+    Portfolios are cached for `cache_ttl` seconds when it's set. Crediting, debiting or
+    withdrawing from a plan through the aggregator invalidates the portfolio the plan
+    belongs to, and `invalidate` forgets portfolios changed by other means.
+
+    Args:
+        savings: The `Savings` wrapper the portfolios are retrieved with.
+            It's given a client of its own with `pooled` if it has none.
+        concurrency: The maximum number of calls in flight.
+        include_transactions: If set to `True`, the first page of the transactions of
+            every plan is retrieved too.
+        transactions_page_size: The number of transactions retrieved per plan.
+        cache_ttl: The number of seconds a portfolio is reused for. Portfolios aren't
+            cached when it's not provided.
+        rate_limiter: An optional `RateLimiter` every call waits for.
+
+    Example:
+        ```python
+        aggregator = SavingsAggregator(kuda.savings, cache_ttl=60)
+        portfolio = aggregator.portfolio("customer-reference", "0123456789")
+        print(portfolio.total_balance, portfolio.by_product(SavingsProduct.FIXED))
+        ```
+    """
+
+    def __init__(
+        self,
+        savings: "Savings",
+        concurrency: int = 8,
+        include_transactions: bool = False,
+        transactions_page_size: int = DEFAULT_PAGE_SIZE,
+        cache_ttl: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.savings = pooled(savings)
+        self.concurrency = concurrency
+        self.include_transactions = include_transactions
+        self.transactions_page_size = transactions_page_size
+        self.rate_limiter = rate_limiter
+        self._cache = _PortfolioCache(cache_ttl) if cache_ttl is not None else None
+
+    def _call(self, call: _Call) -> _Result:
+        key, function = call
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return key, function(), None
+        except Exception as error:
+            return key, None, str(error)
+
+    def _fan_out(self, portfolio: SavingsPortfolio, calls: List[_Call]) -> None:
+        for result in bounded_map(self._call, calls, self.concurrency):
+            _add(portfolio, result)
+
+    def portfolio(
+        self,
+        tracking_reference: str,
+        primary_account_number: str,
+        refresh: bool = False,
+    ) -> SavingsPortfolio:
+        """Returns the savings portfolio of a customer.
+
+        Args:
+            tracking_reference: The tracking reference of the customer.
+            primary_account_number: The account number of the customer.
+            refresh: If set to `True`, the portfolio is retrieved even if it's cached.
+
+        Returns:
+            A `SavingsPortfolio`. Calls that fail are recorded in its `errors` rather
+            than raised, and incomplete portfolios aren't cached.
+        """
+        if self._cache is not None and not refresh:
+            portfolio = self._cache.get(tracking_reference)
+            if portfolio is not None:
+                return portfolio
+        if self._cache is None:
+            return self._retrieve(tracking_reference, primary_account_number)
+        started = self._cache.begin()
+        portfolio = None
+        try:
+            portfolio = self._retrieve(tracking_reference, primary_account_number)
+        finally:
+            self._cache.end(
+                portfolio if portfolio is not None and portfolio.complete else None,
+                started,
+            )
+        return portfolio
+
+    def _retrieve(
+        self, tracking_reference: str, primary_account_number: str
+    ) -> SavingsPortfolio:
+        portfolio = SavingsPortfolio(tracking_reference, fetched_at=time.time())
+        self._fan_out(
+            portfolio,
+            _plan_calls(self.savings, tracking_reference, primary_account_number),
+        )
+        if self.include_transactions:
+            self._fan_out(
+                portfolio,
+                _transaction_calls(
+                    self.savings, portfolio.plans, self.transactions_page_size
+                ),
+            )
+        _ordered(portfolio)
+        return portfolio
+
+    def invalidate(self, tracking_reference: Optional[str] = None) -> None:
+        """Forgets the cached portfolio of a customer, or of every customer."""
+        if self._cache is not None:
+            self._cache.invalidate(tracking_reference)
+
+    def _invalidate_plan(self, tracking_reference: str) -> None:
+        # Called even when the call raised, since a call that timed out may still have
+        # changed the plan.
+        if self._cache is not None:
+            self._cache.invalidate_plan(tracking_reference)
+
+    def credit_or_debit_plain_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `Savings.credit_or_debit_plain_savings_account` and invalidates the
+        portfolio of the plan."""
+        try:
+            return self.savings.credit_or_debit_plain_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
+
+    def withdrawal_from_flexible_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `Savings.withdrawal_from_flexible_savings_account` and invalidates the
+        portfolio of the plan."""
+        try:
+            return self.savings.withdrawal_from_flexible_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
+
+    def close_fixed_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `Savings.close_fixed_savings_account` and invalidates the portfolio of
+        the plan."""
+        try:
+            return self.savings.close_fixed_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
+
+
+class AsyncSavingsAggregator:
+    """The asynchronous equivalent of `SavingsAggregator`.
+
+    Args:
+        savings: The `AsyncSavings` wrapper the portfolios are retrieved with.
+        concurrency: The maximum number of calls in flight.
+        include_transactions: If set to `True`, the first page of the transactions of
+            every plan is retrieved too.
+        transactions_page_size: The number of transactions retrieved per plan.
+        cache_ttl: The number of seconds a portfolio is reused for.
+        rate_limiter: An optional `RateLimiter` every call waits for.
+    """
+
+    def __init__(
+        self,
+        savings: "AsyncSavings",
+        concurrency: int = 8,
+        include_transactions: bool = False,
+        transactions_page_size: int = DEFAULT_PAGE_SIZE,
+        cache_ttl: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.savings = pooled(savings)
+        self.concurrency = concurrency
+        self.include_transactions = include_transactions
+        self.transactions_page_size = transactions_page_size
+        self.rate_limiter = rate_limiter
+        self._cache = _PortfolioCache(cache_ttl) if cache_ttl is not None else None
+
+    async def _call(self, call: _Call) -> _Result:
+        key, function = call
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            return key, await function(), None
+        except Exception as error:
+            return key, None, str(error)
+
+    async def _fan_out(self, portfolio: SavingsPortfolio, calls: List[_Call]) -> None:
+        async for result in bounded_map_async(self._call, calls, self.concurrency):
+            _add(portfolio, result)
+
+    async def portfolio(
+        self,
+        tracking_reference: str,
+        primary_account_number: str,
+        refresh: bool = False,
+    ) -> SavingsPortfolio:
+        """Returns the savings portfolio of a customer.
+
+        Args:
+            tracking_reference: The tracking reference of the customer.
+            primary_account_number: The account number of the customer.
+            refresh: If set to `True`, the portfolio is retrieved even if it's cached.
+
+        Returns:
+            A `SavingsPortfolio`.
+        """
+        if self._cache is not None and not refresh:
+            portfolio = self._cache.get(tracking_reference)
+            if portfolio is not None:
+                return portfolio
+        if self._cache is None:
+            return await self._retrieve(tracking_reference, primary_account_number)
+        started = self._cache.begin()
+        portfolio = None
+        try:
+            portfolio = await self._retrieve(tracking_reference, primary_account_number)
+        finally:
+            self._cache.end(
+                portfolio if portfolio is not None and portfolio.complete else None,
+                started,
+            )
+        return portfolio
+
+    async def _retrieve(
+        self, tracking_reference: str, primary_account_number: str
+    ) -> SavingsPortfolio:
+        portfolio = SavingsPortfolio(tracking_reference, fetched_at=time.time())
+        await self._fan_out(
+            portfolio,
+            _plan_calls(self.savings, tracking_reference, primary_account_number),
+        )
+        if self.include_transactions:
+            await self._fan_out(
+                portfolio,
+                _transaction_calls(
+                    self.savings, portfolio.plans, self.transactions_page_size
+                ),
+            )
+        _ordered(portfolio)
+        return portfolio
+
+    def invalidate(self, tracking_reference: Optional[str] = None) -> None:
+        """Forgets the cached portfolio of a customer, or of every customer."""
+        if self._cache is not None:
+            self._cache.invalidate(tracking_reference)
+
+    def _invalidate_plan(self, tracking_reference: str) -> None:
+        # Called even when the call raised, since a call that timed out may still have
+        # changed the plan.
+        if self._cache is not None:
+            self._cache.invalidate_plan(tracking_reference)
+
+    async def credit_or_debit_plain_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `AsyncSavings.credit_or_debit_plain_savings_account` and invalidates
+        the portfolio of the plan."""
+        try:
+            return await self.savings.credit_or_debit_plain_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
+
+    async def withdrawal_from_flexible_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `AsyncSavings.withdrawal_from_flexible_savings_account` and
+        invalidates the portfolio of the plan."""
+        try:
+            return await self.savings.withdrawal_from_flexible_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
+
+    async def close_fixed_savings_account(self, **kwargs) -> APIResponse:
+        """Calls `AsyncSavings.close_fixed_savings_account` and invalidates the
+        portfolio of the plan."""
+        try:
+            return await self.savings.close_fixed_savings_account(**kwargs)
+        finally:
+            self._invalidate_plan(kwargs["tracking_reference"])
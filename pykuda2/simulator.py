@@ -0,0 +1,597 @@
+"""An in-process simulator of Kuda's single url API.
+
+The simulator keeps virtual accounts, balances, transfers and their transaction
+histories in memory, and answers requests the way Kuda does, dispatching on the
+`servicetype` of every request. Latency, errors and throttling can be injected so
+the wrappers can be load tested and soak tested without network access.
+
+It can be used as an ASGI application, e.g. with `httpx.ASGITransport` or any ASGI
+server, or as the handler of an `httpx.MockTransport` for synchronous clients.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+from pykuda2.concurrency import RateLimiter
+from pykuda2.utils import ServiceType, TransactionStatus
+
+_JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+_BANKS = [
+    {"bankName": "Kuda.", "bankCode": "999129"},
+    {"bankName": "Access Bank", "bankCode": "000014"},
+    {"bankName": "First Bank of Nigeria", "bankCode": "000016"},
+    {"bankName": "Guaranty Trust Bank", "bankCode": "000013"},
+    {"bankName": "United Bank For Africa", "bankCode": "000004"},
+    {"bankName": "Zenith Bank", "bankCode": "000015"},
+]
+
+
+class SimulatedError(Exception):
+    """Raised by a service handler to answer a request with `status: false`."""
+
+
+class KudaSimulator:
+    """A stateful, in-memory simulator of Kuda's API.
+
+    Args:
+        main_account_balance: The opening balance of the main account.
+        latency: The mean latency in seconds added to every request.
+        latency_jitter: The maximum number of seconds randomly added to or removed from `latency`.
+        error_rate: The probability (between 0 and 1) that a request fails with `error_status_code`.
+        error_status_code: The HTTP status code of injected errors.
+        max_requests_per_second: When provided, requests beyond this rate are answered with a
+            `429 Too Many Requests`.
+        settle_after: The number of transaction status queries a transfer stays `Pending` for
+            before it becomes `Successful`.
+        credentials: An optional mapping of emails to api keys that are allowed to get a token.
+            Any credential is accepted when it is not provided.
+        seed: An optional seed for the random number generator used to inject latency and errors.
+
+    Attributes:
+        calls: A counter of the requests received per service type.
+    """
+
+    def __init__(
+        self,
+        main_account_balance: float = 1_000_000.0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status_code: int = 500,
+        max_requests_per_second: Optional[float] = None,
+        settle_after: int = 0,
+        credentials: Optional[Dict[str, str]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self.settle_after = settle_after
+        self.credentials = credentials
+        self.token = secrets.token_urlsafe(32)
+        self.calls: Counter = Counter()
+        self.main_account = {
+            "accountNumber": "3000000001",
+            "availableBalance": main_account_balance,
+            "ledgerBalance": main_account_balance,
+        }
+        self.virtual_accounts: Dict[str, dict] = {}
+        self.transfers: Dict[str, dict] = {}
+        self.transfer_instructions: Dict[str, list] = {}
+        self.postings: Dict[Optional[str], list] = {None: []}
+        self._random = random.Random(seed)
+        self._throttle = (
+            RateLimiter(rate=max_requests_per_second)
+            if max_requests_per_second
+            else None
+        )
+        self._lock = threading.RLock()
+        self._account_numbers = itertools.count(2500000001)
+        self._transaction_references = itertools.count(1)
+        self._handlers: Dict[ServiceType, Callable[[dict], object]] = {
+            ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT: self._create_virtual_account,
+            ServiceType.ADMIN_VIRTUAL_ACCOUNTS: self._get_virtual_accounts,
+            ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT: self._get_virtual_account,
+            ServiceType.RETRIEVE_SINGLE_VIRTUAL_ACCOUNT: self._get_virtual_account,
+            ServiceType.ADMIN_UPDATE_VIRTUAL_ACCOUNT: self._update_virtual_account,
+            ServiceType.ADMIN_DISABLE_VIRTUAL_ACCOUNT: self._disable_virtual_account,
+            ServiceType.ADMIN_ENABLE_VIRTUAL_ACCOUNT: self._enable_virtual_account,
+            ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE: self._get_main_account_balance,
+            ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE: self._get_virtual_account_balance,
+            ServiceType.BANK_LIST: self._get_banks,
+            ServiceType.NAME_ENQUIRY: self._name_enquiry,
+            ServiceType.SINGLE_FUND_TRANSFER: self._fund_transfer,
+            ServiceType.VIRTUAL_ACCOUNT_FUND_TRANSFER: self._virtual_account_fund_transfer,
+            ServiceType.FUND_VIRTUAL_ACCOUNT: self._fund_virtual_account,
+            ServiceType.WITHDRAW_VIRTUAL_ACCOUNT: self._withdraw_from_virtual_account,
+            ServiceType.FUND_TRANSFER_INSTRUCTION: self._process_transfer_instructions,
+            ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION: self._search_transfer_instructions,
+            ServiceType.TRANSACTION_STATUS_QUERY: self._get_transfer_status,
+            ServiceType.ADMIN_MAIN_ACCOUNT_TRANSACTIONS: self._get_main_account_transactions,
+            ServiceType.ADMIN_MAIN_ACCOUNT_FILTERED_TRANSACTIONS: self._get_main_account_transactions,
+            ServiceType.ADMIN_VIRTUAL_ACCOUNT_TRANSACTIONS: self._get_virtual_account_transactions,
+            ServiceType.ADMIN_VIRTUAL_ACCOUNT_FILTERED_TRANSACTIONS: self._get_virtual_account_transactions,
+        }
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Answers a request synchronously. It is meant to be used with `httpx.MockTransport`.
+
+        Args:
+            request: The request sent by the `httpx` client.
+
+        Returns:
+            The simulated response.
+        """
+        delay = self._latency()
+        if delay:
+            time.sleep(delay)
+        status_code, content_type, content = self._dispatch(
+            request.method, request.url.path, request.headers, request.read()
+        )
+        return httpx.Response(
+            status_code, headers={"content-type": content_type}, content=content
+        )
+
+    async def __call__(self, scope, receive, send):
+        """Answers a request as an ASGI application."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        delay = self._latency()
+        if delay:
+            await asyncio.sleep(delay)
+        status_code, content_type, content = self._dispatch(
+            scope["method"], scope["path"], headers, body
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", content_type.encode("latin-1")),
+                    (b"content-length", str(len(content)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    def add_virtual_account(
+        self, tracking_reference: str, balance: float = 0.0, **details
+    ) -> dict:
+        """Seeds the simulator with a virtual account.
+
+        Args:
+            tracking_reference: The unique identifier of the virtual account.
+            balance: The opening balance of the virtual account.
+            **details: Other details of the account e.g. `email` or `firstName`.
+
+        Returns:
+            The created virtual account.
+        """
+        with self._lock:
+            account = self._new_virtual_account(
+                {"trackingreference": tracking_reference, **details}
+            )
+            account["availableBalance"] = account["ledgerBalance"] = balance
+            return account
+
+    def _latency(self) -> float:
+        if not self.latency and not self.latency_jitter:
+            return 0.0
+        return max(
+            0.0,
+            self.latency
+            + self._random.uniform(-self.latency_jitter, self.latency_jitter),
+        )
+
+    def _dispatch(
+        self, method: str, path: str, headers, body: bytes
+    ) -> Tuple[int, str, bytes]:
+        if self._throttle and not self._throttle.try_acquire():
+            return self._json(429, {"status": False, "message": "Too many requests"})
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._json(
+                self.error_status_code,
+                {"status": False, "message": "Simulated server error"},
+            )
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return self._json(400, {"status": False, "message": "Invalid JSON"})
+        if path.endswith("/Account/GetToken"):
+            return self._get_token(payload)
+        if headers.get("authorization") != f"Bearer {self.token}":
+            return self._json(401, {"status": False, "message": "Unauthorized"})
+        payload = {key.lower(): value for key, value in payload.items()}
+        try:
+            service_type = ServiceType(payload.get("servicetype"))
+            handler = self._handlers[service_type]
+        except (ValueError, KeyError):
+            return self._json(
+                404,
+                {
+                    "status": False,
+                    "message": f"Unsupported service type {payload.get('servicetype')}",
+                },
+            )
+        self.calls[service_type] += 1
+        data = {
+            key.lower(): value for key, value in (payload.get("data") or {}).items()
+        }
+        data["requestref"] = payload.get("requestref")
+        try:
+            with self._lock:
+                response_data = handler(data)
+        except SimulatedError as exc:
+            return self._json(200, {"status": False, "message": str(exc), "data": None})
+        return self._json(
+            200,
+            {
+                "status": True,
+                "message": "Request successful.",
+                "data": response_data,
+            },
+        )
+
+    @staticmethod
+    def _json(status_code: int, body) -> Tuple[int, str, bytes]:
+        return status_code, _JSON_CONTENT_TYPE, json.dumps(body).encode("utf-8")
+
+    def _get_token(self, payload: dict) -> Tuple[int, str, bytes]:
+        if self.credentials is not None and self.credentials.get(
+            payload.get("email")
+        ) != payload.get("apiKey"):
+            return self._json(
+                401, {"status": False, "message": "Invalid email or apiKey"}
+            )
+        return 200, "text/plain; charset=utf-8", self.token.encode("utf-8")
+
+    # Virtual accounts
+
+    def _new_virtual_account(self, data: dict) -> dict:
+        tracking_reference = data.get("trackingreference")
+        if not tracking_reference:
+            raise SimulatedError("trackingReference is required")
+        if tracking_reference in self.virtual_accounts:
+            raise SimulatedError(
+                f"A virtual account with tracking reference {tracking_reference} already exists"
+            )
+        account = {
+            "accountNumber": str(next(self._account_numbers)),
+            "email": data.get("email"),
+            "phoneNumber": data.get("phonenumber"),
+            "lastName": data.get("lastname"),
+            "firstName": data.get("firstname"),
+            "middleName": data.get("middlename"),
+            "businessName": data.get("businessname"),
+            "accountName": " ".join(
+                name for name in (data.get("firstname"), data.get("lastname")) if name
+            ),
+            "trackingReference": tracking_reference,
+            "creationDate": self._now().isoformat(),
+            "isDeleted": False,
+            "availableBalance": 0.0,
+            "ledgerBalance": 0.0,
+        }
+        self.virtual_accounts[tracking_reference] = account
+        self.postings[tracking_reference] = []
+        return account
+
+    def _virtual_account(self, data: dict, active: bool = True) -> dict:
+        account = self.virtual_accounts.get(data.get("trackingreference"))
+        if account is None:
+            raise SimulatedError("Virtual account not found")
+        if active and account["isDeleted"]:
+            raise SimulatedError("Virtual account is disabled")
+        return account
+
+    @staticmethod
+    def _public_account(account: dict) -> dict:
+        return {
+            key: value
+            for key, value in account.items()
+            if key not in ("availableBalance", "ledgerBalance")
+        }
+
+    def _create_virtual_account(self, data: dict) -> dict:
+        account = self._new_virtual_account(data)
+        return {
+            "accountNumber": account["accountNumber"],
+            "trackingReference": account["trackingReference"],
+        }
+
+    def _get_virtual_accounts(self, data: dict) -> dict:
+        accounts = [
+            self._public_account(account) for account in self.virtual_accounts.values()
+        ]
+        return {
+            "accounts": self._page(accounts, data),
+            "totalCount": len(accounts),
+        }
+
+    def _get_virtual_account(self, data: dict) -> dict:
+        return {"account": self._public_account(self._virtual_account(data, False))}
+
+    def _update_virtual_account(self, data: dict) -> dict:
+        account = self._virtual_account(data)
+        for key, field in (
+            ("firstname", "firstName"),
+            ("lastname", "lastName"),
+            ("email", "email"),
+        ):
+            if data.get(key) is not None:
+                account[field] = data[key]
+        return {"account": self._public_account(account)}
+
+    def _disable_virtual_account(self, data: dict) -> dict:
+        account = self._virtual_account(data, False)
+        account["isDeleted"] = True
+        return {"accountNumber": account["accountNumber"]}
+
+    def _enable_virtual_account(self, data: dict) -> dict:
+        account = self._virtual_account(data, False)
+        account["isDeleted"] = False
+        return {"accountNumber": account["accountNumber"]}
+
+    def _get_main_account_balance(self, data: dict) -> dict:
+        return self._balance(self.main_account)
+
+    def _get_virtual_account_balance(self, data: dict) -> dict:
+        return self._balance(self._virtual_account(data, False))
+
+    @staticmethod
+    def _balance(account: dict) -> dict:
+        return {
+            "ledgerBalance": account["ledgerBalance"],
+            "availableBalance": account["availableBalance"],
+            "withdrawableBalance": account["availableBalance"],
+        }
+
+    # Transfers
+
+    def _get_banks(self, data: dict) -> dict:
+        return {"banks": _BANKS}
+
+    def _name_enquiry(self, data: dict) -> dict:
+        account_number = data.get("beneficiaryaccountnumber")
+        for account in self.virtual_accounts.values():
+            if account["accountNumber"] == account_number:
+                name = account["accountName"]
+                break
+        else:
+            name = f"Simulated Beneficiary {account_number}"
+        return {
+            "beneficiaryAccountNumber": account_number,
+            "beneficiaryName": name,
+            "senderAccountNumber": self.main_account["accountNumber"],
+            "beneficiaryBankCode": data.get("beneficiarybankcode"),
+            "sessionID": secrets.token_hex(15),
+        }
+
+    def _fund_transfer(self, data: dict) -> dict:
+        return self._transfer(data, self.main_account, None, data.get("amount"))
+
+    def _virtual_account_fund_transfer(self, data: dict) -> dict:
+        source = self._virtual_account(data)
+        return self._transfer(
+            data, source, source["trackingReference"], data.get("amount")
+        )
+
+    def _fund_virtual_account(self, data: dict) -> dict:
+        destination = self._virtual_account(data)
+        response = self._transfer(data, self.main_account, None, data.get("amount"))
+        self._credit(
+            destination,
+            destination["trackingReference"],
+            data.get("amount"),
+            data.get("narration"),
+            response["transactionReference"],
+        )
+        return response
+
+    def _withdraw_from_virtual_account(self, data: dict) -> dict:
+        source = self._virtual_account(data)
+        response = self._transfer(
+            data, source, source["trackingReference"], data.get("amount")
+        )
+        self._credit(
+            self.main_account,
+            None,
+            data.get("amount"),
+            data.get("narration"),
+            response["transactionReference"],
+        )
+        return response
+
+    def _transfer(
+        self, data: dict, source: dict, source_key: Optional[str], amount
+    ) -> dict:
+        request_reference = data["requestref"]
+        if request_reference in self.transfers:
+            raise SimulatedError("Duplicate request reference")
+        amount = self._amount(amount)
+        if source["availableBalance"] < amount:
+            raise SimulatedError("Insufficient funds")
+        transaction_reference = f"SIM{next(self._transaction_references):012d}"
+        self._post(
+            source, source_key, -amount, data.get("narration"), transaction_reference
+        )
+        self.transfers[request_reference] = {
+            "requestReference": request_reference,
+            "transactionReference": transaction_reference,
+            "amount": amount,
+            "queries": 0,
+        }
+        return {
+            "requestReference": request_reference,
+            "transactionReference": transaction_reference,
+            "responseCode": "00",
+        }
+
+    def _process_transfer_instructions(self, data: dict) -> dict:
+        request_reference = data["requestref"]
+        if request_reference in self.transfer_instructions:
+            raise SimulatedError("Duplicate request reference")
+        instructions = data.get("fundtransferinstructions") or []
+        self.transfer_instructions[request_reference] = instructions
+        return {
+            "requestReference": request_reference,
+            "instructionCount": len(instructions),
+        }
+
+    def _search_transfer_instructions(self, data: dict) -> dict:
+        filters = {
+            "AccountNumber": data.get("accountnumber"),
+            "Reference": data.get("reference"),
+            "Amount": data.get("amount"),
+            "OriginalRequestRef": data.get("originalrequestref"),
+            "Status": data.get("status"),
+        }
+        instructions = [
+            {
+                **instruction,
+                "OriginalRequestRef": request_reference,
+                "Status": TransactionStatus.SUCCESSFUL.value,
+            }
+            for request_reference, batch in self.transfer_instructions.items()
+            for instruction in batch
+        ]
+        # Empty filters match every instruction.
+        instructions = [
+            instruction
+            for instruction in instructions
+            if all(
+                not value or instruction.get(key) == value
+                for key, value in filters.items()
+            )
+        ]
+        return {
+            "fundTransferInstructions": self._page(instructions, data),
+            "totalCount": len(instructions),
+        }
+
+    def _credit(
+        self,
+        account: dict,
+        account_key: Optional[str],
+        amount,
+        narration: Optional[str],
+        transaction_reference: str,
+    ) -> None:
+        self._post(
+            account,
+            account_key,
+            self._amount(amount),
+            narration,
+            transaction_reference,
+        )
+
+    def _post(
+        self,
+        account: dict,
+        account_key: Optional[str],
+        amount: float,
+        narration: Optional[str],
+        transaction_reference: str,
+    ) -> None:
+        account["availableBalance"] = round(account["availableBalance"] + amount, 2)
+        account["ledgerBalance"] = round(account["ledgerBalance"] + amount, 2)
+        self.postings[account_key].append(
+            {
+                "referenceNumber": transaction_reference,
+                "amount": abs(amount),
+                "balance": account["availableBalance"],
+                "transactionType": "Credit" if amount > 0 else "Debit",
+                "narration": narration,
+                "date": self._now().isoformat(),
+            }
+        )
+
+    def _get_transfer_status(self, data: dict) -> dict:
+        transfer = self.transfers.get(data.get("transactionrequestreference"))
+        if transfer is None:
+            raise SimulatedError("Transaction not found")
+        transfer["queries"] += 1
+        status = (
+            TransactionStatus.SUCCESSFUL
+            if transfer["queries"] > self.settle_after
+            else TransactionStatus.PENDING
+        )
+        return {
+            "requestReference": transfer["requestReference"],
+            "transactionReference": transfer["transactionReference"],
+            "status": status.value,
+        }
+
+    # Transaction histories
+
+    def _get_main_account_transactions(self, data: dict) -> dict:
+        return self._history(self.postings[None], data)
+
+    def _get_virtual_account_transactions(self, data: dict) -> dict:
+        account = self._virtual_account(data, False)
+        return self._history(self.postings[account["trackingReference"]], data)
+
+    def _history(self, postings: list, data: dict) -> dict:
+        start_date, end_date = data.get("startdate"), data.get("enddate")
+        if start_date or end_date:
+            postings = [
+                posting
+                for posting in postings
+                if (not start_date or posting["date"][:10] >= start_date[:10])
+                and (not end_date or posting["date"][:10] <= end_date[:10])
+            ]
+        return {
+            "postingsHistory": self._page(postings, data),
+            "totalCount": len(postings),
+        }
+
+    @staticmethod
+    def _page(items: list, data: dict) -> list:
+        page_size = int(data.get("pagesize") or len(items) or 1)
+        page_number = max(1, int(data.get("pagenumber") or 1))
+        start = (page_number - 1) * page_size
+        return items[start : start + page_size]
+
+    @staticmethod
+    def _amount(amount) -> float:
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            raise SimulatedError("Invalid amount")
+        if amount <= 0:
+            raise SimulatedError("Amount must be greater than zero")
+        return amount
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
@@ -0,0 +1,130 @@
+import contextlib
+from typing import Any, Dict, Iterator, Optional
+
+from pykuda2.base import __version__
+from pykuda2.instrumentation import InstrumentationHook, KudaCall, TokenFetch
+from pykuda2.utils import ServiceType
+
+
+class TracingHook(InstrumentationHook):
+    """Traces every call made to Kuda with OpenTelemetry.
+
+    Every call gets a client span that is a child of the span current in the caller's
+    context. The access token fetches made during a call get a child span of their own,
+    so slow calls can be told apart from slow token refreshes, and the trace context is
+    propagated to Kuda in the headers of the request. Retries and other notable events
+    are added as events to the current span, or to the span of the caller they're
+    reported for, e.g. when a poller retries the status query of a transfer.
+
+    It requires the `opentelemetry-api` package, and an SDK to be configured for the
+    spans to be exported anywhere.
+
+    Args:
+        tracer: The tracer spans are started with. It defaults to the `pykuda2` tracer of
+            the global tracer provider.
+
+    Example:
+        ```python
+        from pykuda2 import Kuda
+        from pykuda2.instrumentation import Instrumentation
+        from pykuda2.tracing import TracingHook
+
+        kuda = Kuda(email, api_key, instrumentation=Instrumentation([TracingHook()]))
+        ```
+    """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import context, propagate, trace
+        except ImportError:
+            raise ImportError(
+                "TracingHook requires the 'opentelemetry-api' package. "
+                "Install it with `pip install opentelemetry-api`."
+            )
+        self._context = context
+        self._propagate = propagate
+        self._trace = trace
+        self.tracer = (
+            tracer
+            if tracer is not None
+            else trace.get_tracer("pykuda2", instrumenting_library_version=__version__)
+        )
+
+    def _start_span(self, name: str, attributes: Dict[str, Any], state: dict) -> None:
+        span = self.tracer.start_span(
+            name, kind=self._trace.SpanKind.CLIENT, attributes=attributes
+        )
+        # The span is made current until it ends, so the spans started meanwhile (e.g.
+        # for the token fetched during a call) are its children.
+        state["span"] = span
+        state["context_token"] = self._context.attach(
+            self._trace.set_span_in_context(span)
+        )
+
+    def _end_span(self, state: dict, error: Optional[BaseException]) -> None:
+        span = state.pop("span", None)
+        if span is None:
+            return
+        self._context.detach(state.pop("context_token"))
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(
+                self._trace.Status(self._trace.StatusCode.ERROR, str(error))
+            )
+        span.end()
+
+    def call_started(self, call: KudaCall) -> None:
+        attributes = {
+            "kuda.service_type": call.service_type.value,
+            "http.request.method": call.method.value,
+        }
+        if call.endpoint_path is not None:
+            attributes["kuda.endpoint_path"] = call.endpoint_path
+        if call.request_reference is not None:
+            attributes["kuda.request_reference"] = call.request_reference
+        self._start_span(f"Kuda {call.service_type.value}", attributes, call.context)
+
+    def request_prepared(self, call: KudaCall, headers: dict) -> None:
+        self._propagate.inject(headers)
+
+    def call_finished(self, call: KudaCall) -> None:
+        span = call.context.get("span")
+        if span is None:
+            return
+        if call.status_code is not None:
+            span.set_attribute("http.response.status_code", call.status_code)
+            if call.status_code >= 400 and call.error is None:
+                span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        if call.status is not None:
+            span.set_attribute("kuda.status", str(call.status))
+        for phase, seconds in call.phases.items():
+            span.set_attribute(f"kuda.{phase}.duration", seconds)
+        self._end_span(call.context, call.error)
+
+    def token_fetch_started(self, fetch: TokenFetch) -> None:
+        self._start_span("Kuda token", {}, fetch.context)
+
+    def token_fetch_finished(self, fetch: TokenFetch) -> None:
+        self._end_span(fetch.context, fetch.error)
+
+    def retry(self, service_type: ServiceType) -> None:
+        self._trace.get_current_span().add_event(
+            "kuda.retry", {"kuda.service_type": service_type.value}
+        )
+
+    def event(self, name: str, attributes: Dict[str, Any]) -> None:
+        self._trace.get_current_span().add_event(name, attributes)
+
+    def capture_context(self) -> Any:
+        return self._context.get_current()
+
+    @contextlib.contextmanager
+    def restore_context(self, context: Any) -> Iterator[None]:
+        if context is None:
+            yield
+            return
+        token = self._context.attach(context)
+        try:
+            yield
+        finally:
+            self._context.detach(token)
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import warnings
+from typing import Optional
+
+import httpx
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_CONCURRENT_STREAMS = 100
+
+
+class StreamLimitedTransport(httpx.BaseTransport):
+    """Caps the number of requests in flight over a wrapped transport.
+
+    With HTTP/2 a single connection carries many concurrent requests (streams), so the
+    cap is `max_connections * max_concurrent_streams`. Requests beyond it wait for a
+    slot instead of opening new streams. The body of every response is read before its
+    slot is released.
+
+    Args:
+        transport: The transport requests are sent with.
+        max_in_flight: The maximum number of requests sent concurrently.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_in_flight: int):
+        if max_in_flight < 1:
+            raise ValueError("`max_in_flight` must be at least 1")
+        self._transport = transport
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._slots:
+            response = self._transport.handle_request(request)
+            try:
+                response.read()
+            except BaseException:
+                response.close()
+                raise
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncStreamLimitedTransport(httpx.AsyncBaseTransport):
+    """The asynchronous equivalent of `StreamLimitedTransport`.
+
+    Args:
+        transport: The transport requests are sent with.
+        max_in_flight: The maximum number of requests sent concurrently.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_in_flight: int):
+        if max_in_flight < 1:
+            raise ValueError("`max_in_flight` must be at least 1")
+        self._transport = transport
+        self._max_in_flight = max_in_flight
+        # Created on first use so it's bound to the loop the requests are made in.
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        async with self._slots:
+            response = await self._transport.handle_async_request(request)
+            try:
+                await response.aread()
+            except BaseException:
+                await response.aclose()
+                raise
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        warnings.warn(
+            "HTTP/2 was requested but the 'h2' package is not installed, falling back "
+            "to HTTP/1.1. Install it with `pip install pykuda2[http2]`.",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return False
+    return True
+
+
+def build_transport(
+    http2: bool = True,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+) -> httpx.BaseTransport:
+    """Builds a pooled transport that multiplexes requests over HTTP/2.
+
+    HTTP/2 is negotiated with the server when connecting, so the transport falls back to
+    HTTP/1.1 on its own when the server doesn't support it. It also falls back to
+    HTTP/1.1, with a warning, when the optional `h2` package isn't installed.
+
+    Args:
+        http2: Set to `False` to only use HTTP/1.1.
+        max_connections: The maximum number of connections kept open to Kuda.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            HTTP/2 connection.
+
+    Returns:
+        A transport that can be given to the sync wrappers as `transport`.
+    """
+    http2 = http2 and _http2_available()
+    transport = httpx.HTTPTransport(
+        http2=http2, limits=httpx.Limits(max_connections=max_connections)
+    )
+    if not http2:
+        return transport
+    return StreamLimitedTransport(transport, max_connections * max_concurrent_streams)
+
+
+def build_async_transport(
+    http2: bool = True,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_concurrent_streams: int = DEFAULT_MAX_CONCURRENT_STREAMS,
+) -> httpx.AsyncBaseTransport:
+    """Builds a pooled asynchronous transport that multiplexes requests over HTTP/2.
+
+    See `build_transport` for how it falls back to HTTP/1.1.
+
+    Args:
+        http2: Set to `False` to only use HTTP/1.1.
+        max_connections: The maximum number of connections kept open to Kuda.
+        max_concurrent_streams: The maximum number of requests in flight over each
+            HTTP/2 connection.
+
+    Returns:
+        A transport that can be given to the async wrappers as `transport`.
+    """
+    http2 = http2 and _http2_available()
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2, limits=httpx.Limits(max_connections=max_connections)
+    )
+    if not http2:
+        return transport
+    return AsyncStreamLimitedTransport(
+        transport, max_connections * max_concurrent_streams
+    )
@@ -1,5 +1,4 @@
 import secrets
-import string
 from dataclasses import dataclass
 from enum import Enum, IntEnum
 from typing import Optional, Union
@@ -14,7 +13,8 @@ def generate_number(length: int) -> int:
     Returns:
         The random number.
     """
-    return int("".join(secrets.choice(string.digits) for _ in range(length)))
+    lower_bound = 10 ** (length - 1)
+    return lower_bound + secrets.randbelow(10**length - lower_bound)
 
 
 class Gender(IntEnum):
@@ -74,6 +74,19 @@ class TransferInstruction:
         reference: A unique identifier for the transfer.
     """
 
+    # Payouts are made of many instructions, so they don't get a `__dict__` each.
+    __slots__ = (
+        "account_number",
+        "account_name",
+        "beneficiary_bank_code",
+        "amount",
+        "bank_code",
+        "narration",
+        "bank_name",
+        "long_code",
+        "reference",
+    )
+
     account_number: str
     account_name: str
     beneficiary_bank_code: str
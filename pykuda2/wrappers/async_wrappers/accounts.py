@@ -1,10 +1,12 @@
 from typing import Optional
 
 from pykuda2.base import BaseAsyncAPIWrapper
-from pykuda2.utils import ServiceType, APIResponse
+from pykuda2.endpoints import ACCOUNT_ENDPOINTS, endpoint_method
+from pykuda2.utils import APIResponse
 
 
 class AsyncAccount(BaseAsyncAPIWrapper):
+    @endpoint_method(ACCOUNT_ENDPOINTS["create_virtual_account"])
     async def create_virtual_account(
         self,
         email: str,
@@ -36,21 +38,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "email": email,
-            "phoneNumber": phone_number,
-            "lastName": last_name,
-            "firstName": first_name,
-            "middleName": middle_name,
-            "businessName": business_name,
-            "trackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["update_virtual_account"])
     async def update_virtual_account(
         self,
         tracking_reference: str,
@@ -82,28 +71,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
             ConnectionException: when the request times out or in the absence of an internet connection.
             ValueError: If none of the optional parameters is provided.
         """
-        if not any([first_name, last_name, email]):
-            raise ValueError(
-                "At least one of the parameters `first_name`, `last_name` or `email` must be provided"
-            )
-        data = {
-            "trackingReference": tracking_reference,
-            "firstName": first_name,
-            "lastName": last_name,
-            "email": email,
-        }
-        if not first_name:
-            data.pop("firstName")
-        if not last_name:
-            data.pop("lastName")
-        if not email:
-            data.pop("email")
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_UPDATE_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["get_virtual_accounts"])
     async def get_virtual_accounts(
         self, page_size: int, page_number: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -122,16 +91,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "PageSize": page_size,
-            "PageNumber": page_number,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNTS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["get_virtual_account"])
     async def get_virtual_account(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -149,15 +110,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["disable_virtual_account"])
     async def disable_virtual_account(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -179,15 +133,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_DISABLE_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["enable_virtual_account"])
     async def enable_virtual_account(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -205,15 +152,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_ENABLE_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["get_admin_account_balance"])
     async def get_admin_account_balance(
         self, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -230,11 +170,8 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(ACCOUNT_ENDPOINTS["get_virtual_account_balance"])
     async def get_virtual_account_balance(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -252,11 +189,3 @@ class AsyncAccount(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE,
-            data=data,
-            request_reference=request_reference,
-        )
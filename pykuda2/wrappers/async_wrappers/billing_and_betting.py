@@ -1,10 +1,18 @@
+import functools
 from typing import Optional, Union
 
 from pykuda2.base import BaseAsyncAPIWrapper
-from pykuda2.utils import BillType, ServiceType, APIResponse
+from pykuda2.endpoints import BILLING_AND_BETTING_ENDPOINTS, endpoint_method
+from pykuda2.polling import AsyncPendingPurchase, AsyncPoller
+from pykuda2.utils import BillType, APIResponse
 
 
 class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
+    # The poller that drives the `wait` of pending purchases. The default one,
+    # shared by every wrapper, is used when it is left as `None`.
+    poller: Optional[AsyncPoller] = None
+
+    @endpoint_method(BILLING_AND_BETTING_ENDPOINTS["get_bill_type_options"])
     async def get_bill_type_options(
         self, bill_type: BillType, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -23,13 +31,8 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"BillTypeName": bill_type}
-        return await self._api_call(
-            service_type=ServiceType.GET_BILLERS_BY_TYPE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(BILLING_AND_BETTING_ENDPOINTS["verify_customer_before_purchase"])
     async def verify_customer_before_purchase(
         self,
         tracking_reference: str,
@@ -59,16 +62,6 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingRef": tracking_reference,
-            "KudaBillItemIdentifier": kuda_bill_item_identifier,
-            "CustomerIdentification": customer_identification,
-        }
-        return await self._api_call(
-            service_type=ServiceType.VERIFY_BILL_CUSTOMER,
-            data=data,
-            request_reference=request_reference,
-        )
 
     async def purchase_bill(
         self,
@@ -77,7 +70,7 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         customer_identifier: str,
         phone_number: Optional[str] = None,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> AsyncPendingPurchase:
         """Purchase a bill from your main account.
 
         Args:
@@ -93,23 +86,31 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            An `AsyncPendingPurchase` which is an `APIResponse` whose `wait` coroutine returns the
+                final status of the purchase once it is either successful or failed.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Amount": amount,
-            "BillItemIdentifier": bill_item_identifier,
-            "PhoneNumber": phone_number,
-            "CustomerIdentifier": customer_identifier,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_PURCHASE_BILL,
+        endpoint = BILLING_AND_BETTING_ENDPOINTS["purchase_bill"]
+        data = endpoint.build_payload(
+            amount, bill_item_identifier, customer_identifier, phone_number
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = await self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return AsyncPendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_bill_purchase_status,
+                bill_request_ref=request_reference,
+                bill_response_reference=None,
+            ),
+            poller=self.poller,
+        )
 
     async def purchase_bill_from_virtual_account(
         self,
@@ -119,7 +120,7 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         phone_number: str,
         customer_identifier: str,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> AsyncPendingPurchase:
         """Purchase a bill from your virtual account.
 
         Args:
@@ -136,24 +137,35 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            An `AsyncPendingPurchase` which is an `APIResponse` whose `wait` coroutine returns the
+                final status of the purchase once it is either successful or failed.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Amount": amount,
-            "BillItemIdentifier": bill_item_identifier,
-            "PhoneNumber": phone_number,
-            "CustomerIdentifier": customer_identifier,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.PURCHASE_BILL,
+        endpoint = BILLING_AND_BETTING_ENDPOINTS["purchase_bill_from_virtual_account"]
+        data = endpoint.build_payload(
+            tracking_reference,
+            amount,
+            bill_item_identifier,
+            phone_number,
+            customer_identifier,
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = await self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return AsyncPendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_bill_purchase_status,
+                bill_request_ref=request_reference,
+                bill_response_reference=None,
+            ),
+            poller=self.poller,
+        )
 
     async def get_bill_purchase_status(
         self,
@@ -181,16 +193,15 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
                 "Both `bill_response_reference` and `bill_request_ref` should"
                 " not be provided. Please provide any but not both"
             )
-        data = {
-            "BillResponseReference": bill_response_reference,
-            "BillRequestRef": bill_request_ref,
-        }
+        endpoint = BILLING_AND_BETTING_ENDPOINTS["get_bill_purchase_status"]
+        data = endpoint.build_payload(bill_request_ref, bill_response_reference)
         return await self._api_call(
-            service_type=ServiceType.BILL_TSQ,
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
 
+    @endpoint_method(BILLING_AND_BETTING_ENDPOINTS["get_purchased_bills"])
     async def get_purchased_bills(
         self, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -207,11 +218,10 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_GET_PURCHASED_BILLS,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(
+        BILLING_AND_BETTING_ENDPOINTS["get_purchased_bill_from_virtual_account"]
+    )
     async def get_purchased_bill_from_virtual_account(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -229,9 +239,3 @@ class AsyncBillingAndBetting(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"TrackingReference": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.GET_PURCHASED_BILLS,
-            data=data,
-            request_reference=request_reference,
-        )
@@ -1,10 +1,12 @@
 from typing import Optional
 
 from pykuda2.base import BaseAsyncAPIWrapper
-from pykuda2.utils import ServiceType, CardChannel, Gender, APIResponse
+from pykuda2.endpoints import CARD_ENDPOINTS, endpoint_method
+from pykuda2.utils import CardChannel, Gender, APIResponse
 
 
 class AsyncCard(BaseAsyncAPIWrapper):
+    @endpoint_method(CARD_ENDPOINTS["request_card"])
     async def request_card(
         self,
         tracking_reference: str,
@@ -44,26 +46,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "NameOnCard": name_on_card,
-            "dateofBirth": date_of_birth,
-            "Gender": gender,
-            "DeliveryState": delivery_state,
-            "DeliveryStreetNoAndName": delivery_street_no_and_name,
-            "DeliveryCity": delivery_city,
-            "DeliveryLGA": delivery_lga,
-            "DeliveryLandmark": delivery_landmark,
-            "Country": country,
-            "additionalPhoneNumber": additional_phone_number,
-        }
-        return await self._api_call(
-            service_type=ServiceType.REQUEST_CARD,
-            data=data,
-            # endpoint_path="/RequestCard",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["get_cards"])
     async def get_cards(
         self,
         tracking_reference: str,
@@ -85,17 +69,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return await self._api_call(
-            service_type=ServiceType.GET_CUSTOMER_CARDS,
-            data=data,
-            # endpoint_path="/GetCustomerCards",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["activate_card"])
     async def activate_card(
         self,
         pan: int,
@@ -123,20 +98,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Pan": pan,
-            "CVV": cvv,
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ACTIVATE_CARD,
-            data=data,
-            # endpoint_path="/ActivateCard",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["deactivate_card"])
     async def deactivate_card(
         self,
         id: int,
@@ -160,18 +123,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return await self._api_call(
-            service_type=ServiceType.DEACTIVATE_CARD,
-            data=data,
-            # endpoint_path="/DeactivateCard",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["set_card_limit"])
     async def set_card_limit(
         self,
         id: int,
@@ -206,20 +159,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "Channel": channel,
-            "Limit": limit,
-            "SimulateRequest": simulate_request,
-        }
-        return await self._api_call(
-            service_type=ServiceType.MANAGE_CARD_TRANSACTION_LIMIT,
-            data=data,
-            # endpoint_path="/ManageCardTransactionLimit",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["manage_card_channel"])
     async def manage_card_channel(
         self,
         id: int,
@@ -247,20 +188,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "Channel": channel,
-            "Limit": limit,
-            "SimulateRequest": simulate_request,
-        }
-        return await self._api_call(
-            service_type=ServiceType.MANAGE_CARD_CHANNEL,
-            data=data,
-            # endpoint_path="/ManageCardChannel",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["change_card_pin"])
     async def change_card_pin(
         self,
         id: int,
@@ -282,15 +211,10 @@ class AsyncCard(BaseAsyncAPIWrapper):
                 of calling this function.
 
         Raises:
-            ConnectionException: when the request times out or in the absence of an internet connection."""
-        data = {"Id": id, "TrackingReference": tracking_reference, "NewPIN": new_pin}
-        return await self._api_call(
-            service_type=ServiceType.CHANGE_CARD_PIN,
-            data=data,
-            # endpoint_path="/ChangeCardPIN",
-            request_reference=request_reference,
-        )
+            ConnectionException: when the request times out or in the absence of an internet connection.
+        """
 
+    @endpoint_method(CARD_ENDPOINTS["block_card"])
     async def block_card(
         self, tracking_reference: str, id: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -313,17 +237,8 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.BLOCK_CARD,
-            data=data,
-            # endpoint_path="/BlockCard",
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["unblock_card"])
     async def unblock_card(
         self, tracking_reference: str, id: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -342,13 +257,3 @@ class AsyncCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.UNBLOCK_CARD,
-            data=data,
-            # endpoint_path="/UnblockCard",
-            request_reference=request_reference,
-        )
@@ -1,11 +1,21 @@
+import functools
 from typing import Optional, Union
 
 from pykuda2.base import BaseAsyncAPIWrapper
-from pykuda2.utils import ServiceType, APIResponse
+from pykuda2.endpoints import GIFT_CARD_ENDPOINTS, endpoint_method
+from pykuda2.polling import AsyncPendingPurchase, AsyncPoller
+from pykuda2.utils import APIResponse
 
 
 class AsyncGiftCard(BaseAsyncAPIWrapper):
-    async def get_gift_cards(self, request_reference: Optional[str] = None) -> APIResponse:
+    # The poller that drives the `wait` of pending purchases. The default one,
+    # shared by every wrapper, is used when it is left as `None`.
+    poller: Optional[AsyncPoller] = None
+
+    @endpoint_method(GIFT_CARD_ENDPOINTS["get_gift_cards"])
+    async def get_gift_cards(
+        self, request_reference: Optional[str] = None
+    ) -> APIResponse:
         """Retrieves a curated list of gift cards supported by Kuda.
 
         Args:
@@ -19,9 +29,6 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        return await self._api_call(
-            service_type=ServiceType.GET_GIFT_CARD, request_reference=request_reference
-        )
 
     async def purchase_gift_card(
         self,
@@ -32,7 +39,7 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
         biller_identifier: str,
         note: Optional[str] = None,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> AsyncPendingPurchase:
         """Buy gift cards from the admin account
 
         Args:
@@ -50,25 +57,41 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            An `AsyncPendingPurchase` which is an `APIResponse` whose `wait` coroutine returns the
+                final status of the purchase once it is either successful or failed.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return await self._api_call(
-            service_type=ServiceType.ADMIN_BUY_GIFT_CARD,
+        endpoint = GIFT_CARD_ENDPOINTS["purchase_gift_card"]
+        data = endpoint.build_payload(
+            amount,
+            customer_name,
+            customer_mobile,
+            customer_email,
+            biller_identifier,
+            note,
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = await self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return AsyncPendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_gift_card_status,
+                tracking_reference=None,
+                amount=amount,
+                customer_name=customer_name,
+                customer_mobile=customer_mobile,
+                customer_email=customer_email,
+                biller_identifier=biller_identifier,
+                note=note,
+            ),
+            poller=self.poller,
+        )
 
     async def purchase_gift_card_from_virtual_account(
         self,
@@ -80,7 +103,7 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
         biller_identifier: str,
         note: Optional[str] = None,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> AsyncPendingPurchase:
         """Buy gift cards from the virtual account.
 
         Args:
@@ -99,27 +122,44 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            An `AsyncPendingPurchase` which is an `APIResponse` whose `wait` coroutine returns the
+                final status of the purchase once it is either successful or failed.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return await self._api_call(
-            service_type=ServiceType.BUY_GIFT_CARD,
+        endpoint = GIFT_CARD_ENDPOINTS["purchase_gift_card_from_virtual_account"]
+        data = endpoint.build_payload(
+            tracking_reference,
+            amount,
+            customer_name,
+            customer_mobile,
+            customer_email,
+            biller_identifier,
+            note,
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = await self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return AsyncPendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_gift_card_status,
+                tracking_reference=tracking_reference,
+                amount=amount,
+                customer_name=customer_name,
+                customer_mobile=customer_mobile,
+                customer_email=customer_email,
+                biller_identifier=biller_identifier,
+                note=note,
+            ),
+            poller=self.poller,
+        )
 
+    @endpoint_method(GIFT_CARD_ENDPOINTS["get_gift_card_status"])
     async def get_gift_card_status(
         self,
         tracking_reference: str,
@@ -155,17 +195,3 @@ class AsyncGiftCard(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return await self._api_call(
-            service_type=ServiceType.GIFT_CARD_TSQ,
-            data=data,
-            request_reference=request_reference,
-        )
@@ -1,13 +1,33 @@
-from typing import Union
+from typing import Callable, Optional, Union
+
+import httpx
 
 from pykuda2 import Mode, ServiceType, APIResponse
 from pykuda2.base import BaseAsyncAPIWrapper
 from pykuda2.exceptions import TokenException
+from pykuda2.instrumentation import Instrumentation
 
 
 class AsyncInstantSettlementService(BaseAsyncAPIWrapper):
-    def __init__(self, secret_key: str, client_password: str, mode=Mode.DEVELOPMENT):
-        super().__init__(email="", api_key="", mode=mode)
+    def __init__(
+        self,
+        secret_key: str,
+        client_password: str,
+        mode=Mode.DEVELOPMENT,
+        client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email="",
+            api_key="",
+            mode=mode,
+            client=client,
+            transport=transport,
+            instrumentation=instrumentation,
+            reference_generator=reference_generator,
+        )
         self.secret_key = secret_key
         self.client_password = client_password
 
@@ -21,26 +41,22 @@ class AsyncInstantSettlementService(BaseAsyncAPIWrapper):
             Mode.PRODUCTION: "https://partners.kuda.com",
         }[self._mode]
 
-    @property
-    async def _token(self) -> str:
-        if self._token:
-            return self._token
-        else:
-            response = await self._api_call(
-                service_type=ServiceType.NO_OP,
-                data={
-                    "secretKey": self.secret_key,
-                    "clientPassword": self.client_password,
-                },
-                endpoint_path="/api/Auth/authenticate",
-                exclude_auth_header=True,
-            )
-            if response.data:
-                self._token = response.data["auth_token"]
-                return self._token
-            raise TokenException(
-                f"Unable to get access token for InstantSettlementService. {response.message}. Please ensure valid credentials were provided"
-            )
+    async def _fetch_token(self) -> str:
+        response = await self._api_call(
+            service_type=ServiceType.NO_OP,
+            data={
+                "secretKey": self.secret_key,
+                "clientPassword": self.client_password,
+            },
+            endpoint_path="/api/Auth/authenticate",
+            exclude_auth_header=True,
+        )
+        if response.data:
+            self._saved_token = response.data["auth_token"]
+            return self._saved_token
+        raise TokenException(
+            f"Unable to get access token for InstantSettlementService. {response.message}. Please ensure valid credentials were provided"
+        )
 
     async def create_terminal(
         self,
@@ -1,10 +1,12 @@
 from typing import Optional, Union
 
 from pykuda2.base import BaseAsyncAPIWrapper
-from pykuda2.utils import TransactionType, ServiceType, APIResponse
+from pykuda2.endpoints import SAVINGS_ENDPOINTS, endpoint_method
+from pykuda2.utils import TransactionType, APIResponse
 
 
 class AsyncSavings(BaseAsyncAPIWrapper):
+    @endpoint_method(SAVINGS_ENDPOINTS["create_plain_savings_account"])
     async def create_plain_savings_account(
         self,
         name: str,
@@ -30,13 +32,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"Name": name, "TrackingReference": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.CREATE_PLAIN_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_plain_savings_account"])
     async def get_plain_savings_account(
         self,
         tracking_reference: str,
@@ -59,12 +56,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "PrimaryAccountNumber": primary_account_number,
-        }
-        return await self._api_call(service_type=ServiceType.GET_PLAIN_SAVE, data=data)
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_plain_savings_accounts"])
     async def get_plain_savings_accounts(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -83,13 +76,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"TrackingReference": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.GET_ALL_CUSTOMER_PLAIN_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["credit_or_debit_plain_savings_account"])
     async def credit_or_debit_plain_savings_account(
         self,
         amount: Union[int, float],
@@ -118,18 +106,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Amount": amount,
-            "Narration": narration,
-            "TransactionType": transaction_type,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.PLAIN_SAVE_DEBIT_CREDIT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_plain_savings_account_transactions"])
     async def get_plain_savings_account_transactions(
         self,
         page_size: int,
@@ -153,17 +131,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "PageSize": page_size,
-            "PageNumber": page_number,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.RETRIEVE_PLAIN_SAVE_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["create_open_flexible_savings_account"])
     async def create_open_flexible_savings_account(
         self,
         savings_tracking_reference: str,
@@ -201,22 +170,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "SavingsTrackingReference": savings_tracking_reference,
-            "Name": name,
-            "VirtualAccountTrackingReference": virtual_account_tracking_reference,
-            "Amount": amount,
-            "Duration": duration,
-            "Frequency": frequency,
-            "StartNow": start_now,
-            "StartData": start_date,
-        }
-        return await self._api_call(
-            service_type=ServiceType.CREATE_OPEN_FLEXIBLE_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["pre_create_open_flexible_savings_account"])
     async def pre_create_open_flexible_savings_account(
         self,
         savings_tracking_reference: str,
@@ -256,23 +211,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "SavingsTrackingReference": savings_tracking_reference,
-            "Name": name,
-            "VirtualAccountTrackingReference": virtual_account_tracking_reference,
-            "Amount": amount,
-            "Duration": duration,
-            "Frequency": frequency,
-            "StartNow": start_now,
-            "StartData": start_date,
-            "IsInterestEarning": is_interest_earning,
-        }
-        return await self._api_call(
-            service_type=ServiceType.PRE_CREATE_OPEN_FLEXIBLE_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_open_flexible_savings_account"])
     async def get_open_flexible_savings_account(
         self,
         tracking_reference: str,
@@ -294,16 +234,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "PrimaryAccountNumber": primary_account_number,
-        }
-        return await self._api_call(
-            service_type=ServiceType.GET_OPEN_FLEXIBLE_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_open_flexible_savings_accounts"])
     async def get_open_flexible_savings_accounts(
         self,
         tracking_reference: str,
@@ -325,16 +257,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "PrimaryAccountNumber": primary_account_number,
-        }
-        return await self._api_call(
-            service_type=ServiceType.GET_ALL_CUSTOMER_OPEN_FLEXIBLE_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["withdrawal_from_flexible_savings_account"])
     async def withdrawal_from_flexible_savings_account(
         self,
         amount: Union[int, float],
@@ -359,13 +283,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"Amount": amount, "TrackingReference": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.COMPLETE_OPEN_FLEXIBLE_SAVE_WITHDRAWAL,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_flexible_savings_account_transactions"])
     async def get_flexible_savings_account_transactions(
         self,
         tracking_reference: str,
@@ -389,17 +308,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "PageSize": page_size,
-            "PageNumber": page_number,
-            "TrackingReference": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.RETRIEVE_OPEN_FLEXIBLE_SAVE_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["create_fixed_savings_account"])
     async def create_fixed_savings_account(
         self,
         savings_tracking_reference: str,
@@ -439,23 +349,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "SavingsTrackingReference": savings_tracking_reference,
-            "Name": name,
-            "VirtualAccountTrackingReference": virtual_account_tracking_reference,
-            "Amount": amount,
-            "Duration": duration,
-            "Frequency": frequency,
-            "StartNow": start_now,
-            "StartData": start_date,
-            "IsInterestEarning": is_interest_earning,
-        }
-        return await self._api_call(
-            service_type=ServiceType.CREATE_FIXED_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_fixed_savings_account"])
     async def get_fixed_savings_account(
         self,
         tracking_reference: str,
@@ -475,15 +370,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "SavingsId": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.GET_FIXED_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_fixed_savings_accounts"])
     async def get_fixed_savings_accounts(
         self, tracking_reference: str, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -501,13 +389,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"TrackingReference": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.GET_ALL_CUSTOMER_FIXED_SAVE,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["close_fixed_savings_account"])
     async def close_fixed_savings_account(
         self,
         amount: Union[int, float],
@@ -532,13 +415,8 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"Amount": amount, "SavingsId": tracking_reference}
-        return await self._api_call(
-            service_type=ServiceType.COMPLETE_FIXED_SAVE_WITHDRAWAL,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(SAVINGS_ENDPOINTS["get_fixed_savings_account_transactions"])
     async def get_fixed_savings_account_transactions(
         self,
         tracking_reference: str,
@@ -562,13 +440,3 @@ class AsyncSavings(BaseAsyncAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "PageNumber": page_number,
-            "PageSize": page_size,
-            "SavingsId": tracking_reference,
-        }
-        return await self._api_call(
-            service_type=ServiceType.RETRIEVE_FIXED_SAVE_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
@@ -1,10 +1,12 @@
 from typing import Optional
 
 from pykuda2.base import BaseAPIWrapper
-from pykuda2.utils import ServiceType, CardChannel, Gender, APIResponse
+from pykuda2.endpoints import CARD_ENDPOINTS, endpoint_method
+from pykuda2.utils import CardChannel, Gender, APIResponse
 
 
 class Card(BaseAPIWrapper):
+    @endpoint_method(CARD_ENDPOINTS["request_card"])
     def request_card(
         self,
         tracking_reference: str,
@@ -44,25 +46,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "NameOnCard": name_on_card,
-            "dateofBirth": date_of_birth,
-            "Gender": gender,
-            "DeliveryState": delivery_state,
-            "DeliveryStreetNoAndName": delivery_street_no_and_name,
-            "DeliveryCity": delivery_city,
-            "DeliveryLGA": delivery_lga,
-            "DeliveryLandmark": delivery_landmark,
-            "Country": country,
-            "additionalPhoneNumber": additional_phone_number,
-        }
-        return self._api_call(
-            service_type=ServiceType.REQUEST_CARD,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["get_cards"])
     def get_cards(
         self,
         tracking_reference: str,
@@ -84,16 +69,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return self._api_call(
-            service_type=ServiceType.GET_CUSTOMER_CARDS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["activate_card"])
     def activate_card(
         self,
         pan: int,
@@ -121,19 +98,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Pan": pan,
-            "CVV": cvv,
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return self._api_call(
-            service_type=ServiceType.ACTIVATE_CARD,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["deactivate_card"])
     def deactivate_card(
         self,
         id: int,
@@ -157,17 +123,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "SimulateRequest": simulate_request,
-        }
-        return self._api_call(
-            service_type=ServiceType.DEACTIVATE_CARD,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["set_card_limit"])
     def set_card_limit(
         self,
         id: int,
@@ -202,19 +159,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "Channel": channel,
-            "Limit": limit,
-            "SimulateRequest": simulate_request,
-        }
-        return self._api_call(
-            service_type=ServiceType.MANAGE_CARD_TRANSACTION_LIMIT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["manage_card_channel"])
     def manage_card_channel(
         self,
         id: int,
@@ -242,19 +188,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-            "Channel": channel,
-            "Limit": limit,
-            "SimulateRequest": simulate_request,
-        }
-        return self._api_call(
-            service_type=ServiceType.MANAGE_CARD_CHANNEL,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["change_card_pin"])
     def change_card_pin(
         self,
         id: int,
@@ -276,14 +211,10 @@ class Card(BaseAPIWrapper):
                 of calling this function.
 
         Raises:
-            ConnectionException: when the request times out or in the absence of an internet connection."""
-        data = {"Id": id, "TrackingReference": tracking_reference, "NewPIN": new_pin}
-        return self._api_call(
-            service_type=ServiceType.CHANGE_CARD_PIN,
-            data=data,
-            request_reference=request_reference,
-        )
+            ConnectionException: when the request times out or in the absence of an internet connection.
+        """
 
+    @endpoint_method(CARD_ENDPOINTS["block_card"])
     def block_card(
         self, tracking_reference: str, id: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -306,16 +237,8 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-        }
-        return self._api_call(
-            service_type=ServiceType.BLOCK_CARD,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(CARD_ENDPOINTS["unblock_card"])
     def unblock_card(
         self, tracking_reference: str, id: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -334,12 +257,3 @@ class Card(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "Id": id,
-            "TrackingReference": tracking_reference,
-        }
-        return self._api_call(
-            service_type=ServiceType.UNBLOCK_CARD,
-            data=data,
-            request_reference=request_reference,
-        )
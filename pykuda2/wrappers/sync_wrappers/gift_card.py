@@ -1,10 +1,18 @@
+import functools
 from typing import Optional, Union
 
 from pykuda2.base import BaseAPIWrapper
-from pykuda2.utils import ServiceType, APIResponse
+from pykuda2.endpoints import GIFT_CARD_ENDPOINTS, endpoint_method
+from pykuda2.polling import PendingPurchase, Poller
+from pykuda2.utils import APIResponse
 
 
 class GiftCard(BaseAPIWrapper):
+    # The poller that drives the `wait` of pending purchases. The default one,
+    # shared by every wrapper, is used when it is left as `None`.
+    poller: Optional[Poller] = None
+
+    @endpoint_method(GIFT_CARD_ENDPOINTS["get_gift_cards"])
     def get_gift_cards(self, request_reference: Optional[str] = None) -> APIResponse:
         """Retrieves a curated list of gift cards supported by Kuda.
 
@@ -19,9 +27,6 @@ class GiftCard(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        return self._api_call(
-            service_type=ServiceType.GET_GIFT_CARD, request_reference=request_reference
-        )
 
     def purchase_gift_card(
         self,
@@ -32,7 +37,7 @@ class GiftCard(BaseAPIWrapper):
         biller_identifier: str,
         note: Optional[str] = None,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> PendingPurchase:
         """Buy gift cards from the admin account
 
         Args:
@@ -50,25 +55,41 @@ class GiftCard(BaseAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            A `PendingPurchase` which is an `APIResponse` whose `wait` method blocks until the
+                purchase is either successful or failed and returns its final status.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return self._api_call(
-            service_type=ServiceType.ADMIN_BUY_GIFT_CARD,
+        endpoint = GIFT_CARD_ENDPOINTS["purchase_gift_card"]
+        data = endpoint.build_payload(
+            amount,
+            customer_name,
+            customer_mobile,
+            customer_email,
+            biller_identifier,
+            note,
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return PendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_gift_card_status,
+                tracking_reference=None,
+                amount=amount,
+                customer_name=customer_name,
+                customer_mobile=customer_mobile,
+                customer_email=customer_email,
+                biller_identifier=biller_identifier,
+                note=note,
+            ),
+            poller=self.poller,
+        )
 
     def purchase_gift_card_from_virtual_account(
         self,
@@ -80,7 +101,7 @@ class GiftCard(BaseAPIWrapper):
         biller_identifier: str,
         note: Optional[str] = None,
         request_reference: Optional[str] = None,
-    ) -> APIResponse:
+    ) -> PendingPurchase:
         """Buy gift cards from the virtual account.
 
         Args:
@@ -99,27 +120,44 @@ class GiftCard(BaseAPIWrapper):
                 it is automatically generated if not provided.
 
         Returns:
-            An `APIResponse` which is basically just a dataclass containing the data returned by the server as result
-                of calling this function.
+            A `PendingPurchase` which is an `APIResponse` whose `wait` method blocks until the
+                purchase is either successful or failed and returns its final status.
 
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return self._api_call(
-            service_type=ServiceType.BUY_GIFT_CARD,
+        endpoint = GIFT_CARD_ENDPOINTS["purchase_gift_card_from_virtual_account"]
+        data = endpoint.build_payload(
+            tracking_reference,
+            amount,
+            customer_name,
+            customer_mobile,
+            customer_email,
+            biller_identifier,
+            note,
+        )
+        request_reference = request_reference or self._generate_request_reference()
+        response = self._api_call(
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
+        return PendingPurchase.from_response(
+            response,
+            check=functools.partial(
+                self.get_gift_card_status,
+                tracking_reference=tracking_reference,
+                amount=amount,
+                customer_name=customer_name,
+                customer_mobile=customer_mobile,
+                customer_email=customer_email,
+                biller_identifier=biller_identifier,
+                note=note,
+            ),
+            poller=self.poller,
+        )
 
+    @endpoint_method(GIFT_CARD_ENDPOINTS["get_gift_card_status"])
     def get_gift_card_status(
         self,
         tracking_reference: str,
@@ -155,17 +193,3 @@ class GiftCard(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "requestingCustomerName": customer_name,
-            "requestingCustomerMobile": customer_mobile,
-            "requestingCustomerEmail": customer_email,
-            "billerIdentifier": biller_identifier,
-            "note": note,
-        }
-        return self._api_call(
-            service_type=ServiceType.GIFT_CARD_TSQ,
-            data=data,
-            request_reference=request_reference,
-        )
@@ -1,14 +1,34 @@
-from typing import Union
+from typing import Callable, Optional, Union
+
+import httpx
 
 from pykuda2 import Mode, ServiceType, APIResponse
 from pykuda2.base import BaseAPIWrapper
 
 from pykuda2.exceptions import TokenException
+from pykuda2.instrumentation import Instrumentation
 
 
 class InstantSettlementService(BaseAPIWrapper):
-    def __init__(self, secret_key: str, client_password: str, mode=Mode.DEVELOPMENT):
-        super().__init__(email="", api_key="", mode=mode)
+    def __init__(
+        self,
+        secret_key: str,
+        client_password: str,
+        mode=Mode.DEVELOPMENT,
+        client: Optional[httpx.Client] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        reference_generator: Optional[Callable[[], str]] = None,
+    ):
+        super().__init__(
+            email="",
+            api_key="",
+            mode=mode,
+            client=client,
+            transport=transport,
+            instrumentation=instrumentation,
+            reference_generator=reference_generator,
+        )
         self.secret_key = secret_key
         self.client_password = client_password
 
@@ -22,27 +42,23 @@ class InstantSettlementService(BaseAPIWrapper):
             Mode.PRODUCTION: "https://partners.kuda.com",
         }[self._mode]
 
-    @property
-    def _token(self) -> str:
-        if self._token:
-            return self._token
-        else:
-            response = self._api_call(
-                service_type=ServiceType.NO_OP,
-                data={
-                    "secretKey": self.secret_key,
-                    "clientPassword": self.client_password,
-                },
-                endpoint_path="/api/Auth/authenticate",
-                exclude_auth_header=True,
-            )
-            if response.data:
-                self._token = response.data["auth_token"]
-                return self._token
-            raise TokenException(
-                "Unable to get access token for InstantSettlementService. "
-                f"{response.message}. Please ensure valid credentials were provided"
-            )
+    def _fetch_token(self) -> str:
+        response = self._api_call(
+            service_type=ServiceType.NO_OP,
+            data={
+                "secretKey": self.secret_key,
+                "clientPassword": self.client_password,
+            },
+            endpoint_path="/api/Auth/authenticate",
+            exclude_auth_header=True,
+        )
+        if response.data:
+            self._saved_token = response.data["auth_token"]
+            return self._saved_token
+        raise TokenException(
+            "Unable to get access token for InstantSettlementService. "
+            f"{response.message}. Please ensure valid credentials were provided"
+        )
 
     def create_terminal(
         self,
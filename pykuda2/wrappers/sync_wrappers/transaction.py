@@ -1,15 +1,17 @@
 from typing import Optional, Union
 
 from pykuda2.base import BaseAPIWrapper
+from pykuda2.endpoints import TRANSACTION_ENDPOINTS, endpoint_method
+from pykuda2.instructions import TransferInstructionBatch
 from pykuda2.utils import (
     TransferInstruction,
-    ServiceType,
     TransactionStatus,
     APIResponse,
 )
 
 
 class Transaction(BaseAPIWrapper):
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_banks"])
     def get_banks(self, request_reference: Optional[str] = None) -> APIResponse:
         """Retrieves all the banks available from NIPS
 
@@ -27,10 +29,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        return self._api_call(
-            service_type=ServiceType.BANK_LIST, request_reference=request_reference
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["confirm_transfer_recipient"])
     def confirm_transfer_recipient(
         self,
         beneficiary_account_number: str,
@@ -60,18 +60,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "beneficiaryAccountNumber": beneficiary_account_number,
-            "beneficiaryBankCode": beneficiary_bank_code,
-            "SenderTrackingReference": sender_tracking_reference,
-            "isRequestFromVirtualAccount": is_request_from_virtual_account,
-        }
-        return self._api_call(
-            service_type=ServiceType.NAME_ENQUIRY,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["fund_transfer"])
     def fund_transfer(
         self,
         beneficiary_account: str,
@@ -116,23 +106,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "ClientAccountNumber": client_account_number,
-            "beneficiaryAccount": beneficiary_account,
-            "beneficiaryBankCode": beneficiary_bank_code,
-            "beneficiaryName": beneficiary_name,
-            "amount": amount,
-            "narration": narration,
-            "nameEnquirySessionID": name_enquiry_session_id,
-            "senderName": sender_name,
-            "clientFeeCharge": client_fee_charge,
-        }
-        return self._api_call(
-            service_type=ServiceType.SINGLE_FUND_TRANSFER,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["virtual_account_fund_transfer"])
     def virtual_account_fund_transfer(
         self,
         tracking_reference: str,
@@ -178,33 +153,19 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "beneficiaryAccount": beneficiary_account,
-            "amount": amount,
-            "narration": narration,
-            "beneficiaryBankCode": beneficiary_bank_code,
-            "beneficiaryName": beneficiary_name,
-            "senderName": sender_name,
-            "nameEnquiryId": name_enquiry_id,
-            "clientFeeCharge": client_fee_charge,
-            "ClientAccountNumber": client_account_number,
-        }
-        return self._api_call(
-            service_type=ServiceType.VIRTUAL_ACCOUNT_FUND_TRANSFER,
-            data=data,
-            request_reference=request_reference,
-        )
 
     def process_transfers(
         self,
-        fund_transfer_instructions: list[TransferInstruction],
+        fund_transfer_instructions: Union[
+            list[TransferInstruction], TransferInstructionBatch
+        ],
         request_reference: Optional[str] = None,
     ) -> APIResponse:
         """Allows you to send a list of transfer instructions to Kuda, to make the payments on your behalf.
 
         Args:
-            fund_transfer_instructions: A list of transfer instructions for transfers to be made.
+            fund_transfer_instructions: A list of transfer instructions for transfers to be made,
+                or a `TransferInstructionBatch`.
             request_reference: a unique identifier for this api call.
                 it is automatically generated if not provided.
 
@@ -215,18 +176,22 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "FundTransferInstructions": [
+        if isinstance(fund_transfer_instructions, TransferInstructionBatch):
+            instructions = fund_transfer_instructions.to_dicts()
+        else:
+            instructions = [
                 fund_transfer_instruction.to_dict()
                 for fund_transfer_instruction in fund_transfer_instructions
             ]
-        }
+        endpoint = TRANSACTION_ENDPOINTS["process_transfers"]
+        data = endpoint.build_payload(instructions)
         return self._api_call(
-            service_type=ServiceType.FUND_TRANSFER_INSTRUCTION,
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_transfer_instructions"])
     def get_transfer_instructions(
         self,
         account_number: str,
@@ -261,20 +226,6 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "AccountNumber": account_number,
-            "Reference": reference,
-            "Amount": amount,
-            "OriginalRequestRef": original_request_ref,
-            "Status": status,
-            "PageNumber": page_number,
-            "PageSize": page_size,
-        }
-        return self._api_call(
-            service_type=ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION,
-            data=data,
-            request_reference=request_reference,
-        )
 
     def get_transaction_logs(
         self,
@@ -311,23 +262,25 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "RequestReference": request_reference,
-            "ResponseReference": response_reference,
-            "FetchSuccessfulRecords": fetch_successful_records,
-            "TransactionDate": transaction_date,
-            "HasTransactionDateRangeFilter": has_transaction_date_range_filter,
-            "StartDate": start_date,
-            "EndDate": end_date,
-            "PageSize": page_size,
-            "PageNumber": page_number,
-        }
+        endpoint = TRANSACTION_ENDPOINTS["get_transaction_logs"]
+        data = endpoint.build_payload(
+            request_reference,
+            response_reference,
+            fetch_successful_records,
+            transaction_date,
+            has_transaction_date_range_filter,
+            start_date,
+            end_date,
+            page_size,
+            page_number,
+        )
         return self._api_call(
-            service_type=ServiceType.RETRIEVE_TRANSACTION_LOGS,
+            service_type=endpoint.service_type,
             data=data,
             request_reference=request_reference,
         )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_transaction_history"])
     def get_transaction_history(
         self, page_size: int, page_number: int, request_reference: Optional[str] = None
     ) -> APIResponse:
@@ -346,13 +299,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {"pageSize": page_size, "pageNumber": page_number}
-        return self._api_call(
-            service_type=ServiceType.ADMIN_MAIN_ACCOUNT_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_filtered_transaction_history"])
     def get_filtered_transaction_history(
         self,
         page_size: int,
@@ -378,18 +326,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "pageSize": page_size,
-            "pageNumber": page_number,
-            "startDate": start_date,
-            "endDate": end_date,
-        }
-        return self._api_call(
-            service_type=ServiceType.ADMIN_MAIN_ACCOUNT_FILTERED_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_virtual_account_transaction_history"])
     def get_virtual_account_transaction_history(
         self,
         tracking_reference: str,
@@ -413,17 +351,10 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "pageSize": page_size,
-            "pageNumber": page_number,
-        }
-        return self._api_call(
-            service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNT_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(
+        TRANSACTION_ENDPOINTS["get_virtual_account_filtered_transaction_history"]
+    )
     def get_virtual_account_filtered_transaction_history(
         self,
         tracking_reference: str,
@@ -451,19 +382,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "pageSize": page_size,
-            "pageNumber": page_number,
-            "startDate": start_date,
-            "endDate": end_date,
-        }
-        return self._api_call(
-            service_type=ServiceType.ADMIN_VIRTUAL_ACCOUNT_FILTERED_TRANSACTIONS,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["get_status"])
     def get_status(
         self,
         is_third_party_bank_transfer: bool,
@@ -486,16 +406,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "isThirdPartyBankTransfer": is_third_party_bank_transfer,
-            "transactionRequestReference": transaction_request_reference,
-        }
-        return self._api_call(
-            service_type=ServiceType.TRANSACTION_STATUS_QUERY,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["fund_virtual_account"])
     def fund_virtual_account(
         self,
         tracking_reference: str,
@@ -522,17 +434,8 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "narration": narration,
-        }
-        return self._api_call(
-            service_type=ServiceType.FUND_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
 
+    @endpoint_method(TRANSACTION_ENDPOINTS["withdraw_from_virtual_account"])
     def withdraw_from_virtual_account(
         self,
         tracking_reference: str,
@@ -562,14 +465,3 @@ class Transaction(BaseAPIWrapper):
         Raises:
             ConnectionException: when the request times out or in the absence of an internet connection.
         """
-        data = {
-            "trackingReference": tracking_reference,
-            "amount": amount,
-            "narration": narration,
-            "ClientFeeCharge": client_fee_charge,
-        }
-        return self._api_call(
-            service_type=ServiceType.WITHDRAW_VIRTUAL_ACCOUNT,
-            data=data,
-            request_reference=request_reference,
-        )
@@ -0,0 +1,107 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.balances import BalanceSnapshot, snapshot_balances, snapshot_balances_async
+from pykuda2.exceptions import PaginationException
+from pykuda2.pagination import iter_virtual_accounts
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+
+def seeded_simulator(accounts: int) -> KudaSimulator:
+    simulator = KudaSimulator()
+    for index in range(accounts):
+        simulator.add_virtual_account(f"ref-{index}", balance=float(index))
+    return simulator
+
+
+class IterVirtualAccountsTestCase(TestCase):
+    def test_pages_are_walked(self):
+        simulator = seeded_simulator(25)
+        with Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        ) as accounts:
+            references = [
+                account["trackingReference"]
+                for account in iter_virtual_accounts(accounts, page_size=10)
+            ]
+        self.assertEqual(references, [f"ref-{index}" for index in range(25)])
+        self.assertEqual(simulator.calls[ServiceType.ADMIN_VIRTUAL_ACCOUNTS], 3)
+
+    def test_failed_pages_raise(self):
+        simulator = KudaSimulator()
+        with Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        ) as accounts:
+            accounts.warmup()
+            simulator.error_rate = 1
+            with self.assertRaises(PaginationException):
+                list(iter_virtual_accounts(accounts))
+
+
+class SnapshotBalancesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = seeded_simulator(30)
+        self.accounts = Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.accounts.close)
+
+    def test_balances_of_every_account_are_retrieved(self):
+        snapshot = snapshot_balances(self.accounts, concurrency=4, page_size=7)
+        self.assertEqual(len(snapshot), 30)
+        self.assertEqual(snapshot.get("ref-3"), (3.0, 3.0))
+        self.assertEqual(snapshot.total_available_balance, sum(range(30)))
+        self.assertEqual(
+            sorted(reference for reference, _, _ in snapshot.rows()),
+            sorted(f"ref-{index}" for index in range(30)),
+        )
+
+    def test_only_stale_balances_are_refreshed(self):
+        snapshot = snapshot_balances(self.accounts)
+        self.simulator.add_virtual_account("ref-new", balance=5.0)
+        self.simulator.virtual_accounts["ref-0"]["availableBalance"] = 100.0
+        snapshot_balances(self.accounts, snapshot=snapshot, max_age=3600)
+        self.assertEqual(
+            self.simulator.calls[ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE], 31
+        )
+        self.assertEqual(snapshot.get("ref-new"), (5.0, 5.0))
+        self.assertEqual(snapshot.get("ref-0"), (0.0, 0.0))
+
+        snapshot_balances(self.accounts, snapshot=snapshot, max_age=0, discover=False)
+        self.assertEqual(snapshot.get("ref-0"), (100.0, 0.0))
+        self.assertEqual(len(snapshot), 31)
+
+    def test_failed_lookups_keep_the_previous_balance(self):
+        snapshot = BalanceSnapshot()
+        snapshot._update("ref-missing", 1.0, 1.0, 0.0)
+        snapshot_balances(self.accounts, snapshot=snapshot, discover=False)
+        self.assertEqual(snapshot.get("ref-missing"), (1.0, 1.0))
+        self.assertEqual(snapshot.errors, {"ref-missing": "Virtual account not found"})
+
+
+class SnapshotBalancesAsyncTestCase(IsolatedAsyncioTestCase):
+    async def test_balances_of_every_account_are_retrieved(self):
+        simulator = seeded_simulator(30)
+        accounts = AsyncAccount(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        snapshot = await snapshot_balances_async(accounts, concurrency=4, page_size=7)
+        self.assertEqual(len(snapshot), 30)
+        self.assertEqual(snapshot.get("ref-29"), (29.0, 29.0))
+        await snapshot_balances_async(accounts, snapshot=snapshot, max_age=3600)
+        await accounts.aclose()
+        self.assertEqual(
+            simulator.calls[ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE], 30
+        )
@@ -1,7 +1,19 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
 from httpx import codes as HTTP_STATUS_CODE
 
 from pykuda2.base import BaseAPIWrapper, BaseAsyncAPIWrapper
+from pykuda2.concurrency import pooled
+from pykuda2.kuda import AsyncKuda, Kuda
+from pykuda2.provisioning import VirtualAccountProvisioner
+from pykuda2.simulator import KudaSimulator
+from pykuda2.wrappers.sync_wrappers.instant_settlement_service import (
+    InstantSettlementService,
+)
 from pykuda2.utils import APIResponse, ServiceType
+from pykuda2.wrappers.sync_wrappers.accounts import Account
 from tests.mocked_api_call_testcase import (
     MockedAPICallTestCase,
     MockedAsyncAPICallTestCase,
@@ -84,3 +96,229 @@ class AsyncAPIWrapperTestCase(MockedAsyncAPICallTestCase):
                 },
             ),
         )
+
+
+class TransportInjectionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+
+    def test_requests_are_made_with_the_transport(self):
+        with Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        ) as kuda:
+            response = kuda.accounts.get_admin_account_balance()
+        self.assertTrue(response.status)
+        self.assertTrue(kuda._client.is_closed)
+        self.assertIs(kuda.accounts._client, kuda._client)
+
+    def test_provided_client_is_left_open(self):
+        client = httpx.Client(transport=httpx.MockTransport(self.simulator.handle))
+        with BaseAPIWrapper(email="", api_key="", client=client) as wrapper:
+            self.assertEqual(wrapper._token, self.simulator.token)
+        self.assertFalse(client.is_closed)
+        client.close()
+
+    def test_client_and_transport_are_mutually_exclusive(self):
+        with self.assertRaises(ValueError):
+            BaseAPIWrapper(
+                email="",
+                api_key="",
+                client=httpx.Client(),
+                transport=httpx.MockTransport(self.simulator.handle),
+            )
+
+
+class AsyncTransportInjectionTestCase(IsolatedAsyncioTestCase):
+    async def test_requests_are_made_with_the_transport(self):
+        simulator = KudaSimulator()
+        async with AsyncKuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        ) as kuda:
+            response = await kuda.accounts.get_admin_account_balance()
+        self.assertTrue(response.status)
+        self.assertTrue(kuda._client.is_closed)
+        self.assertIs(kuda.transactions._client, kuda._client)
+
+
+class RecordingHandler:
+    def __init__(self, simulator: KudaSimulator):
+        self.simulator = simulator
+        self.methods = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.methods.append(request.method)
+        if request.url.path.endswith("/api/Auth/authenticate"):
+            return httpx.Response(200, json={"data": {"auth_token": "iss-token"}})
+        return self.simulator.handle(request)
+
+
+class WarmupTestCase(TestCase):
+    def test_token_and_connections_are_shared(self):
+        handler = RecordingHandler(KudaSimulator())
+        with Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handler),
+        ) as kuda:
+            # The token fetched when the wrapper was created is reused.
+            self.assertEqual(handler.methods, ["POST"])
+            handler.methods.clear()
+            kuda.warmup(connections=4)
+            self.assertEqual(handler.methods, ["HEAD"] * 4)
+            self.assertEqual(kuda._saved_token, handler.simulator.token)
+            self.assertEqual(kuda.savings._saved_token, kuda._saved_token)
+            self.assertTrue(kuda.accounts.get_admin_account_balance().status)
+
+    def test_client_is_created_when_none_was_provided(self):
+        wrapper = BaseAPIWrapper(email="", api_key="")
+        wrapper._saved_token = "token"
+        with patch("httpx.Client") as client:
+            wrapper.warmup(connections=2)
+        self.assertIs(wrapper._client, client.return_value)
+        self.assertEqual(wrapper._client.head.call_count, 2)
+        wrapper.close()
+        wrapper._client.close.assert_called_once_with()
+
+    def test_instant_settlement_service_token_is_cached(self):
+        handler = RecordingHandler(KudaSimulator())
+        service = InstantSettlementService(
+            secret_key="secret",
+            client_password="password",
+            transport=httpx.MockTransport(handler),
+        )
+        service.warmup()
+        self.assertEqual(service._saved_token, "iss-token")
+        self.assertEqual(service._headers["authorization"], "Bearer iss-token")
+        self.assertEqual(handler.methods, ["POST", "HEAD"])
+        service.close()
+
+
+class PoolConnectionsTestCase(TestCase):
+    def test_wrappers_without_client_are_given_one(self):
+        wrapper = BaseAPIWrapper(email="", api_key="")
+        self.assertIs(pooled(wrapper), wrapper)
+        self.assertIsInstance(wrapper._client, httpx.Client)
+        wrapper.close()
+        self.assertTrue(wrapper._client.is_closed)
+
+    def test_provided_client_is_kept(self):
+        client = httpx.Client()
+        wrapper = BaseAPIWrapper(email="", api_key="", client=client)
+        pooled(wrapper)
+        self.assertIs(wrapper._client, client)
+        wrapper.close()
+        self.assertFalse(client.is_closed)
+        client.close()
+
+    def test_bulk_helpers_pool_their_wrapper(self):
+        accounts = Account(email="", api_key="")
+        VirtualAccountProvisioner(accounts)
+        self.assertIsInstance(accounts._client, httpx.Client)
+        accounts.close()
+
+
+class AsyncWarmupTestCase(IsolatedAsyncioTestCase):
+    async def test_token_and_connections_are_shared(self):
+        handler = RecordingHandler(KudaSimulator())
+        async with AsyncKuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handler),
+        ) as kuda:
+            await kuda.warmup(connections=3)
+            self.assertEqual(handler.methods, ["POST"] + ["HEAD"] * 3)
+            self.assertEqual(kuda.cards._saved_token, handler.simulator.token)
+
+
+class APIWrapperTokenTestCase(TestCase):
+    def setUp(self) -> None:
+        self.handler = RecordingHandler(KudaSimulator())
+        self.wrapper = BaseAPIWrapper(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.handler),
+        )
+        self.addCleanup(self.wrapper.close)
+
+    def call(self) -> APIResponse:
+        return self.wrapper._api_call(
+            service_type=ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE
+        )
+
+    def test_token_is_fetched_once(self):
+        self.assertTrue(self.call().status)
+        self.assertTrue(self.call().status)
+        self.assertEqual(self.handler.methods, ["POST"] * 3)
+        self.assertEqual(self.wrapper._saved_token, self.handler.simulator.token)
+
+    def test_rejected_token_is_fetched_again(self):
+        self.assertTrue(self.call().status)
+        self.handler.simulator.token = "rotated-token"
+        response = self.call()
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(self.wrapper._saved_token)
+        self.assertTrue(self.call().status)
+        self.assertEqual(self.wrapper._saved_token, "rotated-token")
+
+    def test_base_headers_are_read_only(self):
+        with self.assertRaises(TypeError):
+            self.wrapper._base_headers["authorization"] = "Bearer token"
+
+
+class AsyncAPIWrapperTokenTestCase(IsolatedAsyncioTestCase):
+    async def test_rejected_token_is_fetched_again(self):
+        handler = RecordingHandler(KudaSimulator())
+        async with BaseAsyncAPIWrapper(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handler),
+        ) as wrapper:
+            service_type = ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE
+            self.assertTrue((await wrapper._api_call(service_type=service_type)).status)
+            self.assertTrue((await wrapper._api_call(service_type=service_type)).status)
+            self.assertEqual(handler.methods, ["POST"] * 3)
+            handler.simulator.token = "rotated-token"
+            response = await wrapper._api_call(service_type=service_type)
+            self.assertEqual(response.status_code, 401)
+            self.assertTrue((await wrapper._api_call(service_type=service_type)).status)
+            self.assertEqual(wrapper._saved_token, "rotated-token")
+
+
+class PreparedRequestTestCase(TestCase):
+    def setUp(self) -> None:
+        self.wrapper = BaseAPIWrapper(email="test@example.com", api_key="key")
+        self.wrapper._saved_token = "token"
+
+    def test_headers_are_reused_until_the_token_changes(self):
+        headers = self.wrapper._headers
+        self.assertIs(self.wrapper._headers, headers)
+        self.wrapper._saved_token = "new-token"
+        self.assertEqual(self.wrapper._headers["authorization"], "Bearer new-token")
+        self.assertEqual(headers["authorization"], "Bearer token")
+
+    def test_payload(self):
+        kwargs = self.wrapper._parse_call_kwargs(
+            service_type=ServiceType.NO_OP,
+            endpoint_path="/Account/GetToken",
+            request_reference="ref",
+        )
+        self.assertEqual(kwargs["json"], {"requestref": "ref"})
+        self.assertEqual(kwargs["url"], self.wrapper._base_url + "/Account/GetToken")
+        kwargs = self.wrapper._parse_call_kwargs(
+            service_type=ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE,
+            data={"trackingReference": "ref-1"},
+            request_reference="ref",
+        )
+        self.assertEqual(
+            kwargs["json"],
+            {
+                "servicetype": ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE,
+                "requestref": "ref",
+                "data": {"trackingReference": "ref-1"},
+            },
+        )
+        self.assertEqual(kwargs["url"], self.wrapper._base_url)
@@ -0,0 +1,47 @@
+import json
+from unittest import TestCase
+
+from benchmarks.hot_path import compare, run_benchmarks
+
+
+class HotPathBenchmarksTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.results = run_benchmarks(
+            iterations=20,
+            async_iterations=4,
+            concurrency_levels=(1, 4),
+            pagination_accounts=30,
+            pagination_page_size=10,
+        )
+
+    def test_results_are_json_serializable(self):
+        results = json.loads(json.dumps(self.results))
+        self.assertEqual(
+            set(results["results"]),
+            {
+                "parse_call_kwargs",
+                "parse_response",
+                "request_reference",
+                "api_call",
+                "async_api_call",
+                "api_call_with_transport",
+                "api_call_instrumented",
+                "async_api_call_with_transport",
+                "throughput",
+                "api_response_memory",
+                "pagination",
+            },
+        )
+        self.assertEqual(set(results["results"]["throughput"]["async"]), {"1", "4"})
+        self.assertEqual(results["results"]["pagination"]["items"], 30)
+
+    def test_compare_reports_regressions(self):
+        slower = json.loads(json.dumps(self.results))
+        slower["results"]["api_call"]["us_per_call"] *= 2
+        slower["results"]["pagination"]["items_per_second"] /= 2
+        regressions = {metric for metric, _, _ in compare(self.results, slower)}
+        self.assertEqual(
+            regressions, {"api_call.us_per_call", "pagination.items_per_second"}
+        )
+        self.assertEqual(compare(self.results, self.results), [])
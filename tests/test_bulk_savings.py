@@ -0,0 +1,259 @@
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from decimal import Decimal
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.bulk_savings import (
+    AsyncBulkSavingsPoster,
+    BulkSavingsPoster,
+    PostingStatus,
+    SavingsPosting,
+    posting_reference,
+)
+from pykuda2.exceptions import ConnectionException
+from pykuda2.polling import Backoff
+from pykuda2.utils import APIResponse, TransactionType
+
+NO_BACKOFF = Backoff(initial=0, jitter=0)
+
+
+def make_postings(count: int):
+    return [
+        (f"SAVINGS-{index:03d}", 10 + index, TransactionType.CREDIT, "Interest")
+        for index in range(count)
+    ]
+
+
+class FakeSavings:
+    """Applies postings once per request reference, like Kuda. The first `failures`
+    attempts of the accounts in `flaky` time out and those of the accounts in
+    `unavailable` get a 503, and the first attempt of the accounts in `lost` is applied
+    but times out."""
+
+    def __init__(self, flaky=(), failures=1, rejected=(), unavailable=(), lost=()):
+        self.flaky = set(flaky)
+        self.failures = failures
+        self.rejected = set(rejected)
+        self.unavailable = set(unavailable)
+        self.lost = set(lost)
+        self.attempts = Counter()
+        self.applied = {}
+        self._lock = threading.Lock()
+
+    def credit_or_debit_plain_savings_account(
+        self, amount, narration, transaction_type, tracking_reference, request_reference
+    ):
+        with self._lock:
+            self.attempts[tracking_reference] += 1
+            if (
+                tracking_reference in self.flaky
+                and self.attempts[tracking_reference] <= self.failures
+            ):
+                raise ConnectionException("Request timed out")
+            if (
+                tracking_reference in self.unavailable
+                and self.attempts[tracking_reference] <= self.failures
+            ):
+                return APIResponse(
+                    status_code=503,
+                    status=False,
+                    message="Service unavailable",
+                    data=None,
+                    raw={},
+                )
+            if tracking_reference in self.rejected or request_reference in self.applied:
+                return APIResponse(
+                    status_code=200,
+                    status=False,
+                    message="Rejected",
+                    data=None,
+                    raw={},
+                )
+            self.applied[request_reference] = (tracking_reference, amount)
+            if (
+                tracking_reference in self.lost
+                and self.attempts[tracking_reference] == 1
+            ):
+                raise ConnectionException("Request timed out")
+            return APIResponse(
+                status_code=200,
+                status=True,
+                message="Completed Successfully",
+                data=None,
+                raw={},
+            )
+
+
+class AsyncFakeSavings(FakeSavings):
+    async def credit_or_debit_plain_savings_account(self, **kwargs):
+        return super().credit_or_debit_plain_savings_account(**kwargs)
+
+
+class PostingReferenceTestCase(TestCase):
+    def test_references_are_stable(self):
+        posting = SavingsPosting("SAVINGS-1", 100, TransactionType.CREDIT, "Interest")
+        reference = posting_reference("run", 0, posting)
+        self.assertEqual(reference, posting_reference("run", 0, posting))
+        self.assertEqual(
+            reference,
+            posting_reference("run", 0, posting._replace(transaction_type="c")),
+        )
+        self.assertNotEqual(reference, posting_reference("run", 1, posting))
+        self.assertNotEqual(reference, posting_reference("other-run", 0, posting))
+        self.assertNotEqual(
+            reference, posting_reference("run", 0, posting._replace(amount=101))
+        )
+
+    def test_amounts_are_normalized(self):
+        posting = SavingsPosting("SAVINGS-1", 100, TransactionType.CREDIT, "Interest")
+        reference = posting_reference("run", 0, posting)
+        for amount in (100.0, "100.00", Decimal("1E+2")):
+            with self.subTest(amount=amount):
+                self.assertEqual(
+                    reference,
+                    posting_reference("run", 0, posting._replace(amount=amount)),
+                )
+        self.assertNotEqual(
+            posting_reference("run", 0, posting._replace(amount="100.50")),
+            posting_reference("run", 0, posting._replace(amount="100.05")),
+        )
+
+
+class BulkSavingsPosterTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.results_path = os.path.join(directory.name, "results.jsonl")
+
+    def read_results(self):
+        with open(self.results_path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_postings_are_applied_once(self):
+        savings = FakeSavings(flaky={"SAVINGS-003", "SAVINGS-007"}, failures=2)
+        poster = BulkSavingsPoster(savings, "run", concurrency=4, backoff=NO_BACKOFF)
+        outcome = poster.post_all(make_postings(20), self.results_path)
+
+        self.assertEqual(outcome, Counter({PostingStatus.SUCCEEDED: 20}))
+        self.assertEqual(len(savings.applied), 20)
+        self.assertEqual(savings.attempts["SAVINGS-003"], 3)
+        results = self.read_results()
+        self.assertEqual(sorted(result["index"] for result in results), list(range(20)))
+        retried = next(r for r in results if r["tracking_reference"] == "SAVINGS-007")
+        self.assertEqual(retried["attempts"], 3)
+        self.assertEqual(retried["status"], "succeeded")
+        self.assertEqual(retried["transaction_type"], "c")
+
+    def test_failures(self):
+        savings = FakeSavings(
+            flaky={"SAVINGS-001"},
+            failures=5,
+            rejected={"SAVINGS-002"},
+            unavailable={"SAVINGS-003"},
+            lost={"SAVINGS-004"},
+        )
+        poster = BulkSavingsPoster(savings, "run", backoff=NO_BACKOFF)
+        results = {
+            result.posting.tracking_reference: result
+            for result in poster.post(make_postings(5), self.results_path)
+        }
+        self.assertEqual(results["SAVINGS-000"].status, PostingStatus.SUCCEEDED)
+        # Requests that timed out may have been applied.
+        self.assertEqual(results["SAVINGS-001"].status, PostingStatus.UNKNOWN)
+        self.assertEqual(results["SAVINGS-001"].attempts, 3)
+        self.assertEqual(results["SAVINGS-001"].error, "Request timed out")
+        # Rejections are final, unavailable responses are retried.
+        self.assertEqual(results["SAVINGS-002"].status, PostingStatus.FAILED)
+        self.assertEqual(results["SAVINGS-002"].attempts, 1)
+        self.assertEqual(results["SAVINGS-003"].attempts, 3)
+        self.assertEqual(results["SAVINGS-003"].status, PostingStatus.FAILED)
+        # A retry rejected as a duplicate after a timeout isn't a failure.
+        self.assertEqual(results["SAVINGS-004"].status, PostingStatus.UNKNOWN)
+        self.assertEqual(results["SAVINGS-004"].attempts, 2)
+
+        # Unknown postings aren't sent again by a rerun, failed ones are.
+        savings.attempts.clear()
+        outcome = poster.post_all(make_postings(5), self.results_path)
+        self.assertEqual(
+            outcome,
+            Counter(
+                {
+                    PostingStatus.SKIPPED: 1,
+                    PostingStatus.UNKNOWN: 2,
+                    PostingStatus.FAILED: 2,
+                }
+            ),
+        )
+        self.assertEqual(
+            savings.attempts, Counter({"SAVINGS-002": 1, "SAVINGS-003": 3})
+        )
+
+    def test_gateway_errors_are_unknown(self):
+        class GatewaySavings(FakeSavings):
+            def credit_or_debit_plain_savings_account(self, **kwargs):
+                self.attempts[kwargs["tracking_reference"]] += 1
+                return APIResponse(
+                    status_code=504, status=False, message="", data=None, raw={}
+                )
+
+        savings = GatewaySavings()
+        poster = BulkSavingsPoster(savings, "run", backoff=NO_BACKOFF)
+        outcome = poster.post_all(make_postings(2))
+        self.assertEqual(outcome, Counter({PostingStatus.UNKNOWN: 2}))
+        self.assertEqual(savings.attempts["SAVINGS-000"], 3)
+
+    def test_broken_connections_are_unknown(self):
+        class BrokenSavings(FakeSavings):
+            def credit_or_debit_plain_savings_account(self, **kwargs):
+                self.attempts[kwargs["tracking_reference"]] += 1
+                if kwargs["tracking_reference"] == "SAVINGS-000":
+                    raise httpx.ReadError("Connection reset by peer")
+                raise httpx.ConnectError("Connection refused")
+
+        savings = BrokenSavings()
+        poster = BulkSavingsPoster(savings, "run", backoff=NO_BACKOFF)
+        results = {
+            result.posting.tracking_reference: result
+            for result in poster.post(make_postings(2))
+        }
+        # A read error may come after Kuda applied the posting, a connect error can't.
+        self.assertEqual(results["SAVINGS-000"].status, PostingStatus.UNKNOWN)
+        self.assertEqual(results["SAVINGS-001"].status, PostingStatus.FAILED)
+        self.assertEqual(
+            savings.attempts, Counter({"SAVINGS-000": 3, "SAVINGS-001": 3})
+        )
+
+    def test_interrupted_runs_only_send_what_is_left(self):
+        savings = FakeSavings(unavailable={"SAVINGS-004"}, failures=3)
+        poster = BulkSavingsPoster(savings, "run", concurrency=1, backoff=NO_BACKOFF)
+        results = poster.post(make_postings(10), self.results_path)
+        for _ in range(6):
+            next(results)
+        results.close()
+
+        # The posting in flight when the run stopped is either recorded or cancelled,
+        # so it's skipped or sent, but never sent twice.
+        outcome = poster.post_all(make_postings(10), self.results_path)
+        self.assertNotIn(PostingStatus.FAILED, outcome)
+        self.assertIn(outcome[PostingStatus.SKIPPED], (5, 6))
+        self.assertEqual(sum(outcome.values()), 10)
+        self.assertEqual(len(savings.applied), 10)
+        statuses = Counter(result["status"] for result in self.read_results())
+        self.assertEqual(statuses, Counter({"succeeded": 10, "failed": 1}))
+
+
+class AsyncBulkSavingsPosterTestCase(IsolatedAsyncioTestCase):
+    async def test_postings_are_applied_once(self):
+        savings = AsyncFakeSavings(flaky={"SAVINGS-002"})
+        poster = AsyncBulkSavingsPoster(
+            savings, "run", concurrency=4, backoff=NO_BACKOFF
+        )
+        outcome = await poster.post_all(make_postings(10))
+        self.assertEqual(outcome, Counter({PostingStatus.SUCCEEDED: 10}))
+        self.assertEqual(len(savings.applied), 10)
+        self.assertEqual(savings.attempts["SAVINGS-002"], 2)
@@ -0,0 +1,113 @@
+import os
+import tempfile
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.directory import AsyncVirtualAccountDirectory, VirtualAccountDirectory
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+NEW_ACCOUNT = dict(
+    email="New@Example.com",
+    phone_number="08012345678",
+    last_name="Doe",
+    first_name="Jane",
+    middle_name="",
+    business_name="",
+    tracking_reference="ref-new",
+)
+
+
+class VirtualAccountDirectoryTestCase(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "directory.db")
+        self.simulator = KudaSimulator()
+        for index in range(15):
+            self.simulator.add_virtual_account(
+                f"ref-{index}", email=f"customer-{index % 5}@example.com"
+            )
+        self.accounts = Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.accounts.close)
+        self.directory = VirtualAccountDirectory(self.accounts, path=self.path)
+        self.addCleanup(self.directory.close)
+
+    def test_refresh_populates_the_indexes(self):
+        self.directory.refresh(page_size=4)
+        self.assertEqual(len(self.directory), 15)
+        account_number = self.simulator.virtual_accounts["ref-7"]["accountNumber"]
+        self.assertEqual(
+            self.directory.get_by_account_number(account_number)["trackingReference"],
+            "ref-7",
+        )
+        self.assertEqual(
+            sorted(
+                account["trackingReference"]
+                for account in self.directory.get_by_email("CUSTOMER-2@example.com")
+            ),
+            ["ref-12", "ref-2", "ref-7"],
+        )
+        calls = sum(self.simulator.calls.values())
+        self.directory.get("ref-3")
+        self.assertEqual(sum(self.simulator.calls.values()), calls)
+
+    def test_changes_are_written_through(self):
+        self.directory.refresh()
+        self.directory.create_virtual_account(**NEW_ACCOUNT)
+        account = self.directory.get_by_email("new@example.com")[0]
+        self.assertEqual(
+            account["accountNumber"],
+            self.simulator.virtual_accounts["ref-new"]["accountNumber"],
+        )
+        self.directory.update_virtual_account("ref-new", email="other@example.com")
+        self.assertEqual(self.directory.get_by_email("new@example.com"), [])
+        self.assertEqual(len(self.directory.get_by_email("other@example.com")), 1)
+        self.directory.disable_virtual_account("ref-new")
+        self.assertTrue(self.directory.get("ref-new")["isDeleted"])
+        self.directory.enable_virtual_account("ref-new")
+        self.assertFalse(self.directory.get("ref-new")["isDeleted"])
+
+    def test_directory_is_persisted(self):
+        self.directory.refresh()
+        self.directory.create_virtual_account(**NEW_ACCOUNT)
+        self.directory.close()
+        self.directory = VirtualAccountDirectory(self.accounts, path=self.path)
+        self.assertEqual(len(self.directory), 16)
+        self.assertIsNotNone(self.directory.get("ref-new"))
+
+    def test_missing_accounts_are_fetched(self):
+        self.assertIsNone(self.directory.get("ref-1"))
+        self.assertEqual(self.directory.fetch("ref-1")["trackingReference"], "ref-1")
+        self.assertIn("ref-1", self.directory)
+        self.assertIsNone(self.directory.fetch("ref-unknown"))
+        self.assertEqual(
+            self.simulator.calls[ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT], 2
+        )
+
+
+class AsyncVirtualAccountDirectoryTestCase(IsolatedAsyncioTestCase):
+    async def test_refresh_and_write_through(self):
+        simulator = KudaSimulator()
+        for index in range(5):
+            simulator.add_virtual_account(f"ref-{index}", email=f"{index}@example.com")
+        accounts = AsyncAccount(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        directory = AsyncVirtualAccountDirectory(accounts)
+        await directory.refresh(page_size=2)
+        await directory.create_virtual_account(**NEW_ACCOUNT)
+        await directory.disable_virtual_account("ref-0")
+        await accounts.aclose()
+        self.assertEqual(len(directory), 6)
+        self.assertTrue(directory.get("ref-0")["isDeleted"])
+        self.assertEqual(len(directory.get_by_email("new@example.com")), 1)
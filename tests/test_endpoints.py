@@ -0,0 +1,193 @@
+import json
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.endpoints import (
+    ACCOUNT_ENDPOINTS,
+    BILLING_AND_BETTING_ENDPOINTS,
+    CARD_ENDPOINTS,
+    GIFT_CARD_ENDPOINTS,
+    SAVINGS_ENDPOINTS,
+    TRANSACTION_ENDPOINTS,
+    Endpoint,
+    Field,
+    Idempotency,
+    endpoint_method,
+    get_endpoint,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType, TransactionType
+from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+from pykuda2.wrappers.async_wrappers.card import AsyncCard
+from pykuda2.wrappers.async_wrappers.savings import AsyncSavings
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+from pykuda2.wrappers.sync_wrappers.card import Card
+from pykuda2.wrappers.sync_wrappers.savings import Savings
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+ALL_ENDPOINTS = (
+    ACCOUNT_ENDPOINTS,
+    SAVINGS_ENDPOINTS,
+    CARD_ENDPOINTS,
+    TRANSACTION_ENDPOINTS,
+    GIFT_CARD_ENDPOINTS,
+    BILLING_AND_BETTING_ENDPOINTS,
+)
+
+
+class RecordingSimulator(KudaSimulator):
+    def __init__(self):
+        super().__init__()
+        self.payloads = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("Account/GetToken"):
+            self.payloads.append(json.loads(request.content))
+        return super().handle(request)
+
+
+class EndpointTestCase(TestCase):
+    def test_payload_is_built_from_the_fields(self):
+        endpoint = ACCOUNT_ENDPOINTS["update_virtual_account"]
+        self.assertEqual(
+            endpoint.build_payload("ref", None, "Doe", ""),
+            {"trackingReference": "ref", "lastName": "Doe"},
+        )
+        self.assertIsNone(
+            ACCOUNT_ENDPOINTS["get_admin_account_balance"].build_payload()
+        )
+
+    def test_endpoints_are_looked_up_by_service_type(self):
+        endpoint = get_endpoint(ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT)
+        self.assertIs(endpoint, ACCOUNT_ENDPOINTS["create_virtual_account"])
+        self.assertEqual(endpoint.idempotency, Idempotency.IDEMPOTENT)
+        endpoint = get_endpoint(ServiceType.SINGLE_FUND_TRANSFER)
+        self.assertIs(endpoint, TRANSACTION_ENDPOINTS["fund_transfer"])
+        self.assertEqual(endpoint.idempotency, Idempotency.UNSAFE)
+        self.assertIsNone(get_endpoint(ServiceType.NO_OP))
+
+    def test_service_types_are_declared_once(self):
+        service_types = [
+            endpoint.service_type
+            for endpoints in ALL_ENDPOINTS
+            for endpoint in endpoints.values()
+        ]
+        self.assertEqual(len(service_types), len(set(service_types)))
+
+    def test_wrappers_are_generated_from_their_endpoints(self):
+        for wrapper, endpoints in (
+            (Savings, SAVINGS_ENDPOINTS),
+            (AsyncSavings, SAVINGS_ENDPOINTS),
+            (Card, CARD_ENDPOINTS),
+            (AsyncCard, CARD_ENDPOINTS),
+            (Transaction, TRANSACTION_ENDPOINTS),
+            (AsyncTransaction, TRANSACTION_ENDPOINTS),
+        ):
+            for name, endpoint in endpoints.items():
+                method = getattr(wrapper, name)
+                if hasattr(method, "endpoint"):
+                    self.assertIs(method.endpoint, endpoint)
+
+    def test_signatures_must_match_the_fields(self):
+        endpoint = Endpoint(
+            service_type=ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT,
+            fields=(Field("tracking_reference", "trackingReference"),),
+        )
+        with self.assertRaises(TypeError):
+
+            @endpoint_method(endpoint)
+            def get_virtual_account(self, reference: str, request_reference=None): ...
+
+    def test_generated_methods_keep_their_declaration(self):
+        method = Account.update_virtual_account
+        self.assertEqual(method.__name__, "update_virtual_account")
+        self.assertTrue(method.__doc__.startswith("Modifies a virtual account data."))
+        self.assertIs(method.endpoint, ACCOUNT_ENDPOINTS["update_virtual_account"])
+        self.assertEqual(method.__defaults__, (None, None, None, None))
+
+
+class GeneratedMethodTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = RecordingSimulator()
+        self.accounts = Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.accounts.close)
+
+    def test_payload_is_sent(self):
+        response = self.accounts.create_virtual_account(
+            email="a@example.com",
+            phone_number="08012345678",
+            last_name="Doe",
+            first_name="John",
+            middle_name="",
+            business_name="",
+            tracking_reference="ref-a",
+            request_reference="request-a",
+        )
+        self.assertTrue(response.status)
+        (payload,) = self.simulator.payloads
+        self.assertEqual(payload["servicetype"], "ADMIN_CREATE_VIRTUAL_ACCOUNT")
+        self.assertEqual(payload["requestref"], "request-a")
+        self.assertEqual(payload["data"]["trackingReference"], "ref-a")
+        self.assertEqual(payload["data"]["phoneNumber"], "08012345678")
+
+    def test_savings_payload_is_sent(self):
+        savings = Savings(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(savings.close)
+        savings.credit_or_debit_plain_savings_account(
+            amount=100,
+            narration="Interest",
+            transaction_type=TransactionType.CREDIT,
+            tracking_reference="savings-a",
+            request_reference="request-a",
+        )
+        savings.get_fixed_savings_account_transactions(
+            tracking_reference="fixed-a", page_number=1, page_size=10
+        )
+        credit, transactions = self.simulator.payloads
+        self.assertEqual(credit["servicetype"], "PLAIN_SAVE_DEBIT_CREDIT")
+        self.assertEqual(credit["requestref"], "request-a")
+        self.assertEqual(
+            credit["data"],
+            {
+                "Amount": 100,
+                "Narration": "Interest",
+                "TransactionType": TransactionType.CREDIT.value,
+                "TrackingReference": "savings-a",
+            },
+        )
+        self.assertEqual(
+            transactions["data"],
+            {"SavingsId": "fixed-a", "PageNumber": 1, "PageSize": 10},
+        )
+
+    def test_at_least_one_optional_argument_is_required(self):
+        with self.assertRaisesRegex(ValueError, "`first_name`, `last_name` or `email`"):
+            self.accounts.update_virtual_account(tracking_reference="ref-a")
+        self.assertEqual(self.simulator.payloads, [])
+
+
+class AsyncGeneratedMethodTestCase(IsolatedAsyncioTestCase):
+    async def test_payload_is_sent(self):
+        simulator = RecordingSimulator()
+        accounts = AsyncAccount(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        response = await accounts.get_virtual_accounts(page_size=5, page_number=2)
+        await accounts.aclose()
+        self.assertTrue(response.status)
+        (payload,) = simulator.payloads
+        self.assertEqual(payload["Data"], {"PageSize": 5, "PageNumber": 2})
+        with self.assertRaises(ValueError):
+            await accounts.update_virtual_account(tracking_reference="ref-a")
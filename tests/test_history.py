@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import date
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.exceptions import PaginationException
+from pykuda2.history import AsyncHistoryDownloader, HistoryDownloader, date_shards
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import APIResponse, ServiceType
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+
+def add_postings(simulator: KudaSimulator, days: int, per_day: int, key=None):
+    postings = simulator.postings.setdefault(key, [])
+    for day in range(1, days + 1):
+        for index in range(per_day):
+            postings.append(
+                {
+                    "referenceNumber": f"SIM-{day:02d}-{index:02d}",
+                    "amount": 100.0,
+                    "transactionType": "Credit",
+                    "date": f"2023-01-{day:02d}T10:{index:02d}:00+00:00",
+                }
+            )
+
+
+class DateShardsTestCase(TestCase):
+    def test_ranges_are_split_into_shards(self):
+        self.assertEqual(
+            date_shards("2023-01-30", date(2023, 2, 2)),
+            [
+                ("2023-01-30", "2023-01-30"),
+                ("2023-01-31", "2023-01-31"),
+                ("2023-02-01", "2023-02-01"),
+                ("2023-02-02", "2023-02-02"),
+            ],
+        )
+        self.assertEqual(
+            date_shards("2023-01-01", "2023-01-10", shard_days=7),
+            [("2023-01-01", "2023-01-07"), ("2023-01-08", "2023-01-10")],
+        )
+        self.assertEqual(date_shards("2023-01-02", "2023-01-01"), [])
+
+
+class HistoryDownloaderTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.transactions.close)
+
+    def test_shards_are_merged_in_order(self):
+        add_postings(self.simulator, days=10, per_day=5)
+        downloader = HistoryDownloader(self.transactions, concurrency=4, page_size=2)
+        transactions = list(downloader.download("2023-01-01", "2023-01-10"))
+        self.assertEqual(
+            [transaction["referenceNumber"] for transaction in transactions],
+            [posting["referenceNumber"] for posting in self.simulator.postings[None]],
+        )
+        # 3 pages for each of the 10 days.
+        self.assertEqual(
+            self.simulator.calls[ServiceType.ADMIN_MAIN_ACCOUNT_FILTERED_TRANSACTIONS],
+            30,
+        )
+
+    def test_transactions_are_deduplicated(self):
+        add_postings(self.simulator, days=2, per_day=2)
+        self.simulator.postings[None].append(
+            {**self.simulator.postings[None][0], "date": "2023-01-02T23:59:00+00:00"}
+        )
+        downloader = HistoryDownloader(self.transactions, shard_days=1)
+        transactions = list(downloader.download("2023-01-01", "2023-01-02"))
+        self.assertEqual(len(transactions), 4)
+
+    def test_virtual_account_histories_are_downloaded(self):
+        self.simulator.virtual_accounts["ref-1"] = {
+            "trackingReference": "ref-1",
+            "accountNumber": "2500000001",
+            "isDeleted": False,
+        }
+        add_postings(self.simulator, days=3, per_day=2, key="ref-1")
+        downloader = HistoryDownloader(self.transactions, page_size=10)
+        transactions = list(
+            downloader.download("2023-01-01", "2023-01-03", tracking_reference="ref-1")
+        )
+        self.assertEqual(len(transactions), 6)
+
+    def test_failed_pages_raise(self):
+        self.transactions.warmup()
+        self.simulator.error_rate = 1
+        with self.assertRaises(PaginationException):
+            list(
+                HistoryDownloader(self.transactions).download(
+                    "2023-01-01", "2023-01-02"
+                )
+            )
+
+    def test_shards_after_a_slow_one_are_bounded(self):
+        first_shard = threading.Event()
+        started = []
+
+        class SlowTransaction:
+            def get_filtered_transaction_history(self, start_date, **kwargs):
+                started.append(start_date)
+                if start_date == "2023-01-01":
+                    first_shard.wait()
+                return APIResponse(
+                    status_code=200,
+                    status=True,
+                    message="Completed Successfully",
+                    data={"postingsHistory": [{"referenceNumber": start_date}]},
+                    raw={},
+                )
+
+        downloader = HistoryDownloader(SlowTransaction(), concurrency=2)
+        history = downloader.download("2023-01-01", "2023-01-20")
+        transactions = []
+        consumer = threading.Thread(target=lambda: transactions.extend(history))
+        consumer.start()
+        time.sleep(0.2)
+        # The slow first shard and no more than 3 shards after it.
+        self.assertEqual(len(started), 4)
+        first_shard.set()
+        consumer.join()
+        self.assertEqual(len(transactions), 20)
+        self.assertEqual(transactions[0]["referenceNumber"], "2023-01-01")
+
+
+class AsyncHistoryDownloaderTestCase(IsolatedAsyncioTestCase):
+    async def test_shards_are_merged_in_order(self):
+        simulator = KudaSimulator()
+        add_postings(simulator, days=7, per_day=3)
+        transactions = AsyncTransaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        downloader = AsyncHistoryDownloader(
+            transactions, shard_days=2, concurrency=3, page_size=4
+        )
+        history = [
+            transaction
+            async for transaction in downloader.download("2023-01-01", "2023-01-07")
+        ]
+        await transactions.aclose()
+        self.assertEqual(history, simulator.postings[None])
@@ -0,0 +1,97 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.exceptions import PaginationException
+from pykuda2.instruction_search import (
+    AsyncTransferInstructionSearch,
+    TransferInstructionFilter,
+    TransferInstructionSearch,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType, TransactionStatus
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+from tests.test_instructions import make_instructions
+
+
+class TransferInstructionSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.transactions.close)
+        self.transactions.process_transfers(
+            list(make_instructions(25)), request_reference="batch-1"
+        )
+        self.search = TransferInstructionSearch(self.transactions, page_size=10)
+
+    def test_pages_are_fetched_transparently(self):
+        instructions = list(self.search.search(original_request_ref="batch-1"))
+        self.assertEqual(len(instructions), 25)
+        self.assertEqual(
+            self.simulator.calls[ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION], 3
+        )
+
+    def test_cursors_can_be_resumed(self):
+        cursor = self.search.search()
+        self.assertEqual(len(cursor.next_page()), 10)
+        resumed = self.search.search(page_number=cursor.page_number)
+        self.assertEqual(
+            [instruction["Reference"] for instruction in resumed][0], "payout-10"
+        )
+        self.assertTrue(resumed.exhausted)
+        self.assertEqual(resumed.next_page(), [])
+
+    def test_pages_are_cached_by_filter(self):
+        list(self.search.search(account_number="0000000003"))
+        list(self.search.search(account_number="0000000003"))
+        self.assertEqual(
+            self.simulator.calls[ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION], 1
+        )
+        self.search.invalidate(TransferInstructionFilter(account_number="0000000003"))
+        (instruction,) = self.search.search(account_number="0000000003")
+        self.assertEqual(instruction["Reference"], "payout-3")
+        self.assertEqual(
+            self.simulator.calls[ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION], 2
+        )
+
+    def test_instructions_are_indexed(self):
+        list(self.search.search())
+        index = self.search.index
+        self.assertEqual(len(index), 25)
+        self.assertEqual(index.get("payout-7")["AccountNumber"], "0000000007")
+        (instruction,) = index.get_by_account_number("0000000007")
+        self.assertEqual(instruction["Reference"], "payout-7")
+        self.assertEqual(len(index.get_by_status(TransactionStatus.SUCCESSFUL)), 25)
+        self.assertEqual(index.get_by_status("Failed"), [])
+
+    def test_failed_pages_raise(self):
+        self.transactions.warmup()
+        self.simulator.error_rate = 1
+        with self.assertRaises(PaginationException):
+            list(self.search.search())
+
+
+class AsyncTransferInstructionSearchTestCase(IsolatedAsyncioTestCase):
+    async def test_pages_are_fetched_and_cached(self):
+        simulator = KudaSimulator()
+        transactions = AsyncTransaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        await transactions.process_transfers(list(make_instructions(15)))
+        search = AsyncTransferInstructionSearch(transactions, page_size=10)
+        first = [instruction async for instruction in search.search()]
+        second = [instruction async for instruction in search.search()]
+        await transactions.aclose()
+        self.assertEqual(len(first), 15)
+        self.assertEqual(first, second)
+        self.assertEqual(
+            simulator.calls[ServiceType.SEARCH_FUND_TRANSFER_INSTRUCTION], 2
+        )
+        self.assertEqual(len(search.index), 15)
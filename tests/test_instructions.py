@@ -0,0 +1,216 @@
+import json
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.instructions import (
+    AsyncTransferInstructionSubmitter,
+    TransferInstructionBatch,
+    TransferInstructionSubmitter,
+    chunk_instructions,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType, TransferInstruction
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+
+def make_instructions(count: int):
+    for index in range(count):
+        yield TransferInstruction(
+            account_number=f"{index:010d}",
+            account_name="John Doe",
+            beneficiary_bank_code="000013",
+            amount=1000,
+            bank_code="000013",
+            narration="Payout",
+            bank_name="Guaranty Trust Bank",
+            long_code="",
+            reference=f"payout-{index}",
+        )
+
+
+class ChunkInstructionsTestCase(TestCase):
+    def test_instructions_are_chunked_by_count(self):
+        chunks = list(chunk_instructions(make_instructions(25), max_count=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(chunks[2][-1].reference, "payout-24")
+
+    def test_instructions_are_chunked_by_size(self):
+        max_bytes = 1024
+        chunks = list(chunk_instructions(make_instructions(25), max_bytes=max_bytes))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 25)
+        for chunk in chunks:
+            body = json.dumps(
+                {
+                    "servicetype": ServiceType.FUND_TRANSFER_INSTRUCTION.value,
+                    "requestref": "a" * 64,
+                    "data": {
+                        "FundTransferInstructions": [
+                            instruction.to_dict() for instruction in chunk
+                        ]
+                    },
+                }
+            )
+            self.assertLessEqual(len(body), max_bytes)
+
+    def test_oversized_instructions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            list(chunk_instructions(make_instructions(1), max_bytes=300))
+
+
+class TransferInstructionBatchTestCase(TestCase):
+    def test_instructions_are_stored_by_column(self):
+        instructions = list(make_instructions(5))
+        batch = TransferInstructionBatch(instructions)
+        self.assertEqual(len(batch), 5)
+        self.assertEqual(batch[3].reference, "payout-3")
+        self.assertEqual(batch[1:3].references, ["payout-1", "payout-2"])
+        self.assertEqual(
+            batch.to_dicts(), [instruction.to_dict() for instruction in instructions]
+        )
+        self.assertEqual(list(batch), instructions)
+
+    def test_amounts_are_sent_exactly(self):
+        instructions = list(make_instructions(3))
+        for instruction, amount in zip(instructions, (100000, 12.5, 7)):
+            instruction.amount = amount
+        batch = TransferInstructionBatch(instructions)
+        self.assertEqual(
+            json.dumps(batch.to_dicts()),
+            json.dumps([instruction.to_dict() for instruction in instructions]),
+        )
+        self.assertIs(type(batch[0].amount), int)
+        self.assertEqual(json.dumps(batch[0:1].to_dicts()[0]["Amount"]), "100000")
+
+    def test_invalid_instructions_are_reported(self):
+        batch = TransferInstructionBatch(make_instructions(4))
+        batch.amounts[0] = 0
+        batch.account_numbers[1] = "123"
+        batch.beneficiary_bank_codes[2] = "999999"
+        batch.references[3] = "payout-2"
+        errors = batch.validate(max_amount=500, bank_codes=["000013"])
+        self.assertEqual([index for index, _ in errors], [0, 1, 1, 2, 2, 2, 3, 3])
+        self.assertEqual(batch[:0].validate(), [])
+
+    def test_batches_are_chunked_without_building_instructions(self):
+        batch = TransferInstructionBatch(make_instructions(25))
+        chunks = list(chunk_instructions(batch, max_count=10))
+        self.assertTrue(
+            all(isinstance(chunk, TransferInstructionBatch) for chunk in chunks)
+        )
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+
+
+def _references_of(count: int):
+    return [instruction.reference for instruction in make_instructions(count)]
+
+
+class TransferInstructionSubmitterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.transactions.close)
+
+    def test_chunks_are_submitted_and_merged(self):
+        submitter = TransferInstructionSubmitter(
+            self.transactions, max_count=10, concurrency=3
+        )
+        submission = submitter.submit_all(make_instructions(95))
+        self.assertTrue(submission.submitted)
+        self.assertEqual([chunk.index for chunk in submission.chunks], list(range(10)))
+        self.assertEqual(
+            sorted(submission.request_references),
+            sorted(self.simulator.transfer_instructions),
+        )
+        self.assertEqual(
+            [len(chunk.references) for chunk in submission.chunks], [10] * 9 + [5]
+        )
+        self.assertEqual(submission.rejected_references, [])
+        self.assertEqual(submission.unknown_references, [])
+
+    def test_batches_are_submitted(self):
+        submitter = TransferInstructionSubmitter(self.transactions, max_count=10)
+        batch = TransferInstructionBatch(make_instructions(15))
+        submission = submitter.submit_all(batch)
+        self.assertTrue(submission.submitted)
+        self.assertEqual(submission.chunks[1].references[-1], "payout-14")
+        instruction, *_ = self.simulator.transfer_instructions[
+            submission.chunks[0].request_reference
+        ]
+        self.assertEqual(instruction["Reference"], "payout-0")
+
+    def test_server_errors_are_reported_as_unknown(self):
+        self.transactions.warmup()
+        self.simulator.error_rate = 1
+        submitter = TransferInstructionSubmitter(self.transactions, max_count=10)
+        submission = submitter.submit_all(make_instructions(15))
+        self.assertFalse(submission.submitted)
+        self.assertEqual(len(submission.unknown_chunks), 2)
+        self.assertEqual(submission.unknown_references[0], "payout-0")
+        self.assertEqual(submission.rejected_chunks, [])
+        self.assertEqual(
+            submission.chunks[0].response.message, "Simulated server error"
+        )
+
+    def test_connection_errors_are_reported_as_unknown(self):
+        def handle(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("GetToken"):
+                return self.simulator.handle(request)
+            raise httpx.ReadTimeout("Timed out")
+
+        transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handle),
+        )
+        self.addCleanup(transactions.close)
+        submission = TransferInstructionSubmitter(transactions).submit_all(
+            make_instructions(5)
+        )
+        (chunk,) = submission.unknown_chunks
+        self.assertIsNotNone(chunk.error)
+        self.assertIsNone(chunk.response)
+        self.assertEqual(submission.unknown_references, _references_of(5))
+        self.assertEqual(submission.rejected_chunks, [])
+
+    def test_rejected_chunks_are_reported(self):
+        # Every chunk is sent with the same reference, so Kuda rejects all but the first.
+        self.transactions.reference_generator = lambda: "payout-run"
+        submitter = TransferInstructionSubmitter(
+            self.transactions, max_count=10, concurrency=1
+        )
+        submission = submitter.submit_all(make_instructions(15))
+        self.assertTrue(submission.chunks[0].submitted)
+        self.assertEqual(submission.rejected_chunks, [submission.chunks[1]])
+        self.assertEqual(submission.rejected_references[0], "payout-10")
+        self.assertEqual(submission.unknown_chunks, [])
+
+
+class AsyncTransferInstructionSubmitterTestCase(IsolatedAsyncioTestCase):
+    async def test_chunks_are_submitted_and_merged(self):
+        simulator = KudaSimulator()
+        transactions = AsyncTransaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        submitter = AsyncTransferInstructionSubmitter(
+            transactions, max_count=7, concurrency=2
+        )
+        submission = await submitter.submit_all(make_instructions(20))
+        await transactions.aclose()
+        self.assertTrue(submission.submitted)
+        self.assertEqual(len(submission.chunks), 3)
+        self.assertEqual(
+            sum(
+                len(instructions)
+                for instructions in simulator.transfer_instructions.values()
+            ),
+            20,
+        )
@@ -0,0 +1,210 @@
+import contextlib
+from unittest import IsolatedAsyncioTestCase, TestCase, skipIf
+
+import httpx
+
+from pykuda2.exceptions import ConnectionException
+from pykuda2.instrumentation import (
+    InMemorySink,
+    Instrumentation,
+    InstrumentationHook,
+    LatencyHistogram,
+    OpenTelemetrySink,
+    PrometheusSink,
+)
+from pykuda2.kuda import AsyncKuda, Kuda
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.sync_wrappers.instant_settlement_service import (
+    InstantSettlementService,
+)
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+except ImportError:
+    MeterProvider = None
+
+
+class RecordingHook(InstrumentationHook):
+    def __init__(self):
+        self.events = []
+
+    def call_started(self, call):
+        self.events.append(("started", call.service_type))
+
+    def request_prepared(self, call, headers):
+        headers["x-test"] = "1"
+
+    def call_finished(self, call):
+        self.events.append(("finished", call.service_type))
+
+
+class FailingHook(InstrumentationHook):
+    def call_finished(self, call):
+        raise RuntimeError("boom")
+
+
+class LatencyHistogramTestCase(TestCase):
+    def test_percentiles_are_within_precision(self):
+        histogram = LatencyHistogram(precision=0.01)
+        for value in range(1, 1001):
+            histogram.record(value / 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.5 * 0.01)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99, delta=0.99 * 0.01)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        self.assertEqual(histogram.count, 1000)
+
+    def test_zero_durations_are_recorded(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return self.simulator.handle(request)
+
+        self.sink = InMemorySink()
+        self.hook = RecordingHook()
+        self.kuda = Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handler),
+            instrumentation=Instrumentation([self.hook, FailingHook(), self.sink]),
+        )
+        self.addCleanup(self.kuda.close)
+
+    def test_phases_are_recorded(self):
+        for _ in range(3):
+            self.kuda.accounts.get_admin_account_balance()
+        snapshot = self.sink.snapshot()[
+            ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value
+        ]
+        self.assertEqual(
+            set(snapshot["latency"]),
+            {"token", "serialization", "network", "parsing", "total"},
+        )
+        self.assertEqual(snapshot["latency"]["network"]["count"], 3)
+        self.assertEqual(snapshot["status_codes"], {200: 3})
+        self.assertGreater(snapshot["request_bytes"], 0)
+        self.assertGreater(snapshot["response_bytes"], 0)
+        self.assertEqual(self.hook.events[0][0], "started")
+        self.assertEqual(self.requests[-1].headers["x-test"], "1")
+
+    def test_errors_are_recorded(self):
+        def handler(request):
+            raise httpx.ConnectError("unreachable", request=request)
+
+        self.kuda.accounts._client = httpx.Client(
+            transport=httpx.MockTransport(handler)
+        )
+        with self.assertRaises(ConnectionException):
+            self.kuda.accounts.get_admin_account_balance()
+        snapshot = self.sink.snapshot()[
+            ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value
+        ]
+        self.assertEqual(snapshot["errors"], {"ConnectionException": 1})
+        self.assertEqual(snapshot["status_codes"], {})
+
+    def test_retries_are_counted(self):
+        self.kuda.instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY)
+        self.assertEqual(self.sink.retries[ServiceType.TRANSACTION_STATUS_QUERY], 1)
+
+    def test_events_can_be_reported_on_behalf_of_a_caller(self):
+        class ContextHook(InstrumentationHook):
+            def __init__(self):
+                self.current = None
+                self.retries = []
+
+            def capture_context(self):
+                return "caller"
+
+            @contextlib.contextmanager
+            def restore_context(self, context):
+                self.current = context
+                yield
+                self.current = None
+
+            def retry(self, service_type):
+                self.retries.append(self.current)
+
+        hook = ContextHook()
+        instrumentation = Instrumentation([hook, FailingHook()])
+        context = instrumentation.capture_context()
+        self.assertEqual(context, ("caller", None))
+        instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY)
+        instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY, context)
+        self.assertEqual(hook.retries, [None, "caller"])
+
+    def test_instant_settlement_service_tokens_are_instrumented(self):
+        sink = InMemorySink()
+
+        def handler(request):
+            if request.url.path.endswith("/api/Auth/authenticate"):
+                return httpx.Response(200, json={"data": {"auth_token": "iss-token"}})
+            return self.simulator.handle(request)
+
+        service = InstantSettlementService(
+            secret_key="secret",
+            client_password="password",
+            transport=httpx.MockTransport(handler),
+            instrumentation=Instrumentation([sink]),
+        )
+        self.addCleanup(service.close)
+        service.warmup()
+        self.assertEqual(service._saved_token, "iss-token")
+        self.assertEqual(sink.token_fetches.count, 1)
+
+    @skipIf(prometheus_client is None, "prometheus-client is not installed")
+    def test_prometheus_sink(self):
+        registry = prometheus_client.CollectorRegistry()
+        self.kuda.accounts.instrumentation = Instrumentation(
+            [PrometheusSink(registry=registry)]
+        )
+        self.kuda.accounts.get_admin_account_balance()
+        labels = {
+            "service_type": ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value,
+            "status_code": "200",
+        }
+        self.assertEqual(registry.get_sample_value("pykuda2_calls_total", labels), 1.0)
+
+    @skipIf(MeterProvider is None, "opentelemetry-sdk is not installed")
+    def test_opentelemetry_sink(self):
+        reader = InMemoryMetricReader()
+        meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+        self.kuda.accounts.instrumentation = Instrumentation(
+            [OpenTelemetrySink(meter=meter)]
+        )
+        self.kuda.accounts.get_admin_account_balance()
+        metrics = reader.get_metrics_data().resource_metrics[0].scope_metrics[0]
+        self.assertIn(
+            "pykuda2.call.duration", {metric.name for metric in metrics.metrics}
+        )
+
+
+class AsyncInstrumentationTestCase(IsolatedAsyncioTestCase):
+    async def test_phases_are_recorded(self):
+        sink = InMemorySink()
+        async with AsyncKuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(KudaSimulator().handle),
+            instrumentation=Instrumentation([sink]),
+        ) as kuda:
+            await kuda.accounts.get_admin_account_balance()
+        snapshot = sink.snapshot()[
+            ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value
+        ]
+        self.assertEqual(snapshot["latency"]["total"]["count"], 1)
+        self.assertEqual(snapshot["status_codes"], {200: 1})
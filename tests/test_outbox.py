@@ -0,0 +1,320 @@
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+
+from pykuda2.endpoints import GIFT_CARD_ENDPOINTS
+from pykuda2.exceptions import ConnectionException
+from pykuda2.outbox import (
+    MONEY_MOVING_SERVICE_TYPES,
+    AsyncOutboxRecovery,
+    Outbox,
+    OutboxRecovery,
+    OutboxStatus,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import APIResponse, ServiceType
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+TRANSFER_KWARGS = dict(
+    beneficiary_account="0123456789",
+    beneficiary_bank_code="000013",
+    beneficiary_name="John Doe",
+    amount=1000,
+    narration="Rent",
+    name_enquiry_session_id="session",
+    sender_name="Jane Doe",
+)
+
+GIFT_CARD_PAYLOAD = GIFT_CARD_ENDPOINTS["purchase_gift_card"].build_payload(
+    5000,
+    "John Doe",
+    "09012345678",
+    "johndoe@example.com",
+    "KUD-GFTC-UAE-002",
+    None,
+)
+
+SUCCESSFUL = APIResponse(
+    status_code=200,
+    status=True,
+    message="Request successful.",
+    data={"Status": "Successful"},
+    raw={"status": True, "data": {"Status": "Successful"}},
+)
+
+
+class OutboxTestCase(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "outbox.db")
+        self.outbox = Outbox(self.path)
+        self.addCleanup(self.outbox.close)
+        self.simulator = KudaSimulator()
+        # Requests fail with these exceptions before (or after) reaching the simulator.
+        self.fail_before = None
+        self.fail_after = None
+        # The status code and body every call but the token request is answered with.
+        self.reply = None
+        self.transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.handle),
+            outbox=self.outbox,
+        )
+        self.addCleanup(self.transactions.close)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("GetToken"):
+            return self.simulator.handle(request)
+        if self.reply:
+            status_code, body = self.reply
+            return httpx.Response(status_code, json=body)
+        if self.fail_before:
+            raise self.fail_before
+        response = self.simulator.handle(request)
+        if self.fail_after:
+            raise self.fail_after
+        return response
+
+    def test_money_moving_calls_are_recorded_and_acknowledged(self):
+        response = self.transactions.fund_transfer(
+            **TRANSFER_KWARGS, request_reference="ref-1"
+        )
+        self.assertTrue(response.status)
+        (entry,) = self.outbox.entries()
+        self.assertEqual(entry.request_reference, "ref-1")
+        self.assertEqual(entry.service_type, ServiceType.SINGLE_FUND_TRANSFER)
+        self.assertEqual(entry.payload["beneficiaryAccount"], "0123456789")
+        self.assertEqual(entry.status, OutboxStatus.ACKNOWLEDGED)
+        self.assertTrue(entry.response["status"])
+
+    def test_calls_are_recorded_with_the_generated_reference(self):
+        self.transactions.fund_transfer(**TRANSFER_KWARGS)
+        (entry,) = self.outbox.entries()
+        self.assertIn(entry.request_reference, self.simulator.transfers)
+
+    def test_other_calls_are_not_recorded(self):
+        self.transactions.get_banks()
+        self.assertEqual(self.outbox.entries(), [])
+
+    def test_rejected_calls_are_marked_rejected(self):
+        self.transactions.fund_transfer(**{**TRANSFER_KWARGS, "amount": 10**9})
+        (entry,) = self.outbox.entries()
+        self.assertEqual(entry.status, OutboxStatus.REJECTED)
+
+    def test_server_errors_leave_the_entry_pending(self):
+        self.transactions.warmup()
+        self.simulator.error_rate = 1
+        self.transactions.fund_transfer(**TRANSFER_KWARGS)
+        self.assertEqual(len(self.outbox.pending()), 1)
+
+    def test_calls_with_a_recorded_reference_are_not_made(self):
+        self.outbox.record("ref-1", ServiceType.SINGLE_FUND_TRANSFER, {})
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.transactions.fund_transfer(
+                **TRANSFER_KWARGS, request_reference="ref-1"
+            )
+        self.assertEqual(self.simulator.calls[ServiceType.SINGLE_FUND_TRANSFER], 0)
+
+    def test_entries_survive_a_restart(self):
+        self.fail_after = httpx.ReadTimeout("Timed out")
+        with self.assertRaises(ConnectionException):
+            self.transactions.fund_transfer(
+                **TRANSFER_KWARGS, request_reference="ref-1"
+            )
+        self.outbox.close()
+        self.outbox = Outbox(self.path)
+        (entry,) = self.outbox.pending()
+        self.assertEqual(entry.request_reference, "ref-1")
+
+    def test_purchases_are_recorded_but_not_transfer_instructions(self):
+        self.assertLessEqual(
+            {
+                ServiceType.ADMIN_PURCHASE_BILL,
+                ServiceType.PURCHASE_BILL,
+                ServiceType.ADMIN_BUY_GIFT_CARD,
+                ServiceType.BUY_GIFT_CARD,
+            },
+            MONEY_MOVING_SERVICE_TYPES,
+        )
+        self.assertNotIn(
+            ServiceType.FUND_TRANSFER_INSTRUCTION, MONEY_MOVING_SERVICE_TYPES
+        )
+
+    def test_late_acknowledgements_are_ignored(self):
+        self.outbox.record("ref-1", ServiceType.SINGLE_FUND_TRANSFER, {})
+        self.outbox.close()
+        with self.assertLogs("pykuda2.outbox", "WARNING"):
+            self.outbox.acknowledge("ref-1", SUCCESSFUL)
+        self.outbox = Outbox(self.path)
+        self.addCleanup(self.outbox.close)
+        (entry,) = self.outbox.pending()
+        self.assertEqual(entry.request_reference, "ref-1")
+
+    def test_concurrent_records_are_all_written(self):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(
+                executor.map(
+                    lambda index: self.outbox.record(
+                        f"ref-{index}", ServiceType.FUND_VIRTUAL_ACCOUNT, {}
+                    ),
+                    range(200),
+                )
+            )
+        self.assertEqual(len(self.outbox.pending()), 200)
+
+    def test_recovery_reconciles_calls_that_reached_kuda(self):
+        self.fail_after = httpx.ReadTimeout("Timed out")
+        with self.assertRaises(ConnectionException):
+            self.transactions.fund_transfer(
+                **TRANSFER_KWARGS, request_reference="ref-1"
+            )
+        self.fail_after = None
+        reconciled = OutboxRecovery(self.outbox, self.transactions).reconcile(
+            older_than=0
+        )
+        self.assertEqual(reconciled, {OutboxStatus.SUCCESSFUL: 1})
+        self.assertEqual(self.outbox.pending(), [])
+
+    def test_recovery_marks_calls_that_never_reached_kuda_not_found(self):
+        self.fail_before = httpx.ConnectError("Unreachable")
+        with self.assertRaises(ConnectionException):
+            self.transactions.fund_transfer(
+                **TRANSFER_KWARGS, request_reference="ref-1"
+            )
+        self.fail_before = None
+        OutboxRecovery(self.outbox, self.transactions).reconcile(older_than=0)
+        (entry,) = self.outbox.entries()
+        self.assertEqual(entry.status, OutboxStatus.NOT_FOUND)
+
+    def test_recovery_leaves_entries_pending_when_the_query_fails(self):
+        recovery = OutboxRecovery(self.outbox, self.transactions)
+        self.outbox.record("ref-1", ServiceType.SINGLE_FUND_TRANSFER, {})
+        for reply in (
+            (400, {"status": False, "message": "Invalid request"}),
+            (401, {"status": False, "message": "Unauthorized"}),
+            (429, {"status": False, "message": "Too many requests"}),
+            (404, {"status": False, "message": "Not found"}),
+            (500, {"status": False, "message": "Transaction not found"}),
+            (200, {"status": False, "message": "Service temporarily unavailable"}),
+        ):
+            with self.subTest(reply=reply):
+                self.reply = reply
+                self.assertEqual(recovery.reconcile(older_than=0), {})
+                (entry,) = self.outbox.entries()
+                self.assertEqual(entry.status, OutboxStatus.PENDING)
+
+    def test_recovery_marks_entries_kuda_has_no_record_of_not_found(self):
+        self.outbox.record("ref-1", ServiceType.SINGLE_FUND_TRANSFER, {})
+        self.reply = (200, {"status": False, "message": "Transaction not found"})
+        reconciled = OutboxRecovery(self.outbox, self.transactions).reconcile(
+            older_than=0
+        )
+        self.assertEqual(reconciled, {OutboxStatus.NOT_FOUND: 1})
+
+    def test_recovery_reconciles_purchases(self):
+        self.outbox.record("bill", ServiceType.ADMIN_PURCHASE_BILL, {})
+        self.outbox.record(
+            "gift-card", ServiceType.ADMIN_BUY_GIFT_CARD, GIFT_CARD_PAYLOAD
+        )
+        billing_and_betting = Mock()
+        billing_and_betting.get_bill_purchase_status.return_value = SUCCESSFUL
+        gift_cards = Mock()
+        gift_cards.get_gift_card_status.return_value = SUCCESSFUL
+        reconciled = OutboxRecovery(
+            self.outbox, self.transactions, billing_and_betting, gift_cards
+        ).reconcile(older_than=0)
+        self.assertEqual(reconciled, {OutboxStatus.SUCCESSFUL: 2})
+        billing_and_betting.get_bill_purchase_status.assert_called_once_with(
+            bill_request_ref="bill", bill_response_reference=None
+        )
+        # Gift card purchases are looked up by their details.
+        gift_cards.get_gift_card_status.assert_called_once_with(
+            tracking_reference=None,
+            amount=5000,
+            customer_name="John Doe",
+            customer_mobile="09012345678",
+            customer_email="johndoe@example.com",
+            biller_identifier="KUD-GFTC-UAE-002",
+            note=None,
+        )
+
+    def test_recovery_leaves_purchases_pending_without_their_wrapper(self):
+        self.outbox.record("bill", ServiceType.ADMIN_PURCHASE_BILL, {})
+        self.outbox.record("gift-card", ServiceType.BUY_GIFT_CARD, GIFT_CARD_PAYLOAD)
+        recovery = OutboxRecovery(self.outbox, self.transactions)
+        self.assertEqual(recovery.reconcile(older_than=0), {})
+        self.assertEqual(len(self.outbox.pending()), 2)
+
+    def test_recovery_leaves_recent_entries_alone(self):
+        self.outbox.record("ref-1", ServiceType.SINGLE_FUND_TRANSFER, {})
+        recovery = OutboxRecovery(self.outbox, self.transactions)
+        self.assertEqual(recovery.reconcile(older_than=60), {})
+        self.assertEqual(len(self.outbox.pending()), 1)
+
+    def test_recovery_leaves_unsettled_transfers_pending(self):
+        self.simulator.settle_after = 1
+        self.fail_after = httpx.ReadTimeout("Timed out")
+        with self.assertRaises(ConnectionException):
+            self.transactions.fund_transfer(**TRANSFER_KWARGS)
+        self.fail_after = None
+        recovery = OutboxRecovery(self.outbox, self.transactions)
+        self.assertEqual(recovery.reconcile(older_than=0), {})
+        self.assertEqual(len(self.outbox.pending()), 1)
+        self.assertEqual(recovery.reconcile(older_than=0), {OutboxStatus.SUCCESSFUL: 1})
+
+
+class AsyncOutboxTestCase(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.outbox = Outbox(os.path.join(directory.name, "outbox.db"))
+        self.addCleanup(self.outbox.close)
+        self.simulator = KudaSimulator()
+        self.transactions = AsyncTransaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+            outbox=self.outbox,
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.transactions.aclose()
+
+    async def test_money_moving_calls_are_recorded_and_acknowledged(self):
+        response = await self.transactions.fund_transfer(
+            **TRANSFER_KWARGS, request_reference="ref-1"
+        )
+        self.assertTrue(response.status)
+        (entry,) = self.outbox.entries()
+        self.assertEqual(entry.status, OutboxStatus.ACKNOWLEDGED)
+
+    async def test_recovery_reconciles_pending_entries(self):
+        await self.transactions.fund_transfer(
+            **TRANSFER_KWARGS, request_reference="ref-1"
+        )
+        self.outbox.record("ref-2", ServiceType.SINGLE_FUND_TRANSFER, {})
+        self.outbox.update("ref-1", OutboxStatus.PENDING)
+        reconciled = await AsyncOutboxRecovery(
+            self.outbox, self.transactions
+        ).reconcile(older_than=0)
+        self.assertEqual(
+            reconciled, {OutboxStatus.SUCCESSFUL: 1, OutboxStatus.NOT_FOUND: 1}
+        )
+
+    async def test_recovery_reconciles_gift_card_purchases(self):
+        self.outbox.record("gift-card", ServiceType.BUY_GIFT_CARD, GIFT_CARD_PAYLOAD)
+        gift_cards = Mock()
+        gift_cards.get_gift_card_status = AsyncMock(return_value=SUCCESSFUL)
+        reconciled = await AsyncOutboxRecovery(
+            self.outbox, self.transactions, gift_cards=gift_cards
+        ).reconcile(older_than=0)
+        self.assertEqual(reconciled, {OutboxStatus.SUCCESSFUL: 1})
+        gift_cards.get_gift_card_status.assert_awaited_once()
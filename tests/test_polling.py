@@ -0,0 +1,318 @@
+import asyncio
+import time
+from concurrent.futures import CancelledError
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, Mock, patch
+
+from pykuda2.concurrency import RateLimiter
+from pykuda2.exceptions import ConnectionException, PollingTimeoutException
+from pykuda2.polling import (
+    AsyncPendingPurchase,
+    AsyncPoller,
+    AsyncTransactionStatusPoller,
+    Backoff,
+    PendingPurchase,
+    Poller,
+    TransactionStatusPoller,
+    get_transaction_status,
+)
+from pykuda2.utils import APIResponse, ServiceType, TransactionStatus
+from pykuda2.wrappers.async_wrappers.gift_card import AsyncGiftCard
+from pykuda2.wrappers.sync_wrappers.billing_and_betting import BillingAndBetting
+
+
+def status_response(status: str) -> APIResponse:
+    return APIResponse(
+        status_code=200,
+        status=True,
+        message="Request successful.",
+        data={"Status": status},
+        raw={"status": True, "data": {"Status": status}},
+    )
+
+
+FAST_BACKOFF = Backoff(initial=0.001, factor=2, maximum=0.01, jitter=0)
+
+
+class BackoffTestCase(TestCase):
+    def test_delay_grows_exponentially_up_to_maximum(self):
+        backoff = Backoff(initial=1, factor=2, maximum=5, jitter=0)
+        self.assertEqual(
+            [backoff.delay(attempt) for attempt in range(5)], [1, 2, 4, 5, 5]
+        )
+
+    def test_delay_does_not_overflow(self):
+        self.assertEqual(Backoff(maximum=60, jitter=0).delay(10_000), 60)
+
+
+class RateLimiterTestCase(TestCase):
+    def test_burst_is_not_delayed(self):
+        limiter = RateLimiter(rate=1000, burst=5)
+        self.assertEqual([limiter._reserve() for _ in range(5)], [0.0] * 5)
+
+    def test_calls_beyond_burst_wait(self):
+        limiter = RateLimiter(rate=10, burst=1)
+        limiter._reserve()
+        self.assertGreater(limiter._reserve(), 0)
+
+
+class TransactionStatusTestCase(TestCase):
+    def test_get_transaction_status(self):
+        self.assertEqual(
+            get_transaction_status(status_response("successful")),
+            TransactionStatus.SUCCESSFUL,
+        )
+        self.assertIsNone(get_transaction_status(status_response("unknown")))
+
+
+class TransactionStatusPollerTestCase(TestCase):
+    def test_polls_until_transfer_is_final(self):
+        transactions = Mock()
+        transactions.get_status.side_effect = [
+            status_response("Pending"),
+            ConnectionException(),
+            status_response("Processing"),
+            status_response("Successful"),
+        ]
+        callback = Mock()
+        with TransactionStatusPoller(transactions, backoff=FAST_BACKOFF) as poller:
+            future = poller.watch_transfer("123456", callback=callback)
+            response = future.result(timeout=5)
+        self.assertEqual(get_transaction_status(response), TransactionStatus.SUCCESSFUL)
+        self.assertEqual(transactions.get_status.call_count, 4)
+        transactions.get_status.assert_called_with(
+            is_third_party_bank_transfer=True, transaction_request_reference="123456"
+        )
+        callback.assert_called_once_with(response)
+        # Only the poll that failed is reported as a retry.
+        transactions.instrumentation.retry.assert_called_once_with(
+            ServiceType.TRANSACTION_STATUS_QUERY,
+            transactions.instrumentation.capture_context.return_value,
+        )
+
+    def test_transfers_stuck_pending_time_out(self):
+        transactions = Mock()
+        transactions.get_status.return_value = status_response("Pending")
+        with TransactionStatusPoller(transactions, backoff=FAST_BACKOFF) as poller:
+            future = poller.watch_transfer("123456", timeout=0.05)
+            with self.assertRaises(PollingTimeoutException):
+                future.result(timeout=5)
+        transactions.instrumentation.retry.assert_not_called()
+
+    def test_watches_many_transfers(self):
+        transactions = Mock()
+        transactions.get_status.side_effect = lambda **kwargs: status_response(
+            "Failed"
+        )
+        with TransactionStatusPoller(
+            transactions, backoff=FAST_BACKOFF, batch_size=10
+        ) as poller:
+            futures = [poller.watch_transfer(str(ref)) for ref in range(100)]
+            results = [future.result(timeout=5) for future in futures]
+        self.assertEqual(len(results), 100)
+        self.assertEqual(transactions.get_status.call_count, 100)
+
+    def test_non_transient_errors_are_set_on_the_future(self):
+        poller = Poller(backoff=FAST_BACKOFF)
+        future = poller.watch(check=Mock(side_effect=KeyError("boom")), is_final=bool)
+        with self.assertRaises(KeyError):
+            future.result(timeout=5)
+        poller.stop()
+
+    def test_is_final_errors_are_set_on_the_future(self):
+        with Poller(backoff=FAST_BACKOFF) as poller:
+            future = poller.watch(
+                check=Mock(return_value={}), is_final=Mock(side_effect=KeyError("boom"))
+            )
+            with self.assertRaises(KeyError):
+                future.result(timeout=5)
+            # The polling thread survives it.
+            future = poller.watch(check=Mock(return_value=True), is_final=bool)
+            self.assertTrue(future.result(timeout=5))
+
+    def test_stop_cancels_pending_items(self):
+        poller = Poller(backoff=Backoff(initial=60, jitter=0))
+        future = poller.watch(check=Mock(), is_final=bool)
+        poller.stop()
+        with self.assertRaises(CancelledError):
+            future.result(timeout=5)
+
+    def test_stop_cancels_the_rest_of_the_batch(self):
+        poller = Poller(backoff=FAST_BACKOFF, batch_size=10)
+
+        def slow_check():
+            time.sleep(0.1)
+            return True
+
+        check = Mock(side_effect=slow_check)
+        futures = [poller.watch(check=check, is_final=bool, delay=0) for _ in range(5)]
+        time.sleep(0.05)
+        poller.stop()
+        self.assertTrue(futures[-1].cancelled())
+        self.assertLess(check.call_count, 5)
+
+    def test_timeout_is_set_on_the_future(self):
+        with Poller(backoff=FAST_BACKOFF) as poller:
+            future = poller.watch(
+                check=Mock(return_value=False), is_final=bool, timeout=0.05
+            )
+            with self.assertRaises(PollingTimeoutException):
+                future.result(timeout=5)
+
+    def test_rate_limiter_is_applied(self):
+        rate_limiter = RateLimiter(rate=50, burst=1)
+        started_at = time.monotonic()
+        with Poller(backoff=FAST_BACKOFF, rate_limiter=rate_limiter) as poller:
+            futures = [
+                poller.watch(check=Mock(return_value=True), is_final=bool)
+                for _ in range(6)
+            ]
+            [future.result(timeout=5) for future in futures]
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.09)
+
+
+class AsyncTransactionStatusPollerTestCase(IsolatedAsyncioTestCase):
+    async def test_polls_until_transfer_is_final(self):
+        transactions = Mock()
+        transactions.get_status = AsyncMock(
+            side_effect=[
+                status_response("Pending"),
+                ConnectionException(),
+                status_response("Successful"),
+            ]
+        )
+        callback = AsyncMock()
+        async with AsyncTransactionStatusPoller(
+            transactions, backoff=FAST_BACKOFF
+        ) as poller:
+            response = await asyncio.wait_for(
+                poller.watch_transfer("123456", callback=callback), timeout=5
+            )
+        self.assertEqual(get_transaction_status(response), TransactionStatus.SUCCESSFUL)
+        self.assertEqual(transactions.get_status.await_count, 3)
+        callback.assert_awaited_once_with(response)
+
+    async def test_watches_many_transfers_concurrently(self):
+        transactions = Mock()
+        transactions.get_status = AsyncMock(return_value=status_response("Failed"))
+        async with AsyncTransactionStatusPoller(
+            transactions, backoff=FAST_BACKOFF
+        ) as poller:
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    *(poller.watch_transfer(str(ref)) for ref in range(200))
+                ),
+                timeout=5,
+            )
+        self.assertEqual(len(results), 200)
+
+    async def test_is_final_errors_are_set_on_the_future(self):
+        async with AsyncPoller(backoff=FAST_BACKOFF) as poller:
+            future = poller.watch(
+                check=AsyncMock(return_value={}),
+                is_final=Mock(side_effect=KeyError("boom")),
+            )
+            with self.assertRaises(KeyError):
+                await asyncio.wait_for(future, timeout=5)
+
+    async def test_stop_cancels_items_being_polled(self):
+        async def slow_check():
+            await asyncio.sleep(60)
+
+        poller = AsyncPoller(backoff=FAST_BACKOFF)
+        future = poller.watch(check=slow_check, is_final=bool, delay=0)
+        await asyncio.sleep(0.05)
+        await poller.stop()
+        self.assertTrue(future.cancelled())
+
+    async def test_stop_cancels_pending_items(self):
+        poller = AsyncTransactionStatusPoller(
+            Mock(), backoff=Backoff(initial=60, jitter=0)
+        )
+        future = poller.watch_transfer("123456")
+        await poller.stop()
+        self.assertTrue(future.cancelled())
+
+
+class PendingPurchaseTestCase(TestCase):
+    def test_purchase_bill_can_be_waited_for(self):
+        wrapper = BillingAndBetting(email="", api_key="")
+        wrapper.poller = Poller(backoff=FAST_BACKOFF)
+        with patch.object(
+            wrapper,
+            "_api_call",
+            side_effect=[
+                status_response("Pending"),
+                status_response("Processing"),
+                status_response("Successful"),
+            ],
+        ) as api_call:
+            purchase = wrapper.purchase_bill(
+                amount=100,
+                bill_item_identifier="KDA-VTU-MTN",
+                customer_identifier="08012345678",
+                request_reference="1234567890",
+            )
+            self.assertIsInstance(purchase, PendingPurchase)
+            response = purchase.wait(timeout=5)
+        wrapper.poller.stop()
+        self.assertEqual(get_transaction_status(response), TransactionStatus.SUCCESSFUL)
+        self.assertEqual(
+            api_call.call_args.kwargs["data"],
+            {"BillResponseReference": None, "BillRequestRef": "1234567890"},
+        )
+
+    def test_rejected_purchase_resolves_immediately(self):
+        purchase = PendingPurchase.from_response(
+            APIResponse(
+                status_code=400, status=False, message="", data=None, raw={}
+            ),
+            check=Mock(),
+        )
+        self.assertIs(purchase.wait(), purchase)
+        purchase.check.assert_not_called()
+
+    def test_wait_times_out(self):
+        purchase = PendingPurchase.from_response(
+            status_response("Pending"),
+            check=Mock(return_value=status_response("Pending")),
+            poller=Poller(backoff=FAST_BACKOFF),
+        )
+        with self.assertRaises(PollingTimeoutException):
+            purchase.wait(timeout=0.05)
+        purchase.poller.stop()
+
+
+class AsyncPendingPurchaseTestCase(IsolatedAsyncioTestCase):
+    async def test_many_purchases_share_one_poller(self):
+        wrapper = AsyncGiftCard(email="", api_key="")
+        wrapper.poller = AsyncPoller(backoff=FAST_BACKOFF)
+        responses = {}
+
+        async def api_call(service_type, data, request_reference, **kwargs):
+            count = responses.get(request_reference, 0)
+            responses[request_reference] = count + 1
+            return status_response("Successful" if count >= 2 else "Pending")
+
+        with patch.object(wrapper, "_api_call", side_effect=api_call):
+            purchases = [
+                await wrapper.purchase_gift_card(
+                    amount=5000,
+                    customer_name="John Doe",
+                    customer_mobile="09012345678",
+                    customer_email="johndoe@example.com",
+                    biller_identifier="KUD-GFTC-UAE-002",
+                )
+                for _ in range(20)
+            ]
+            self.assertIsInstance(purchases[0], AsyncPendingPurchase)
+            results = await asyncio.gather(
+                *(purchase.wait(timeout=5) for purchase in purchases)
+            )
+        await wrapper.poller.stop()
+        self.assertTrue(
+            all(
+                get_transaction_status(result) == TransactionStatus.SUCCESSFUL
+                for result in results
+            )
+        )
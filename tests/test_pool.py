@@ -0,0 +1,90 @@
+from collections import Counter
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.pool import AsyncKudaPool, KudaPool
+from pykuda2.simulator import KudaSimulator
+
+
+class PoolTestMixin:
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.token_requests: Counter = Counter()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/Account/GetToken"):
+            self.token_requests[request.content] += 1
+        return self.simulator.handle(request)
+
+
+class KudaPoolTestCase(PoolTestMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pool = KudaPool(max_size=2, transport=httpx.MockTransport(self.handle))
+        self.addCleanup(self.pool.close)
+
+    def test_wrappers_are_cached_per_credentials(self):
+        kuda = self.pool.get("a@example.com", "key-a")
+        self.assertIs(self.pool.get("a@example.com", "key-a"), kuda)
+        self.assertIsNot(self.pool.get("a@example.com", "key-b"), kuda)
+        self.assertEqual(list(self.token_requests.values()), [1, 1])
+
+    def test_wrappers_share_the_pool_client(self):
+        kuda = self.pool.get("a@example.com", "key-a")
+        other = self.pool.get("b@example.com", "key-b")
+        self.assertIs(kuda.transactions._client, other.accounts._client)
+        self.assertTrue(kuda.accounts.get_admin_account_balance().status)
+        self.assertEqual(sum(self.token_requests.values()), 2)
+
+    def test_least_recently_used_wrappers_are_evicted(self):
+        a = self.pool.get("a@example.com", "key-a")
+        self.pool.get("b@example.com", "key-b")
+        self.pool.get("a@example.com", "key-a")
+        self.pool.get("c@example.com", "key-c")
+        self.assertEqual(len(self.pool), 2)
+        self.assertIs(self.pool.get("a@example.com", "key-a"), a)
+        self.pool.get("b@example.com", "key-b")
+        self.assertEqual(sum(self.token_requests.values()), 4)
+
+    def test_evicted_wrappers_are_recreated(self):
+        kuda = self.pool.get("a@example.com", "key-a")
+        self.pool.evict("a@example.com", "key-a")
+        self.assertIsNot(self.pool.get("a@example.com", "key-a"), kuda)
+
+    def test_provided_client_is_left_open(self):
+        client = httpx.Client(transport=httpx.MockTransport(self.handle))
+        self.addCleanup(client.close)
+        with KudaPool(client=client) as pool:
+            pool.get("a@example.com", "key-a")
+        self.assertFalse(client.is_closed)
+
+    def test_client_cant_be_provided_with_a_transport(self):
+        with self.assertRaises(ValueError):
+            KudaPool(client=httpx.Client(), transport=httpx.MockTransport(self.handle))
+
+
+class AsyncKudaPoolTestCase(PoolTestMixin, IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pool = AsyncKudaPool(
+            max_size=2, transport=httpx.MockTransport(self.handle)
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.pool.aclose()
+
+    async def test_wrappers_are_cached_per_credentials(self):
+        kuda = await self.pool.get("a@example.com", "key-a")
+        self.assertIs(await self.pool.get("a@example.com", "key-a"), kuda)
+        response = await kuda.accounts.get_admin_account_balance()
+        self.assertTrue(response.status)
+        self.assertEqual(sum(self.token_requests.values()), 1)
+
+    async def test_least_recently_used_wrappers_are_evicted(self):
+        a = await self.pool.get("a@example.com", "key-a")
+        await self.pool.get("b@example.com", "key-b")
+        await self.pool.get("a@example.com", "key-a")
+        await self.pool.get("c@example.com", "key-c")
+        self.assertEqual(len(self.pool), 2)
+        self.assertIs(await self.pool.get("a@example.com", "key-a"), a)
@@ -0,0 +1,251 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+
+from pykuda2.concurrency import RateLimiter, bounded_map, bounded_map_async
+from pykuda2.provisioning import (
+    AsyncVirtualAccountProvisioner,
+    ProvisioningCheckpoint,
+    VirtualAccountProvisioner,
+    read_virtual_accounts_csv,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.async_wrappers.accounts import AsyncAccount
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+
+
+def make_rows(count: int, start: int = 0):
+    for index in range(start, start + count):
+        yield {
+            "email": f"customer-{index}@example.com",
+            "phone_number": "08012345678",
+            "last_name": "Doe",
+            "first_name": "John",
+            "middle_name": "",
+            "business_name": "",
+            "tracking_reference": f"ref-{index}",
+        }
+
+
+class BoundedMapTestCase(TestCase):
+    def test_calls_are_bounded(self):
+        in_flight = []
+        lock = threading.Lock()
+        counter = [0]
+
+        def function(item):
+            with lock:
+                counter[0] += 1
+                in_flight.append(counter[0])
+            time.sleep(0.005)
+            with lock:
+                counter[0] -= 1
+            return item * 2
+
+        results = list(bounded_map(function, range(20), concurrency=4))
+        self.assertEqual(sorted(results), [item * 2 for item in range(20)])
+        self.assertLessEqual(max(in_flight), 4)
+
+    def test_items_are_pulled_lazily(self):
+        pulled = []
+
+        def items():
+            for item in range(1000):
+                pulled.append(item)
+                yield item
+
+        results = bounded_map(lambda item: item, items(), concurrency=2)
+        next(results)
+        results.close()
+        self.assertLess(len(pulled), 10)
+
+
+class BoundedMapAsyncTestCase(IsolatedAsyncioTestCase):
+    async def test_results_are_yielded(self):
+        async def double(item):
+            return item * 2
+
+        results = [result async for result in bounded_map_async(double, range(10), 3)]
+        self.assertEqual(sorted(results), [item * 2 for item in range(10)])
+
+
+class VirtualAccountProvisionerTestCase(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.simulator = KudaSimulator()
+        self.accounts = Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.accounts.close)
+
+    def test_accounts_are_created(self):
+        provisioner = VirtualAccountProvisioner(self.accounts, concurrency=4)
+        results = list(provisioner.provision(make_rows(25)))
+        self.assertEqual(len(results), 25)
+        self.assertTrue(all(result.created for result in results))
+        self.assertEqual(
+            {result.tracking_reference: result.account_number for result in results},
+            {
+                reference: account["accountNumber"]
+                for reference, account in self.simulator.virtual_accounts.items()
+            },
+        )
+
+    def test_rows_can_be_read_from_csv(self):
+        path = os.path.join(self.directory, "accounts.csv")
+        with open(path, "w") as file:
+            file.write("email,phoneNumber,lastName,firstName,trackingReference\n")
+            file.write("a@example.com,08012345678,Doe,John,ref-a\n")
+        (row,) = read_virtual_accounts_csv(path)
+        self.assertEqual(row["tracking_reference"], "ref-a")
+        self.assertNotIn("middle_name", row)
+        provisioner = VirtualAccountProvisioner(self.accounts)
+        (result,) = provisioner.provision(read_virtual_accounts_csv(path))
+        self.assertTrue(result.created)
+        # Missing columns are sent as `None` rather than as empty strings.
+        self.assertIsNone(self.simulator.virtual_accounts["ref-a"]["middleName"])
+
+    def test_rows_without_tracking_reference_are_reported(self):
+        (row,) = make_rows(1)
+        del row["tracking_reference"]
+        rows = [row, {**row, "tracking_reference": ""}, *make_rows(1, start=1)]
+        results = list(VirtualAccountProvisioner(self.accounts).provision(rows))
+        self.assertEqual(
+            sorted((result.tracking_reference, result.created) for result in results),
+            [("", False), ("", False), ("ref-1", True)],
+        )
+        self.assertEqual(
+            [result.message for result in results if not result.created],
+            ["The row has no tracking reference"] * 2,
+        )
+
+    def test_progress_is_checkpointed_and_resumed(self):
+        checkpoint = os.path.join(self.directory, "checkpoint.jsonl")
+        provisioner = VirtualAccountProvisioner(
+            self.accounts, concurrency=2, checkpoint=checkpoint
+        )
+        results = provisioner.provision(make_rows(10))
+        for _ in range(4):
+            next(results)
+        results.close()
+        with open(checkpoint) as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(sum("in_flight" not in record for record in records), 4)
+
+        results = list(provisioner.provision(make_rows(10)))
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result.created for result in results))
+        self.assertEqual(sum(result.from_checkpoint for result in results), 4)
+        self.assertEqual(len(self.simulator.virtual_accounts), 10)
+
+    def test_accounts_created_by_an_interrupted_run_are_looked_up(self):
+        rows = list(make_rows(2))
+        self.accounts.create_virtual_account(**rows[0])
+        checkpoint = os.path.join(self.directory, "checkpoint.jsonl")
+        interrupted = ProvisioningCheckpoint(checkpoint)
+        interrupted.start("ref-0")
+        interrupted.start("ref-1")
+        interrupted.close()
+
+        results = VirtualAccountProvisioner(
+            self.accounts, checkpoint=checkpoint
+        ).provision(rows)
+        self.assertEqual(
+            {result.tracking_reference: result.account_number for result in results},
+            {
+                reference: account["accountNumber"]
+                for reference, account in self.simulator.virtual_accounts.items()
+            },
+        )
+        self.assertEqual(
+            self.simulator.calls[ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT], 2
+        )
+        self.assertEqual(ProvisioningCheckpoint(checkpoint).in_flight, set())
+
+    def test_rejections_are_not_looked_up(self):
+        (row,) = make_rows(1)
+        self.accounts.create_virtual_account(**row)
+        (result,) = VirtualAccountProvisioner(self.accounts).provision([row])
+        self.assertFalse(result.created)
+        self.assertIn("already exists", result.message)
+        self.assertEqual(
+            self.simulator.calls[ServiceType.ADMIN_RETRIEVE_SINGLE_VIRTUAL_ACCOUNT], 0
+        )
+
+    def test_accounts_whose_creation_timed_out_are_looked_up(self):
+        def handle(request):
+            response = self.simulator.handle(request)
+            if b"ADMIN_CREATE_VIRTUAL_ACCOUNT" in request.content:
+                raise httpx.ReadTimeout("Timed out", request=request)
+            return response
+
+        accounts = Account(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(handle),
+        )
+        self.addCleanup(accounts.close)
+        (result,) = VirtualAccountProvisioner(accounts).provision(make_rows(1))
+        self.assertEqual(
+            result.account_number,
+            self.simulator.virtual_accounts["ref-0"]["accountNumber"],
+        )
+
+    def test_failures_are_reported(self):
+        self.accounts.warmup()
+        self.simulator.error_rate = 1
+        with patch.object(
+            self.accounts,
+            "get_virtual_account",
+            wraps=self.accounts.get_virtual_account,
+        ) as get_virtual_account:
+            (result,) = VirtualAccountProvisioner(self.accounts).provision(make_rows(1))
+        self.assertFalse(result.created)
+        self.assertEqual(result.message, "Simulated server error")
+        # The account was looked up, since a server error may come after its creation.
+        get_virtual_account.assert_called_once_with(tracking_reference="ref-0")
+
+    def test_creations_are_rate_limited(self):
+        provisioner = VirtualAccountProvisioner(
+            self.accounts, rate_limiter=RateLimiter(rate=1000, burst=1)
+        )
+        list(provisioner.provision(make_rows(5)))
+        self.assertEqual(
+            self.simulator.calls[ServiceType.ADMIN_CREATE_VIRTUAL_ACCOUNT], 5
+        )
+
+
+class AsyncVirtualAccountProvisionerTestCase(IsolatedAsyncioTestCase):
+    async def test_accounts_are_created_and_checkpointed(self):
+        simulator = KudaSimulator()
+        accounts = AsyncAccount(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "checkpoint.jsonl")
+            provisioner = AsyncVirtualAccountProvisioner(
+                accounts, concurrency=4, checkpoint=checkpoint
+            )
+            results = [result async for result in provisioner.provision(make_rows(12))]
+            with open(checkpoint) as file:
+                lines = [json.loads(line) for line in file]
+        await accounts.aclose()
+        self.assertTrue(all(result.created for result in results))
+        self.assertEqual(sum("in_flight" in line for line in lines), 12)
+        self.assertEqual(
+            sum(line.get("account_number") is not None for line in lines), 12
+        )
+        self.assertEqual(len(simulator.virtual_accounts), 12)
@@ -0,0 +1,85 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+import httpx
+
+from pykuda2.recipients import (
+    AsyncRecipientVerifier,
+    RecipientVerifier,
+    name_match_score,
+)
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.async_wrappers.transaction import AsyncTransaction
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+
+def make_row(account_number: str, name: str = ""):
+    return {"account_number": account_number, "bank_code": "000013", "name": name}
+
+
+class NameMatchScoreTestCase(TestCase):
+    def test_case_punctuation_and_order_are_ignored(self):
+        self.assertEqual(name_match_score("DOE, John", "john doe"), 1)
+        self.assertLess(name_match_score("Jane Smith", "John Doe"), 0.5)
+
+
+class RecipientVerifierTestCase(TestCase):
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator()
+        self.transactions = Transaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.simulator.handle),
+        )
+        self.addCleanup(self.transactions.close)
+        self.verifier = RecipientVerifier(self.transactions, concurrency=4)
+
+    def test_recipients_are_looked_up_once(self):
+        rows = [make_row("0000000001") for _ in range(3)] + [make_row("0000000002")]
+        results = list(self.verifier.verify(rows))
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.matched for result in results))
+        self.assertEqual(self.simulator.calls[ServiceType.NAME_ENQUIRY], 2)
+
+        list(self.verifier.verify(rows))
+        self.assertEqual(self.simulator.calls[ServiceType.NAME_ENQUIRY], 2)
+
+    def test_names_are_matched(self):
+        matching = make_row("0000000001", name="beneficiary SIMULATED 0000000001")
+        mismatching = make_row("0000000001", name="Jane Smith")
+        results = {
+            result.row["name"]: result
+            for result in self.verifier.verify([matching, mismatching])
+        }
+        self.assertTrue(results[matching["name"]].matched)
+        self.assertEqual(results[matching["name"]].score, 1)
+        self.assertFalse(results["Jane Smith"].matched)
+        self.assertEqual(
+            results["Jane Smith"].account_name, "Simulated Beneficiary 0000000001"
+        )
+
+    def test_failures_are_reported_and_not_cached(self):
+        self.transactions.warmup()
+        self.simulator.error_rate = 1
+        (result,) = self.verifier.verify([make_row("0000000001")])
+        self.assertFalse(result.matched)
+        self.assertIsNone(result.account_name)
+        self.assertEqual(result.message, "Simulated server error")
+        self.assertEqual(self.verifier.cache, {})
+
+
+class AsyncRecipientVerifierTestCase(IsolatedAsyncioTestCase):
+    async def test_recipients_are_verified(self):
+        simulator = KudaSimulator()
+        transactions = AsyncTransaction(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(simulator.handle),
+        )
+        verifier = AsyncRecipientVerifier(transactions, concurrency=4)
+        rows = [make_row(f"000000000{index % 3}") for index in range(9)]
+        results = [result async for result in verifier.verify(rows)]
+        await transactions.aclose()
+        self.assertEqual(len(results), 9)
+        self.assertTrue(all(result.matched for result in results))
+        self.assertEqual(simulator.calls[ServiceType.NAME_ENQUIRY], 3)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+import httpx
+
+from pykuda2.base import BaseAPIWrapper
+from pykuda2.exceptions import DuplicateReferenceException
+from pykuda2.references import (
+    DedupingReferenceGenerator,
+    NumericReferenceGenerator,
+    ReferenceGenerator,
+    UlidReferenceGenerator,
+    get_default_reference_generator,
+    set_default_reference_generator,
+)
+from pykuda2.kuda import Kuda
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType, generate_number
+from pykuda2.wrappers.sync_wrappers.instant_settlement_service import (
+    InstantSettlementService,
+)
+
+
+class GenerateNumberTestCase(TestCase):
+    def test_number_has_the_requested_length(self):
+        self.assertTrue(all(len(str(generate_number(10))) == 10 for _ in range(1000)))
+
+
+class ReferenceGeneratorTestCase(TestCase):
+    def test_generators_must_implement_call(self):
+        class Incomplete(ReferenceGenerator):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class NumericReferenceGeneratorTestCase(TestCase):
+    def test_leading_zeros_are_kept(self):
+        generator = NumericReferenceGenerator(length=4)
+        with patch("secrets.randbelow", return_value=42):
+            self.assertEqual(generator(), "0042")
+
+
+class UlidReferenceGeneratorTestCase(TestCase):
+    def test_references_are_strictly_increasing(self):
+        generator = UlidReferenceGenerator(clock=lambda: 1_700_000_000.0)
+        references = [generator() for _ in range(1000)]
+        self.assertEqual(references, sorted(set(references)))
+        self.assertTrue(all(len(reference) == 26 for reference in references))
+
+    def test_references_are_increasing_when_the_clock_goes_backwards(self):
+        times = iter([2.0, 1.0])
+        generator = UlidReferenceGenerator(clock=lambda: next(times))
+        first, second = generator(), generator()
+        self.assertLess(first, second)
+
+    def test_references_are_unique_across_threads(self):
+        generator = UlidReferenceGenerator()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            references = list(executor.map(lambda _: generator(), range(10_000)))
+        self.assertEqual(len(set(references)), 10_000)
+
+    def test_node_id_is_prefixed(self):
+        self.assertTrue(UlidReferenceGenerator(node_id="web1")().startswith("web1"))
+        with self.assertRaises(ValueError):
+            UlidReferenceGenerator(node_id="web-1")
+
+
+class DedupingReferenceGeneratorTestCase(TestCase):
+    def test_duplicates_are_regenerated(self):
+        generator = DedupingReferenceGenerator(generator=iter(["1", "1", "2"]).__next__)
+        self.assertEqual([generator(), generator()], ["1", "2"])
+        generator.close()
+
+    def test_references_are_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "references.db")
+            first = DedupingReferenceGenerator(generator=lambda: "1", path=path)
+            self.assertEqual(first(), "1")
+            first.close()
+            second = DedupingReferenceGenerator(
+                generator=lambda: "1", path=path, max_attempts=3
+            )
+            with self.assertRaises(DuplicateReferenceException):
+                second()
+            self.assertEqual(second.prune(older_than=-1), 1)
+            second.close()
+
+
+class WrapperReferenceTestCase(TestCase):
+    def test_wrapper_uses_its_generator(self):
+        wrapper = BaseAPIWrapper(email="", api_key="")
+        wrapper.reference_generator = lambda: "custom-reference"
+        kwargs = wrapper._parse_call_kwargs(
+            service_type=ServiceType.BANK_LIST, exclude_auth_header=True
+        )
+        self.assertEqual(kwargs["json"]["requestref"], "custom-reference")
+
+    def test_generator_is_given_to_every_wrapper(self):
+        generator = NumericReferenceGenerator(length=12)
+        with Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(KudaSimulator().handle),
+            reference_generator=generator,
+        ) as kuda:
+            for wrapper in (kuda, *kuda._wrappers):
+                self.assertIs(wrapper.reference_generator, generator)
+        service = InstantSettlementService(
+            secret_key="", client_password="", reference_generator=generator
+        )
+        self.assertIs(service.reference_generator, generator)
+
+    def test_provided_references_are_registered(self):
+        generator = DedupingReferenceGenerator(
+            generator=iter(["ref-1", "ref-2"]).__next__
+        )
+        self.addCleanup(generator.close)
+        with Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(KudaSimulator().handle),
+            reference_generator=generator,
+        ) as kuda:
+            kuda.transactions.get_banks(request_reference="ref-1")
+        # The reference the caller provided is never generated.
+        self.assertEqual(generator(), "ref-2")
+
+    def test_default_generator_can_be_replaced(self):
+        default = get_default_reference_generator()
+        self.addCleanup(set_default_reference_generator, default)
+        set_default_reference_generator(NumericReferenceGenerator(length=12))
+        reference = BaseAPIWrapper(email="", api_key="")._generate_request_reference()
+        self.assertEqual(len(reference), 12)
@@ -0,0 +1,213 @@
+import os
+import tempfile
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+from pykuda2.exceptions import PaginationException
+from pykuda2.resumable import (
+    PaginationCheckpoint,
+    checkpoint_key,
+    iter_resumable,
+    iter_resumable_async,
+    iter_settlement_transactions,
+    iter_transaction_logs,
+    iter_transaction_logs_async,
+    page_records,
+)
+from pykuda2.utils import APIResponse
+
+RECORDS = [{"reference": f"LOG-{index:03d}"} for index in range(23)]
+
+
+def page(page_number: int, page_size: int, failing_pages=()) -> APIResponse:
+    if page_number in failing_pages:
+        return APIResponse(
+            status_code=500, status=False, message="Unavailable", data=None, raw={}
+        )
+    items = RECORDS[(page_number - 1) * page_size : page_number * page_size]
+    return APIResponse(
+        status_code=200,
+        status=True,
+        message="Completed Successfully",
+        data={"transactions": items, "totalCount": len(RECORDS)},
+        raw={},
+    )
+
+
+class FakeTransaction:
+    def __init__(self, failing_pages=()):
+        self.failing_pages = set(failing_pages)
+        self.calls = []
+
+    def get_transaction_logs(self, page_size, page_number, **filters):
+        self.calls.append((page_number, filters))
+        return page(page_number, page_size, self.failing_pages)
+
+
+class AsyncFakeTransaction(FakeTransaction):
+    async def get_transaction_logs(self, page_size, page_number, **filters):
+        return super().get_transaction_logs(page_size, page_number, **filters)
+
+
+class FakeSettlementService:
+    def transactions(self, terminal_id, from_, to, page_size, page_number):
+        return page(page_number, page_size)
+
+
+class CheckpointTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoints.db")
+        self.checkpoint = PaginationCheckpoint(self.path)
+        self.addCleanup(self.checkpoint.close)
+
+
+class PaginationCheckpointTestCase(CheckpointTestCase):
+    def test_positions_are_persisted(self):
+        self.assertEqual(self.checkpoint.load("walk"), (1, 0, False))
+        self.checkpoint.save("walk", 3, 4, False)
+        with PaginationCheckpoint(self.path) as checkpoint:
+            self.assertEqual(checkpoint.load("walk"), (3, 4, False))
+            checkpoint.reset("walk")
+        self.assertEqual(self.checkpoint.load("walk"), (1, 0, False))
+
+    def test_keys_ignore_the_order_of_filters(self):
+        self.assertEqual(
+            checkpoint_key("logs", start_date="2023-01-01", end_date="2023-01-31"),
+            checkpoint_key("logs", end_date="2023-01-31", start_date="2023-01-01"),
+        )
+        self.assertNotEqual(
+            checkpoint_key("logs", start_date="2023-01-01"),
+            checkpoint_key("logs", start_date="2023-01-02"),
+        )
+
+    def test_page_records(self):
+        self.assertEqual(page(1, 5).data["transactions"], page_records(page(1, 5)))
+        response = APIResponse(
+            status_code=200, status=True, message="", data=RECORDS, raw={}
+        )
+        self.assertEqual(page_records(response), RECORDS)
+
+
+class IterResumableTestCase(CheckpointTestCase):
+    def test_every_record_is_iterated_over(self):
+        records = list(
+            iter_resumable(lambda n: page(n, 5), self.checkpoint, "walk", page_size=5)
+        )
+        self.assertEqual(records, RECORDS)
+        self.assertEqual(self.checkpoint.load("walk"), (6, 0, True))
+        # A completed walk doesn't fetch anything again.
+        self.assertEqual(
+            list(iter_resumable(self.fail, self.checkpoint, "walk", page_size=5)), []
+        )
+
+    def fail(self, page_number):
+        raise AssertionError("No page should be fetched")
+
+    def test_interrupted_walks_resume_without_duplicates(self):
+        walk = iter_resumable(lambda n: page(n, 5), self.checkpoint, "walk", 5)
+        emitted = [next(walk) for _ in range(7)]
+        walk.close()
+
+        # The process restarts with a new connection to the same database.
+        with PaginationCheckpoint(self.path) as checkpoint:
+            emitted += list(iter_resumable(lambda n: page(n, 5), checkpoint, "walk", 5))
+        self.assertEqual(emitted, RECORDS)
+
+    def test_failed_pages_raise_and_keep_the_checkpoint(self):
+        walk = iter_resumable(
+            lambda n: page(n, 5, failing_pages={3}), self.checkpoint, "walk", 5
+        )
+        emitted = []
+        with self.assertRaises(PaginationException):
+            for record in walk:
+                emitted.append(record)
+        self.assertEqual(emitted, RECORDS[:10])
+        self.assertEqual(self.checkpoint.load("walk"), (3, 0, False))
+
+        emitted += iter_resumable(lambda n: page(n, 5), self.checkpoint, "walk", 5)
+        self.assertEqual(emitted, RECORDS)
+
+    def test_transaction_logs(self):
+        transactions = FakeTransaction(failing_pages={2})
+        with self.assertRaises(PaginationException):
+            list(
+                iter_transaction_logs(
+                    transactions,
+                    self.checkpoint,
+                    "2023-01-01",
+                    "2023-01-31",
+                    page_size=10,
+                )
+            )
+        transactions.failing_pages.clear()
+        records = list(
+            iter_transaction_logs(
+                transactions, self.checkpoint, "2023-01-01", "2023-01-31", page_size=10
+            )
+        )
+        self.assertEqual(records, RECORDS[10:])
+        self.assertEqual([call[0] for call in transactions.calls], [1, 2, 2, 3])
+        self.assertEqual(transactions.calls[0][1]["start_date"], "2023-01-01")
+        self.assertTrue(transactions.calls[0][1]["has_transaction_date_range_filter"])
+
+        # Other filters are walked over from the start.
+        records = list(
+            iter_transaction_logs(
+                transactions, self.checkpoint, "2023-02-01", "2023-02-28", page_size=10
+            )
+        )
+        self.assertEqual(records, RECORDS)
+
+    def test_settlement_transactions(self):
+        records = list(
+            iter_settlement_transactions(
+                FakeSettlementService(),
+                self.checkpoint,
+                "TERMINAL",
+                "2023-01-01",
+                "2023-01-31",
+                page_size=4,
+            )
+        )
+        self.assertEqual(records, RECORDS)
+
+
+class AsyncIterResumableTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = PaginationCheckpoint(
+            os.path.join(directory.name, "checkpoints.db")
+        )
+        self.addCleanup(self.checkpoint.close)
+
+    async def test_interrupted_walks_resume_without_duplicates(self):
+        async def fetch_page(page_number):
+            return page(page_number, 5)
+
+        emitted = []
+        async for record in iter_resumable_async(
+            fetch_page, self.checkpoint, "walk", 5
+        ):
+            emitted.append(record)
+            if len(emitted) == 12:
+                break
+        async for record in iter_resumable_async(
+            fetch_page, self.checkpoint, "walk", 5
+        ):
+            emitted.append(record)
+        self.assertEqual(emitted, RECORDS)
+
+    async def test_transaction_logs(self):
+        records = [
+            record
+            async for record in iter_transaction_logs_async(
+                AsyncFakeTransaction(),
+                self.checkpoint,
+                "2023-01-01",
+                "2023-01-31",
+                page_size=10,
+            )
+        ]
+        self.assertEqual(records, RECORDS)
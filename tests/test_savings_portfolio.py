@@ -0,0 +1,284 @@
+import threading
+import time
+from decimal import Decimal
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+from pykuda2.exceptions import ConnectionException
+from pykuda2.savings_portfolio import (
+    AsyncSavingsAggregator,
+    SavingsAggregator,
+    SavingsPlan,
+    SavingsProduct,
+)
+from pykuda2.utils import APIResponse, TransactionType
+
+PLANS = {
+    SavingsProduct.PLAIN: [
+        {"trackingReference": "PLAIN-1", "name": "Rent", "amount": "1500.50"}
+    ],
+    SavingsProduct.FLEXIBLE: [
+        {
+            "savingsTrackingReference": "FLEX-1",
+            "name": "Holiday",
+            "balance": 300,
+            "interestRate": 10,
+            "status": "Active",
+        }
+    ],
+    SavingsProduct.FIXED: [
+        {
+            "SavingsId": "FIXED-1",
+            "Name": "Car",
+            "Amount": 5000,
+            "MaturityDate": "2024-01-01",
+        },
+        {"SavingsId": "FIXED-2", "Name": "School", "Amount": 200},
+    ],
+}
+
+
+def response(data, status=True) -> APIResponse:
+    return APIResponse(
+        status_code=200,
+        status=status,
+        message="Completed Successfully" if status else "Service unavailable",
+        data=data,
+        raw={},
+    )
+
+
+class FakeSavings:
+    """Answers every call after `delay` seconds, recording how many are in flight."""
+
+    def __init__(self, delay: float = 0.05, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, name, data):
+        with self._lock:
+            self.calls.append(name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if name in self.failing:
+            return response(None, status=False)
+        return response(data)
+
+    def get_plain_savings_accounts(self, tracking_reference):
+        return self._answer("plain", PLANS[SavingsProduct.PLAIN])
+
+    def get_open_flexible_savings_accounts(
+        self, tracking_reference, primary_account_number
+    ):
+        return self._answer("flexible", {"savings": PLANS[SavingsProduct.FLEXIBLE]})
+
+    def get_fixed_savings_accounts(self, tracking_reference):
+        return self._answer("fixed", PLANS[SavingsProduct.FIXED])
+
+    def _transactions(self, tracking_reference, page_size, page_number):
+        return self._answer(
+            tracking_reference,
+            {"transactions": [{"reference": f"{tracking_reference}-TX"}]},
+        )
+
+    get_plain_savings_account_transactions = _transactions
+    get_flexible_savings_account_transactions = _transactions
+    get_fixed_savings_account_transactions = _transactions
+
+    def credit_or_debit_plain_savings_account(self, **kwargs):
+        with self._lock:
+            self.calls.append("credit_or_debit")
+        return response(None)
+
+
+class AsyncFakeSavings(FakeSavings):
+    async def get_plain_savings_accounts(self, tracking_reference):
+        return super().get_plain_savings_accounts(tracking_reference)
+
+    async def get_open_flexible_savings_accounts(
+        self, tracking_reference, primary_account_number
+    ):
+        return super().get_open_flexible_savings_accounts(
+            tracking_reference, primary_account_number
+        )
+
+    async def get_fixed_savings_accounts(self, tracking_reference):
+        return super().get_fixed_savings_accounts(tracking_reference)
+
+
+class SavingsPlanTestCase(TestCase):
+    def test_products_are_normalized(self):
+        plan = SavingsPlan.from_data(
+            SavingsProduct.FIXED, PLANS[SavingsProduct.FIXED][0]
+        )
+        self.assertEqual(plan.tracking_reference, "FIXED-1")
+        self.assertEqual(plan.name, "Car")
+        self.assertEqual(plan.balance, Decimal(5000))
+        self.assertEqual(plan.maturity_date, "2024-01-01")
+        self.assertIsNone(plan.interest_rate)
+
+        plan = SavingsPlan.from_data(
+            SavingsProduct.PLAIN, PLANS[SavingsProduct.PLAIN][0]
+        )
+        self.assertEqual(plan.balance, Decimal("1500.50"))
+
+    def test_balances_are_exact(self):
+        plan = SavingsPlan.from_data(
+            SavingsProduct.PLAIN, {"amount": 0.1, "interestRate": "n/a"}
+        )
+        self.assertEqual(plan.balance, Decimal("0.1"))
+        self.assertIsNone(plan.interest_rate)
+        plan = SavingsPlan.from_data(SavingsProduct.PLAIN, {"amount": "NaN"})
+        self.assertEqual(plan.balance, Decimal(0))
+
+
+class SavingsAggregatorTestCase(TestCase):
+    def test_products_are_retrieved_concurrently(self):
+        savings = FakeSavings(delay=0.1)
+        started = time.monotonic()
+        portfolio = SavingsAggregator(savings).portfolio("CUSTOMER", "0123456789")
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(savings.max_in_flight, 3)
+
+        self.assertTrue(portfolio.complete)
+        self.assertEqual(
+            [plan.tracking_reference for plan in portfolio.plans],
+            ["PLAIN-1", "FLEX-1", "FIXED-1", "FIXED-2"],
+        )
+        self.assertEqual(portfolio.total_balance, Decimal("7000.5"))
+        self.assertEqual(len(portfolio.by_product(SavingsProduct.FIXED)), 2)
+        self.assertEqual(portfolio.transactions, {})
+
+    def test_transactions_of_every_plan(self):
+        savings = FakeSavings(delay=0)
+        portfolio = SavingsAggregator(savings, include_transactions=True).portfolio(
+            "CUSTOMER", "0123456789"
+        )
+        self.assertEqual(
+            portfolio.transactions["FIXED-2"], [{"reference": "FIXED-2-TX"}]
+        )
+        self.assertEqual(len(portfolio.transactions), 4)
+
+    def test_failures_are_recorded_and_not_cached(self):
+        savings = FakeSavings(delay=0, failing={"flexible"})
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+        portfolio = aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertFalse(portfolio.complete)
+        self.assertEqual(portfolio.errors, {"flexible": "Service unavailable"})
+        self.assertEqual(len(portfolio.plans), 3)
+
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertEqual(savings.calls.count("plain"), 2)
+
+    def test_portfolios_are_cached_until_a_plan_changes(self):
+        savings = FakeSavings(delay=0)
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+        portfolio = aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertIs(aggregator.portfolio("CUSTOMER", "0123456789"), portfolio)
+        self.assertEqual(savings.calls.count("plain"), 1)
+
+        aggregator.credit_or_debit_plain_savings_account(
+            amount=100,
+            narration="Top up",
+            transaction_type=TransactionType.CREDIT,
+            tracking_reference="PLAIN-1",
+        )
+        self.assertIsNot(aggregator.portfolio("CUSTOMER", "0123456789"), portfolio)
+        self.assertEqual(savings.calls.count("plain"), 2)
+
+        aggregator.invalidate("CUSTOMER")
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        aggregator.portfolio("CUSTOMER", "0123456789", refresh=True)
+        self.assertEqual(savings.calls.count("plain"), 4)
+
+    def test_portfolios_are_invalidated_when_a_change_fails(self):
+        class TimingOutSavings(FakeSavings):
+            def credit_or_debit_plain_savings_account(self, **kwargs):
+                raise ConnectionException("Server refused to respond")
+
+        savings = TimingOutSavings(delay=0)
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+        portfolio = aggregator.portfolio("CUSTOMER", "0123456789")
+        # The credit may have been applied before the call timed out.
+        with self.assertRaises(ConnectionException):
+            aggregator.credit_or_debit_plain_savings_account(
+                amount=100,
+                narration="Top up",
+                transaction_type=TransactionType.CREDIT,
+                tracking_reference="PLAIN-1",
+            )
+        self.assertIsNot(aggregator.portfolio("CUSTOMER", "0123456789"), portfolio)
+
+    def test_portfolios_changed_while_retrieved_are_not_cached(self):
+        savings = FakeSavings(delay=0.2)
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+
+        def credit_while_retrieving(refresh):
+            retrieval = threading.Thread(
+                target=aggregator.portfolio,
+                args=("CUSTOMER", "0123456789", refresh),
+            )
+            retrieval.start()
+            time.sleep(0.05)
+            aggregator.credit_or_debit_plain_savings_account(
+                amount=100,
+                narration="Top up",
+                transaction_type=TransactionType.CREDIT,
+                tracking_reference="PLAIN-1",
+            )
+            retrieval.join()
+
+        # Neither a plan that isn't cached yet nor one of a cached portfolio.
+        credit_while_retrieving(refresh=False)
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        credit_while_retrieving(refresh=True)
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertEqual(savings.calls.count("plain"), 4)
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertEqual(savings.calls.count("plain"), 4)
+
+    def test_forgotten_portfolios_forget_their_plans(self):
+        savings = FakeSavings(delay=0)
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        aggregator.invalidate("CUSTOMER")
+        self.assertEqual(aggregator._cache._customers, {})
+
+        aggregator.portfolio("CUSTOMER", "0123456789")
+        aggregator.portfolio("OTHER", "9876543210")
+        self.assertEqual(aggregator._cache._customers["PLAIN-1"], {"CUSTOMER", "OTHER"})
+        aggregator._cache._portfolios["CUSTOMER"].fetched_at -= 61
+        self.assertIsNone(aggregator._cache.get("CUSTOMER"))
+        self.assertEqual(aggregator._cache._customers["PLAIN-1"], {"OTHER"})
+        aggregator.invalidate("OTHER")
+        self.assertEqual(aggregator._cache._customers, {})
+
+    def test_portfolios_expire(self):
+        savings = FakeSavings(delay=0)
+        aggregator = SavingsAggregator(savings, cache_ttl=60)
+        portfolio = aggregator.portfolio("CUSTOMER", "0123456789")
+        portfolio.fetched_at -= 61
+        self.assertIsNot(aggregator.portfolio("CUSTOMER", "0123456789"), portfolio)
+
+
+class AsyncSavingsAggregatorTestCase(IsolatedAsyncioTestCase):
+    async def test_portfolio(self):
+        savings = AsyncFakeSavings(delay=0)
+        aggregator = AsyncSavingsAggregator(savings, cache_ttl=60)
+        portfolio = await aggregator.portfolio("CUSTOMER", "0123456789")
+        self.assertEqual(
+            [plan.product for plan in portfolio.plans],
+            [
+                SavingsProduct.PLAIN,
+                SavingsProduct.FLEXIBLE,
+                SavingsProduct.FIXED,
+                SavingsProduct.FIXED,
+            ],
+        )
+        self.assertIs(await aggregator.portfolio("CUSTOMER", "0123456789"), portfolio)
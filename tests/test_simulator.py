@@ -0,0 +1,150 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+from httpx import codes as HTTP_STATUS_CODE
+
+from pykuda2.simulator import KudaSimulator
+from pykuda2.utils import ServiceType
+from pykuda2.wrappers.sync_wrappers.accounts import Account
+from pykuda2.wrappers.sync_wrappers.transaction import Transaction
+
+BASE_URL = "https://kuda-openapi-uat.kudabank.com/v2.1"
+
+
+class SimulatedAPICallTestCase(TestCase):
+    """Routes the module level `httpx.post` used by the wrappers to a `KudaSimulator`."""
+
+    simulator_kwargs: dict = {}
+
+    def setUp(self) -> None:
+        self.simulator = KudaSimulator(**self.simulator_kwargs)
+        self.client = httpx.Client(transport=httpx.MockTransport(self.simulator.handle))
+        patcher = patch("httpx.post", side_effect=self.client.post)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.client.close)
+
+
+class KudaSimulatorTestCase(SimulatedAPICallTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.accounts = Account(email="test@example.com", api_key="key")
+        self.transactions = Transaction(email="test@example.com", api_key="key")
+
+    def create_virtual_account(self, tracking_reference: str):
+        return self.accounts.create_virtual_account(
+            email=f"{tracking_reference}@example.com",
+            phone_number="08012345678",
+            last_name="Doe",
+            first_name="John",
+            middle_name="",
+            business_name="",
+            tracking_reference=tracking_reference,
+        )
+
+    def test_can_create_and_retrieve_virtual_account(self):
+        response = self.create_virtual_account("ref-1")
+        self.assertTrue(response.status)
+        account_number = response.data["accountNumber"]
+        response = self.accounts.get_virtual_account(tracking_reference="ref-1")
+        self.assertEqual(response.data["account"]["accountNumber"], account_number)
+
+    def test_duplicate_tracking_reference_is_rejected(self):
+        self.create_virtual_account("ref-1")
+        response = self.create_virtual_account("ref-1")
+        self.assertEqual(response.status_code, HTTP_STATUS_CODE.OK)
+        self.assertFalse(response.status)
+
+    def test_virtual_accounts_are_paginated(self):
+        for index in range(25):
+            self.create_virtual_account(f"ref-{index}")
+        pages = [
+            self.accounts.get_virtual_accounts(page_size=10, page_number=page).data
+            for page in (1, 2, 3)
+        ]
+        self.assertEqual([len(page["accounts"]) for page in pages], [10, 10, 5])
+        self.assertEqual(pages[0]["totalCount"], 25)
+
+    def test_balances_move_with_transfers(self):
+        self.create_virtual_account("ref-1")
+        self.transactions.fund_virtual_account(
+            tracking_reference="ref-1", amount=5000, narration="Top up"
+        )
+        self.transactions.withdraw_from_virtual_account(
+            tracking_reference="ref-1", amount=1500, narration="Payout"
+        )
+        balance = self.accounts.get_virtual_account_balance(tracking_reference="ref-1")
+        self.assertEqual(balance.data["availableBalance"], 3500)
+        history = self.transactions.get_virtual_account_transaction_history(
+            tracking_reference="ref-1", page_size=10, page_number=1
+        )
+        self.assertEqual(len(history.data["postingsHistory"]), 2)
+
+    def test_insufficient_funds(self):
+        self.create_virtual_account("ref-1")
+        response = self.transactions.withdraw_from_virtual_account(
+            tracking_reference="ref-1", amount=1, narration="Payout"
+        )
+        self.assertFalse(response.status)
+
+    def test_transfer_status_settles(self):
+        self.simulator.settle_after = 1
+        self.transactions.fund_transfer(
+            beneficiary_account="0123456789",
+            beneficiary_bank_code="000014",
+            beneficiary_name="Jane Doe",
+            amount=100,
+            narration="Test transfer",
+            name_enquiry_session_id="",
+            sender_name="John Doe",
+            request_reference="transfer-1",
+        )
+        statuses = [
+            self.transactions.get_status(
+                is_third_party_bank_transfer=True,
+                transaction_request_reference="transfer-1",
+            ).data["status"]
+            for _ in range(2)
+        ]
+        self.assertEqual(statuses, ["Pending", "Successful"])
+        self.assertEqual(self.simulator.calls[ServiceType.TRANSACTION_STATUS_QUERY], 2)
+
+    def test_requests_without_token_are_rejected(self):
+        response = self.client.post(BASE_URL, json={"servicetype": "BANK_LIST"})
+        self.assertEqual(response.status_code, HTTP_STATUS_CODE.UNAUTHORIZED)
+
+
+class ThrottledKudaSimulatorTestCase(SimulatedAPICallTestCase):
+    simulator_kwargs = {"max_requests_per_second": 1}
+
+    def test_requests_beyond_the_rate_are_throttled(self):
+        status_codes = [
+            self.client.post(f"{BASE_URL}/Account/GetToken", json={}).status_code
+            for _ in range(3)
+        ]
+        self.assertIn(HTTP_STATUS_CODE.TOO_MANY_REQUESTS, status_codes)
+
+
+class FailingKudaSimulatorTestCase(SimulatedAPICallTestCase):
+    simulator_kwargs = {"error_rate": 1.0, "error_status_code": 503}
+
+    def test_errors_are_injected(self):
+        response = self.client.post(f"{BASE_URL}/Account/GetToken", json={})
+        self.assertEqual(response.status_code, HTTP_STATUS_CODE.SERVICE_UNAVAILABLE)
+
+
+class AsyncKudaSimulatorTestCase(IsolatedAsyncioTestCase):
+    async def test_can_be_used_as_an_asgi_application(self):
+        simulator = KudaSimulator(latency=0.001)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=simulator)
+        ) as client:
+            token = await client.post(f"{BASE_URL}/Account/GetToken", json={})
+            response = await client.post(
+                BASE_URL,
+                json={"ServiceType": "BANK_LIST", "RequestRef": "1"},
+                headers={"authorization": f"Bearer {token.text}"},
+            )
+        self.assertEqual(response.status_code, HTTP_STATUS_CODE.OK)
+        self.assertTrue(response.json()["data"]["banks"])
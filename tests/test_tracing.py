@@ -0,0 +1,149 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase, skipIf
+from unittest.mock import Mock
+
+import httpx
+
+from pykuda2.exceptions import ConnectionException
+from pykuda2.instrumentation import Instrumentation
+from pykuda2.kuda import AsyncKuda, Kuda
+from pykuda2.simulator import KudaSimulator
+from pykuda2.polling import Backoff, TransactionStatusPoller
+from pykuda2.utils import APIResponse, ServiceType
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    from pykuda2.tracing import TracingHook
+except ImportError:
+    TracerProvider = None
+
+
+class TracingMixin:
+    def setUp(self) -> None:
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = provider.get_tracer("test")
+        self.instrumentation = Instrumentation([TracingHook(tracer=self.tracer)])
+        self.simulator = KudaSimulator()
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.simulator.handle(request)
+
+    def spans(self) -> dict:
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+
+@skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+class TracingHookTestCase(TracingMixin, TestCase):
+    def test_calls_are_traced_within_the_callers_context(self):
+        kuda = Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.handler),
+            instrumentation=self.instrumentation,
+        )
+        kuda.accounts._saved_token = None
+        with self.tracer.start_as_current_span("payout") as parent:
+            kuda.accounts.get_virtual_account_balance(tracking_reference="missing")
+        kuda.close()
+
+        spans = self.spans()
+        call = spans[f"Kuda {ServiceType.RETRIEVE_VIRTUAL_ACCOUNT_BALANCE.value}"]
+        token = spans["Kuda token"]
+        self.assertEqual(call.parent.span_id, parent.get_span_context().span_id)
+        self.assertEqual(token.parent.span_id, call.context.span_id)
+        self.assertEqual(call.kind, trace.SpanKind.CLIENT)
+        self.assertEqual(call.attributes["http.response.status_code"], 200)
+        self.assertEqual(call.attributes["kuda.status"], "False")
+        self.assertIn("kuda.request_reference", call.attributes)
+        traceparent = self.requests[-1].headers["traceparent"]
+        self.assertIn(format(call.context.trace_id, "032x"), traceparent)
+
+    def test_errors_are_recorded(self):
+        def handler(request):
+            raise httpx.ConnectError("unreachable", request=request)
+
+        kuda = Kuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.handler),
+            instrumentation=self.instrumentation,
+        )
+        kuda.accounts._client = httpx.Client(transport=httpx.MockTransport(handler))
+        with self.assertRaises(Exception):
+            kuda.accounts.get_admin_account_balance()
+        span = self.spans()[
+            f"Kuda {ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value}"
+        ]
+        self.assertEqual(span.status.status_code, trace.StatusCode.ERROR)
+        self.assertEqual(span.events[0].name, "exception")
+
+    def test_events_are_added_to_the_current_span(self):
+        with self.tracer.start_as_current_span("payout"):
+            self.instrumentation.retry(ServiceType.TRANSACTION_STATUS_QUERY)
+            self.instrumentation.event("kuda.coalesced", {"kuda.calls": 3})
+        span = self.spans()["payout"]
+        self.assertEqual(
+            [event.name for event in span.events], ["kuda.retry", "kuda.coalesced"]
+        )
+
+    def test_retries_of_a_poller_are_added_to_the_span_of_the_caller(self):
+        transactions = Mock(instrumentation=self.instrumentation)
+        transactions.get_status.side_effect = [
+            ConnectionException(),
+            APIResponse(
+                status_code=200,
+                status=True,
+                message="",
+                data={"Status": "Successful"},
+                raw={},
+            ),
+        ]
+        backoff = Backoff(initial=0.001, jitter=0)
+        with TransactionStatusPoller(transactions, backoff=backoff) as poller:
+            with self.tracer.start_as_current_span("payout"):
+                poller.watch_transfer("123456").result(timeout=5)
+            with self.tracer.start_as_current_span("unrelated"):
+                pass
+        spans = self.spans()
+        self.assertEqual(
+            [event.name for event in spans["payout"].events], ["kuda.retry"]
+        )
+        self.assertEqual(list(spans["unrelated"].events), [])
+
+
+@skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+class AsyncTracingHookTestCase(TracingMixin, IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_get_their_own_spans(self):
+        async with AsyncKuda(
+            email="test@example.com",
+            api_key="key",
+            transport=httpx.MockTransport(self.handler),
+            instrumentation=self.instrumentation,
+        ) as kuda:
+            with self.tracer.start_as_current_span("payouts") as parent:
+                await asyncio.gather(
+                    *(kuda.accounts.get_admin_account_balance() for _ in range(5))
+                )
+        calls = [
+            span
+            for span in self.exporter.get_finished_spans()
+            if span.name
+            == f"Kuda {ServiceType.ADMIN_RETRIEVE_MAIN_ACCOUNT_BALANCE.value}"
+        ]
+        self.assertEqual(len(calls), 5)
+        self.assertTrue(
+            all(
+                span.parent.span_id == parent.get_span_context().span_id
+                for span in calls
+            )
+        )
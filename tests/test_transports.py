@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase, TestCase, skipIf
+
+import httpx
+
+from pykuda2.base import BaseAPIWrapper
+from pykuda2.transports import (
+    AsyncStreamLimitedTransport,
+    StreamLimitedTransport,
+    build_transport,
+)
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class StreamLimitedTransportTestCase(TestCase):
+    def test_requests_in_flight_are_capped(self):
+        tracker = ConcurrencyTracker()
+
+        def handler(request):
+            tracker.enter()
+            time.sleep(0.01)
+            tracker.exit()
+            return httpx.Response(200, json={"status": True})
+
+        transport = StreamLimitedTransport(httpx.MockTransport(handler), 3)
+        with httpx.Client(transport=transport) as client:
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                responses = list(
+                    executor.map(lambda _: client.get("https://kuda.test"), range(20))
+                )
+        self.assertTrue(all(response.json()["status"] for response in responses))
+        self.assertEqual(tracker.peak, 3)
+
+    @skipIf(h2 is not None, "h2 is installed")
+    def test_falls_back_to_http1_without_h2(self):
+        with self.assertWarns(RuntimeWarning):
+            transport = build_transport()
+        self.assertIsInstance(transport, httpx.HTTPTransport)
+        transport.close()
+
+    @skipIf(h2 is None, "h2 is not installed")
+    def test_http2_transport_is_stream_limited(self):
+        transport = build_transport(max_connections=2, max_concurrent_streams=50)
+        self.assertIsInstance(transport, StreamLimitedTransport)
+        transport.close()
+
+    def test_http2_cannot_be_used_with_a_client(self):
+        with httpx.Client() as client:
+            with self.assertRaises(ValueError):
+                BaseAPIWrapper(email="", api_key="", client=client, http2=True)
+
+
+class AsyncStreamLimitedTransportTestCase(IsolatedAsyncioTestCase):
+    async def test_requests_in_flight_are_capped(self):
+        tracker = ConcurrencyTracker()
+
+        async def handler(request):
+            tracker.enter()
+            await asyncio.sleep(0.01)
+            tracker.exit()
+            return httpx.Response(200, json={"status": True})
+
+        transport = AsyncStreamLimitedTransport(httpx.MockTransport(handler), 5)
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *(client.get("https://kuda.test") for _ in range(50))
+            )
+        self.assertEqual(len(responses), 50)
+        self.assertEqual(tracker.peak, 5)